@@ -14,7 +14,7 @@ sys.path.append(str(Path(__file__).resolve().parents[1]))
 from app.database import Base
 from app.config import settings
 
-from app.models import User, Game, Seed, Bet
+from app.models import User, Game, Seed, Bet, SeedChain, Round, BetRollupHourly, RollupWatermark, LedgerEntry, BalanceSnapshot, UserDirectory, RevokedToken, IdempotencyKey, MerkleBatch, AnomalyAlert, JobLease, JobRun
 
 
 # this is the Alembic Config object, which provides
@@ -0,0 +1,48 @@
+"""rounds
+
+Revision ID: 3b1f7c9e2d40
+Revises: 90d84f3912a9
+Create Date: 2026-10-19 12:21:05.117342
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b1f7c9e2d40'
+down_revision: Union[str, Sequence[str], None] = '90d84f3912a9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('rounds',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('game_id', sa.Integer(), nullable=False),
+    sa.Column('server_seed', sa.String(length=128), nullable=False),
+    sa.Column('server_seed_hash', sa.String(length=64), nullable=False),
+    sa.Column('client_seed', sa.String(length=64), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('opened_at', sa.DateTime(), nullable=False),
+    sa.Column('closes_at', sa.DateTime(), nullable=False),
+    sa.Column('result_number', sa.Float(), nullable=True),
+    sa.Column('bets_count', sa.Integer(), nullable=False),
+    sa.Column('settled_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['game_id'], ['games.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_rounds_game_id'), 'rounds', ['game_id'], unique=False)
+    op.create_index(op.f('ix_rounds_id'), 'rounds', ['id'], unique=False)
+    op.create_index(op.f('ix_rounds_status'), 'rounds', ['status'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_rounds_status'), table_name='rounds')
+    op.drop_index(op.f('ix_rounds_id'), table_name='rounds')
+    op.drop_index(op.f('ix_rounds_game_id'), table_name='rounds')
+    op.drop_table('rounds')
@@ -0,0 +1,42 @@
+"""user directory
+
+Revision ID: 4d18f6a2c7e9
+Revises: e5a0c3d81b62
+Create Date: 2026-10-19 16:03:41.550912
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4d18f6a2c7e9'
+down_revision: Union[str, Sequence[str], None] = 'e5a0c3d81b62'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('user_directory',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('username', sa.String(), nullable=False),
+    sa.Column('email', sa.String(), nullable=False),
+    sa.Column('shard', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('moved_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_user_directory_email'), 'user_directory', ['email'], unique=True)
+    op.create_index(op.f('ix_user_directory_shard'), 'user_directory', ['shard'], unique=False)
+    op.create_index(op.f('ix_user_directory_username'), 'user_directory', ['username'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_user_directory_username'), table_name='user_directory')
+    op.drop_index(op.f('ix_user_directory_shard'), table_name='user_directory')
+    op.drop_index(op.f('ix_user_directory_email'), table_name='user_directory')
+    op.drop_table('user_directory')
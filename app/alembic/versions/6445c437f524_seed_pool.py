@@ -0,0 +1,36 @@
+"""seed pool
+
+Revision ID: 6445c437f524
+Revises: cc2c9dba3e44
+Create Date: 2026-10-19 10:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6445c437f524'
+down_revision: Union[str, Sequence[str], None] = 'cc2c9dba3e44'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('seeds') as batch_op:
+        batch_op.alter_column('user_id', existing_type=sa.Integer(), nullable=True)
+    op.create_index(
+        'ix_seeds_pool', 'seeds', ['id'], unique=False,
+        postgresql_where=sa.text('user_id IS NULL')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_seeds_pool', table_name='seeds', postgresql_where=sa.text('user_id IS NULL'))
+    op.execute('DELETE FROM seeds WHERE user_id IS NULL')
+    with op.batch_alter_table('seeds') as batch_op:
+        batch_op.alter_column('user_id', existing_type=sa.Integer(), nullable=False)
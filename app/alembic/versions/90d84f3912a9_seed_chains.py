@@ -0,0 +1,48 @@
+"""seed chains
+
+Revision ID: 90d84f3912a9
+Revises: 6445c437f524
+Create Date: 2026-10-19 11:02:17.540913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '90d84f3912a9'
+down_revision: Union[str, Sequence[str], None] = '6445c437f524'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('seed_chains',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('path', sa.String(), nullable=False),
+    sa.Column('terminal_hash', sa.String(length=64), nullable=False),
+    sa.Column('length', sa.Integer(), nullable=False),
+    sa.Column('next_index', sa.Integer(), nullable=False),
+    sa.Column('active', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('terminal_hash')
+    )
+    op.create_index(op.f('ix_seed_chains_id'), 'seed_chains', ['id'], unique=False)
+    with op.batch_alter_table('seeds') as batch_op:
+        batch_op.add_column(sa.Column('chain_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('chain_index', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_seeds_chain_id', 'seed_chains', ['chain_id'], ['id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('seeds') as batch_op:
+        batch_op.drop_constraint('fk_seeds_chain_id', type_='foreignkey')
+        batch_op.drop_column('chain_index')
+        batch_op.drop_column('chain_id')
+    op.drop_index(op.f('ix_seed_chains_id'), table_name='seed_chains')
+    op.drop_table('seed_chains')
@@ -0,0 +1,40 @@
+"""merkle batches
+
+Revision ID: a4b9e2d7c315
+Revises: 1c7e9a3f5b28
+Create Date: 2026-10-19 18:31:52.418630
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4b9e2d7c315'
+down_revision: Union[str, Sequence[str], None] = '1c7e9a3f5b28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('merkle_batches',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('first_bet_id', sa.Integer(), nullable=False),
+    sa.Column('last_bet_id', sa.Integer(), nullable=False),
+    sa.Column('bets_count', sa.Integer(), nullable=False),
+    sa.Column('root', sa.String(length=64), nullable=False),
+    sa.Column('bet_ids', sa.LargeBinary(), nullable=False),
+    sa.Column('levels', sa.LargeBinary(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_merkle_batches_last_bet_id'), 'merkle_batches', ['last_bet_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_merkle_batches_last_bet_id'), table_name='merkle_batches')
+    op.drop_table('merkle_batches')
@@ -0,0 +1,38 @@
+"""per player hash chains
+
+Revision ID: a62d4e8c1f37
+Revises: f3a7c2d95b14
+Create Date: 2026-10-20 10:12:04.381552
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a62d4e8c1f37'
+down_revision: Union[str, Sequence[str], None] = 'f3a7c2d95b14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Уже зарегистрированный файл - одна цепочка на весь файл
+    with op.batch_alter_table('seed_chains') as batch_op:
+        batch_op.add_column(sa.Column('segment_length', sa.Integer(), nullable=True))
+    op.execute('UPDATE seed_chains SET segment_length = length')
+    with op.batch_alter_table('seed_chains') as batch_op:
+        batch_op.alter_column('segment_length', nullable=False)
+
+    op.add_column('seeds', sa.Column('chain_segment', sa.Integer(), nullable=True))
+    op.execute('UPDATE seeds SET chain_segment = 0 WHERE chain_id IS NOT NULL')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('seeds', 'chain_segment')
+    with op.batch_alter_table('seed_chains') as batch_op:
+        batch_op.drop_column('segment_length')
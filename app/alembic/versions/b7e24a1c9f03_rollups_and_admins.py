@@ -0,0 +1,52 @@
+"""rollups and admins
+
+Revision ID: b7e24a1c9f03
+Revises: 3b1f7c9e2d40
+Create Date: 2026-10-19 13:40:52.902117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e24a1c9f03'
+down_revision: Union[str, Sequence[str], None] = '3b1f7c9e2d40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('is_admin', sa.Boolean(), nullable=False, server_default=sa.false()))
+    op.create_table('bet_rollups_hourly',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('game_id', sa.Integer(), nullable=False),
+    sa.Column('hour', sa.DateTime(), nullable=False),
+    sa.Column('bets_count', sa.Integer(), nullable=False),
+    sa.Column('wins_count', sa.Integer(), nullable=False),
+    sa.Column('turnover', sa.Float(), nullable=False),
+    sa.Column('payout', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['game_id'], ['games.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('game_id', 'hour', name='uq_bet_rollups_hourly_game_hour')
+    )
+    op.create_index(op.f('ix_bet_rollups_hourly_hour'), 'bet_rollups_hourly', ['hour'], unique=False)
+    op.create_index(op.f('ix_bet_rollups_hourly_id'), 'bet_rollups_hourly', ['id'], unique=False)
+    op.create_table('rollup_watermarks',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('last_bet_id', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('rollup_watermarks')
+    op.drop_index(op.f('ix_bet_rollups_hourly_id'), table_name='bet_rollups_hourly')
+    op.drop_index(op.f('ix_bet_rollups_hourly_hour'), table_name='bet_rollups_hourly')
+    op.drop_table('bet_rollups_hourly')
+    op.drop_column('users', 'is_admin')
@@ -0,0 +1,30 @@
+"""round player seeds
+
+Revision ID: c9e5d2a7b418
+Revises: a62d4e8c1f37
+Create Date: 2026-10-21 09:41:27.615093
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c9e5d2a7b418'
+down_revision: Union[str, Sequence[str], None] = 'a62d4e8c1f37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('rounds') as batch_op:
+        batch_op.add_column(sa.Column('player_seeds', sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('rounds') as batch_op:
+        batch_op.drop_column('player_seeds')
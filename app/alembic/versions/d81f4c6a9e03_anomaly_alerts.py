@@ -0,0 +1,43 @@
+"""anomaly alerts
+
+Revision ID: d81f4c6a9e03
+Revises: a4b9e2d7c315
+Create Date: 2026-10-19 19:02:17.903541
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd81f4c6a9e03'
+down_revision: Union[str, Sequence[str], None] = 'a4b9e2d7c315'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('anomaly_alerts',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('bet_id', sa.Integer(), nullable=True),
+    sa.Column('detector', sa.String(length=20), nullable=False),
+    sa.Column('score', sa.Float(), nullable=False),
+    sa.Column('details', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['bet_id'], ['bets.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_anomaly_alerts_created_at'), 'anomaly_alerts', ['created_at'], unique=False)
+    op.create_index(op.f('ix_anomaly_alerts_user_id'), 'anomaly_alerts', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_anomaly_alerts_user_id'), table_name='anomaly_alerts')
+    op.drop_index(op.f('ix_anomaly_alerts_created_at'), table_name='anomaly_alerts')
+    op.drop_table('anomaly_alerts')
@@ -0,0 +1,231 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+import logging
+
+from app.database import get_db, shard_router
+from app.models.game import Game
+from app.models.job import JobRun
+from app.models.user import User
+from app.schemas.admin import (
+    GameSettings,
+    GameUpdate,
+    JobRunInfo,
+    JobStatus,
+    ProfilingRequest,
+    ProfilingStatus,
+    TracemallocReport
+)
+from app.services.auth import get_current_admin
+from app.services.game_catalog import publish_game_update
+from app.services.profiling import (
+    request_profiler,
+    start_tracemalloc,
+    stop_tracemalloc,
+    tracemalloc_top
+)
+from app.services.scheduler import scheduler
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(
+    prefix="/api/admin",
+    tags=["Admin"]
+)
+
+
+def _profiling_status(token: str = None) -> dict:
+    return {
+        "remaining": request_profiler.remaining,
+        "sample_rate": request_profiler.sample_rate,
+        "path_prefix": request_profiler.path_prefix,
+        "token": token,
+        "directory": request_profiler.directory,
+        "dumps": request_profiler.dumps()
+    }
+
+
+# =========================
+# ПРОФИЛИРОВАНИЕ ЗАПРОСОВ
+# =========================
+
+@router.post("/profiling", response_model=ProfilingStatus)
+def arm_profiling(
+    request: ProfilingRequest,
+    admin: User = Depends(get_current_admin)
+):
+    """
+    Профилировать следующие N запросов воркера
+    
+    - Запросы с заголовком **X-Profile-Token** (токен из ответа) - всегда
+    - Остальные (по path_prefix) - с вероятностью sample_rate
+    
+    Профили пишутся в PROFILING_DIR как folded stacks
+    (flamegraph.pl, speedscope, inferno). Воркер должен быть
+    запущен с PROFILING_ENABLED=true, иначе 400.
+    """
+    try:
+        token = request_profiler.arm(request.requests, request.sample_rate, request.path_prefix)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    logger.warning(f"Profiling armed by {admin.username}")
+    return _profiling_status(token)
+
+
+@router.get("/profiling", response_model=ProfilingStatus)
+def get_profiling(admin: User = Depends(get_current_admin)):
+    """
+    Сколько запросов ещё будет профилировано и список профилей
+    """
+    return _profiling_status()
+
+
+@router.delete("/profiling", response_model=ProfilingStatus)
+def disarm_profiling(admin: User = Depends(get_current_admin)):
+    """
+    Выключить профилирование
+    """
+    request_profiler.disarm()
+    return _profiling_status()
+
+
+# =========================
+# TRACEMALLOC
+# =========================
+
+@router.post("/tracemalloc/start", status_code=status.HTTP_204_NO_CONTENT)
+def tracemalloc_start(
+    frames: int = Query(default=1, ge=1, le=50),
+    admin: User = Depends(get_current_admin)
+):
+    """
+    Включить tracemalloc (пока включён, все выделения памяти медленнее)
+    """
+    start_tracemalloc(frames)
+    logger.warning(f"tracemalloc started by {admin.username}")
+
+
+@router.get("/tracemalloc", response_model=TracemallocReport)
+def tracemalloc_snapshot(
+    top: int = Query(default=20, ge=1, le=500),
+    group_by: str = Query(default="lineno", pattern="^(lineno|filename|traceback)$"),
+    admin: User = Depends(get_current_admin)
+):
+    """
+    Топ мест выделения памяти (снимок также пишется в PROFILING_DIR)
+    """
+    try:
+        return tracemalloc_top(top, group_by)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+@router.post("/tracemalloc/stop", status_code=status.HTTP_204_NO_CONTENT)
+def tracemalloc_stop(admin: User = Depends(get_current_admin)):
+    """
+    Выключить tracemalloc
+    """
+    stop_tracemalloc()
+
+
+# =========================
+# КАТАЛОГ ИГР
+# =========================
+
+def _apply_game_update(db: Session, game_id: int, changes: dict) -> Game | None:
+    game = db.query(Game).filter(Game.id == game_id).first()
+    if game is None:
+        return None
+
+    min_bet = changes.get("min_bet", game.min_bet)
+    max_bet = changes.get("max_bet", game.max_bet)
+    if min_bet > max_bet:
+        raise ValueError("min_bet must not exceed max_bet")
+
+    for name, value in changes.items():
+        setattr(game, name, value)
+    return game
+
+
+@router.patch("/games/{game_id}", response_model=GameSettings)
+def update_game(
+    game_id: int,
+    update: GameUpdate,
+    db: Session = Depends(get_db),
+    admin: User = Depends(get_current_admin)
+):
+    """
+    Изменить настройки игры (лимиты ставок, house edge, правила)
+    
+    С шардированием копия каталога на каждом шарде меняется так же.
+    Кеши каталога во всех воркерах сбрасываются через шину инвалидации.
+    """
+    changes = update.model_dump(exclude_unset=True)
+
+    try:
+        game = _apply_game_update(db, game_id, changes)
+    except ValueError as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    if game is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Game not found"
+        )
+
+    db.commit()
+    db.refresh(game)
+
+    # Копии каталога на шардах (те же ID, проверки уже прошли)
+    for shard in range(len(shard_router)):
+        shard_db = shard_router.session(shard)
+        try:
+            _apply_game_update(shard_db, game_id, changes)
+            shard_db.commit()
+        finally:
+            shard_db.close()
+
+    publish_game_update(game_id)
+
+    logger.warning(f"Game {game_id} updated by {admin.username}: {changes}")
+    return game
+
+
+# =========================
+# ФОНОВЫЕ ЗАДАЧИ
+# =========================
+
+@router.get("/jobs", response_model=list[JobStatus])
+def list_jobs(admin: User = Depends(get_current_admin)):
+    """
+    Задачи планировщика этого воркера: расписание, следующий и последний запуск
+    """
+    return scheduler.status()
+
+
+@router.get("/jobs/runs", response_model=list[JobRunInfo])
+def list_job_runs(
+    job: str | None = Query(default=None, description="Only runs of this job"),
+    status_filter: str | None = Query(default=None, alias="status", pattern="^(ok|error|timeout)$"),
+    limit: int = Query(default=50, ge=1, le=1000),
+    db: Session = Depends(get_db),
+    admin: User = Depends(get_current_admin)
+):
+    """
+    История запусков задач во всех воркерах, новые первыми
+    """
+    query = db.query(JobRun)
+    if job is not None:
+        query = query.filter(JobRun.job == job)
+    if status_filter is not None:
+        query = query.filter(JobRun.status == status_filter)
+    return query.order_by(JobRun.id.desc()).limit(limit).all()
@@ -3,14 +3,23 @@ from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 import logging
 
-from app.database import get_db
+from app.database import get_db, shard_router
 from app.models.user import User
-from app.schemas.user import UserCreate, UserResponse, Token
+from app.schemas.user import UserCreate, UserResponse, UserBanResponse, Token
+from app.services.invalidation import invalidation_bus
+from app.services.ledger import ledger
+from app.services.revocation import revocation_list
+from app.services.sharding import create_sharded_user, open_user_session
 from app.services.auth import (
+    oauth2_scheme,
     get_password_hash,
-    create_access_token,
+    create_user_token,
+    decode_access_token,
     authenticate_user,
-    get_current_user
+    get_current_user,
+    get_current_admin,
+    get_login_db,
+    get_user_db
 )
 
 # Настройка логирования
@@ -37,7 +46,28 @@ def register(
     - Проверяет уникальность username и email
     - Хеширует пароль
     - Создаёт пользователя с начальным балансом 1000
+    - С шардированием: ID и шард выдаёт user_directory основной БД
     """
+    if shard_router.enabled:
+        # Уникальность username и email проверяет справочник
+        try:
+            user = create_sharded_user(db, User(
+                username=user_data.username,
+                email=user_data.email,
+                hashed_password=get_password_hash(user_data.password),
+                balance=1000.0  # Начальный баланс
+            ))
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+        
+        invalidation_bus.publish("users", user.id)
+        logger.info(f"New user registered: {user.username}")
+        
+        return user
+    
     # Проверка существования username
     existing_user = db.query(User).filter(
         User.username == user_data.username
@@ -72,6 +102,7 @@ def register(
     db.commit()
     db.refresh(user)
     
+    invalidation_bus.publish("users", user.id)
     logger.info(f"New user registered: {user.username}")
     
     return user
@@ -79,7 +110,7 @@ def register(
 @router.post("/login", response_model=Token)
 def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_login_db)
 ):
     """
     Логин (получение JWT токена)
@@ -100,8 +131,14 @@ def login(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    if user.is_banned:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="User is banned"
+        )
+    
     # Создание токена
-    access_token = create_access_token(data={"sub": user.username})
+    access_token = create_user_token(user, db)
     
     logger.info(f"User logged in: {user.username}")
     
@@ -110,20 +147,46 @@ def login(
         "token_type": "bearer"
     }
 
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+def logout(
+    token: str = Depends(oauth2_scheme),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Выход: текущий токен отзывается до истечения
+    
+    Остальные воркеры узнают об отзыве при следующем опросе
+    таблицы revoked_tokens (REVOCATION_POLL_INTERVAL_SECONDS).
+    """
+    try:
+        revocation_list.revoke_token(db, decode_access_token(token))
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    logger.info(f"User logged out: {current_user.username}")
+
 @router.get("/me", response_model=UserResponse)
 def get_me(
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_user_db)
 ):
     """
     Получить информацию о текущем пользователе
     
     Требует авторизации (JWT токен)
     """
-    return current_user
+    response = UserResponse.model_validate(current_user)
+    response.balance = ledger.balance(db, current_user.id)
+    return response
 
 @router.get("/test-protected")
 def test_protected(
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_user_db)
 ):
     """
     Тестовый защищённый endpoint
@@ -132,5 +195,68 @@ def test_protected(
     """
     return {
         "message": f"Hello, {current_user.username}!",
-        "balance": current_user.balance
+        "balance": ledger.balance(db, current_user.id)
     }
+
+
+# =========================
+# БАН ПОЛЬЗОВАТЕЛЕЙ (АДМИН)
+# =========================
+
+def _set_banned(db: Session, user_id: int, banned: bool) -> User:
+    user_db = open_user_session(db, user_id)
+    if user_db is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    
+    try:
+        user = user_db.query(User).filter(User.id == user_id).first()
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User not found"
+            )
+        
+        user.is_banned = banned
+        user_db.commit()
+        invalidation_bus.publish("users", user_id)
+        return user
+    finally:
+        if user_db is not db:
+            user_db.close()
+
+@router.post("/users/{user_id}/ban", response_model=UserBanResponse)
+def ban_user(
+    user_id: int,
+    db: Session = Depends(get_db),
+    admin: User = Depends(get_current_admin)
+):
+    """
+    Забанить пользователя
+    
+    - Новые логины запрещены
+    - Все уже выданные токены отзываются (без ожидания их истечения)
+    """
+    _set_banned(db, user_id, True)
+    revocation_list.revoke_user(db, user_id)
+    
+    logger.warning(f"User {user_id} banned by {admin.username}")
+    
+    return {"user_id": user_id, "is_banned": True}
+
+@router.post("/users/{user_id}/unban", response_model=UserBanResponse)
+def unban_user(
+    user_id: int,
+    db: Session = Depends(get_db),
+    admin: User = Depends(get_current_admin)
+):
+    """
+    Снять бан (токены, выданные до бана, остаются отозванными)
+    """
+    _set_banned(db, user_id, False)
+    
+    logger.info(f"User {user_id} unbanned by {admin.username}")
+    
+    return {"user_id": user_id, "is_banned": False}
@@ -0,0 +1,146 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from datetime import datetime
+import logging
+
+from app.models.bet import Bet
+from app.models.merkle_batch import MerkleBatch
+from app.models.user import User
+from app.schemas.bet import BetProofResponse, MerkleBatchInfo
+from app.services.auth import get_current_user, get_user_db
+from app.services.bet_export import EXPORT_FORMATS, export_bets
+from app.services.merkle import batch_proof, bet_leaf, find_bet_batch
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(
+    prefix="/api/bets",
+    tags=["Bets"]
+)
+
+
+# =========================
+# ВЫГРУЗКА СТАВОК
+# =========================
+
+@router.get("/export")
+def export_bet_history(
+    export_format: str = Query(default="csv", alias="format", pattern="^(csv|ndjson)$"),
+    gzip: bool = False,
+    user_id: int | None = None,
+    game_id: int | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    db: Session = Depends(get_user_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Потоковая выгрузка истории ставок (CSV или NDJSON)
+    
+    - Игрок выгружает только свои ставки
+    - Администратор может указать **user_id** любого игрока или выгрузить все
+    - **gzip=true** - сжатие на лету
+    - С шардированием выгрузка идёт с шарда текущего пользователя
+    
+    Память сервера не зависит от размера выгрузки.
+    """
+    if not current_user.is_admin:
+        if user_id is not None and user_id != current_user.id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="You can only export your own bets"
+            )
+        user_id = current_user.id
+    
+    chunks = export_bets(
+        db,
+        export_format=export_format,
+        compress=gzip,
+        user_id=user_id,
+        game_id=game_id,
+        start=start,
+        end=end
+    )
+    
+    filename = f"bets.{export_format}" + (".gz" if gzip else "")
+    media_type = "application/gzip" if gzip else EXPORT_FORMATS[export_format]
+    
+    logger.info(f"User {current_user.username} exported bets: user_id={user_id}, game_id={game_id}")
+    
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+# =========================
+# MERKLE-КОММИТМЕНТЫ
+# =========================
+
+@router.get("/merkle/batches", response_model=list[MerkleBatchInfo])
+def list_merkle_batches(
+    limit: int = Query(default=100, ge=1, le=1000),
+    before_id: int | None = None,
+    db: Session = Depends(get_user_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Опубликованные корни пачек ставок, новые первыми
+    
+    С шардированием - пачки шарда текущего пользователя.
+    """
+    query = db.query(
+        MerkleBatch.id,
+        MerkleBatch.first_bet_id,
+        MerkleBatch.last_bet_id,
+        MerkleBatch.bets_count,
+        MerkleBatch.root,
+        MerkleBatch.created_at
+    )
+    if before_id is not None:
+        query = query.filter(MerkleBatch.id < before_id)
+    
+    return query.order_by(MerkleBatch.id.desc()).limit(limit).all()
+
+
+@router.get("/{bet_id}/proof", response_model=BetProofResponse)
+def get_bet_proof(
+    bet_id: int,
+    db: Session = Depends(get_user_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Доказательство включения ставки в Merkle-пачку
+    
+    Игрок хеширует **leaf** и по шагам **proof** получает **root**,
+    который совпадает с опубликованным корнем пачки. Ставки
+    коммитятся пачками в фоне - свежая ставка получает
+    доказательство через MERKLE_BATCH_MAX_AGE_SECONDS.
+    """
+    bet = db.query(Bet).filter(Bet.id == bet_id).first()
+    
+    if not bet or (bet.user_id != current_user.id and not current_user.is_admin):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Bet not found"
+        )
+    
+    batch = find_bet_batch(db, bet_id)
+    proof = batch_proof(batch, bet_id) if batch else None
+    
+    if proof is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Bet is not committed to a Merkle batch yet"
+        )
+    
+    return {
+        "bet_id": bet_id,
+        "batch_id": batch.id,
+        "root": batch.root,
+        "bets_count": batch.bets_count,
+        "leaf": bet_leaf(bet),
+        **proof
+    }
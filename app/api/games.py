@@ -1,19 +1,38 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, status
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
+import json
 import logging
 
-from app.database import get_db
+from app.database import get_db, shard_router
 from app.models.user import User
 from app.models.game import Game
+from app.models.round import Round
 from app.schemas.game import (
+    GameBetRequest,
+    GameBetResponse,
     NvutiBetRequest,
     NvutiBetResponse,
     SeedInfo,
     SeedRotateRequest,
-    SeedRotateResponse
+    SeedRotateResponse,
+    NvutiVerifyRequest,
+    NvutiVerifyResponse,
+    HashChainInfo,
+    RoundBetRequest,
+    RoundBetResponse,
+    RoundInfo
 )
-from app.services.auth import get_current_user
+from app.services.auth import get_current_user, get_user_db
+from app.services.game_catalog import game_catalog
+from app.services.idempotency import idempotency_cache, request_fingerprint
+from app.services.invalidation import invalidation_bus
 from app.services.nvuti_service import NvutiService
+from app.services.rate_limit import rate_limit
+from app.services.hash_chain import get_active_chain
+from app.services.round_service import round_book
+from app.services.sqlite_writer import sqlite_writer
+from app.utils.wire import WIRE_RESPONSES, wire_body, wire_openapi, wire_response
 
 logger = logging.getLogger(__name__)
 
@@ -23,15 +42,57 @@ router = APIRouter(
 )
 
 
+def _run_nvuti(db: Session, operation):
+    """
+    Выполнить операцию NvutiService
+    
+    В режиме SQLITE_TUNED запись идёт через единственный поток-писатель
+    (пачками в одной транзакции), иначе - в сессии запроса. Эффекты
+    в памяти (лимиты риска, детекторы аномалий) применяются только
+    после commit пачки.
+    """
+    if sqlite_writer.enabled and not shard_router.enabled:
+        services = []
+        
+        def job(writer_db: Session):
+            service = NvutiService(writer_db, autocommit=False)
+            services.append(service)
+            return operation(service)
+        
+        try:
+            result = sqlite_writer.execute(job)
+        except Exception:
+            for service in services:
+                service.finish(committed=False)
+            raise
+        for service in services:
+            service.finish(committed=True)
+        
+        alerts = [alert for service in services for alert in service.alerts]
+        if alerts:
+            # Алерты - отдельной операцией писателя, ответ их не ждёт
+            sqlite_writer.submit(lambda writer_db: writer_db.add_all(alerts))
+        return result
+    return operation(NvutiService(db))
+
+
 # =========================
 # NVUTI ENDPOINTS
 # =========================
 
-@router.post("/nvuti/bet", response_model=NvutiBetResponse)
+@router.post(
+    "/nvuti/bet",
+    response_model=NvutiBetResponse,
+    responses=WIRE_RESPONSES,
+    openapi_extra=wire_openapi(NvutiBetRequest),
+    dependencies=[Depends(rate_limit("nvuti_bet"))]
+)
 def play_nvuti(
-    bet_data: NvutiBetRequest,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    request: Request,
+    bet_data: NvutiBetRequest = Depends(wire_body(NvutiBetRequest)),
+    db: Session = Depends(get_user_db),
+    current_user: User = Depends(get_current_user),
+    idempotency_key: str | None = Header(None, min_length=1, max_length=64)
 ):
     """
     Сыграть в Nvuti (Provably Fair Dice Game)
@@ -52,9 +113,17 @@ def play_nvuti(
     - 90% шанс → 1.06x множитель
     
     **Provably Fair:** Результат можно проверить криптографически
+    
+    Лимит частоты: settings.RATE_LIMIT_RULES["nvuti_bet"] (429 + Retry-After)
+    
+    **Idempotency-Key:** повтор запроса с тем же ключом (например, после
+    таймаута) вернёт ответ первой ставки, не играя заново
+    (заголовок ответа Idempotent-Replayed: true)
+    
+    **Формат:** JSON или MessagePack (Content-Type / Accept: application/msgpack)
     """
-    # Получаем игру Nvuti из БД
-    game = db.query(Game).filter(Game.type == "dice").first()
+    # Получаем игру Nvuti (из кеша каталога воркера)
+    game = game_catalog.by_type(db, NvutiService.GAME_TYPE)
     
     if not game:
         raise HTTPException(
@@ -62,24 +131,64 @@ def play_nvuti(
             detail="Nvuti game not found in database. Run init_db.py first."
         )
     
-    # Создаём сервис и играем
-    service = NvutiService(db)
+    return _place_bet(
+        request, db, current_user, game, bet_data.amount, {"win_chance": bet_data.win_chance}, idempotency_key
+    )
+
+
+def _place_bet(
+    request: Request,
+    db: Session,
+    current_user: User,
+    game,
+    amount: float,
+    params: dict,
+    idempotency_key: str | None
+):
+    """
+    Сыграть ставку: повтор по Idempotency-Key, запись через _run_nvuti
+    
+    Ошибки валидации (ValueError) - 400.
+    """
+    fingerprint = None
     
     try:
-        result = service.play(
-            user_id=current_user.id,
-            game_id=game.id,
-            bet_amount=bet_data.amount,
-            win_chance=bet_data.win_chance
-        )
+        # Повтор уже сыгранной ставки - отдаём сохранённый ответ
+        if idempotency_key is not None:
+            fingerprint = request_fingerprint(game_id=game.id, amount=amount, **params)
+            stored = idempotency_cache.lookup(db, current_user.id, idempotency_key, fingerprint)
+            if stored is not None:
+                return wire_response(request, stored, headers={"Idempotent-Replayed": "true"})
+        
+        # Играем (через поток-писатель в режиме SQLite)
+        try:
+            result = _run_nvuti(db, lambda service: service.play_game(
+                user_id=current_user.id,
+                game_id=game.id,
+                bet_amount=amount,
+                params=params,
+                idempotency_key=idempotency_key
+            ))
+        except IntegrityError:
+            # Одновременный повтор с тем же ключом успел закоммитить ставку первым
+            db.rollback()
+            if idempotency_key is None:
+                raise
+            stored = idempotency_cache.lookup(db, current_user.id, idempotency_key, fingerprint)
+            if stored is None:
+                raise
+            return wire_response(request, stored, headers={"Idempotent-Replayed": "true"})
+        
+        if idempotency_key is not None:
+            idempotency_cache.remember(current_user.id, idempotency_key, fingerprint, result)
         
         logger.info(
-            f"User {current_user.username} played Nvuti: "
-            f"bet={bet_data.amount}, win_chance={bet_data.win_chance}, "
+            f"User {current_user.username} played {game.type}: "
+            f"bet={amount}, params={params}, "
             f"result={result['is_win']}, profit_loss={result['profit_loss']}"
         )
         
-        return result
+        return wire_response(request, result)
     
     except ValueError as e:
         raise HTTPException(
@@ -88,9 +197,10 @@ def play_nvuti(
         )
 
 
-@router.get("/nvuti/seed", response_model=SeedInfo)
+@router.get("/nvuti/seed", response_model=SeedInfo, responses=WIRE_RESPONSES)
 def get_current_seed(
-    db: Session = Depends(get_db),
+    request: Request,
+    db: Session = Depends(get_user_db),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -104,13 +214,13 @@ def get_current_seed(
     Этот endpoint НЕ раскрывает server_seed до смены seed.
     """
     service = NvutiService(db)
-    return service.get_current_seed_info(current_user.id)
+    return wire_response(request, service.get_current_seed_info(current_user.id))
 
 
 @router.post("/nvuti/seed/rotate", response_model=SeedRotateResponse)
 def rotate_seed(
     request: SeedRotateRequest,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_user_db),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -123,22 +233,210 @@ def rotate_seed(
     
     После смены ты можешь верифицировать все игры со старым seed.
     """
-    service = NvutiService(db)
-    
-    result = service.rotate_seed(
+    result = _run_nvuti(db, lambda service: service.rotate_seed(
         user_id=current_user.id,
         new_client_seed=request.new_client_seed
-    )
+    ))
+    
+    # Кеши seed'а игрока в других воркерах
+    invalidation_bus.publish("seeds", current_user.id)
     
     logger.info(f"User {current_user.username} rotated seed")
     
     return result
 
 
+@router.post("/nvuti/verify", response_model=NvutiVerifyResponse)
+def verify_nvuti(
+    request: NvutiVerifyRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Проверить результат игры (Provably Fair)
+    
+    Пересчитывает result_number по раскрытому server_seed и проверяет:
+    - **server_seed_hash**: совпадает ли хеш (обычный режим)
+    - **chain_terminal_hash** + **chain_index**: является ли seed звеном
+      chain_index цепочки игрока с этим терминальным хешем (режим
+      цепочки хешей; 400 - если цепочка не наша)
+    """
+    service = NvutiService(db)
+    
+    try:
+        return service.verify(
+            server_seed=request.server_seed,
+            client_seed=request.client_seed,
+            nonce=request.nonce,
+            server_seed_hash=request.server_seed_hash,
+            chain_terminal_hash=request.chain_terminal_hash,
+            chain_index=request.chain_index
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+@router.get("/nvuti/chain", response_model=HashChainInfo)
+def get_hash_chain(db: Session = Depends(get_db)):
+    """
+    Опубликованный хеш активного файла цепочек
+    
+    Файл - независимые цепочки по segment_length звеньев, одна на
+    игрока. Терминальный хеш цепочки игрока - server_seed_hash его
+    первого seed'а из неё; каждый его seed, захешированный
+    (chain_index + 1) раз, даёт этот хеш.
+    """
+    chain = get_active_chain(db)
+    
+    if not chain:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No active hash chain"
+        )
+    
+    return {
+        "terminal_hash": chain.terminal_hash,
+        "length": chain.length,
+        "segment_length": chain.segment_length,
+        "issued": chain.next_index
+    }
+
+
+# =========================
+# ОБЩИЕ РАУНДЫ NVUTI
+# =========================
+
+@router.post(
+    "/rounds/bet",
+    response_model=RoundBetResponse,
+    responses=WIRE_RESPONSES,
+    openapi_extra=wire_openapi(RoundBetRequest),
+    dependencies=[Depends(rate_limit("round_bet"))]
+)
+def place_round_bet(
+    request: Request,
+    bet_data: RoundBetRequest = Depends(wire_body(RoundBetRequest)),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Поставить на общий бросок текущего раунда
+    
+    Все ставки окна играют на одно число. Результат и выплаты
+    появляются после закрытия окна (см. GET /rounds/{round_id}).
+    
+    - **client_seed**: seed игрока; client seed раунда выводится
+      при закрытии окна из seed'ов всех принятых ставок
+    
+    Формат: JSON или MessagePack, как у /nvuti/bet
+    """
+    # Раунд рассчитывается одной транзакцией в одной БД
+    if shard_router.enabled:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Shared rounds are not available with sharded user data"
+        )
+    
+    game = game_catalog.by_type(db, round_book.GAME_TYPE)
+    
+    if not game:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Round game not found in database. Run init_db.py first."
+        )
+    
+    try:
+        return wire_response(request, round_book.place_bet(
+            db,
+            user=current_user,
+            game=game,
+            bet_amount=bet_data.amount,
+            win_chance=bet_data.win_chance,
+            client_seed=bet_data.client_seed
+        ))
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+@router.get("/rounds/{round_id}", response_model=RoundInfo)
+def get_round(round_id: int, db: Session = Depends(get_db)):
+    """
+    Информация о раунде
+    
+    После закрытия окна публикуются player_seeds и client_seed =
+    SHA-256(JSON [id, player_seeds]), после расчёта раскрывается
+    server_seed: result_number можно пересчитать через /nvuti/verify
+    с nonce = 0.
+    """
+    round_row = db.query(Round).filter(Round.id == round_id).first()
+    
+    if not round_row:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Round not found"
+        )
+    
+    return {
+        "id": round_row.id,
+        "status": round_row.status,
+        "server_seed_hash": round_row.server_seed_hash,
+        "client_seed": round_row.client_seed or None,
+        "player_seeds": json.loads(round_row.player_seeds) if round_row.player_seeds else None,
+        "server_seed": round_row.server_seed if round_row.status != "open" else None,
+        "closes_at": round_row.closes_at,
+        "result_number": round_row.result_number,
+        "bets_count": round_row.bets_count
+    }
+
+
 @router.get("/")
 def list_games(db: Session = Depends(get_db)):
     """
     Список всех доступных игр
     """
     games = db.query(Game).all()
-    return games
\ No newline at end of file
+    return games
+
+
+# Объявлен последним: /rounds/bet и /nvuti/bet должны совпасть раньше
+@router.post(
+    "/{game_id}/bet",
+    response_model=GameBetResponse,
+    responses=WIRE_RESPONSES,
+    openapi_extra=wire_openapi(GameBetRequest),
+    dependencies=[Depends(rate_limit("game_bet"))]
+)
+def play_game(
+    game_id: int,
+    request: Request,
+    bet_data: GameBetRequest = Depends(wire_body(GameBetRequest)),
+    db: Session = Depends(get_user_db),
+    current_user: User = Depends(get_current_user),
+    idempotency_key: str | None = Header(None, min_length=1, max_length=64)
+):
+    """
+    Ставка в любую игру каталога
+    
+    Движок выбирается по Game.type из реестра game_engines: новая
+    игра - новый движок, без правок API.
+    
+    - **amount**: Размер ставки
+    - **params**: Параметры ставки движка: `{"win_chance": 50}` для dice,
+      `{"flips": 3, "heads": true}` для coinflip
+    
+    Idempotency-Key, лимит частоты и формат (JSON / MessagePack) - как у /nvuti/bet
+    """
+    game = game_catalog.get(db, game_id)
+    
+    if not game:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Game not found"
+        )
+    
+    return _place_bet(request, db, current_user, game, bet_data.amount, bet_data.params, idempotency_key)
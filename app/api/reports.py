@@ -0,0 +1,76 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+from datetime import datetime
+
+from app.database import get_db, shard_router
+from app.models.user import User
+from app.schemas.report import RollupReportRow
+from app.services.auth import get_current_admin
+from app.services.rollups import daily_report, hourly_report, merge_reports
+
+router = APIRouter(
+    prefix="/api/reports",
+    tags=["Reports"]
+)
+
+
+def _check_range(start: datetime, end: datetime):
+    if end <= start:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="end must be after start"
+        )
+
+
+def _build_report(build, db: Session, start: datetime, end: datetime, game_id: int | None) -> list[dict]:
+    """
+    Отчёт по основной БД или, с шардированием, сумма отчётов шардов
+    (агрегаты считаются на шарде вместе с его ставками)
+    """
+    if not shard_router.enabled:
+        return build(db, start, end, game_id)
+
+    reports = []
+    for shard in range(len(shard_router)):
+        shard_db = shard_router.session(shard)
+        try:
+            reports.append(build(shard_db, start, end, game_id))
+        finally:
+            shard_db.close()
+    return merge_reports(reports)
+
+
+# =========================
+# ФИНАНСОВЫЕ ОТЧЁТЫ
+# =========================
+
+@router.get("/hourly", response_model=list[RollupReportRow])
+def get_hourly_report(
+    start: datetime,
+    end: datetime,
+    game_id: int | None = Query(default=None),
+    db: Session = Depends(get_db),
+    admin: User = Depends(get_current_admin)
+):
+    """
+    GGR, оборот и RTP по часам за [start, end)
+    
+    Читает только часовые агрегаты, таблица bets не сканируется.
+    """
+    _check_range(start, end)
+    return _build_report(hourly_report, db, start, end, game_id)
+
+
+@router.get("/daily", response_model=list[RollupReportRow])
+def get_daily_report(
+    start: datetime,
+    end: datetime,
+    game_id: int | None = Query(default=None),
+    db: Session = Depends(get_db),
+    admin: User = Depends(get_current_admin)
+):
+    """
+    GGR, оборот и RTP по дням за [start, end)
+    """
+    _check_range(start, end)
+    return _build_report(daily_report, db, start, end, game_id)
@@ -0,0 +1,88 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import sessionmaker
+
+from app.config import settings
+from app.models.bet import Bet
+from app.services.rollups import max_bet_id_before, rebuild_range, set_watermark, truncate_hour
+
+
+def _rebuild_chunk(start: datetime, end: datetime) -> tuple[datetime, int]:
+    # У каждого процесса своё подключение
+    engine = create_engine(settings.DATABASE_URL)
+    db = sessionmaker(bind=engine)()
+    try:
+        return start, rebuild_range(db, start, end)
+    finally:
+        db.close()
+        engine.dispose()
+
+
+def split_range(start: datetime, end: datetime, chunk_hours: int) -> list[tuple[datetime, datetime]]:
+    """
+    Разбить [start, end) на выровненные по часу куски
+    """
+    chunks = []
+    current = truncate_hour(start)
+    step = timedelta(hours=chunk_hours)
+    while current < end:
+        chunks.append((current, min(current + step, end)))
+        current += step
+    return chunks
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Rebuild hourly bet rollups in parallel by time ranges. "
+                    "Stop the background aggregator (ROLLUP_ENABLED=false) while it runs."
+    )
+    parser.add_argument("--start", type=datetime.fromisoformat, help="UTC, default: first bet")
+    parser.add_argument("--end", type=datetime.fromisoformat, help="UTC, default: start of current hour")
+    parser.add_argument("--chunk-hours", type=int, default=24)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument(
+        "--set-watermark",
+        action="store_true",
+        help="Point the incremental aggregator at the last bet before --end"
+    )
+    args = parser.parse_args()
+
+    engine = create_engine(settings.DATABASE_URL)
+    db = sessionmaker(bind=engine)()
+
+    try:
+        start = args.start or db.query(func.min(Bet.timestamp)).scalar()
+        end = truncate_hour(args.end or datetime.utcnow())
+
+        if start is None:
+            print("No bets to backfill")
+            return
+
+        chunks = split_range(start, end, args.chunk_hours)
+        print(f"Rebuilding {start} .. {end} in {len(chunks)} chunk(s) with {args.workers} worker(s)...")
+
+        started = time.perf_counter()
+        total = 0
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            for chunk_start, count in pool.map(_rebuild_chunk, *zip(*chunks)):
+                total += count
+                print(f"   {chunk_start:%Y-%m-%d %H:%M}: {count} bets")
+
+        elapsed = time.perf_counter() - started
+        print(f"✅ {total} bets aggregated in {elapsed:.1f}s")
+
+        if args.set_watermark:
+            last_bet_id = max_bet_id_before(db, end)
+            set_watermark(db, last_bet_id)
+            print(f"✅ Watermark set to bet {last_bet_id}")
+    finally:
+        db.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -5,11 +5,205 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    # Стоимость bcrypt (2^N итераций); тесты ставят минимальную - 4
+    BCRYPT_ROUNDS: int = 12
+
+    # Логирование настраивается при старте воркера (lifespan), не при импорте
+    LOG_LEVEL: str = "INFO"
+    LOG_FILE: str = "app.log"                # Пусто - только консоль
+    # Прогрев перед готовностью воркера: ping БД и шардов, загрузка каталога игр
+    WARMUP_ENABLED: bool = True
+
+    # Как часто воркер подтягивает новые отзывы токенов из БД
+    REVOCATION_POLL_INTERVAL_SECONDS: float = 1.0
+    # Перечитываем отзывы за последние N секунд: строки с меньшим id могут закоммититься позже
+    REVOCATION_SYNC_GRACE_SECONDS: float = 10.0
+
+    # Лимиты частоты запросов (token bucket): rate - запросов в секунду, burst - ёмкость корзины
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_RULES: dict[str, dict[str, float]] = {
+        "nvuti_bet": {"user_rate": 20, "user_burst": 40, "ip_rate": 100, "ip_burst": 200},
+        "round_bet": {"user_rate": 20, "user_burst": 40, "ip_rate": 100, "ip_burst": 200},
+        "game_bet": {"user_rate": 20, "user_burst": 40, "ip_rate": 100, "ip_burst": 200},
+    }
+    RATE_LIMIT_MAX_KEYS: int = 100_000       # Корзин в памяти воркера (LRU)
+    # "memory" - лимит на воркер, "sqlite" - общий файл для всех воркеров хоста
+    RATE_LIMIT_BACKEND: str = "memory"
+    RATE_LIMIT_SQLITE_PATH: str = "./rate_limit.db"
+    RATE_LIMIT_IDLE_SECONDS: float = 600.0   # Неактивные корзины в SQLite удаляются
+
+    # Повторы ставок с заголовком Idempotency-Key
+    IDEMPOTENCY_CACHE_MAX_KEYS: int = 100_000
+    IDEMPOTENCY_KEY_TTL_HOURS: float = 24.0        # Сколько хранить сохранённые ответы
+    IDEMPOTENCY_PURGE_INTERVAL_SECONDS: float = 600.0
+
+    # Шина инвалидации кешей между воркерами:
+    # "local" - один воркер, "postgres" - LISTEN/NOTIFY в DATABASE_URL,
+    # "sqlite" - общий файл, который опрашивают все воркеры хоста
+    INVALIDATION_BACKEND: str = "local"
+    INVALIDATION_CHANNEL: str = "cache_invalidation"
+    INVALIDATION_SQLITE_PATH: str = "./invalidation.db"
+    INVALIDATION_POLL_INTERVAL_MS: float = 50.0
+    INVALIDATION_COALESCE_MS: float = 10.0    # Сколько копим входящие инвалидации перед применением
+
+    # Планировщик фоновых задач (app/services/jobs.py)
+    SCHEDULER_ENABLED: bool = True
+    SCHEDULER_PROCESS_WORKERS: int = 1             # Процессов для тяжёлых задач
+    SCHEDULER_LEASE_GRACE_SECONDS: float = 30.0    # Запас аренды сверх интервала и таймаута
+    SCHEDULER_HISTORY_DAYS: float = 7.0            # Сколько хранить историю запусков
+    SCHEDULER_HISTORY_PURGE_CRON: str = "17 3 * * *"
+
+    # Запись выборки запросов в JSONL для воспроизведения (python -m app.replay_traffic)
+    RECORDER_ENABLED: bool = False
+    RECORDER_DIR: str = "./recordings"
+    RECORDER_SAMPLE_RATE: float = 0.01             # Доля сессий (токенов), записываемых целиком
+    RECORDER_PATH_PREFIXES: list[str] = ["/api/"]
+    RECORDER_MAX_BODY_BYTES: int = 16 * 1024       # Тело больше - не записывается (только размер)
+    RECORDER_MAX_FILE_MB: float = 64.0             # Новый файл, когда текущий больше
+    RECORDER_MAX_FILES: int = 50                   # Старые файлы сверх - удаляются
+    # Идентификаторы в теле и query заменяются псевдонимами (повторы сохраняются)
+    RECORDER_REDACT_FIELDS: list[str] = [
+        "username", "email", "client_seed", "new_client_seed", "server_seed"
+    ]
+    # Секреты не пишутся совсем - вместо значения заглушка
+    RECORDER_SECRET_FIELDS: list[str] = ["password", "token", "access_token", "refresh_token"]
+
+    # Профилирование запросов и снимки tracemalloc (по команде админа).
+    # Выключено - зависимость профилировщика не подключается к маршрутам
+    PROFILING_ENABLED: bool = False
+    PROFILING_DIR: str = "./profiles"
+    PROFILING_SAMPLE_INTERVAL_MS: float = 1.0
+
+    # Пул заранее сгенерированных seed'ов
+    SEED_POOL_ENABLED: bool = True
+    SEED_POOL_TARGET: int = 1000          # До скольки seed'ов доливаем пул
+    SEED_POOL_LOW_WATERMARK: int = 250    # Ниже этого уровня начинаем доливать
+    SEED_POOL_REFILL_BATCH: int = 200     # Сколько seed'ов вставляем за одну транзакцию
+    SEED_POOL_REFILL_INTERVAL_SECONDS: float = 5.0
+
+    # Режим server seed'ов: "random" (случайный seed на пользователя) или "chain" (цепочка хешей)
+    SEED_MODE: str = "random"
+
+    # Общие раунды Nvuti
+    ROUND_WINDOW_SECONDS: float = 10.0
+    ROUND_SETTLE_INTERVAL_SECONDS: float = 0.5
+
+    # Лимиты риска казино (проверяются в памяти, без запросов к БД).
+    # Состояние - своё у каждого воркера: лимит ставок «в полёте» действует
+    # на воркер (с N воркерами - до N x EXPOSURE_MAX_PENDING_PAYOUT), а
+    # ставки других воркеров в лимитах за окно видны только после сверки
+    # (раз в EXPOSURE_RECONCILE_INTERVAL_SECONDS). Между сверками каждый
+    # воркер может добрать лимит за окно целиком. Нужен общий предел -
+    # задавайте значения из расчёта на один воркер (общий / N).
+    EXPOSURE_ENABLED: bool = True
+    EXPOSURE_WINDOW_SECONDS: float = 3600.0
+    EXPOSURE_MAX_BET_PAYOUT: float = 50_000.0       # Максимальный чистый выигрыш одной ставки
+    EXPOSURE_MAX_PENDING_PAYOUT: float = 250_000.0  # Сумма возможных выигрышей ставок «в полёте»
+    EXPOSURE_MAX_HOUSE_LOSS: float = 500_000.0      # Максимальный убыток казино за окно
+    EXPOSURE_MAX_USER_NET_WIN: float = 100_000.0    # Максимальный чистый выигрыш игрока за окно
+    EXPOSURE_MAX_TRACKED_USERS: int = 100_000
+    EXPOSURE_RECONCILE_INTERVAL_SECONDS: float = 300.0
+
+    # Потоковые детекторы аномалий по ставкам игрока (O(1) на ставку, в памяти)
+    ANOMALY_ENABLED: bool = True
+    ANOMALY_MAX_TRACKED_USERS: int = 100_000
+    ANOMALY_IDLE_SECONDS: float = 3600.0              # Состояние неактивного игрока удаляется
+    ANOMALY_ALERT_COOLDOWN_SECONDS: float = 600.0     # Не чаще одного алерта детектора на игрока
+    ANOMALY_STREAK_MAX_PROBABILITY: float = 1e-7      # Серия выигрышей менее вероятна - алерт
+    ANOMALY_EWMA_ALPHA: float = 0.02                  # Вес новой ставки в EWMA доли выигрышей
+    ANOMALY_EWMA_MIN_BETS: int = 100
+    ANOMALY_EWMA_Z: float = 5.0                       # Порог z-оценки превышения доли выигрышей
+    ANOMALY_CUSUM_K: float = 0.25                     # Допуск CUSUM (в стандартных отклонениях)
+    ANOMALY_CUSUM_H: float = 20.0                     # Порог CUSUM
+    ANOMALY_CUSUM_CLIP: float = 4.0                   # Обрезка z одной ставки (редкие крупные выигрыши)
+    ANOMALY_SHARED_SEED_USERS: int = 3                # Один client seed у стольких игроков - алерт
+    ANOMALY_MAX_TRACKED_SEEDS: int = 100_000
+
+    # Часовые агрегаты ставок для отчётов
+    ROLLUP_ENABLED: bool = True
+    ROLLUP_INTERVAL_SECONDS: float = 30.0
+    ROLLUP_BATCH_SIZE: int = 10_000
+    # Не агрегируем ставки моложе этого - их транзакции могут ещё не закоммититься
+    ROLLUP_GRACE_SECONDS: float = 5.0
+
+    # Журнал движений баланса
+    LEDGER_COMPACT_ENABLED: bool = True
+    LEDGER_COMPACT_INTERVAL_SECONDS: float = 60.0
+    # Не сворачиваем движения моложе этого - их транзакции могут ещё не закоммититься
+    LEDGER_COMPACT_GRACE_SECONDS: float = 5.0
+    LEDGER_CACHE_MAX_USERS: int = 100_000
+
+    # Merkle-коммитменты рассчитанных ставок (корень на пачку)
+    MERKLE_ENABLED: bool = True
+    MERKLE_BATCH_SIZE: int = 1024                # Ставок в полной пачке
+    MERKLE_BATCH_MAX_AGE_SECONDS: float = 60.0   # Неполная пачка коммитится, когда старейшая ставка старше
+    MERKLE_INTERVAL_SECONDS: float = 5.0
+    # Не берём ставки моложе этого - их транзакции могут ещё не закоммититься
+    MERKLE_GRACE_SECONDS: float = 5.0
+
+    # Шарды с данными игроков (users, seeds, bets, журнал баланса).
+    # Пусто - всё в DATABASE_URL. В DATABASE_URL остаются каталог игр,
+    # справочник user_directory и общие таблицы.
+    SHARD_DATABASE_URLS: list[str] = []
+
+    # Режим SQLite для небольших инсталляций: WAL, настроенные pragma
+    # и один поток-писатель, который коммитит ставки пачками
+    SQLITE_TUNED: bool = False
+    SQLITE_SYNCHRONOUS: str = "NORMAL"             # В WAL не теряет целостность, fsync только на checkpoint
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024      # Байт файла БД, читаемых через mmap
+    SQLITE_CACHE_SIZE_KB: int = 64 * 1024          # Кеш страниц на соединение
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_WRITER_BATCH_SIZE: int = 200            # Максимум операций в одном коммите
+    SQLITE_WRITER_MAX_DELAY_MS: float = 2.0        # Сколько ждём, добирая пачку
 
     class Config:
         env_file = ".env"
 
-settings = Settings()
+
+
+class LazySettings:
+    """
+    Настройки, которые читаются при первом обращении, а не при импорте
+
+    Модули держат ссылку на этот объект (from app.config import settings).
+    Settings() (env и .env) создаётся при первом чтении атрибута.
+    configure() подставляет готовые настройки до старта, например
+    create_app(Settings(...)) или тесты.
+    """
+
+    def __init__(self):
+        object.__setattr__(self, "_settings", None)
+
+    def configure(self, value: Settings = None) -> Settings:
+        """
+        Подставить настройки (None - перечитать env при следующем обращении)
+        """
+        object.__setattr__(self, "_settings", value)
+        return value
+
+    @property
+    def loaded(self) -> bool:
+        return self._settings is not None
+
+    def current(self) -> Settings:
+        """
+        Сам объект Settings (например, чтобы передать в другой процесс)
+        """
+        return self._load()
+
+    def _load(self) -> Settings:
+        if self._settings is None:
+            object.__setattr__(self, "_settings", Settings())
+        return self._settings
+
+    def __getattr__(self, name: str):
+        return getattr(self._load(), name)
+
+    def __setattr__(self, name: str, value) -> None:
+        setattr(self._load(), name, value)
+
+
+settings = LazySettings()
 
 '''
 from app.config import settings
@@ -1,20 +1,199 @@
-from sqlalchemy import create_engine
+import threading
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from app.config import settings
 
 
-engine = create_engine(settings.DATABASE_URL)
+def configure_sqlite(target_engine, begin: str = "BEGIN") -> None:
+    """
+    Включить WAL и настроенные pragma для каждого соединения SQLite
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    WAL позволяет читателям работать параллельно с писателем.
+    Транзакции открываем сами (драйвер sqlite3 не шлёт BEGIN перед
+    SAVEPOINT), для писателя - BEGIN IMMEDIATE: блокировка на запись
+    берётся сразу и ждёт busy_timeout, а не падает на середине.
+
+    Args:
+        target_engine: Engine SQLite
+        begin: Команда начала транзакции
+    """
+    @event.listens_for(target_engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE}")
+        cursor.execute(f"PRAGMA cache_size=-{settings.SQLITE_CACHE_SIZE_KB}")
+        cursor.execute(f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.close()
+
+    @event.listens_for(target_engine, "begin")
+    def begin_transaction(connection):
+        connection.exec_driver_sql(begin)
+
+
+def make_engine(url: str, begin: str = "BEGIN"):
+    """
+    Создать engine (для SQLite в режиме SQLITE_TUNED - с настройками WAL)
+    """
+    if url.startswith("sqlite") and settings.SQLITE_TUNED:
+        sqlite_engine = create_engine(url, connect_args={"check_same_thread": False})
+        configure_sqlite(sqlite_engine, begin)
+        return sqlite_engine
+    return create_engine(url)
+
+
+# =========================
+# ОСНОВНАЯ БД (создаётся при первом обращении)
+# =========================
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    """
+    Engine основной БД (DATABASE_URL), создаётся при первом вызове
+
+    Импорт app.database не читает настройки и не создаёт пул -
+    это происходит при первой сессии или на старте воркера.
+    """
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = make_engine(settings.DATABASE_URL)
+        return _engine
+
+
+def dispose_engines() -> None:
+    """
+    Закрыть пулы соединений основной БД и шардов (остановка воркера)
+    """
+    global _engine
+    with _engine_lock:
+        if _engine is not None:
+            _engine.dispose()
+            _engine = None
+    SessionLocal.kw.pop("bind", None)
+    shard_router.reset()
+
+
+class LazySessionMaker(sessionmaker):
+    """
+    sessionmaker, который привязывается к get_engine() при первой сессии
+    """
+
+    def __call__(self, **local_kw) -> Session:
+        if self.kw.get("bind") is None and "bind" not in local_kw:
+            self.configure(bind=get_engine())
+        return super().__call__(**local_kw)
+
+
+SessionLocal = LazySessionMaker(autocommit=False, autoflush=False)
 
 Base = declarative_base()
 
 
+def __getattr__(name: str):
+    # from app.database import engine (бенчмарки, скрипты)
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+class ShardRouter:
+    """
+    Шарды с данными игроков
+
+    Каждый шард - отдельная БД с полной схемой: строки users, seeds,
+    bets и журнала баланса игрока лежат на одном шарде, каталог игр
+    копируется на все. Какой игрок на каком шарде - в user_directory
+    основной БД (DATABASE_URL).
+    """
+
+    def __init__(self, urls: list[str] = None):
+        """
+        Args:
+            urls: Список шардов; None - SHARD_DATABASE_URLS при первом обращении
+        """
+        self._urls = None
+        self._engines = []
+        self._sessionmakers = []
+        if urls is not None:
+            self.configure(urls)
+
+    def configure(self, urls: list[str]) -> None:
+        """
+        Задать список шардов (пустой - шардирование выключено)
+        """
+        for shard_engine in self._engines:
+            shard_engine.dispose()
+
+        self._urls = list(urls)
+        self._engines = [make_engine(url) for url in self._urls]
+        self._sessionmakers = [
+            sessionmaker(autocommit=False, autoflush=False, bind=shard_engine)
+            for shard_engine in self._engines
+        ]
+
+    def reset(self) -> None:
+        """
+        Закрыть пулы; при следующем обращении шарды снова возьмутся из настроек
+        """
+        for shard_engine in self._engines:
+            shard_engine.dispose()
+        self._urls = None
+        self._engines = []
+        self._sessionmakers = []
+
+    def _configured(self) -> None:
+        if self._urls is None:
+            self.configure(settings.SHARD_DATABASE_URLS)
+
+    @property
+    def urls(self) -> list[str]:
+        self._configured()
+        return self._urls
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.urls)
+
+    def __len__(self) -> int:
+        return len(self.urls)
+
+    def engine(self, shard: int):
+        self._configured()
+        return self._engines[shard]
+
+    def session(self, shard: int) -> Session:
+        """
+        Новая сессия шарда (закрывает вызывающий)
+
+        Номер шарда сохраняется в session.info["shard"].
+        """
+        if not 0 <= shard < len(self):
+            raise ValueError(f"Unknown shard: {shard}")
+        db = self._sessionmakers[shard]()
+        db.info["shard"] = shard
+        return db
+
+    def shard_for_new_user(self, user_id: int) -> int:
+        """
+        Шард для нового игрока (дальше - только через user_directory)
+        """
+        return user_id % len(self.urls)
+
+
+shard_router = ShardRouter()
+
 
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
@@ -0,0 +1,46 @@
+import argparse
+import sys
+from datetime import datetime
+
+from app.database import SessionLocal
+from app.services.bet_export import EXPORT_FORMATS, export_bets
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream bets to a CSV/NDJSON file with constant memory")
+    parser.add_argument("--format", dest="export_format", choices=sorted(EXPORT_FORMATS), default="csv")
+    parser.add_argument("--gzip", action="store_true", help="Compress on the fly")
+    parser.add_argument("--user-id", type=int)
+    parser.add_argument("--game-id", type=int)
+    parser.add_argument("--start", type=datetime.fromisoformat, help="UTC, inclusive")
+    parser.add_argument("--end", type=datetime.fromisoformat, help="UTC, exclusive")
+    parser.add_argument("--out", default="-", help="Output file, '-' for stdout")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    out = sys.stdout.buffer if args.out == "-" else open(args.out, "wb")
+
+    try:
+        written = 0
+        for chunk in export_bets(
+            db,
+            export_format=args.export_format,
+            compress=args.gzip,
+            user_id=args.user_id,
+            game_id=args.game_id,
+            start=args.start,
+            end=args.end
+        ):
+            out.write(chunk)
+            written += len(chunk)
+
+        if args.out != "-":
+            print(f"✅ {written:,} bytes written to {args.out}", file=sys.stderr)
+    finally:
+        if out is not sys.stdout.buffer:
+            out.close()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
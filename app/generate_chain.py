@@ -0,0 +1,96 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from app.services.hash_chain import generate_chain
+
+
+def _generate_one(path: str, length: int, segment_length: int) -> tuple[str, str, float]:
+    started = time.perf_counter()
+    terminal_hash = generate_chain(path, length, segment_length=segment_length)
+    return path, terminal_hash, time.perf_counter() - started
+
+
+def generate_chains(
+    out_dir: str,
+    length: int,
+    count: int,
+    workers: int,
+    segment_length: int = None
+) -> list[tuple[str, str, float]]:
+    """
+    Сгенерировать несколько независимых цепочек параллельно
+
+    Одна цепочка строится последовательно, поэтому параллелим
+    по цепочкам: каждый процесс пишет свой файл.
+
+    Args:
+        out_dir: Каталог для файлов цепочек
+        length: Количество звеньев в каждом файле
+        count: Сколько файлов сгенерировать
+        workers: Количество процессов
+        segment_length: Звеньев в цепочке одного игрока
+
+    Returns:
+        [(путь, публикуемый хеш файла, секунд на генерацию)]
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    stamp = int(time.time())
+    paths = [os.path.join(out_dir, f"chain_{stamp}_{i}.bin") for i in range(count)]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_generate_one, path, length, segment_length) for path in paths]
+        return [future.result() for future in futures]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate SHA-256 hash chains for provably fair seeds")
+    parser.add_argument("--length", type=int, default=10_000_000, help="Links per chain file")
+    parser.add_argument(
+        "--segment-length",
+        type=int,
+        default=10_000,
+        help="Links in each player's own chain (file length must be a multiple)"
+    )
+    parser.add_argument("--count", type=int, default=1, help="Number of chain files")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Parallel processes")
+    parser.add_argument("--out-dir", default="chains", help="Output directory")
+    parser.add_argument(
+        "--register",
+        action="store_true",
+        help="Register chains in the database and activate the first one"
+    )
+    args = parser.parse_args()
+
+    if args.length % args.segment_length:
+        print("❌ --length must be a multiple of --segment-length")
+        raise SystemExit(1)
+
+    print(
+        f"Generating {args.count} file(s) of {args.length} links "
+        f"({args.length // args.segment_length} player chains each)..."
+    )
+    results = generate_chains(args.out_dir, args.length, args.count, args.workers, args.segment_length)
+
+    for path, terminal_hash, elapsed in results:
+        print(f"✅ {path}")
+        print(f"   Published hash: {terminal_hash}")
+        print(f"   {args.length / elapsed:,.0f} links/s")
+
+    if args.register:
+        from app.database import SessionLocal
+        from app.services.hash_chain import register_chain
+
+        db = SessionLocal()
+        try:
+            # Активируем первую, остальные ждут своей очереди
+            for i, (path, _, _) in enumerate(results):
+                row = register_chain(db, path, activate=(i == 0), segment_length=args.segment_length)
+                print(f"✅ Registered chain {row.id} (active={row.active})")
+        finally:
+            db.close()
+
+
+if __name__ == "__main__":
+    main()
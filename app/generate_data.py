@@ -0,0 +1,67 @@
+import argparse
+import os
+
+from app.config import settings
+from app.database import SessionLocal, shard_router
+from app.services.synthetic import generate_dataset, plan_dataset
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate synthetic users, seeds and provably fair bets for load testing"
+    )
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--bets-per-user", type=int, default=1000)
+    parser.add_argument("--bets-per-seed", type=int, default=1000, help="Bets before a seed rotation")
+    parser.add_argument("--days", type=float, default=30.0, help="Spread bets over the last N days")
+    parser.add_argument("--password", default="loadtest123", help="Password of every generated user")
+    parser.add_argument("--balance", type=float, default=1_000_000.0, help="Initial balance of every user")
+    parser.add_argument("--prefix", default="load", help="Username prefix (username = prefix + id)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (same seed - same dataset)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Parallel processes")
+    parser.add_argument("--batch-users", type=int, default=100, help="Users per transaction")
+    args = parser.parse_args()
+
+    if shard_router.enabled:
+        print("❌ Sharded setups are not supported: generate into DATABASE_URL without SHARD_DATABASE_URLS")
+        return
+
+    db = SessionLocal()
+    try:
+        plan = plan_dataset(
+            db,
+            users=args.users,
+            bets_per_user=args.bets_per_user,
+            bets_per_seed=args.bets_per_seed,
+            days=args.days,
+            password=args.password,
+            initial_balance=args.balance,
+            username_prefix=args.prefix,
+            rng_seed=args.seed
+        )
+    except ValueError as e:
+        print(f"❌ {e}")
+        return
+    finally:
+        db.close()
+
+    print(
+        f"Generating {plan.users:,} users x {plan.bets_per_user:,} bets = {plan.total_bets:,} bets "
+        f"({plan.seeds_per_user} seed(s) per user, {args.workers} worker(s))..."
+    )
+
+    def progress(written: int) -> None:
+        print(f"   {written:,} / {plan.total_bets:,} bets", end="\r", flush=True)
+
+    result = generate_dataset(
+        settings.DATABASE_URL, plan, workers=args.workers, batch_users=args.batch_users, progress=progress
+    )
+
+    print(f"✅ {result['users']:,} users, {result['bets']:,} bets in {result['elapsed']:.1f}s")
+    print(f"   {result['bets'] / result['elapsed']:,.0f} bets/s")
+    print(f"   Users: {args.prefix}{plan.user_id(0)} ... {args.prefix}{plan.user_id(plan.users - 1)}")
+    print(f"   Password: {args.password}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+import sys
+
+from app.database import SessionLocal, shard_router
+from app.models.user import User
+from app.services.sharding import find_user
+
+
+def grant_admin(username: str, revoke: bool = False):
+    """
+    Выдать (или забрать) права администратора
+    """
+    db = SessionLocal()
+    user_db = db
+    
+    try:
+        # С шардированием пользователь лежит на своём шарде
+        if shard_router.enabled:
+            entry = find_user(db, username)
+            if not entry:
+                print(f"❌ User '{username}' not found")
+                return
+            user_db = shard_router.session(entry.shard)
+        
+        user = user_db.query(User).filter(User.username == username).first()
+        if not user:
+            print(f"❌ User '{username}' not found")
+            return
+        
+        user.is_admin = not revoke
+        user_db.commit()
+        
+        print(f"✅ {username}: is_admin={user.is_admin}")
+    
+    finally:
+        if user_db is not db:
+            user_db.close()
+        db.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python -m app.grant_admin <username> [--revoke]")
+        sys.exit(1)
+    grant_admin(sys.argv[1], revoke="--revoke" in sys.argv)
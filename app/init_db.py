@@ -79,6 +79,51 @@ def init_games():
         db.close()
 
 
+def init_round_game():
+    """
+    Инициализация игры с общими раундами Nvuti
+    """
+    db = SessionLocal()
+    
+    try:
+        existing_game = db.query(Game).filter(Game.name == "Nvuti Rounds").first()
+        if existing_game:
+            print("✅ Game 'Nvuti Rounds' already exists")
+            print(f"   ID: {existing_game.id}")
+            return
+        
+        rounds = Game(
+            name="Nvuti Rounds",
+            type="dice_round",
+            house_edge=5.0,
+            min_bet=1.0,
+            max_bet=1000.0,
+            rules="""
+# Nvuti Rounds - общий бросок на всех
+
+Правила те же, что в Nvuti, но все ставки окна раунда
+играют на **одно** число. Хеш server seed раунда публикуется
+при открытии, сам seed - после расчёта.
+            """
+        )
+        
+        db.add(rounds)
+        db.commit()
+        db.refresh(rounds)
+        
+        print("✅ Game 'Nvuti Rounds' created successfully!")
+        print(f"   ID: {rounds.id}")
+        print(f"   Type: {rounds.type}")
+    
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        db.rollback()
+    
+    finally:
+        db.close()
+
+
 if __name__ == "__main__":
     print("Initializing games...")
-    init_games()
\ No newline at end of file
+    init_games()
+    init_round_game()
\ No newline at end of file
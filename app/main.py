@@ -1,44 +1,87 @@
-from fastapi import FastAPI, Request
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, Request
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+import asyncio
 import logging
 
 # Импорт роутеров
-from app.api import auth, games
+from app.api import admin, auth, bets, games, reports
+from app.config import Settings, settings
+from app.database import SessionLocal, dispose_engines
+from app.services.invalidation import invalidation_bus
+from app.services.jobs import register_jobs
+from app.services.profiling import profile_request
+from app.services.revocation import revocation_list
+from app.services.round_service import round_book
+from app.services.scheduler import scheduler
+from app.services.sqlite_writer import sqlite_writer
+from app.services.traffic import TrafficRecorderMiddleware, traffic_recorder
+from app.services.warmup import warm_up
+from app.utils.metrics import metrics
 
 
+logger = logging.getLogger(__name__)
+
+
+def configure_logging() -> None:
+    """
+    Настройка логирования (при старте воркера, не при импорте)
+
+    Если корневой логгер уже настроен (uvicorn --log-config, тесты),
+    basicConfig ничего не меняет.
+    """
+    handlers = [logging.StreamHandler()]  # Вывод в консоль
+    if settings.LOG_FILE:
+        handlers.append(logging.FileHandler(settings.LOG_FILE))  # Запись в файл
+
+    logging.basicConfig(
+        level=settings.LOG_LEVEL,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=handlers
+    )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Запуск и остановка воркера
+
+    До yield воркер не принимает запросы: здесь создаются пулы
+    соединений, прогревается каталог игр и стартуют фоновые задачи.
+    """
+    configure_logging()
 
-# Настройка логирования
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("app.log"),  # Запись в файл
-        logging.StreamHandler()           # Вывод в консоль
+    if settings.WARMUP_ENABLED:
+        await asyncio.to_thread(warm_up, SessionLocal)
+
+    # Приём инвалидаций кешей от других воркеров
+    invalidation_bus.start()
+    # Циклы с состоянием воркера (подсекундные, расчёт раундов при остановке)
+    tasks = [
+        asyncio.create_task(revocation_list.run(SessionLocal)),
+        asyncio.create_task(round_book.run(SessionLocal))
     ]
-)
-logger = logging.getLogger(__name__)
 
-# Создание приложения
-app = FastAPI(
-    title="Pichusino API",
-    description="Educational casino simulation with Provably Fair Nvuti game",
-    version="1.0.0",
-    docs_url="/docs",
-    redoc_url="/redoc"
-)
-
-# CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+    # Обслуживание БД и сверки - в планировщике (app/services/jobs.py)
+    if settings.SCHEDULER_ENABLED:
+        register_jobs(scheduler)
+        tasks.append(asyncio.create_task(scheduler.run(SessionLocal)))
+
+    yield
+
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    # Дописать ставки, ожидающие в очереди SQLite
+    sqlite_writer.stop()
+    invalidation_bus.stop()
+    traffic_recorder.close()
+    dispose_engines()
+
 
 # Базовые endpoints
-@app.get("/")
 def root():
     return {
         "message": "Welcome to Pichisino API",
@@ -46,15 +89,13 @@ def root():
         "version": "1.0.0"
     }
 
-@app.get("/health")
 def health_check():
     return {"status": "healthy"}
 
-# Подключение роутеров
-app.include_router(auth.router)
-app.include_router(games.router)
+def get_metrics():
+    return metrics.snapshot()
+
 
-@app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     """Глобальный обработчик 500 ошибок"""
     logger.error(f"Unhandled exception: {exc}", exc_info=True)
@@ -66,6 +107,78 @@ async def global_exception_handler(request: Request, exc: Exception):
         }
     )
 
+
+def create_app(app_settings: Settings = None) -> FastAPI:
+    """
+    Фабрика приложения
+
+    Ни настройки, ни engine, ни логирование не создаются при импорте:
+    настройки читаются при первом обращении (или берутся app_settings),
+    пулы соединений и логи - в lifespan.
+
+    Запуск: uvicorn app.main:create_app --factory
+
+    Args:
+        app_settings: Настройки вместо чтения env / .env
+    """
+    if app_settings is not None:
+        settings.configure(app_settings)
+
+    application = FastAPI(
+        lifespan=lifespan,
+        # Профилирование запросов по команде админа: без PROFILING_ENABLED
+        # зависимость не подключается и запросы за неё не платят
+        dependencies=[Depends(profile_request)] if settings.PROFILING_ENABLED else [],
+        title="Pichusino API",
+        description="Educational casino simulation with Provably Fair Nvuti game",
+        version="1.0.0",
+        docs_url="/docs",
+        redoc_url="/redoc"
+    )
+
+    # CORS middleware
+    application.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    # Запись трафика - внешний слой, чтобы время включало все middleware
+    if settings.RECORDER_ENABLED:
+        application.add_middleware(TrafficRecorderMiddleware)
+
+    application.add_api_route("/", root, methods=["GET"])
+    application.add_api_route("/health", health_check, methods=["GET"])
+    application.add_api_route("/metrics", get_metrics, methods=["GET"])
+
+    # Подключение роутеров
+    application.include_router(auth.router)
+    application.include_router(games.router)
+    application.include_router(bets.router)
+    application.include_router(reports.router)
+    application.include_router(admin.router)
+
+    application.add_exception_handler(Exception, global_exception_handler)
+
+    return application
+
+
+_app = None
+
+
+def __getattr__(name: str):
+    # uvicorn app.main:app и тесты: приложение по умолчанию собирается
+    # при первом обращении, а с --factory не собирается лишний раз
+    global _app
+    if name == "app":
+        if _app is None:
+            _app = create_app()
+        return _app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    uvicorn.run("app.main:create_app", factory=True, host="0.0.0.0", port=8000)
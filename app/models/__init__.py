@@ -2,5 +2,15 @@ from app.models.user import User
 from app.models.game import Game
 from app.models.seed import Seed
 from app.models.bet import Bet
+from app.models.seed_chain import SeedChain
+from app.models.round import Round
+from app.models.rollup import BetRollupHourly, RollupWatermark
+from app.models.ledger import LedgerEntry, BalanceSnapshot
+from app.models.user_directory import UserDirectory
+from app.models.revoked_token import RevokedToken
+from app.models.idempotency_key import IdempotencyKey
+from app.models.merkle_batch import MerkleBatch
+from app.models.anomaly_alert import AnomalyAlert
+from app.models.job import JobLease, JobRun
 
-__all__ = ["User", "Game", "Seed", "Bet"]
\ No newline at end of file
+__all__ = ["User", "Game", "Seed", "Bet", "SeedChain", "Round", "BetRollupHourly", "RollupWatermark", "LedgerEntry", "BalanceSnapshot", "UserDirectory", "RevokedToken", "IdempotencyKey", "MerkleBatch", "AnomalyAlert", "JobLease", "JobRun"]
\ No newline at end of file
@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, Float, String, Text, DateTime, ForeignKey
+from datetime import datetime
+from app.database import Base
+
+class AnomalyAlert(Base):
+    """
+    MODEL: Срабатывание потокового детектора аномалий
+
+    Пишется в транзакции ставки, на которой детектор сработал.
+    """
+    __tablename__ = "anomaly_alerts"  # ✅ Таблица во множественном
+
+    id = Column(Integer, primary_key=True)
+
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    bet_id = Column(Integer, ForeignKey("bets.id"), nullable=True)
+
+    # "win_streak", "win_rate", "profit_drift", "shared_seed"
+    detector = Column(String(20), nullable=False)
+
+    # Значение статистики детектора на момент срабатывания
+    score = Column(Float, nullable=False)
+
+    # Подробности (JSON)
+    details = Column(Text, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
@@ -0,0 +1,32 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, UniqueConstraint
+from datetime import datetime
+from app.database import Base
+
+class IdempotencyKey(Base):
+    """
+    MODEL: Сохранённый ответ на ставку с заголовком Idempotency-Key
+
+    Пишется в той же транзакции, что и ставка: уникальность
+    (user_id, key) не даёт повтору запроса сыграть второй раз.
+    """
+    __tablename__ = "idempotency_keys"  # ✅ Таблица во множественном
+    __table_args__ = (
+        UniqueConstraint("user_id", "key", name="uq_idempotency_keys_user_id_key"),
+    )
+
+    id = Column(Integer, primary_key=True)
+
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+
+    # Значение заголовка Idempotency-Key (выбирает клиент)
+    key = Column(String(64), nullable=False)
+
+    # Хеш параметров запроса: тот же ключ с другими параметрами - ошибка клиента
+    request_hash = Column(String(64), nullable=False)
+
+    bet_id = Column(Integer, ForeignKey("bets.id"), nullable=True)
+
+    # JSON ответа (NvutiBetResponse)
+    response = Column(Text, nullable=False)
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
@@ -0,0 +1,44 @@
+from sqlalchemy import Column, Integer, Float, String, Text, DateTime
+from datetime import datetime
+from app.database import Base
+
+class JobLease(Base):
+    """
+    MODEL: Аренда фоновой задачи планировщика
+
+    Задачу с singleton=True выполняет только воркер, держащий
+    неистёкшую аренду. Владелец продлевает её при каждом запуске,
+    после падения владельца аренду по истечении забирает другой воркер.
+    """
+    __tablename__ = "job_leases"  # ✅ Таблица во множественном
+
+    name = Column(String(64), primary_key=True)
+
+    # host:pid:случайный суффикс воркера
+    owner = Column(String(100), nullable=False)
+
+    acquired_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+
+
+class JobRun(Base):
+    """
+    MODEL: Запуск фоновой задачи (история)
+    """
+    __tablename__ = "job_runs"  # ✅ Таблица во множественном
+
+    id = Column(Integer, primary_key=True)
+
+    job = Column(String(64), nullable=False, index=True)
+    owner = Column(String(100), nullable=False)
+
+    started_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+    finished_at = Column(DateTime, nullable=False)
+    duration_ms = Column(Float, nullable=False)
+
+    # "ok", "error", "timeout"
+    status = Column(String(10), nullable=False)
+
+    # Что вернула задача (repr, обрезано) или текст ошибки
+    result = Column(String(200), nullable=True)
+    error = Column(Text, nullable=True)
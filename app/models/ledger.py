@@ -0,0 +1,50 @@
+from sqlalchemy import Column, Integer, BigInteger, DateTime, ForeignKey, String, Index
+from sqlalchemy.orm import relationship
+from datetime import datetime
+from app.database import Base
+
+class LedgerEntry(Base):
+    """
+    MODEL: Движение баланса (только INSERT, строки не меняются)
+
+    Суммы - в целых минорных единицах (копейках), без ошибок float.
+    """
+    __tablename__ = "ledger_entries"  # ✅ Таблица во множественном
+
+    id = Column(Integer, primary_key=True)
+
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+
+    # Изменение баланса в минорных единицах (+ зачисление, - списание)
+    delta = Column(BigInteger, nullable=False)
+
+    # Причина: "bet", "round_bet", "deposit", "adjustment"
+    reason = Column(String(20), nullable=False)
+
+    # Ставка, из-за которой изменился баланс
+    bet_id = Column(Integer, ForeignKey("bets.id"), nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+    # Связи
+    bet = relationship("Bet")
+
+    __table_args__ = (
+        # Сумма дельт после снапшота: WHERE user_id = ? AND id > ?
+        Index("ix_ledger_entries_user_id_id", "user_id", "id"),
+    )
+
+
+class BalanceSnapshot(Base):
+    """
+    MODEL: Свёрнутый баланс пользователя
+
+    balance = начальный баланс + все движения с id <= last_entry_id.
+    Текущий баланс = balance + дельты с id > last_entry_id.
+    """
+    __tablename__ = "balance_snapshots"  # ✅ Таблица во множественном
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    balance = Column(BigInteger, nullable=False)  # Минорные единицы
+    last_entry_id = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
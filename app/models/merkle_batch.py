@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Integer, String, DateTime, LargeBinary
+from datetime import datetime
+from app.database import Base
+
+class MerkleBatch(Base):
+    """
+    MODEL: Merkle-коммитмент пачки рассчитанных ставок
+
+    Дерево хранится целиком: уровни от листьев до корня подряд по
+    32 байта на узел - доказательство включения читается срезами за
+    O(log n) без пересчёта. ID ставок пачки - по возрастанию, 8 байт
+    big-endian на ставку (поиск листа - бинарный поиск).
+    """
+    __tablename__ = "merkle_batches"  # ✅ Таблица во множественном
+
+    id = Column(Integer, primary_key=True)
+
+    # Диапазон ID ставок пачки (включительно)
+    first_bet_id = Column(Integer, nullable=False)
+    last_bet_id = Column(Integer, nullable=False, index=True)
+    bets_count = Column(Integer, nullable=False)
+
+    # Корень дерева (hex)
+    root = Column(String(64), nullable=False)
+
+    bet_ids = Column(LargeBinary, nullable=False)
+    levels = Column(LargeBinary, nullable=False)
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
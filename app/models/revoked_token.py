@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from datetime import datetime
+from app.database import Base
+
+class RevokedToken(Base):
+    """
+    MODEL: Отозванный JWT (logout) или все токены игрока до момента бана
+
+    Воркеры подтягивают новые строки по возрастанию id и держат
+    их в памяти до истечения токенов.
+    """
+    __tablename__ = "revoked_tokens"  # ✅ Таблица во множественном
+
+    id = Column(Integer, primary_key=True)
+
+    # "token" - один токен по jti, "user" - все токены игрока, выданные до revoked_at
+    kind = Column(String(10), nullable=False)
+    key = Column(String(64), nullable=False)
+
+    revoked_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+    # После этого момента отозванные токены истекли сами - строка не нужна
+    expires_at = Column(DateTime, nullable=False, index=True)
@@ -0,0 +1,40 @@
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, String, UniqueConstraint
+from datetime import datetime
+from app.database import Base
+
+class BetRollupHourly(Base):
+    """
+    MODEL: Агрегаты ставок по игре за час (для финансовых отчётов)
+    
+    GGR = turnover - payout, RTP = payout / turnover.
+    Дневные отчёты собираются из часовых строк.
+    """
+    __tablename__ = "bet_rollups_hourly"  # ✅ Таблица во множественном
+    
+    id = Column(Integer, primary_key=True, index=True)
+    
+    game_id = Column(Integer, ForeignKey("games.id"), nullable=False)
+    
+    # Начало часа (UTC)
+    hour = Column(DateTime, nullable=False, index=True)
+    
+    # Агрегаты
+    bets_count = Column(Integer, default=0, nullable=False)
+    wins_count = Column(Integer, default=0, nullable=False)
+    turnover = Column(Float, default=0.0, nullable=False)  # Сумма ставок
+    payout = Column(Float, default=0.0, nullable=False)    # Сумма выплат игрокам
+    
+    __table_args__ = (
+        UniqueConstraint("game_id", "hour", name="uq_bet_rollups_hourly_game_hour"),
+    )
+
+
+class RollupWatermark(Base):
+    """
+    MODEL: До какой ставки агрегатор уже дошёл
+    """
+    __tablename__ = "rollup_watermarks"  # ✅ Таблица во множественном
+    
+    name = Column(String(50), primary_key=True)
+    last_bet_id = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -0,0 +1,38 @@
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, String, Text
+from sqlalchemy.orm import relationship
+from datetime import datetime
+from app.database import Base
+
+class Round(Base):
+    """
+    MODEL: Общий раунд Nvuti (один бросок на всех игроков окна)
+    """
+    __tablename__ = "rounds"  # ✅ Таблица во множественном
+    
+    id = Column(Integer, primary_key=True, index=True)
+    
+    # Какая игра
+    game_id = Column(Integer, ForeignKey("games.id"), nullable=False, index=True)
+    
+    # Provably Fair: server seed раскрывается после расчёта раунда
+    server_seed = Column(String(128), nullable=False)
+    server_seed_hash = Column(String(64), nullable=False)
+    # Client seed выводится при расчёте из seed'ов игроков (пустой, пока раунд открыт)
+    client_seed = Column(String(64), nullable=False, default="")
+    # JSON-список seed'ов игроков в порядке приёма ставок
+    player_seeds = Column(Text, nullable=True)
+    
+    # "open", "settled", "void"
+    status = Column(String(20), default="open", nullable=False, index=True)
+    
+    # Окно приёма ставок
+    opened_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    closes_at = Column(DateTime, nullable=False)
+    
+    # Результат
+    result_number = Column(Float, nullable=True)
+    bets_count = Column(Integer, default=0, nullable=False)
+    settled_at = Column(DateTime, nullable=True)
+    
+    # Связи
+    game = relationship("Game")
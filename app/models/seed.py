@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, ForeignKey, Boolean, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 
@@ -10,8 +10,8 @@ class Seed(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     
-    # К какому пользователю относится
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    # К какому пользователю относится (NULL - seed лежит в пуле и ещё не выдан)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     
     # Server seed (секретный)
     server_seed = Column(String(128), nullable=False)
@@ -28,5 +28,21 @@ class Seed(Base):
     # Активен ли
     active = Column(Boolean, default=True, nullable=False, index=True)
     
+    # Режим цепочки хешей: файл цепочек, цепочка игрока в нём и звено (NULL - случайный seed)
+    chain_id = Column(Integer, ForeignKey("seed_chains.id"), nullable=True)
+    chain_segment = Column(Integer, nullable=True)
+    chain_index = Column(Integer, nullable=True)
+    
     # Связи (единственное - ссылка на одного пользователя)
-    user = relationship("User", back_populates="seeds")
\ No newline at end of file
+    user = relationship("User", back_populates="seeds")
+    chain = relationship("SeedChain", back_populates="seeds")
+
+    __table_args__ = (
+        # Быстрый поиск свободных seed'ов пула
+        Index(
+            "ix_seeds_pool",
+            "id",
+            postgresql_where=user_id.is_(None),
+            sqlite_where=user_id.is_(None)
+        ),
+    )
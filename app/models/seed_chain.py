@@ -0,0 +1,40 @@
+from sqlalchemy import Column, Integer, String, Boolean, DateTime
+from sqlalchemy.orm import relationship
+from datetime import datetime
+from app.database import Base
+
+class SeedChain(Base):
+    """
+    MODEL: Цепочка хешей для Provably Fair (альтернатива случайным seed'ам)
+    
+    Сами звенья лежат в бинарном файле (см. services/hash_chain.py),
+    в БД - только путь, опубликованный хеш и курсор выдачи. Файл -
+    набор независимых цепочек, по одной на игрока.
+    """
+    __tablename__ = "seed_chains"  # ✅ Таблица во множественном
+    
+    id = Column(Integer, primary_key=True, index=True)
+    
+    # Файл со звеньями (по 32 байта)
+    path = Column(String, nullable=False)
+    
+    # Хеш файла (публикуется заранее): терминальный хеш единственной
+    # цепочки или SHA-256 терминалов всех цепочек файла
+    terminal_hash = Column(String(64), nullable=False, unique=True)
+    
+    # Количество звеньев в файле
+    length = Column(Integer, nullable=False)
+    
+    # Звеньев в цепочке одного игрока (файл - length // segment_length цепочек)
+    segment_length = Column(Integer, nullable=False)
+    
+    # Сколько игроков уже получили свою цепочку
+    next_index = Column(Integer, default=0, nullable=False)
+    
+    # Из какой цепочки выдаём сейчас
+    active = Column(Boolean, default=True, nullable=False)
+    
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    
+    # Связи
+    seeds = relationship("Seed", back_populates="chain")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
@@ -19,6 +19,12 @@ class User(Base):
     # Игровые данные
     balance = Column(Float, default=1000.0)
     
+    # Доступ к служебным endpoints (отчёты, выгрузки)
+    is_admin = Column(Boolean, default=False, nullable=False)
+    
+    # Заблокирован администратором: не может войти, токены отозваны
+    is_banned = Column(Boolean, default=False, nullable=False)
+    
     # Метаданные
     created_at = Column(DateTime, default=datetime.utcnow)
     
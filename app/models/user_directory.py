@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from datetime import datetime
+from app.database import Base
+
+class UserDirectory(Base):
+    """
+    MODEL: Справочник игроков для шардирования (только в основной БД)
+
+    Выдаёт глобальные ID игроков и хранит, на каком шарде их данные.
+    Логин ищет игрока здесь по username, дальше работа идёт с шардом.
+    """
+    __tablename__ = "user_directory"
+
+    # Глобальный ID игрока (совпадает с users.id на шарде)
+    id = Column(Integer, primary_key=True)
+
+    username = Column(String, unique=True, index=True, nullable=False)
+    email = Column(String, unique=True, index=True, nullable=False)
+
+    shard = Column(Integer, nullable=False, index=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    moved_at = Column(DateTime, nullable=True)
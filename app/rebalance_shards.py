@@ -0,0 +1,76 @@
+import argparse
+import sys
+
+from app.database import SessionLocal, shard_router
+from app.services.sharding import init_shards, move_user, plan_rebalance, shard_user_counts
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Manage sharded user data (SHARD_DATABASE_URLS). "
+                    "Stop the API workers before moving users."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("init", help="Create missing tables on every shard and copy the game catalog")
+    commands.add_parser("status", help="Show users per shard")
+
+    move = commands.add_parser("move", help="Move one user to another shard")
+    move.add_argument("--user-id", type=int, required=True)
+    move.add_argument("--to", type=int, required=True, dest="target")
+
+    rebalance = commands.add_parser("rebalance", help="Even out users per shard")
+    rebalance.add_argument("--dry-run", action="store_true", help="Only print the plan")
+
+    args = parser.parse_args()
+
+    if not shard_router.enabled:
+        print("❌ Sharding is disabled: set SHARD_DATABASE_URLS")
+        sys.exit(1)
+
+    db = SessionLocal()
+
+    try:
+        if args.command == "init":
+            games = init_shards(db)
+            print(f"✅ {len(shard_router)} shard(s) ready, {games} game(s) copied to each")
+
+        elif args.command == "status":
+            for shard, count in shard_user_counts(db).items():
+                print(f"   shard {shard}: {count} users")
+
+        elif args.command == "move":
+            try:
+                moved = move_user(db, args.user_id, args.target)
+            except ValueError as e:
+                print(f"❌ {e}")
+                sys.exit(1)
+            print(f"✅ User {args.user_id} moved to shard {args.target}: {moved}")
+
+        elif args.command == "rebalance":
+            plan = plan_rebalance(db)
+            if not plan:
+                print("✅ Shards are already balanced")
+                return
+
+            moved = 0
+            for user_id, source, target in plan:
+                if args.dry_run:
+                    print(f"   user {user_id}: shard {source} -> {target}")
+                    continue
+                try:
+                    move_user(db, user_id, target)
+                except ValueError as e:
+                    print(f"   user {user_id}: skipped ❌ {e}")
+                    continue
+                moved += 1
+                print(f"   user {user_id}: shard {source} -> {target} ✅")
+
+            if not args.dry_run:
+                print(f"✅ {moved} of {len(plan)} user(s) moved")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
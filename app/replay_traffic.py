@@ -0,0 +1,65 @@
+import argparse
+import asyncio
+
+from app.services.traffic import load_records, replay, summarize
+
+
+def _ms(value) -> str:
+    return f"{value:9.1f}" if value is not None else f"{'-':>9s}"
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Replay recorded traffic (RECORDER_ENABLED) against a running instance"
+    )
+    parser.add_argument("paths", nargs="+", help="Recording files or directories")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--speed", type=float, default=1.0, help="Time scale: 2.0 - twice the recorded rate")
+    parser.add_argument("--route-prefix", help="Replay only paths with this prefix (e.g. /api/games/nvuti)")
+    parser.add_argument(
+        "--skip-prefix", action="append", default=None,
+        help="Skip paths with this prefix (default: /api/auth - credentials are anonymized)"
+    )
+    parser.add_argument("--user-prefix", default="replay", help="Local users: prefix + 1..N, registered if missing")
+    parser.add_argument("--password", default="replay123", help="Password of local users")
+    parser.add_argument("--max-connections", type=int, default=100)
+    parser.add_argument("--limit", type=int, help="Replay only the first N records")
+    args = parser.parse_args()
+
+    skip_prefixes = tuple(args.skip_prefix) if args.skip_prefix is not None else ("/api/auth",)
+    records = load_records(args.paths, skip_prefixes=skip_prefixes, route_prefix=args.route_prefix)
+    if args.limit:
+        records = records[:args.limit]
+    if not records:
+        print("❌ No records to replay")
+        return
+
+    span = records[-1]["ts"] - records[0]["ts"]
+    print(f"Replaying {len(records):,} requests recorded over {span:.1f}s at {args.speed}x against {args.base_url}...")
+
+    try:
+        results = asyncio.run(replay(
+            records, args.base_url, speed=args.speed, user_prefix=args.user_prefix,
+            password=args.password, max_connections=args.max_connections
+        ))
+    except ValueError as e:
+        print(f"❌ {e}")
+        return
+
+    summary = summarize(results)
+    print(f"✅ Replayed {len(results):,} requests, schedule lag p99 {summary['lag_p99_ms']:.1f} ms")
+    print(
+        f"   {'route':40s}{'count':>7s}{'p50 rec':>9s}{'p50 now':>9s}{'p99 rec':>9s}{'p99 now':>9s}"
+        f"{'Δp99':>9s}{'err rec':>9s}{'err now':>9s}{'status≠':>9s}"
+    )
+    for route, stats in [("TOTAL", summary["total"]), *summary["routes"].items()]:
+        print(
+            f"   {route[:40]:40s}{stats['count']:7d}"
+            f"{_ms(stats['original_p50_ms'])}{_ms(stats['replay_p50_ms'])}"
+            f"{_ms(stats['original_p99_ms'])}{_ms(stats['replay_p99_ms'])}{_ms(stats['p99_delta_ms'])}"
+            f"{stats['original_error_rate']:9.2%}{stats['replay_error_rate']:9.2%}{stats['status_mismatches']:9d}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+from datetime import datetime
+from pydantic import BaseModel, Field
+
+
+class ProfilingRequest(BaseModel):
+    """
+    Взвести профилирование запросов
+    """
+    requests: int = Field(default=10, ge=1, le=1000, description="How many requests to profile")
+    sample_rate: float = Field(default=1.0, gt=0, le=1.0, description="Share of matching requests to profile")
+    path_prefix: str | None = Field(default=None, description="Profile only paths with this prefix")
+
+
+class ProfilingStatus(BaseModel):
+    """
+    Состояние профилировщика и сохранённые профили
+    """
+    remaining: int
+    sample_rate: float
+    path_prefix: str | None
+    # Для заголовка X-Profile-Token (только в ответе на взведение)
+    token: str | None = None
+    directory: str
+    dumps: list[str]
+
+
+class AllocationStat(BaseModel):
+    """
+    Место выделения памяти
+    """
+    location: str
+    size_kb: float
+    count: int
+
+
+class TracemallocReport(BaseModel):
+    """
+    Топ мест выделения памяти
+    """
+    tracing: bool
+    traced_kb: float
+    peak_kb: float
+    top: list[AllocationStat]
+
+
+class GameUpdate(BaseModel):
+    """
+    Изменение настроек игры (только переданные поля)
+    """
+    name: str | None = Field(default=None, min_length=1, max_length=100)
+    house_edge: float | None = Field(default=None, ge=0, lt=100)
+    min_bet: float | None = Field(default=None, gt=0)
+    max_bet: float | None = Field(default=None, gt=0)
+    rules: str | None = None
+
+
+class GameSettings(BaseModel):
+    """
+    Настройки игры после изменения
+    """
+    id: int
+    name: str
+    type: str
+    house_edge: float
+    min_bet: float
+    max_bet: float
+    rules: str | None
+
+
+class JobStatus(BaseModel):
+    """
+    Фоновая задача планировщика в этом воркере
+    """
+    name: str
+    schedule: str
+    singleton: bool
+    process: bool
+    timeout: float | None
+    running: bool
+    next_run_at: datetime | None
+    last_run_at: datetime | None
+    last_status: str | None
+
+
+class JobRunInfo(BaseModel):
+    """
+    Запуск фоновой задачи (из истории job_runs, все воркеры)
+    """
+    id: int
+    job: str
+    owner: str
+    started_at: datetime
+    finished_at: datetime
+    duration_ms: float
+    status: str
+    result: str | None
+    error: str | None
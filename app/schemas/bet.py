@@ -0,0 +1,40 @@
+from pydantic import BaseModel
+from datetime import datetime
+
+
+class MerkleBatchInfo(BaseModel):
+    """
+    Опубликованный корень пачки ставок
+    """
+    id: int
+    first_bet_id: int
+    last_bet_id: int
+    bets_count: int
+    root: str
+    created_at: datetime
+
+
+class MerkleProofStep(BaseModel):
+    """
+    Шаг доказательства: соседний узел и с какой стороны он стоит
+    """
+    hash: str
+    side: str  # "left" или "right"
+
+
+class BetProofResponse(BaseModel):
+    """
+    Доказательство включения ставки в пачку
+
+    Проверка: h = sha256(0x00 || leaf), затем для каждого шага
+    h = sha256(0x01 || hash || h) для "left" или
+    sha256(0x01 || h || hash) для "right"; в конце h == root.
+    """
+    bet_id: int
+    batch_id: int
+    root: str
+    bets_count: int
+    leaf: str
+    leaf_index: int
+    leaf_hash: str
+    proof: list[MerkleProofStep]
@@ -1,4 +1,7 @@
-from pydantic import BaseModel, Field
+from typing import Any
+
+from pydantic import BaseModel, ConfigDict, Field
+from datetime import datetime
 
 
 class NvutiBetRequest(BaseModel):
@@ -34,6 +37,41 @@ class NvutiBetResponse(BaseModel):
     nonce: int
 
 
+class GameBetRequest(BaseModel):
+    """
+    Ставка в игру по её движку (параметры проверяет движок)
+    """
+    amount: float = Field(
+        gt=0,
+        description="Bet amount (must be positive)"
+    )
+    params: dict[str, Any] = Field(
+        default_factory=dict,
+        description="Engine bet parameters, e.g. {\"win_chance\": 50} for dice, {\"flips\": 3} for coinflip"
+    )
+
+
+class GameBetResponse(BaseModel):
+    """
+    Результат ставки в игру
+
+    Кроме общих полей - исход под именем OUTCOME_FIELD движка
+    (result_number у dice) и параметры ставки.
+    """
+    model_config = ConfigDict(extra="allow")
+
+    bet_id: int
+    multiplier: float
+    is_win: bool
+    payout: float
+    profit_loss: float
+    new_balance: float
+    # Provably Fair данные
+    server_seed_hash: str
+    client_seed: str
+    nonce: int
+
+
 class SeedInfo(BaseModel):
     """
     Информация о текущем seed
@@ -58,4 +96,79 @@ class SeedRotateResponse(BaseModel):
     previous_server_seed_hash: str | None
     new_server_seed_hash: str
     new_client_seed: str
-    message: str
\ No newline at end of file
+    message: str
+
+
+class NvutiVerifyRequest(BaseModel):
+    """
+    Запрос на проверку результата игры
+    """
+    server_seed: str
+    client_seed: str
+    nonce: int = Field(ge=0)
+    server_seed_hash: str | None = None
+    # Для режима цепочки хешей
+    chain_terminal_hash: str | None = None
+    chain_index: int | None = Field(default=None, ge=0)
+
+
+class NvutiVerifyResponse(BaseModel):
+    """
+    Результат проверки
+    """
+    result_number: float
+    hash_valid: bool | None
+    chain_valid: bool | None
+
+
+class HashChainInfo(BaseModel):
+    """
+    Публичная информация об активной цепочке хешей
+    """
+    terminal_hash: str
+    length: int
+    # Звеньев в цепочке одного игрока и сколько цепочек уже выдано
+    segment_length: int
+    issued: int
+
+
+class RoundBetRequest(NvutiBetRequest):
+    """
+    Ставка в общий раунд
+    """
+    client_seed: str | None = Field(
+        default=None,
+        min_length=1,
+        max_length=64,
+        description="Player seed mixed into the round's client seed (random if omitted)"
+    )
+
+
+class RoundBetResponse(BaseModel):
+    """
+    Ставка принята в общий раунд
+    """
+    round_id: int
+    server_seed_hash: str
+    # Seed игрока, попадёт в client seed раунда при закрытии окна
+    player_seed: str
+    closes_at: datetime
+    amount: float
+    win_chance: float
+    multiplier: float
+
+
+class RoundInfo(BaseModel):
+    """
+    Информация о раунде (server_seed раскрывается после расчёта)
+    """
+    id: int
+    status: str
+    server_seed_hash: str
+    # Известны после закрытия окна: client_seed = round_client_seed(id, player_seeds)
+    client_seed: str | None
+    player_seeds: list[str] | None
+    server_seed: str | None
+    closes_at: datetime
+    result_number: float | None
+    bets_count: int
@@ -0,0 +1,16 @@
+from pydantic import BaseModel
+from datetime import datetime
+
+
+class RollupReportRow(BaseModel):
+    """
+    Строка финансового отчёта за период (час или день)
+    """
+    game_id: int
+    period: datetime
+    bets_count: int
+    wins_count: int
+    turnover: float
+    payout: float
+    ggr: float
+    rtp: float | None
@@ -29,6 +29,13 @@ class UserResponse(BaseModel):
     class Config:
         from_attributes = True  # Для совместимости с SQLAlchemy
 
+class UserBanResponse(BaseModel):
+    """
+    Схема ответа на бан/разбан пользователя
+    """
+    user_id: int
+    is_banned: bool
+
 class Token(BaseModel):
     """
     Схема для JWT токена
@@ -0,0 +1,257 @@
+import json
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from app.config import settings
+from app.models.anomaly_alert import AnomalyAlert
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class UserStats:
+    """
+    Состояние детекторов одного игрока - несколько чисел, O(1) памяти
+    """
+
+    __slots__ = (
+        "bets", "streak", "streak_log_prob", "ewma_excess", "ewma_variance",
+        "cusum", "last_seen", "last_alert"
+    )
+
+    def __init__(self, now: float):
+        self.bets = 0
+        # Текущая серия выигрышей и log её вероятности
+        self.streak = 0
+        self.streak_log_prob = 0.0
+        # EWMA отклонения (выигрыш - шанс) и EWMA дисперсии p(1-p)
+        self.ewma_excess = 0.0
+        self.ewma_variance = 0.0
+        # Односторонний CUSUM нормированной доходности игрока
+        self.cusum = 0.0
+        self.last_seen = now
+        # detector -> время последнего алерта
+        self.last_alert = {}
+
+
+class AnomalyDetector:
+    """
+    Потоковые детекторы злоупотреблений по рассчитанным ставкам
+
+    Обновляются на каждой ставке за O(1), без запросов к БД:
+    - win_streak: серия выигрышей, вероятность которой (произведение
+      шансов) ниже ANOMALY_STREAK_MAX_PROBABILITY;
+    - win_rate: EWMA доли выигрышей выше ожидаемой (по win_chance)
+      на ANOMALY_EWMA_Z стандартных отклонений;
+    - profit_drift: CUSUM нормированной доходности - устойчивый плюс
+      там, где ожидается house edge;
+    - shared_seed: один client seed у нескольких игроков (боты с общим
+      seed'ом).
+
+    Состояние - LRU по игрокам (и по seed'ам) с ограничением размера;
+    игроки, не ставившие ANOMALY_IDLE_SECONDS, вытесняются первыми.
+    """
+
+    def __init__(self, max_users: int = None, max_seeds: int = None, clock=time.monotonic):
+        self._max_users = max_users
+        self._max_seeds = max_seeds
+        self._clock = clock
+        self._users = OrderedDict()
+        # client_seed -> множество user_id (не больше порога) или None после алерта
+        self._seeds = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.alerts = metrics.counter("anomaly_alerts_total", "Anomaly detector alerts")
+        self.tracked_gauge = metrics.gauge("anomaly_tracked_users", "Users with anomaly detector state")
+
+    @property
+    def max_users(self) -> int:
+        return self._max_users or settings.ANOMALY_MAX_TRACKED_USERS
+
+    @property
+    def max_seeds(self) -> int:
+        return self._max_seeds or settings.ANOMALY_MAX_TRACKED_SEEDS
+
+    def __len__(self) -> int:
+        return len(self._users)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._users.clear()
+            self._seeds.clear()
+
+    def _stats(self, user_id: int, now: float) -> UserStats:
+        stats = self._users.get(user_id)
+        if stats is not None:
+            self._users.move_to_end(user_id)
+            return stats
+
+        # Вытесняем неактивных (они в начале LRU) и сверх лимита
+        idle_before = now - settings.ANOMALY_IDLE_SECONDS
+        while self._users:
+            oldest = next(iter(self._users.values()))
+            if oldest.last_seen >= idle_before and len(self._users) < self.max_users:
+                break
+            self._users.popitem(last=False)
+
+        stats = self._users[user_id] = UserStats(now)
+        self.tracked_gauge.set(len(self._users))
+        return stats
+
+    def _alert(self, stats: UserStats, user_id: int, bet_id, detector: str, score: float, now: float, **details):
+        last = stats.last_alert.get(detector)
+        if last is not None and now - last < settings.ANOMALY_ALERT_COOLDOWN_SECONDS:
+            return None
+        stats.last_alert[detector] = now
+
+        self.alerts.inc()
+        logger.warning(f"Anomaly {detector} for user {user_id}: score={score:.3g}, {details}")
+        return AnomalyAlert(
+            user_id=user_id,
+            bet_id=bet_id,
+            detector=detector,
+            score=score,
+            details=json.dumps(details)
+        )
+
+    # =========================
+    # ДЕТЕКТОРЫ
+    # =========================
+
+    def _check_streak(self, stats: UserStats, is_win: bool, chance: float) -> float | None:
+        if not is_win:
+            stats.streak = 0
+            stats.streak_log_prob = 0.0
+            return None
+
+        stats.streak += 1
+        stats.streak_log_prob += math.log(chance)
+        if stats.streak_log_prob < math.log(settings.ANOMALY_STREAK_MAX_PROBABILITY):
+            probability = math.exp(stats.streak_log_prob)
+            stats.streak = 0
+            stats.streak_log_prob = 0.0
+            return probability
+        return None
+
+    def _check_win_rate(self, stats: UserStats, is_win: bool, chance: float) -> float | None:
+        alpha = settings.ANOMALY_EWMA_ALPHA
+        stats.ewma_excess += alpha * ((1.0 if is_win else 0.0) - chance - stats.ewma_excess)
+        stats.ewma_variance += alpha * (chance * (1 - chance) - stats.ewma_variance)
+
+        if stats.bets < settings.ANOMALY_EWMA_MIN_BETS or stats.ewma_variance <= 0:
+            return None
+
+        # Дисперсия EWMA независимых величин: alpha / (2 - alpha) * дисперсия одной
+        z = stats.ewma_excess / math.sqrt(alpha / (2 - alpha) * stats.ewma_variance)
+        return z if z > settings.ANOMALY_EWMA_Z else None
+
+    def _check_drift(self, stats: UserStats, chance: float, multiplier: float, amount: float, profit_loss: float):
+        # Доходность ставки r: m - 1 с вероятностью p, иначе -1
+        expected = chance * multiplier - 1
+        deviation = multiplier * math.sqrt(chance * (1 - chance))
+        if deviation <= 0 or amount <= 0:
+            return None
+
+        clip = settings.ANOMALY_CUSUM_CLIP
+        z = max(-clip, min(clip, (profit_loss / amount - expected) / deviation))
+        stats.cusum = max(0.0, stats.cusum + z - settings.ANOMALY_CUSUM_K)
+
+        if stats.cusum > settings.ANOMALY_CUSUM_H:
+            score = stats.cusum
+            stats.cusum = 0.0
+            return score
+        return None
+
+    def _check_shared_seed(self, user_id: int, client_seed: str) -> list | None:
+        users = self._seeds.get(client_seed, ())
+        if users is None:
+            self._seeds.move_to_end(client_seed)
+            return None
+
+        if user_id in users:
+            self._seeds.move_to_end(client_seed)
+            return None
+
+        users = set(users)
+        users.add(user_id)
+        if len(users) >= settings.ANOMALY_SHARED_SEED_USERS:
+            # Алерт один раз на seed
+            self._seeds[client_seed] = None
+            return sorted(users)
+
+        self._seeds[client_seed] = users
+        self._seeds.move_to_end(client_seed)
+        while len(self._seeds) > self.max_seeds:
+            self._seeds.popitem(last=False)
+        return None
+
+    # =========================
+    # ОБНОВЛЕНИЕ
+    # =========================
+
+    def observe(
+        self,
+        user_id: int,
+        bet_id: int | None,
+        win_chance: float,
+        multiplier: float,
+        amount: float,
+        profit_loss: float,
+        is_win: bool,
+        client_seed: str = None
+    ) -> list[AnomalyAlert]:
+        """
+        Учесть закоммиченную ставку
+
+        Вызывается только после commit ставки: откаченная ставка не должна
+        сдвигать серии и EWMA. Алерты считаются по живому состоянию под
+        блокировкой, поэтому параллельные ставки игрока учитываются по
+        очереди и cooldown не обходится.
+
+        Args:
+            win_chance: Шанс выигрыша в процентах (1-95)
+
+        Returns:
+            Новые алерты (ещё не добавлены в сессию - пишутся после ставки)
+        """
+        now = self._clock()
+        chance = win_chance / 100
+        alerts = []
+
+        with self._lock:
+            stats = self._stats(user_id, now)
+            stats.bets += 1
+            stats.last_seen = now
+
+            probability = self._check_streak(stats, is_win, chance)
+            if probability is not None:
+                alerts.append(self._alert(
+                    stats, user_id, bet_id, "win_streak", probability, now, probability=probability
+                ))
+
+            z = self._check_win_rate(stats, is_win, chance)
+            if z is not None:
+                alerts.append(self._alert(
+                    stats, user_id, bet_id, "win_rate", z, now,
+                    ewma_excess=round(stats.ewma_excess, 4), bets=stats.bets
+                ))
+
+            cusum = self._check_drift(stats, chance, multiplier, amount, profit_loss)
+            if cusum is not None:
+                alerts.append(self._alert(stats, user_id, bet_id, "profit_drift", cusum, now, bets=stats.bets))
+
+            if client_seed is not None:
+                users = self._check_shared_seed(user_id, client_seed)
+                if users is not None:
+                    alerts.append(self._alert(
+                        stats, user_id, bet_id, "shared_seed", len(users), now,
+                        client_seed=client_seed, user_ids=users
+                    ))
+
+        return [alert for alert in alerts if alert is not None]
+
+
+anomaly_detector = AnomalyDetector()
@@ -1,13 +1,17 @@
+import time
+import uuid
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
 import bcrypt  # ← ИЗМЕНИЛИ: используем bcrypt напрямую
 from fastapi import Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordBearer
+from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 
 from app.config import settings
-from app.database import get_db
+from app.database import get_db, shard_router
 from app.models.user import User
+from app.models.user_directory import UserDirectory
+from app.services.revocation import revocation_list
 
 # =========================
 # НАСТРОЙКИ БЕЗОПАСНОСТИ
@@ -33,7 +37,7 @@ def get_password_hash(password: str) -> str:
     """
     Захешировать пароль
     """
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(settings.BCRYPT_ROUNDS)
     hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
     return hashed.decode('utf-8')
 
@@ -57,7 +61,9 @@ def create_access_token(data: dict) -> str:
     expire = datetime.utcnow() + timedelta(
         minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
     )
-    to_encode.update({"exp": expire})
+    
+    # jti - для отзыва конкретного токена, iat (с долями секунды) - для бана
+    to_encode.update({"exp": expire, "iat": time.time(), "jti": uuid.uuid4().hex})
     
     # Кодируем токен
     encoded_jwt = jwt.encode(
@@ -88,17 +94,117 @@ def decode_access_token(token: str) -> dict:
     )
     return payload
 
+def create_user_token(user: User, db: Session) -> str:
+    """
+    Создать JWT токен пользователя
+    
+    Кроме username кладём ID и номер шарда (если шардирование
+    включено), чтобы запросы шли сразу в нужную БД.
+    
+    Args:
+        user: Пользователь
+        db: Сессия, из которой загружен пользователь
+    """
+    data = {"sub": user.username, "uid": user.id}
+    if "shard" in db.info:
+        data["shard"] = db.info["shard"]
+    return create_access_token(data=data)
+
 # =========================
-# DEPENDENCY ДЛЯ ПОЛУЧЕНИЯ ТЕКУЩЕГО ПОЛЬЗОВАТЕЛЯ
+# DEPENDENCY ДЛЯ СЕССИИ С ДАННЫМИ ИГРОКА
 # =========================
 
-async def get_current_user(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+def get_user_db(
     token: str = Depends(oauth2_scheme),
     db: Session = Depends(get_db)
+):
+    """
+    Сессия БД с данными текущего игрока
+    
+    Без шардирования - та же сессия, что и get_db. С шардированием -
+    сессия шарда из claim'а shard токена; для старых токенов без
+    claim'а шард ищется в user_directory.
+    
+    Raises:
+        HTTPException 401: Если токен невалидный или игрок не найден
+    """
+    if not shard_router.enabled:
+        yield db
+        return
+    
+    try:
+        payload = decode_access_token(token)
+    except JWTError:
+        raise _credentials_exception()
+    
+    shard = payload.get("shard")
+    if shard is None:
+        entry = db.query(UserDirectory).filter(
+            UserDirectory.username == payload.get("sub")
+        ).first()
+        if entry is None:
+            raise _credentials_exception()
+        shard = entry.shard
+    
+    user_db = shard_router.session(shard)
+    try:
+        yield user_db
+    finally:
+        user_db.close()
+
+def get_login_db(
+    form_data: OAuth2PasswordRequestForm = Depends(),
+    db: Session = Depends(get_db)
+):
+    """
+    Сессия БД, в которой лежит входящий игрок (по username из формы логина)
+    
+    Raises:
+        HTTPException 401: Если игрока нет в user_directory
+    """
+    if not shard_router.enabled:
+        yield db
+        return
+    
+    entry = db.query(UserDirectory).filter(
+        UserDirectory.username == form_data.username
+    ).first()
+    if entry is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect username or password",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    user_db = shard_router.session(entry.shard)
+    try:
+        yield user_db
+    finally:
+        user_db.close()
+
+# =========================
+# DEPENDENCY ДЛЯ ПОЛУЧЕНИЯ ТЕКУЩЕГО ПОЛЬЗОВАТЕЛЯ
+# =========================
+
+def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_user_db)
 ) -> User:
     """
     Получить текущего пользователя из JWT токена
     
+    Обычная (не async) функция: запрос к БД и ожидание соединения из
+    пула идут в пуле потоков. В async-варианте они блокировали event
+    loop, и при исчерпанном пуле соединений воркер вставал до
+    pool_timeout (нашёл benchmarks/stress_bets.py).
+    
     Эта функция используется как Dependency в защищённых endpoints:
     
     @app.get("/protected")
@@ -107,19 +213,15 @@ async def get_current_user(
     
     Args:
         token: JWT токен из заголовка Authorization
-        db: Сессия БД
+        db: Сессия БД с данными игрока (шард)
     
     Returns:
         Объект User из БД
     
     Raises:
-        HTTPException 401: Если токен невалидный или пользователь не найден
+        HTTPException 401: Если токен невалидный, отозван или пользователь не найден
     """
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+    credentials_exception = _credentials_exception()
     
     try:
         # Декодируем токен
@@ -132,14 +234,35 @@ async def get_current_user(
     except JWTError:
         raise credentials_exception
     
+    # Отзыв (logout, бан) проверяется в памяти, без запроса к БД
+    if revocation_list.is_revoked(payload):
+        raise credentials_exception
+    
     # Ищем пользователя в БД
     user = db.query(User).filter(User.username == username).first()
     
-    if user is None:
+    if user is None or user.is_banned:
         raise credentials_exception
     
     return user
 
+async def get_current_admin(
+    current_user: User = Depends(get_current_user)
+) -> User:
+    """
+    Получить текущего пользователя-администратора
+    
+    Raises:
+        HTTPException 403: Если пользователь не администратор
+    """
+    if not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin privileges required"
+        )
+    
+    return current_user
+
 # =========================
 # ФУНКЦИЯ ДЛЯ АУТЕНТИФИКАЦИИ
 # =========================
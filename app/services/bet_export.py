@@ -0,0 +1,152 @@
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import Iterable, Iterator
+from sqlalchemy.orm import Session
+
+from app.models.bet import Bet
+
+EXPORT_COLUMNS = ["id", "user_id", "game_id", "amount", "result", "profit_loss", "timestamp", "game_data"]
+
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson"
+}
+
+# Сколько строк копим перед отдачей очередного куска
+ROWS_PER_CHUNK = 1000
+
+
+def iter_bet_rows(
+    db: Session,
+    user_id: int = None,
+    game_id: int = None,
+    start: datetime = None,
+    end: datetime = None,
+    batch_size: int = 5000
+) -> Iterator[tuple]:
+    """
+    Потоково прочитать ставки
+
+    yield_per включает серверный курсор (stream_results) на Postgres:
+    в памяти одновременно не больше batch_size строк.
+
+    Args:
+        db: Сессия БД
+        user_id: Фильтр по пользователю
+        game_id: Фильтр по игре
+        start: Начало периода (включительно)
+        end: Конец периода (не включительно)
+        batch_size: Строк за одно чтение из курсора
+
+    Yields:
+        Кортежи в порядке EXPORT_COLUMNS
+    """
+    query = db.query(
+        Bet.id, Bet.user_id, Bet.game_id, Bet.amount,
+        Bet.result, Bet.profit_loss, Bet.timestamp, Bet.game_data
+    )
+
+    if user_id is not None:
+        query = query.filter(Bet.user_id == user_id)
+    if game_id is not None:
+        query = query.filter(Bet.game_id == game_id)
+    if start is not None:
+        query = query.filter(Bet.timestamp >= start)
+    if end is not None:
+        query = query.filter(Bet.timestamp < end)
+
+    yield from query.order_by(Bet.id).yield_per(batch_size)
+
+
+def encode_csv(rows: Iterable[tuple]) -> Iterator[bytes]:
+    """
+    Закодировать строки в CSV кусками
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+
+    pending = 0
+    for row in rows:
+        writer.writerow(row[:6] + (row[6].isoformat(), row[7]))
+        pending += 1
+
+        if pending >= ROWS_PER_CHUNK:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+
+    yield buffer.getvalue().encode("utf-8")
+
+
+def encode_ndjson(rows: Iterable[tuple]) -> Iterator[bytes]:
+    """
+    Закодировать строки в NDJSON кусками
+
+    game_data уже хранится как JSON - вставляем его как есть,
+    без разбора и повторной сериализации.
+    """
+    lines = []
+    for bet_id, user_id, game_id, amount, result, profit_loss, timestamp, game_data in rows:
+        head = json.dumps({
+            "id": bet_id,
+            "user_id": user_id,
+            "game_id": game_id,
+            "amount": amount,
+            "result": result,
+            "profit_loss": profit_loss,
+            "timestamp": timestamp.isoformat()
+        })
+        lines.append(f'{head[:-1]}, "game_data": {game_data or "null"}}}\n')
+
+        if len(lines) >= ROWS_PER_CHUNK:
+            yield "".join(lines).encode("utf-8")
+            lines.clear()
+
+    yield "".join(lines).encode("utf-8")
+
+
+def gzip_stream(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """
+    Сжимать поток в gzip на лету
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31 - формат gzip
+
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+
+    yield compressor.flush()
+
+
+def export_bets(db: Session, export_format: str = "csv", compress: bool = False, **filters) -> Iterator[bytes]:
+    """
+    Потоковая выгрузка ставок
+
+    Args:
+        db: Сессия БД
+        export_format: "csv" или "ndjson"
+        compress: Сжимать в gzip
+        **filters: Фильтры iter_bet_rows (user_id, game_id, start, end)
+
+    Yields:
+        Куски файла выгрузки
+
+    Raises:
+        ValueError: Если формат не поддерживается
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {export_format}")
+
+    encoder = encode_csv if export_format == "csv" else encode_ndjson
+    chunks = encoder(iter_bet_rows(db, **filters))
+
+    if compress:
+        chunks = gzip_stream(chunks)
+
+    return chunks
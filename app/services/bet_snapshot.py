@@ -0,0 +1,272 @@
+import json
+import os
+from datetime import datetime, timedelta
+from itertools import takewhile
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.models.bet import Bet
+
+# Колонки снапшота и их типы NumPy (little-endian, фиксированная ширина)
+COLUMNS = {
+    "id": "<i8",
+    "user_id": "<i8",
+    "game_id": "<i4",
+    "amount": "<f8",
+    "profit_loss": "<f8",
+    "result": "i1",            # 1 - выигрыш, 0 - проигрыш
+    "timestamp": "<M8[us]"     # datetime64, UTC
+}
+
+META_FILE = "meta.json"
+
+# Группировка по времени: ключ group_by -> тип datetime64
+TIME_BUCKETS = {"hour": "M8[h]", "day": "M8[D]"}
+
+
+# =========================
+# ЗАПИСЬ СНАПШОТА
+# =========================
+
+def _read_meta(snapshot_dir: str) -> dict:
+    path = os.path.join(snapshot_dir, META_FILE)
+    if not os.path.exists(path):
+        return {"rows": 0, "last_bet_id": 0, "columns": COLUMNS}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _write_meta(snapshot_dir: str, meta: dict) -> None:
+    # Атомарная замена: читатели видят либо старые, либо новые метаданные
+    path = os.path.join(snapshot_dir, META_FILE)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(meta, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _column_path(snapshot_dir: str, column: str) -> str:
+    return os.path.join(snapshot_dir, f"{column}.bin")
+
+
+def append_snapshot(
+    db: Session,
+    snapshot_dir: str,
+    batch_size: int = 100_000,
+    grace_seconds: float = 5.0
+) -> int:
+    """
+    Дописать в снапшот ставки, появившиеся после последнего Bet.id
+
+    Ставки берутся подряд по id до первой моложе grace_seconds.
+
+    Данные колонок дописываются в конец файлов, а meta.json
+    (число строк и watermark) обновляется только после fsync.
+    Если прошлый запуск упал посередине, хвосты за пределами
+    meta.rows отрезаются перед записью.
+
+    Args:
+        db: Сессия БД
+        snapshot_dir: Каталог снапшота
+        batch_size: Строк за одну порцию
+        grace_seconds: Не берём ставки моложе этого (их транзакции могут быть не закоммичены)
+
+    Returns:
+        Сколько строк добавлено
+    """
+    os.makedirs(snapshot_dir, exist_ok=True)
+    meta = _read_meta(snapshot_dir)
+
+    # Откатываем недописанный хвост
+    for column, dtype in COLUMNS.items():
+        path = _column_path(snapshot_dir, column)
+        if not os.path.exists(path):
+            open(path, "wb").close()
+        expected = meta["rows"] * np.dtype(dtype).itemsize
+        if os.path.getsize(path) != expected:
+            os.truncate(path, expected)
+
+    cutoff = datetime.utcnow() - timedelta(seconds=grace_seconds)
+    added = 0
+
+    while True:
+        fetched = db.query(
+            Bet.id, Bet.user_id, Bet.game_id, Bet.amount,
+            Bet.profit_loss, Bet.result, Bet.timestamp
+        ).filter(
+            Bet.id > meta["last_bet_id"]
+        ).order_by(Bet.id).limit(batch_size).all()
+
+        # Время ставок может идти не по порядку id: останавливаемся на
+        # первой слишком свежей, иначе watermark перескочит через неё
+        rows = list(takewhile(lambda row: row.timestamp < cutoff, fetched))
+
+        if not rows:
+            break
+
+        ids, user_ids, game_ids, amounts, profit_losses, results, timestamps = zip(*rows)
+        arrays = {
+            "id": np.array(ids, dtype=COLUMNS["id"]),
+            "user_id": np.array(user_ids, dtype=COLUMNS["user_id"]),
+            "game_id": np.array(game_ids, dtype=COLUMNS["game_id"]),
+            "amount": np.array(amounts, dtype=COLUMNS["amount"]),
+            "profit_loss": np.array(profit_losses, dtype=COLUMNS["profit_loss"]),
+            "result": np.array([r == "win" for r in results], dtype=COLUMNS["result"]),
+            "timestamp": np.array(timestamps, dtype=COLUMNS["timestamp"])
+        }
+
+        for column, array in arrays.items():
+            with open(_column_path(snapshot_dir, column), "ab") as f:
+                f.write(array.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+
+        meta["rows"] += len(rows)
+        meta["last_bet_id"] = int(ids[-1])
+        meta["updated_at"] = datetime.utcnow().isoformat()
+        _write_meta(snapshot_dir, meta)
+
+        added += len(rows)
+        if len(rows) < batch_size:
+            break
+
+    return added
+
+
+# =========================
+# ЧТЕНИЕ И АНАЛИТИКА
+# =========================
+
+class BetSnapshot:
+    """
+    Колоночный снапшот ставок через np.memmap
+
+    Колонки отображаются в память только для чтения: несколько
+    процессов-аналитиков делят одни и те же страницы page cache,
+    без копий и без нагрузки на БД.
+    """
+
+    def __init__(self, snapshot_dir: str):
+        self.snapshot_dir = snapshot_dir
+        self.meta = _read_meta(snapshot_dir)
+        self.rows = self.meta["rows"]
+        self._columns = {}
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def column(self, name: str) -> np.ndarray:
+        """
+        Колонка как массив NumPy (memmap, без чтения файла целиком)
+        """
+        if name not in COLUMNS:
+            raise KeyError(f"Unknown column: {name}")
+
+        if name not in self._columns:
+            if self.rows == 0:
+                self._columns[name] = np.empty(0, dtype=COLUMNS[name])
+            else:
+                self._columns[name] = np.memmap(
+                    _column_path(self.snapshot_dir, name),
+                    dtype=COLUMNS[name],
+                    mode="r",
+                    shape=(self.rows,)
+                )
+        return self._columns[name]
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.column(name)
+
+    def mask(
+        self,
+        user_id: int = None,
+        game_id: int = None,
+        start: datetime = None,
+        end: datetime = None,
+        result: str = None
+    ) -> np.ndarray:
+        """
+        Векторный фильтр строк
+
+        Returns:
+            Булев массив длины len(snapshot)
+        """
+        mask = np.ones(self.rows, dtype=bool)
+
+        if user_id is not None:
+            mask &= self.column("user_id") == user_id
+        if game_id is not None:
+            mask &= self.column("game_id") == game_id
+        if start is not None:
+            mask &= self.column("timestamp") >= np.datetime64(start, "us")
+        if end is not None:
+            mask &= self.column("timestamp") < np.datetime64(end, "us")
+        if result is not None:
+            mask &= self.column("result") == (1 if result == "win" else 0)
+
+        return mask
+
+    def summary(self, mask: np.ndarray = None) -> dict:
+        """
+        Оборот, выплаты, GGR и RTP по выбранным строкам
+        """
+        amount = self.column("amount")
+        profit_loss = self.column("profit_loss")
+        result = self.column("result")
+
+        if mask is not None:
+            amount, profit_loss, result = amount[mask], profit_loss[mask], result[mask]
+
+        turnover = float(amount.sum())
+        payout = turnover + float(profit_loss.sum())
+
+        return {
+            "bets_count": int(amount.size),
+            "wins_count": int(result.sum()),
+            "turnover": turnover,
+            "payout": payout,
+            "ggr": turnover - payout,
+            "rtp": payout / turnover if turnover else None
+        }
+
+    def group_by(self, key: str, mask: np.ndarray = None) -> dict:
+        """
+        Агрегаты по значениям колонки (user_id, game_id, ...)
+
+        Для группировки по времени передайте key="hour" или key="day".
+
+        Returns:
+            {значение ключа: summary}
+        """
+        if key in TIME_BUCKETS:
+            keys = self.column("timestamp").astype(TIME_BUCKETS[key])
+        else:
+            keys = self.column(key)
+
+        amount = self.column("amount")
+        profit_loss = self.column("profit_loss")
+        result = self.column("result")
+
+        if mask is not None:
+            keys, amount, profit_loss, result = keys[mask], amount[mask], profit_loss[mask], result[mask]
+
+        unique, inverse = np.unique(keys, return_inverse=True)
+        counts = np.bincount(inverse, minlength=unique.size)
+        wins = np.bincount(inverse, weights=result, minlength=unique.size)
+        turnover = np.bincount(inverse, weights=amount, minlength=unique.size)
+        payout = turnover + np.bincount(inverse, weights=profit_loss, minlength=unique.size)
+
+        groups = {}
+        for i, value in enumerate(unique.tolist()):
+            groups[value] = {
+                "bets_count": int(counts[i]),
+                "wins_count": int(wins[i]),
+                "turnover": float(turnover[i]),
+                "payout": float(payout[i]),
+                "ggr": float(turnover[i] - payout[i]),
+                "rtp": float(payout[i] / turnover[i]) if turnover[i] else None
+            }
+        return groups
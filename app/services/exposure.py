@@ -0,0 +1,264 @@
+import heapq
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.bet import Bet
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class ExposureLimitExceeded(ValueError):
+    """
+    Ставка отклонена лимитами риска казино
+    """
+
+
+class RollingSum:
+    """
+    Скользящая сумма за окно: кольцевой буфер из фиксированного числа корзин
+
+    Добавление и чтение - O(1) (амортизированно): устаревшие корзины
+    вычитаются из общей суммы по мере сдвига времени.
+    """
+
+    def __init__(self, window_seconds: float, buckets: int = 60):
+        self.width = window_seconds / buckets
+        self.buckets = buckets
+        self._values = [0.0] * buckets
+        self._total = 0.0
+        self._head = None  # номер последней корзины (время / ширина)
+
+    def _advance(self, index: int) -> None:
+        if self._head is None:
+            self._head = index
+            return
+
+        if index <= self._head:
+            return
+
+        # Обнуляем корзины, которые выпали из окна
+        for expired in range(self._head + 1, min(index, self._head + self.buckets) + 1):
+            slot = expired % self.buckets
+            self._total -= self._values[slot]
+            self._values[slot] = 0.0
+
+        self._head = index
+
+    def add(self, amount: float, now: float) -> None:
+        index = int(now // self.width)
+        self._advance(index)
+
+        # Запоздавшее событие старше окна не учитываем
+        if index <= self._head - self.buckets:
+            return
+
+        self._values[index % self.buckets] += amount
+        self._total += amount
+
+    def total(self, now: float) -> float:
+        self._advance(int(now // self.width))
+        return self._total
+
+
+class ExposureTracker:
+    """
+    Риски казино в памяти воркера
+
+    Отслеживает:
+    - P&L казино за скользящее окно
+    - максимальную выплату по ставкам «в полёте» (от проверки до расчёта)
+    - чистый выигрыш каждого игрока за окно
+
+    Проверка ставки - O(1) без запросов к БД. Состояние периодически
+    сверяется с таблицей bets (reconcile), чтобы не копить расхождения
+    и учитывать ставки других воркеров.
+
+    Ограничение: трекер свой у каждого воркера, общего хранилища нет.
+    Резервы «в полёте» другие воркеры не видят вовсе, а их ставки в
+    суммах за окно появляются только после reconcile. С N воркерами
+    лимит ставок «в полёте» фактически N x EXPOSURE_MAX_PENDING_PAYOUT,
+    а лимиты за окно между сверками могут быть превышены до N раз.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Окно из настроек - при первой ставке, не при импорте
+        self._house_pnl = None
+        self._user_net_win: OrderedDict[int, RollingSum] = OrderedDict()
+        self._pending_payout = 0.0
+
+        self.pending_gauge = metrics.gauge("exposure_pending_payout", "Max payout of in-flight bets")
+        self.house_pnl_gauge = metrics.gauge("exposure_house_pnl_window", "House P&L over the window")
+        self.rejections = metrics.counter("exposure_rejections_total", "Bets rejected by exposure limits")
+
+    def _house_sum(self) -> RollingSum:
+        if self._house_pnl is None:
+            self._house_pnl = RollingSum(settings.EXPOSURE_WINDOW_SECONDS)
+        return self._house_pnl
+
+    def _user_sum(self, user_id: int) -> RollingSum:
+        user_sum = self._user_net_win.get(user_id)
+
+        if user_sum is None:
+            user_sum = RollingSum(settings.EXPOSURE_WINDOW_SECONDS)
+            self._user_net_win[user_id] = user_sum
+            # Вытесняем самых давно неактивных игроков
+            while len(self._user_net_win) > settings.EXPOSURE_MAX_TRACKED_USERS:
+                self._user_net_win.popitem(last=False)
+        else:
+            self._user_net_win.move_to_end(user_id)
+
+        return user_sum
+
+    def _reject(self, reason: str):
+        self.rejections.inc()
+        raise ExposureLimitExceeded(reason)
+
+    def reserve(self, user_id: int, bet_amount: float, multiplier: float) -> float:
+        """
+        Проверить лимиты и зарезервировать максимальную выплату ставки
+
+        Args:
+            user_id: ID пользователя
+            bet_amount: Размер ставки
+            multiplier: Множитель выплаты
+
+        Returns:
+            Зарезервированная сумма (передать в settle/release)
+
+        Raises:
+            ExposureLimitExceeded: Если ставка нарушает лимиты
+        """
+        if not settings.EXPOSURE_ENABLED:
+            return 0.0
+
+        # Худший случай для казино: игрок выигрывает
+        potential_win = bet_amount * multiplier - bet_amount
+        now = time.time()
+
+        with self._lock:
+            if potential_win > settings.EXPOSURE_MAX_BET_PAYOUT:
+                self._reject("Potential payout exceeds the house limit")
+
+            if self._pending_payout + potential_win > settings.EXPOSURE_MAX_PENDING_PAYOUT:
+                self._reject("House exposure limit reached, try again later")
+
+            house_loss = -self._house_sum().total(now)
+            if house_loss + potential_win > settings.EXPOSURE_MAX_HOUSE_LOSS:
+                self._reject("House exposure limit reached, try again later")
+
+            user_net_win = self._user_sum(user_id).total(now)
+            if user_net_win + potential_win > settings.EXPOSURE_MAX_USER_NET_WIN:
+                self._reject("Player win limit reached, try again later")
+
+            self._pending_payout += potential_win
+            self.pending_gauge.set(self._pending_payout)
+
+        return potential_win
+
+    def release(self, reserved: float) -> None:
+        """
+        Снять резерв ставки, которая не состоялась
+        """
+        if not reserved:
+            return
+
+        with self._lock:
+            self._pending_payout = max(0.0, self._pending_payout - reserved)
+            self.pending_gauge.set(self._pending_payout)
+
+    def settle(self, user_id: int, reserved: float, profit_loss: float) -> None:
+        """
+        Учесть рассчитанную ставку: снять резерв и обновить P&L
+
+        Args:
+            user_id: ID пользователя
+            reserved: Результат reserve()
+            profit_loss: Прибыль/убыток игрока
+        """
+        if not settings.EXPOSURE_ENABLED:
+            return
+
+        now = time.time()
+
+        with self._lock:
+            self._pending_payout = max(0.0, self._pending_payout - reserved)
+            self._house_sum().add(-profit_loss, now)
+            self._user_sum(user_id).add(profit_loss, now)
+
+            self.pending_gauge.set(self._pending_payout)
+            self.house_pnl_gauge.set(self._house_sum().total(now))
+
+    def snapshot(self) -> dict:
+        """
+        Текущие показатели риска
+        """
+        now = time.time()
+        with self._lock:
+            return {
+                "house_pnl_window": self._house_sum().total(now),
+                "pending_payout": self._pending_payout,
+                "tracked_users": len(self._user_net_win)
+            }
+
+    def reconcile(self, *sessions: Session) -> int:
+        """
+        Пересобрать P&L за окно из таблицы bets
+
+        С шардированием ставки лежат на всех шардах: строки шардов
+        сливаются по времени, состояние заменяется один раз целиком.
+        Резервы «в полёте» не трогаем - они живут только в памяти.
+
+        Args:
+            sessions: Сессии БД со ставками (основная или каждый шард)
+
+        Returns:
+            Сколько ставок учтено
+        """
+        window = settings.EXPOSURE_WINDOW_SECONDS
+        since = datetime.utcnow() - timedelta(seconds=window)
+
+        house_pnl = RollingSum(window)
+        user_net_win: OrderedDict[int, RollingSum] = OrderedDict()
+        count = 0
+
+        rows = heapq.merge(
+            *(
+                db.query(Bet.user_id, Bet.profit_loss, Bet.timestamp).filter(
+                    Bet.timestamp >= since
+                ).order_by(Bet.timestamp).yield_per(10000)
+                for db in sessions
+            ),
+            key=lambda row: row[2]
+        )
+
+        for user_id, profit_loss, timestamp in rows:
+            at = timestamp.replace(tzinfo=timezone.utc).timestamp()
+            house_pnl.add(-profit_loss, at)
+
+            user_sum = user_net_win.get(user_id)
+            if user_sum is None:
+                user_sum = user_net_win[user_id] = RollingSum(window)
+            else:
+                user_net_win.move_to_end(user_id)
+            user_sum.add(profit_loss, at)
+            count += 1
+
+        while len(user_net_win) > settings.EXPOSURE_MAX_TRACKED_USERS:
+            user_net_win.popitem(last=False)
+
+        with self._lock:
+            self._house_pnl = house_pnl
+            self._user_net_win = user_net_win
+            self.house_pnl_gauge.set(house_pnl.total(time.time()))
+
+        return count
+
+
+exposure_tracker = ExposureTracker()
@@ -0,0 +1,91 @@
+from dataclasses import dataclass
+from sqlalchemy.orm import Session
+
+from app.models.game import Game
+from app.services.invalidation import VersionedCache, invalidation_bus
+
+TOPIC = "games"
+
+
+@dataclass(frozen=True, slots=True)
+class GameInfo:
+    """
+    Настройки игры, отвязанные от сессии (можно держать в кеше)
+    """
+    id: int
+    name: str
+    type: str
+    house_edge: float
+    min_bet: float
+    max_bet: float
+
+    @classmethod
+    def from_model(cls, game: Game) -> "GameInfo":
+        return cls(
+            id=game.id,
+            name=game.name,
+            type=game.type,
+            house_edge=game.house_edge,
+            min_bet=game.min_bet,
+            max_bet=game.max_bet
+        )
+
+
+class GameCatalog:
+    """
+    Кеш каталога игр воркера - ставка не читает games из БД
+
+    Игра по id - в VersionedCache темы "games" (сбрасывается через
+    шину инвалидации при изменении игры). Тип игры не меняется,
+    поэтому тип -> id кешируется без инвалидации.
+    """
+
+    def __init__(self, bus=None):
+        self._games = VersionedCache(TOPIC, bus)
+        self._ids_by_type = {}
+
+    def clear(self) -> None:
+        self._games.invalidate()
+        self._ids_by_type.clear()
+
+    def warm(self, db: Session) -> int:
+        """
+        Загрузить весь каталог одним запросом (прогрев воркера)
+
+        Returns:
+            Сколько игр загружено
+        """
+        games = db.query(Game).order_by(Game.id).all()
+        for game in games:
+            info = GameInfo.from_model(game)
+            self._ids_by_type.setdefault(game.type, game.id)
+            self._games.get(game.id, lambda info=info: info)
+        return len(games)
+
+    def get(self, db: Session, game_id: int) -> GameInfo | None:
+        def load():
+            game = db.query(Game).filter(Game.id == game_id).first()
+            return GameInfo.from_model(game) if game else None
+
+        return self._games.get(game_id, load)
+
+    def by_type(self, db: Session, game_type: str) -> GameInfo | None:
+        game_id = self._ids_by_type.get(game_type)
+        if game_id is not None:
+            return self.get(db, game_id)
+
+        game = db.query(Game).filter(Game.type == game_type).order_by(Game.id).first()
+        if game is None:
+            return None
+        self._ids_by_type[game_type] = game.id
+        return self.get(db, game.id)
+
+
+game_catalog = GameCatalog()
+
+
+def publish_game_update(game_id: int) -> None:
+    """
+    Сбросить игру в кешах всех воркеров (после commit)
+    """
+    invalidation_bus.publish(TOPIC, game_id)
@@ -0,0 +1,343 @@
+import hashlib
+import hmac
+from abc import ABC, abstractmethod
+from typing import Iterable
+
+import numpy as np
+
+# Размер одного HMAC-SHA256 в байтах
+DIGEST_SIZE = 32
+
+# Знаменатель для перевода 4 байт в число [0, 1)
+UINT32_RANGE = 2 ** 32
+
+
+# =========================
+# ПОТОК БАЙТОВ PROVABLY FAIR
+# =========================
+
+def round_message(client_seed: str, nonce: int, round_index: int) -> bytes:
+    """
+    Сообщение HMAC для раунда потока
+
+    Раунд 0 - ровно "{client_seed}:{nonce}", как в исходном алгоритме
+    Nvuti: все прошлые ставки проверяются без изменений. Следующие
+    раунды - "{client_seed}:{nonce}:{round}".
+    """
+    if round_index == 0:
+        return f"{client_seed}:{nonce}".encode("utf-8")
+    return f"{client_seed}:{nonce}:{round_index}".encode("utf-8")
+
+
+def _keyed_hmac(server_seed: str):
+    # Заготовка с уже обработанным ключом: copy() дешевле hmac.new()
+    return hmac.new(server_seed.encode("utf-8"), digestmod=hashlib.sha256)
+
+
+class ByteStream:
+    """
+    Поток байтов одной ставки: HMAC-SHA256(server_seed, сообщение раунда)
+
+    Байты читаются курсором. Следующий HMAC (раунд) считается, только
+    когда байты текущего кончились - игра с несколькими исходами
+    (серия бросков монеты, карты) тратит один HMAC на много исходов.
+    """
+
+    def __init__(self, server_seed: str, client_seed: str, nonce: int, keyed=None):
+        """
+        Args:
+            server_seed: Серверный seed
+            client_seed: Клиентский seed
+            nonce: Номер игры
+            keyed: Готовая заготовка HMAC с ключом server_seed (для пакетов)
+        """
+        self.client_seed = client_seed
+        self.nonce = nonce
+        self._keyed = keyed or _keyed_hmac(server_seed)
+        self._buffer = b""
+        self.cursor = 0
+        self.rounds = 0
+
+    def _extend(self) -> None:
+        mac = self._keyed.copy()
+        mac.update(round_message(self.client_seed, self.nonce, self.rounds))
+        # Прочитанное больше не нужно - в буфере только хвост
+        self._buffer = self._buffer[self.cursor:] + mac.digest()
+        self.cursor = 0
+        self.rounds += 1
+
+    def read(self, size: int) -> bytes:
+        """
+        Следующие size байт потока
+        """
+        if size < 0:
+            raise ValueError("size must be non-negative")
+        while len(self._buffer) - self.cursor < size:
+            self._extend()
+        chunk = self._buffer[self.cursor:self.cursor + size]
+        self.cursor += size
+        return chunk
+
+    def uint32(self) -> int:
+        """
+        Следующие 4 байта как big-endian число (первые 8 hex символов HMAC)
+        """
+        return int.from_bytes(self.read(4), "big")
+
+    def unit(self) -> float:
+        """
+        Число [0, 1) из 4 байт
+        """
+        return self.uint32() / UINT32_RANGE
+
+    def below(self, limit: int) -> int:
+        """
+        Целое [0, limit) - номер карты, позиция и т.п.
+
+        Из 4 байт: смещение из-за неделимости 2^32 на limit
+        не больше limit / 2^32.
+        """
+        if limit <= 0:
+            raise ValueError("limit must be positive")
+        return int(self.unit() * limit)
+
+
+def first_digests(server_seed: str, client_seed: str, nonces: Iterable[int]) -> bytes:
+    """
+    HMAC раунда 0 для каждого nonce, склеенные подряд (по 32 байта)
+
+    Ключ обрабатывается один раз на весь пакет.
+    """
+    keyed = _keyed_hmac(server_seed)
+    digests = []
+    for nonce in nonces:
+        mac = keyed.copy()
+        mac.update(round_message(client_seed, nonce, 0))
+        digests.append(mac.digest())
+    return b"".join(digests)
+
+
+# =========================
+# ДВИЖКИ ИГР
+# =========================
+
+class GameEngine(ABC):
+    """
+    Правила генерации исхода игры из потока байтов
+
+    roll() - исход одной ставки (обязателен: движок без него не
+    зарегистрируется), roll_batch() - пакетное ядро для симуляций
+    и массовой проверки (по умолчанию - цикл по roll()).
+
+    Ставки на игру (POST /api/games/{game_id}/bet) считает общий
+    NvutiService.play_game: движок проверяет параметры ставки
+    (bet_params), даёт шанс выигрыша в процентах (по нему считаются
+    множитель и детекторы аномалий) и решает, выиграла ли ставка.
+    """
+
+    GAME_TYPES: tuple[str, ...] = ()
+
+    # Принимает ли игра ставки напрямую (общие раунды - только через RoundBook)
+    DIRECT_BETS = True
+
+    # Имя исхода в ответе на ставку и в game_data
+    OUTCOME_FIELD = "outcome"
+
+    @abstractmethod
+    def roll(self, stream: ByteStream, **params):
+        """
+        Исход одной ставки из потока байтов
+        """
+
+    def outcome(self, server_seed: str, client_seed: str, nonce: int, **params):
+        return self.roll(ByteStream(server_seed, client_seed, nonce), **params)
+
+    def roll_batch(self, server_seed: str, client_seed: str, nonces: Iterable[int], **params) -> np.ndarray:
+        keyed = _keyed_hmac(server_seed)
+        return np.array([
+            self.roll(ByteStream(server_seed, client_seed, nonce, keyed), **params)
+            for nonce in nonces
+        ])
+
+    # =========================
+    # СТАВКИ
+    # =========================
+
+    def bet_params(self, params: dict) -> dict:
+        """
+        Проверить параметры ставки из запроса
+
+        Returns:
+            Нормализованные параметры (уходят в is_win/win_chance и game_data)
+
+        Raises:
+            ValueError: Если параметры неверны или игра не принимает ставок
+        """
+        raise ValueError(f"Game type '{self.GAME_TYPES[0]}' does not accept bets")
+
+    def win_chance(self, **params) -> float:
+        """
+        Шанс выигрыша ставки в процентах
+        """
+        raise NotImplementedError
+
+    def is_win(self, outcome, **params) -> bool:
+        raise NotImplementedError
+
+    def roll_params(self, **params) -> dict:
+        """
+        Параметры ставки, нужные roll() (по умолчанию - никакие)
+        """
+        return {}
+
+
+def _only(params: dict, allowed: set) -> None:
+    unknown = set(params) - allowed
+    if unknown:
+        raise ValueError(f"Unknown bet parameters: {', '.join(sorted(unknown))}")
+
+
+_engines: dict[str, GameEngine] = {}
+
+
+def register_engine(cls: type[GameEngine]) -> type[GameEngine]:
+    """
+    Декоратор: зарегистрировать движок для всех его Game.type
+    """
+    engine = cls()
+    for game_type in cls.GAME_TYPES:
+        if game_type in _engines:
+            raise ValueError(f"Engine for game type '{game_type}' is already registered")
+        _engines[game_type] = engine
+    return cls
+
+
+def engine_for(game_type: str) -> GameEngine:
+    """
+    Движок игры по Game.type
+
+    Raises:
+        ValueError: Если для типа нет движка
+    """
+    engine = _engines.get(game_type)
+    if engine is None:
+        raise ValueError(f"No engine for game type '{game_type}'")
+    return engine
+
+
+def registered_types() -> list[str]:
+    return sorted(_engines)
+
+
+@register_engine
+class DiceEngine(GameEngine):
+    """
+    Nvuti: число 0.00 - 99.99 из первых 4 байт HMAC
+
+    Совпадает с исходным calculate_result: int(hex[:8], 16) % 10000 / 100.
+    Ставка выигрывает, если число меньше win_chance.
+    """
+
+    GAME_TYPES = ("dice",)
+
+    OUTCOME_FIELD = "result_number"
+
+    MIN_WIN_CHANCE = 1.0
+    MAX_WIN_CHANCE = 95.0
+
+    def roll(self, stream: ByteStream) -> float:
+        return (stream.uint32() % 10000) / 100.0
+
+    def outcome(self, server_seed: str, client_seed: str, nonce: int) -> float:
+        # Путь ставки: один HMAC без объекта потока
+        digest = hmac.new(
+            server_seed.encode("utf-8"), round_message(client_seed, nonce, 0), hashlib.sha256
+        ).digest()
+        return (int.from_bytes(digest[:4], "big") % 10000) / 100.0
+
+    def roll_batch(self, server_seed: str, client_seed: str, nonces: Iterable[int]) -> np.ndarray:
+        digests = np.frombuffer(first_digests(server_seed, client_seed, nonces), dtype=np.uint8)
+        # Первые 4 байта каждого HMAC как big-endian uint32
+        words = digests.reshape(-1, DIGEST_SIZE)[:, :4].copy().view(">u4").ravel()
+        return (words % 10000) / 100.0
+
+    def bet_params(self, params: dict) -> dict:
+        _only(params, {"win_chance"})
+        try:
+            win_chance = float(params["win_chance"])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError("win_chance is required")
+        if not (self.MIN_WIN_CHANCE <= win_chance <= self.MAX_WIN_CHANCE):
+            raise ValueError(
+                f"Win chance must be between {self.MIN_WIN_CHANCE} and {self.MAX_WIN_CHANCE}"
+            )
+        return {"win_chance": win_chance}
+
+    def win_chance(self, win_chance: float) -> float:
+        return win_chance
+
+    def is_win(self, outcome: float, win_chance: float) -> bool:
+        return outcome < win_chance
+
+
+@register_engine
+class RoundDiceEngine(DiceEngine):
+    """
+    Nvuti общих раундов: тот же бросок, ставки - только через RoundBook
+    """
+
+    GAME_TYPES = ("dice_round",)
+
+    DIRECT_BETS = False
+
+
+@register_engine
+class CoinFlipEngine(GameEngine):
+    """
+    Серия бросков монеты: один бит потока на бросок
+
+    Один HMAC даёт 256 бросков; True - орёл. Ставка на серию
+    выигрывает, если все броски выпали на сторону игрока.
+    """
+
+    GAME_TYPES = ("coinflip",)
+
+    MAX_FLIPS = 1000
+    # Длиннее серии - множитель за пределами разумных лимитов риска
+    MAX_BET_FLIPS = 10
+
+    def _check(self, flips: int) -> None:
+        if not (1 <= flips <= self.MAX_FLIPS):
+            raise ValueError(f"Flips must be between 1 and {self.MAX_FLIPS}")
+
+    def roll(self, stream: ByteStream, flips: int = 1) -> list[bool]:
+        self._check(flips)
+        bits = np.unpackbits(np.frombuffer(stream.read((flips + 7) // 8), dtype=np.uint8))
+        return bits[:flips].astype(bool).tolist()
+
+    def roll_batch(self, server_seed: str, client_seed: str, nonces: Iterable[int], flips: int = 1) -> np.ndarray:
+        self._check(flips)
+        if flips > DIGEST_SIZE * 8:
+            return super().roll_batch(server_seed, client_seed, nonces, flips=flips)
+        digests = np.frombuffer(first_digests(server_seed, client_seed, nonces), dtype=np.uint8)
+        bits = np.unpackbits(digests.reshape(-1, DIGEST_SIZE), axis=1)
+        return bits[:, :flips].astype(bool)
+
+    def bet_params(self, params: dict) -> dict:
+        _only(params, {"flips", "heads"})
+        flips = params.get("flips", 1)
+        heads = params.get("heads", True)
+        if not isinstance(flips, int) or isinstance(flips, bool) or not (1 <= flips <= self.MAX_BET_FLIPS):
+            raise ValueError(f"Flips must be an integer between 1 and {self.MAX_BET_FLIPS}")
+        if not isinstance(heads, bool):
+            raise ValueError("heads must be true or false")
+        return {"flips": flips, "heads": heads}
+
+    def win_chance(self, flips: int, heads: bool) -> float:
+        return 100.0 / 2 ** flips
+
+    def is_win(self, outcome: list[bool], flips: int, heads: bool) -> bool:
+        return all(flip == heads for flip in outcome)
+
+    def roll_params(self, flips: int, heads: bool) -> dict:
+        return {"flips": flips}
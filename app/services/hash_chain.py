@@ -0,0 +1,407 @@
+import hashlib
+import mmap
+import os
+import secrets
+import threading
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.models.seed import Seed
+from app.models.seed_chain import SeedChain
+from app.services.seed_pool import generate_client_seed
+
+# Размер одного звена цепочки в файле (сырой SHA-256)
+LINK_SIZE = 32
+
+# Сколько звеньев пишем в файл за один write()
+WRITE_CHUNK_LINKS = 65536
+
+
+# =========================
+# ЦЕПОЧКА ХЕШЕЙ
+# =========================
+
+def next_link(link: bytes) -> bytes:
+    """
+    Следующее звено цепочки: SHA-256 от hex-представления текущего
+
+    Хешируем именно hex-строку, как и в обычном режиме
+    (server_seed_hash = sha256(server_seed)), поэтому хеш seed'а
+    из цепочки - это просто следующее звено.
+    """
+    return hashlib.sha256(link.hex().encode()).digest()
+
+
+def chain_commitment(terminals: list[bytes]) -> str:
+    """
+    Публикуемый хеш файла цепочек
+
+    Для файла из одной цепочки - её терминальный хеш, иначе -
+    SHA-256 от терминалов всех цепочек подряд.
+    """
+    if len(terminals) == 1:
+        return terminals[0].hex()
+    return hashlib.sha256(b"".join(terminals)).hexdigest()
+
+
+def generate_chain(path: str, length: int, start: bytes = None, segment_length: int = None) -> str:
+    """
+    Построить цепочки и записать их в файл фиксированной ширины
+
+    Файл - подряд идущие независимые цепочки (сегменты) по
+    segment_length звеньев, каждая со своим случайным началом.
+    Один сегмент выдаётся одному игроку: хеш seed'а - предыдущее
+    звено той же цепочки, поэтому раскрытый seed выдаёт только
+    уже раскрытые seed'ы того же игрока.
+
+    В сегменте звено i лежит по смещению i * 32, последнее звено -
+    терминальный хеш. Seed'ы выдаются с конца: первый -
+    предпоследнее звено, второй - звено перед ним и т.д.
+
+    Цепочка строится строго последовательно (каждое звено зависит
+    от предыдущего), поэтому параллелить можно только независимые файлы.
+
+    Args:
+        path: Куда записать файл
+        length: Количество звеньев в файле
+        start: Начальное звено первой цепочки (по умолчанию - случайное)
+        segment_length: Звеньев в цепочке одного игрока
+            (по умолчанию - весь файл одна цепочка)
+
+    Returns:
+        Публикуемый хеш файла (см. chain_commitment)
+    """
+    segment_length = segment_length or length
+    if segment_length < 2:
+        raise ValueError("Chain length must be at least 2")
+    if length % segment_length:
+        raise ValueError("Chain file length must be a multiple of segment length")
+
+    tmp_path = f"{path}.tmp"
+    terminals = []
+
+    with open(tmp_path, "wb") as f:
+        for segment in range(length // segment_length):
+            link = start if start and not segment else secrets.token_bytes(LINK_SIZE)
+            written = 0
+            while written < segment_length:
+                count = min(WRITE_CHUNK_LINKS, segment_length - written)
+                chunk = bytearray(count * LINK_SIZE)
+                for i in range(count):
+                    if written or i:
+                        link = next_link(link)
+                    chunk[i * LINK_SIZE:(i + 1) * LINK_SIZE] = link
+                f.write(chunk)
+                written += count
+            terminals.append(link)
+
+    os.replace(tmp_path, path)
+    return chain_commitment(terminals)
+
+
+def verify_chain_seed(server_seed: str, terminal_hash: str, index: int) -> bool:
+    """
+    Проверить, что seed - звено цепочки с данным терминальным хешем
+
+    Хешируем seed index + 1 раз и сравниваем с терминальным хешем.
+    Работает без доступа к файлу цепочки - так проверяет аудитор.
+
+    Args:
+        server_seed: Раскрытый server seed (hex)
+        terminal_hash: Опубликованный терминальный хеш
+        index: Порядковый номер seed'а в цепочке (с нуля)
+    """
+    link = bytes.fromhex(server_seed)
+    for _ in range(index + 1):
+        link = next_link(link)
+    return link.hex() == terminal_hash
+
+
+class HashChain:
+    """
+    Файл цепочек хешей, доступный через mmap
+
+    Файл не читается целиком: страницы подгружаются ОС по мере
+    обращения, поиск звена - O(1) по смещению.
+    """
+
+    def __init__(self, path: str, segment_length: int = None):
+        """
+        Args:
+            path: Файл цепочек
+            segment_length: Звеньев в цепочке одного игрока
+                (по умолчанию - весь файл одна цепочка)
+        """
+        self.path = path
+        self._file = open(path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.length = len(self._mmap) // LINK_SIZE
+        self.segment_length = segment_length or self.length
+        if self.segment_length < 2 or self.length % self.segment_length:
+            self.close()
+            raise ValueError("Chain file length must be a multiple of segment length")
+        self.segments = self.length // self.segment_length
+
+    def __len__(self) -> int:
+        return self.length
+
+    def link(self, position: int) -> bytes:
+        """
+        Звено по позиции в файле
+        """
+        if not 0 <= position < self.length:
+            raise IndexError(f"Chain position {position} out of range")
+        offset = position * LINK_SIZE
+        return self._mmap[offset:offset + LINK_SIZE]
+
+    def _end(self, segment: int) -> int:
+        # Позиция следующего за сегментом звена
+        if not 0 <= segment < self.segments:
+            raise IndexError(f"Chain segment {segment} out of range")
+        return (segment + 1) * self.segment_length
+
+    def terminal(self, segment: int = 0) -> str:
+        """
+        Терминальный хеш цепочки сегмента
+        """
+        return self.link(self._end(segment) - 1).hex()
+
+    @property
+    def terminal_hash(self) -> str:
+        """
+        Публикуемый хеш файла (см. chain_commitment)
+        """
+        return chain_commitment([bytes.fromhex(self.terminal(segment)) for segment in range(self.segments)])
+
+    @property
+    def capacity(self) -> int:
+        """
+        Сколько seed'ов даёт одна цепочка (терминальное звено не выдаётся)
+        """
+        return self.segment_length - 1
+
+    def server_seed(self, index: int, segment: int = 0) -> str:
+        """
+        Server seed с порядковым номером index (выдача идёт с конца сегмента)
+        """
+        return self.link(self._end(segment) - 2 - index).hex()
+
+    def server_seed_hash(self, index: int, segment: int = 0) -> str:
+        """
+        Хеш server seed'а index - это предыдущее выданное звено
+        """
+        return self.link(self._end(segment) - 1 - index).hex()
+
+    def contains(self, server_seed: str, index: int, segment: int = 0) -> bool:
+        """
+        O(1)-проверка seed'а по файлу цепочки
+        """
+        if not 0 <= index < self.capacity or not 0 <= segment < self.segments:
+            return False
+        return self.server_seed(index, segment) == server_seed
+
+    def close(self):
+        self._mmap.close()
+        self._file.close()
+
+
+_open_chains = {}
+_open_chains_lock = threading.Lock()
+
+
+def open_chain(path: str, segment_length: int = None) -> HashChain:
+    """
+    Открыть файл цепочек (mmap кешируется на процесс)
+    """
+    with _open_chains_lock:
+        chain = _open_chains.get(path)
+        if chain is None:
+            chain = HashChain(path, segment_length)
+            _open_chains[path] = chain
+        return chain
+
+
+# =========================
+# ВЫДАЧА SEED'ОВ ИЗ ЦЕПОЧКИ
+# =========================
+
+def get_active_chain(db: Session) -> SeedChain | None:
+    """
+    Активная цепочка (последняя зарегистрированная)
+    """
+    return db.query(SeedChain).filter(
+        SeedChain.active == True
+    ).order_by(SeedChain.id.desc()).first()
+
+
+def _advance_cursor(db: Session, chain_row: SeedChain) -> int | None:
+    """
+    Атомарно сдвинуть курсор цепочек (сколько игроков получили свою цепочку)
+
+    Returns:
+        Новое значение курсора или None, если цепочки файла кончились
+    """
+    segments = chain_row.length // chain_row.segment_length
+    return db.execute(
+        update(SeedChain)
+        .where(SeedChain.id == chain_row.id, SeedChain.next_index < segments)
+        .values(next_index=SeedChain.next_index + 1)
+        .returning(SeedChain.next_index)
+        .execution_options(synchronize_session=False)
+    ).scalar()
+
+
+def _activate_next_chain(db: Session, exhausted: SeedChain) -> SeedChain | None:
+    """
+    Деактивировать исчерпанную цепочку и активировать следующую неиспользованную
+    """
+    exhausted.active = False
+
+    next_chain = db.query(SeedChain).filter(
+        SeedChain.id != exhausted.id,
+        SeedChain.active == False,
+        SeedChain.next_index == 0
+    ).order_by(SeedChain.id).first()
+
+    if next_chain:
+        next_chain.active = True
+
+    return next_chain
+
+
+def _claim_segment(db: Session) -> tuple[SeedChain, int] | None:
+    """
+    Забрать новую цепочку (сегмент) для игрока
+
+    Returns:
+        (файл цепочек, номер сегмента) или None, если свободных нет
+    """
+    chain_row = get_active_chain(db)
+    if not chain_row:
+        return None
+
+    segment = _advance_cursor(db, chain_row)
+
+    if segment is None:
+        # Файл исчерпан - переключаемся на следующий зарегистрированный
+        chain_row = _activate_next_chain(db, chain_row)
+        if not chain_row:
+            return None
+        segment = _advance_cursor(db, chain_row)
+        if segment is None:
+            return None
+
+    # RETURNING отдаёт уже увеличенный курсор
+    return chain_row, segment - 1
+
+
+def acquire_chain_seed(db: Session, user_id: int, client_seed: str = None) -> Seed | None:
+    """
+    Выдать пользователю следующее звено его цепочки (без commit)
+
+    У каждого игрока своя цепочка (сегмент файла): звенья одной
+    цепочки никогда не достаются разным игрокам, иначе раскрытый
+    seed одного игрока выдал бы активный seed другого. Новый
+    сегмент берётся атомарным UPDATE ... RETURNING курсора, поэтому
+    два воркера никогда не получат один и тот же сегмент.
+
+    Args:
+        db: Сессия БД
+        user_id: ID пользователя
+        client_seed: Свой client seed (опционально)
+
+    Returns:
+        Seed или None, если свободных цепочек нет
+    """
+    last_seed = db.query(Seed).filter(
+        Seed.user_id == user_id,
+        Seed.chain_id.isnot(None)
+    ).order_by(Seed.id.desc()).first()
+
+    chain_row = last_seed.chain if last_seed else None
+    if chain_row and last_seed.chain_index + 1 < chain_row.segment_length - 1:
+        segment = last_seed.chain_segment or 0
+        index = last_seed.chain_index + 1
+    else:
+        claimed = _claim_segment(db)
+        if not claimed:
+            return None
+        chain_row, segment = claimed
+        index = 0
+
+    chain = open_chain(chain_row.path, chain_row.segment_length)
+
+    seed = Seed(
+        user_id=user_id,
+        server_seed=chain.server_seed(index, segment),
+        server_seed_hash=chain.server_seed_hash(index, segment),
+        client_seed=client_seed or generate_client_seed(),
+        nonce=0,
+        active=True,
+        chain_id=chain_row.id,
+        chain_segment=segment,
+        chain_index=index
+    )
+    db.add(seed)
+
+    return seed
+
+
+def find_chain_seed(db: Session, terminal_hash: str, index: int) -> Seed | None:
+    """
+    Выданный seed цепочки игрока по её терминальному хешу
+
+    Терминальный хеш цепочки игрока - server_seed_hash его первого
+    seed'а из этой цепочки. Проверка идёт по строке seed'а, без
+    хеширования: позиции за пределами выданных не найдутся.
+
+    Returns:
+        Seed звена index или None, если цепочка не наша или звено не выдано
+    """
+    first = db.query(Seed).filter(
+        Seed.server_seed_hash == terminal_hash,
+        Seed.chain_id.isnot(None),
+        Seed.chain_index == 0
+    ).first()
+    if first is None:
+        return None
+    if index == 0:
+        return first
+
+    return db.query(Seed).filter(
+        Seed.chain_id == first.chain_id,
+        Seed.chain_segment == (first.chain_segment or 0),
+        Seed.chain_index == index
+    ).first()
+
+
+def register_chain(db: Session, path: str, activate: bool = True, segment_length: int = None) -> SeedChain:
+    """
+    Зарегистрировать файл цепочек в БД
+
+    Args:
+        db: Сессия БД
+        path: Путь к файлу цепочек
+        activate: Сделать цепочку активной (остальные деактивируются)
+        segment_length: Звеньев в цепочке игрока, как при генерации
+            (по умолчанию - весь файл одна цепочка)
+    """
+    chain = HashChain(path, segment_length)
+    try:
+        if activate:
+            db.query(SeedChain).filter(SeedChain.active == True).update({"active": False})
+
+        row = SeedChain(
+            path=os.path.abspath(path),
+            terminal_hash=chain.terminal_hash,
+            length=chain.length,
+            segment_length=chain.segment_length,
+            next_index=0,
+            active=activate
+        )
+        db.add(row)
+        db.commit()
+        db.refresh(row)
+        return row
+    finally:
+        chain.close()
@@ -0,0 +1,154 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.idempotency_key import IdempotencyKey
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def request_fingerprint(**params) -> str:
+    """
+    Хеш параметров запроса (порядок аргументов не важен)
+    """
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()
+
+
+class IdempotencyCache:
+    """
+    Ответы на ставки по ключу Idempotency-Key
+
+    Повтор запроса с тем же ключом возвращает сохранённый ответ:
+    сначала из LRU-кеша воркера, затем из таблицы idempotency_keys.
+    Строка пишется в транзакции ставки, поэтому даже одновременные
+    повторы (на разных воркерах) не сыграют дважды - второй упрётся
+    в уникальный индекс (user_id, key) и прочитает ответ первого.
+    """
+
+    def __init__(self, max_keys: int = None):
+        self._max_keys = max_keys
+        # (user_id, key) -> (request_hash, ответ, time.monotonic() записи)
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.cache_hits = metrics.counter("idempotency_cache_hits_total", "Replays served from the worker cache")
+        self.db_hits = metrics.counter("idempotency_db_hits_total", "Replays served from idempotency_keys")
+        self.misses = metrics.counter("idempotency_misses_total", "Idempotency keys seen for the first time")
+        self.hit_ratio = metrics.gauge("idempotency_cache_hit_ratio", "Share of idempotent lookups served from the worker cache")
+
+
+    @property
+    def max_keys(self) -> int:
+        return self._max_keys or settings.IDEMPOTENCY_CACHE_MAX_KEYS
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    def _update_ratio(self) -> None:
+        total = self.cache_hits.value + self.db_hits.value + self.misses.value
+        self.hit_ratio.set(self.cache_hits.value / total if total else 0.0)
+
+    def _check(self, request_hash: str, stored_hash: str) -> None:
+        if request_hash != stored_hash:
+            raise ValueError("Idempotency-Key was already used with different parameters")
+
+    # =========================
+    # ЧТЕНИЕ
+    # =========================
+
+    def lookup(self, db: Session, user_id: int, key: str, request_hash: str) -> dict | None:
+        """
+        Сохранённый ответ на запрос с этим ключом
+
+        Returns:
+            Ответ или None, если ключ новый
+
+        Raises:
+            ValueError: Если ключ уже использован с другими параметрами
+        """
+        ttl = settings.IDEMPOTENCY_KEY_TTL_HOURS * 3600
+
+        with self._lock:
+            cached = self._cache.get((user_id, key))
+            if cached is not None and time.monotonic() - cached[2] < ttl:
+                self._cache.move_to_end((user_id, key))
+            else:
+                cached = None
+
+        if cached is not None:
+            self.cache_hits.inc()
+            self._update_ratio()
+            self._check(request_hash, cached[0])
+            return cached[1]
+
+        row = db.query(IdempotencyKey).filter(
+            IdempotencyKey.user_id == user_id,
+            IdempotencyKey.key == key
+        ).first()
+
+        if row is None:
+            self.misses.inc()
+            self._update_ratio()
+            return None
+
+        self.db_hits.inc()
+        self._update_ratio()
+        self._check(request_hash, row.request_hash)
+
+        response = json.loads(row.response)
+        self.remember(user_id, key, row.request_hash, response)
+        return response
+
+    # =========================
+    # ЗАПИСЬ
+    # =========================
+
+    def store(self, db: Session, user_id: int, key: str, request_hash: str, response: dict) -> IdempotencyKey:
+        """
+        Сохранить ответ в транзакции ставки (без commit)
+        """
+        row = IdempotencyKey(
+            user_id=user_id,
+            key=key,
+            request_hash=request_hash,
+            bet_id=response.get("bet_id"),
+            response=json.dumps(response)
+        )
+        db.add(row)
+        return row
+
+    def remember(self, user_id: int, key: str, request_hash: str, response: dict) -> None:
+        """
+        Положить ответ в кеш воркера (только после commit ставки)
+        """
+        with self._lock:
+            self._cache[(user_id, key)] = (request_hash, response, time.monotonic())
+            self._cache.move_to_end((user_id, key))
+            while len(self._cache) > self.max_keys:
+                self._cache.popitem(last=False)
+
+    # =========================
+    # ОЧИСТКА
+    # =========================
+
+    def purge(self, db: Session) -> int:
+        """
+        Удалить ответы старше IDEMPOTENCY_KEY_TTL_HOURS
+        """
+        cutoff = datetime.utcnow() - timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS)
+        deleted = db.query(IdempotencyKey).filter(
+            IdempotencyKey.created_at < cutoff
+        ).delete(synchronize_session=False)
+        db.commit()
+        return deleted
+
+
+idempotency_cache = IdempotencyCache()
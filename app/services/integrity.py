@@ -0,0 +1,94 @@
+import json
+from collections import Counter, defaultdict
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models.bet import Bet
+from app.models.seed import Seed
+from app.services.ledger import ledger, to_minor
+
+
+def opening_state(db: Session, user_ids: list[int]) -> dict:
+    """
+    Состояние до нагрузки: балансы игроков и последний ID ставки
+
+    Returns:
+        {"balances": {user_id: баланс}, "last_bet_id"}
+    """
+    return {
+        "balances": ledger.balances(db, user_ids),
+        "last_bet_id": db.query(func.coalesce(func.max(Bet.id), 0)).scalar()
+    }
+
+
+def check_bet_integrity(db: Session, user_ids: list[int], opening: dict) -> dict:
+    """
+    Проверить инварианты ставок после конкурентной нагрузки
+
+    - баланс = баланс до нагрузки + сумма profit_loss новых ставок
+      (в минорных единицах, как в журнале);
+    - баланс не ушёл в минус (две ставки прошли одну проверку баланса);
+    - пара (server seed, nonce) не повторяется: повтор - это один и тот же
+      результат игры дважды;
+    - счётчик seeds.nonce больше любого выданного nonce, иначе
+      следующая ставка повторит уже сыгранный;
+    - у игрока не больше одного активного seed'а.
+
+    Args:
+        opening: Результат opening_state() до нагрузки
+
+    Returns:
+        Число проверенных ставок, нарушения по видам и ok
+    """
+    bets = db.query(Bet.user_id, Bet.profit_loss, Bet.game_data).filter(
+        Bet.user_id.in_(user_ids),
+        Bet.id > opening["last_bet_id"]
+    ).all()
+
+    profit = defaultdict(int)
+    nonces = Counter()
+    max_nonce = {}
+    for user_id, profit_loss, game_data in bets:
+        profit[user_id] += to_minor(profit_loss)
+        data = json.loads(game_data)
+        key = (data["server_seed_hash"], data["nonce"])
+        nonces[key] += 1
+        max_nonce[key[0]] = max(max_nonce.get(key[0], -1), key[1])
+
+    balances = ledger.balances(db, user_ids)
+    balance_mismatches = [
+        {
+            "user_id": user_id,
+            "expected": to_minor(opening["balances"][user_id]) + profit[user_id],
+            "actual": to_minor(balances[user_id])
+        }
+        for user_id in user_ids
+        if to_minor(balances[user_id]) != to_minor(opening["balances"][user_id]) + profit[user_id]
+    ]
+
+    seeds = db.query(Seed.user_id, Seed.server_seed_hash, Seed.nonce, Seed.active).filter(
+        Seed.user_id.in_(user_ids)
+    ).all()
+    counters = {server_seed_hash: nonce for _, server_seed_hash, nonce, _ in seeds}
+    active = Counter(user_id for user_id, _, _, is_active in seeds if is_active)
+
+    violations = {
+        "balance_mismatches": balance_mismatches,
+        "negative_balances": sorted(user_id for user_id, balance in balances.items() if balance < 0),
+        "duplicate_nonces": [
+            {"server_seed_hash": server_seed_hash, "nonce": nonce, "bets": count}
+            for (server_seed_hash, nonce), count in nonces.items() if count > 1
+        ],
+        "counters_behind": [
+            {"server_seed_hash": server_seed_hash, "counter": counters.get(server_seed_hash), "max_nonce": nonce}
+            for server_seed_hash, nonce in max_nonce.items()
+            if counters.get(server_seed_hash, 0) <= nonce
+        ],
+        "multiple_active_seeds": sorted(user_id for user_id, count in active.items() if count > 1)
+    }
+
+    return {
+        "bets": len(bets),
+        **violations,
+        "ok": not any(violations.values())
+    }
@@ -0,0 +1,413 @@
+import json
+import logging
+import queue
+import select
+import sqlite3
+import threading
+import time
+import uuid
+from collections import defaultdict
+from typing import Callable
+
+from app.config import settings
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+# Сообщение «могли что-то пропустить» (переподключение) - сбросить все темы
+_RESET = object()
+
+
+# =========================
+# БЭКЕНДЫ
+# =========================
+
+class LocalBackend:
+    """
+    Один воркер: другим процессам рассылать нечего
+    """
+
+    def start(self, deliver: Callable) -> None:
+        pass
+
+    def stop(self) -> None:
+        pass
+
+    def send(self, payload: str) -> None:
+        pass
+
+
+class PostgresBackend:
+    """
+    Postgres LISTEN/NOTIFY: отдельное соединение слушает канал в потоке
+
+    После потери соединения переподключается и сбрасывает все темы -
+    уведомления, пришедшие в разрыв, потеряны.
+    """
+
+    def __init__(self, url: str, channel: str):
+        # DSN libpq без драйвера SQLAlchemy (postgresql+psycopg2://)
+        self.dsn = "postgresql://" + url.split("://", 1)[1]
+        self.channel = channel
+        self._publish_conn = None
+        self._publish_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _connect(self):
+        import psycopg2
+        import psycopg2.extensions
+
+        conn = psycopg2.connect(self.dsn)
+        conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        return conn
+
+    def start(self, deliver: Callable) -> None:
+        self._thread = threading.Thread(target=self._listen, args=(deliver,), name="invalidation-listen", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+
+    def _listen(self, deliver: Callable) -> None:
+        first = True
+        while not self._stop.is_set():
+            try:
+                conn = self._connect()
+                conn.cursor().execute(f'LISTEN "{self.channel}"')
+                if not first:
+                    deliver(_RESET)
+                first = False
+
+                while not self._stop.is_set():
+                    if select.select([conn], [], [], 0.5) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        deliver(conn.notifies.pop(0).payload)
+            except Exception as e:
+                logger.error(f"Invalidation listener failed, reconnecting: {e}")
+                self._stop.wait(1.0)
+
+    def send(self, payload: str) -> None:
+        with self._publish_lock:
+            try:
+                if self._publish_conn is None or self._publish_conn.closed:
+                    self._publish_conn = self._connect()
+                self._publish_conn.cursor().execute("SELECT pg_notify(%s, %s)", (self.channel, payload))
+            except Exception:
+                self._publish_conn = None
+                raise
+
+
+class SQLitePollingBackend:
+    """
+    Общий файл SQLite: публикация - INSERT, подписка - опрос по id
+
+    Для установок без Postgres и для тестов. Задержка доставки -
+    до INVALIDATION_POLL_INTERVAL_MS, старые строки удаляются.
+    """
+
+    RETENTION_SECONDS = 60.0
+
+    def __init__(self, path: str, interval: float):
+        self.path = path
+        self.interval = interval
+        self._local = threading.local()
+        self._stop = threading.Event()
+        self._thread = None
+
+        self._connect().execute(
+            "CREATE TABLE IF NOT EXISTS invalidations ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, payload TEXT NOT NULL, created REAL NOT NULL)"
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def start(self, deliver: Callable) -> None:
+        last_id = self._connect().execute("SELECT COALESCE(MAX(id), 0) FROM invalidations").fetchone()[0]
+        self._thread = threading.Thread(
+            target=self._poll, args=(deliver, last_id), name="invalidation-poll", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+
+    def _poll(self, deliver: Callable, last_id: int) -> None:
+        polls = 0
+        while not self._stop.wait(self.interval):
+            try:
+                conn = self._connect()
+                rows = conn.execute(
+                    "SELECT id, payload FROM invalidations WHERE id > ? ORDER BY id", (last_id,)
+                ).fetchall()
+                for row_id, payload in rows:
+                    deliver(payload)
+                    last_id = row_id
+
+                polls += 1
+                if polls % 1000 == 0:
+                    conn.execute(
+                        "DELETE FROM invalidations WHERE created < ?", (time.time() - self.RETENTION_SECONDS,)
+                    )
+            except Exception as e:
+                logger.error(f"Invalidation poll failed: {e}")
+
+    def send(self, payload: str) -> None:
+        self._connect().execute(
+            "INSERT INTO invalidations (payload, created) VALUES (?, ?)", (payload, time.time())
+        )
+
+
+# =========================
+# ШИНА
+# =========================
+
+class InvalidationBus:
+    """
+    Шина инвалидации кешей между воркерами
+
+    Кеш подписывается на тему (subscribe), запись в БД публикует
+    инвалидацию темы и, опционально, ключа (publish). Публикующий
+    воркер сбрасывает свои кеши сразу, остальные - когда сообщение
+    дойдёт через бэкенд. Входящие сообщения копятся
+    INVALIDATION_COALESCE_MS и применяются пачкой: на тему - один
+    вызов подписчика с объединённым набором ключей.
+
+    Сообщение несёт версию (time_ns публикации) и время отправки:
+    по нему считается лаг доставки (метрика invalidation_lag_seconds).
+    """
+
+    def __init__(self, backend=None):
+        self.origin = uuid.uuid4().hex
+        self._backend = backend
+        self._subscribers = defaultdict(list)
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        # тема -> версия последней применённой инвалидации
+        self.versions = {}
+
+        self.published = metrics.counter("invalidation_published_total", "Cache invalidations published")
+        self.received = metrics.counter("invalidation_received_total", "Cache invalidations received from other workers")
+        self.flushes = metrics.counter("invalidation_flushes_total", "Coalesced batches of invalidations applied")
+        self.lag = metrics.gauge("invalidation_lag_seconds", "Worst publish-to-apply delay in the last batch")
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            self._backend = self._create_backend()
+        return self._backend
+
+    def _create_backend(self):
+        if settings.INVALIDATION_BACKEND == "local":
+            return LocalBackend()
+        if settings.INVALIDATION_BACKEND == "postgres":
+            return PostgresBackend(settings.DATABASE_URL, settings.INVALIDATION_CHANNEL)
+        if settings.INVALIDATION_BACKEND == "sqlite":
+            return SQLitePollingBackend(
+                settings.INVALIDATION_SQLITE_PATH, settings.INVALIDATION_POLL_INTERVAL_MS / 1000
+            )
+        raise ValueError(f"Unknown INVALIDATION_BACKEND: {settings.INVALIDATION_BACKEND}")
+
+    def subscribe(self, topic: str, callback: Callable) -> None:
+        """
+        Подписаться на тему
+
+        Args:
+            callback: callback(keys) - keys: множество ключей или None (вся тема)
+        """
+        self._subscribers[topic].append(callback)
+
+    # =========================
+    # ПУБЛИКАЦИЯ
+    # =========================
+
+    def publish(self, topic: str, key=None) -> int:
+        """
+        Инвалидировать тему (или один ключ темы) во всех воркерах
+
+        Вызывать после commit записи, иначе другой воркер может
+        перечитать старые данные.
+
+        Returns:
+            Версия инвалидации
+        """
+        version = time.time_ns()
+        self._apply(topic, None if key is None else {key}, version)
+        self.published.inc()
+
+        payload = json.dumps({"t": topic, "k": key, "v": version, "s": time.time(), "o": self.origin})
+        try:
+            self.backend.send(payload)
+        except Exception as e:
+            # Другие воркеры увидят изменения только по истечении своих кешей
+            logger.error(f"Failed to publish invalidation for {topic}: {e}")
+
+        return version
+
+    def _apply(self, topic: str, keys: set | None, version: int) -> None:
+        with self._lock:
+            self.versions[topic] = max(version, self.versions.get(topic, 0))
+        for callback in self._subscribers.get(topic, ()):
+            try:
+                callback(keys)
+            except Exception as e:
+                logger.error(f"Invalidation subscriber for {topic} failed: {e}", exc_info=True)
+
+    # =========================
+    # ПРИЁМ
+    # =========================
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._dispatch, name="invalidation-bus", daemon=True)
+            self._thread.start()
+        self.backend.start(self._queue.put)
+
+    def stop(self) -> None:
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        self.backend.stop()
+        self._queue.put(_STOP)
+        thread.join(timeout=2)
+
+    def _decode(self, item) -> dict | None:
+        if item is _RESET:
+            return item
+        try:
+            message = json.loads(item)
+        except (TypeError, ValueError):
+            logger.warning(f"Malformed invalidation message: {item!r}")
+            return None
+        # Свои сообщения уже применены при публикации
+        return None if message.get("o") == self.origin else message
+
+    def _next_batch(self) -> tuple[list, bool]:
+        item = self._queue.get()
+        if item is _STOP:
+            return [], True
+
+        batch = [item]
+        deadline = time.monotonic() + settings.INVALIDATION_COALESCE_MS / 1000
+        while True:
+            try:
+                item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                return batch, False
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+
+    def apply_batch(self, items: list) -> None:
+        """
+        Применить пачку входящих сообщений (по вызову на тему)
+        """
+        topics = {}
+        versions = {}
+        worst_lag = 0.0
+        now = time.time()
+
+        for item in items:
+            message = self._decode(item)
+            if message is None:
+                continue
+            if message is _RESET:
+                topics = dict.fromkeys(self._subscribers)
+                versions = dict.fromkeys(self._subscribers, time.time_ns())
+                continue
+
+            self.received.inc()
+            topic = message["t"]
+            worst_lag = max(worst_lag, now - message["s"])
+            versions[topic] = max(message["v"], versions.get(topic, 0))
+
+            if message["k"] is None or (topic in topics and topics[topic] is None):
+                topics[topic] = None
+            else:
+                topics.setdefault(topic, set()).add(message["k"])
+
+        for topic, keys in topics.items():
+            self._apply(topic, keys, versions[topic])
+
+        if topics:
+            self.flushes.inc()
+            self.lag.set(worst_lag)
+
+    def _dispatch(self) -> None:
+        while True:
+            batch, stop = self._next_batch()
+            if batch:
+                self.apply_batch(batch)
+            if stop:
+                return
+
+
+invalidation_bus = InvalidationBus()
+
+
+# =========================
+# ВЕРСИОНИРОВАННЫЙ КЕШ
+# =========================
+
+class VersionedCache:
+    """
+    Кеш ключ -> значение, сбрасываемый через шину
+
+    Загрузка, начавшаяся до инвалидации, не кладёт в кеш устаревшее
+    значение: каждая инвалидация увеличивает поколение, и результат
+    сохраняется, только если поколение за время загрузки не менялось.
+    """
+
+    def __init__(self, topic: str, bus: InvalidationBus = None, max_size: int = 10_000):
+        self.topic = topic
+        self.max_size = max_size
+        self._data = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+        (bus or invalidation_bus).subscribe(topic, self.invalidate)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key, loader: Callable):
+        """
+        Значение из кеша или loader() (None не кешируется)
+        """
+        with self._lock:
+            if key in self._data:
+                return self._data[key]
+            generation = self._generation
+
+        value = loader()
+
+        if value is not None:
+            with self._lock:
+                if self._generation == generation and len(self._data) < self.max_size:
+                    self._data[key] = value
+        return value
+
+    def invalidate(self, keys=None) -> None:
+        with self._lock:
+            self._generation += 1
+            if keys is None:
+                self._data.clear()
+            else:
+                for key in keys:
+                    self._data.pop(key, None)
@@ -0,0 +1,125 @@
+import logging
+
+from app.config import settings
+from app.database import SessionLocal, shard_router
+from app.services.exposure import exposure_tracker
+from app.services.idempotency import idempotency_cache
+from app.services.ledger import ledger
+from app.services.merkle import merkle_committer
+from app.services.rollups import rollup_aggregator
+from app.services.scheduler import JobScheduler, scheduler
+from app.services.seed_pool import seed_pool
+
+logger = logging.getLogger(__name__)
+
+# Функции задач - верхнего уровня модуля: задачи с process=True
+# передаются в процесс пула по имени. Задачи над данными игроков
+# (seeds, bets, журнал) идут по каждому шарду.
+
+
+def _player_session_factories() -> list:
+    """
+    Основная БД или, с шардированием, каждый шард
+    """
+    if shard_router.enabled:
+        return [lambda shard=shard: shard_router.session(shard) for shard in range(len(shard_router))]
+    return [SessionLocal]
+
+
+def _each_session(method) -> int:
+    total = 0
+    for factory in _player_session_factories():
+        db = factory()
+        try:
+            total += method(db) or 0
+        finally:
+            db.close()
+    return total
+
+
+def _all_sessions(method):
+    """
+    Вызвать method сразу со всеми сессиями игроков (общий результат по шардам)
+    """
+    sessions = [factory() for factory in _player_session_factories()]
+    try:
+        return method(*sessions)
+    finally:
+        for db in sessions:
+            db.close()
+
+
+def _main_session(method):
+    db = SessionLocal()
+    try:
+        return method(db)
+    finally:
+        db.close()
+
+
+def refill_seed_pool() -> int:
+    added = _each_session(seed_pool.refill)
+    if added:
+        logger.info(f"Seed pool refilled: +{added}")
+    return added
+
+
+def aggregate_rollups() -> int:
+    return _each_session(rollup_aggregator.catch_up)
+
+
+def compact_ledger() -> int:
+    compacted = _each_session(ledger.compact)
+    if compacted:
+        logger.info(f"Ledger compaction: {compacted} snapshots updated")
+    return compacted
+
+
+def purge_idempotency_keys() -> int:
+    deleted = _each_session(idempotency_cache.purge)
+    if deleted:
+        logger.info(f"Purged {deleted} expired idempotency keys")
+    return deleted
+
+
+def commit_merkle_batches() -> int:
+    return _each_session(merkle_committer.catch_up)
+
+
+def reconcile_exposure() -> int:
+    return _all_sessions(exposure_tracker.reconcile)
+
+
+def purge_job_history() -> int:
+    return _main_session(scheduler.purge_history)
+
+
+def register_jobs(target: JobScheduler) -> None:
+    """
+    Зарегистрировать обслуживающие задачи (заново при каждом старте воркера)
+
+    Общие для всех воркеров задачи над БД - singleton. Сверка лимитов
+    риска обновляет память своего воркера - во всех воркерах.
+    Агрегация ставок и Merkle-коммитменты (хеширование пачек) -
+    в пуле процессов.
+    """
+    target.clear()
+
+    def every(seconds: float) -> dict:
+        return {"interval": seconds, "jitter": seconds * 0.1}
+
+    if settings.SEED_POOL_ENABLED:
+        target.add("seed_pool_refill", refill_seed_pool, timeout=60, **every(settings.SEED_POOL_REFILL_INTERVAL_SECONDS))
+    if settings.ROLLUP_ENABLED:
+        target.add("rollups", aggregate_rollups, timeout=300, process=True, **every(settings.ROLLUP_INTERVAL_SECONDS))
+    if settings.LEDGER_COMPACT_ENABLED:
+        target.add("ledger_compaction", compact_ledger, timeout=300, **every(settings.LEDGER_COMPACT_INTERVAL_SECONDS))
+    target.add("idempotency_purge", purge_idempotency_keys, timeout=300, **every(settings.IDEMPOTENCY_PURGE_INTERVAL_SECONDS))
+    if settings.MERKLE_ENABLED:
+        target.add("merkle_commit", commit_merkle_batches, timeout=300, process=True, **every(settings.MERKLE_INTERVAL_SECONDS))
+    if settings.EXPOSURE_ENABLED:
+        target.add(
+            "exposure_reconcile", reconcile_exposure, timeout=120, singleton=False,
+            **every(settings.EXPOSURE_RECONCILE_INTERVAL_SECONDS)
+        )
+    target.add("job_history_purge", purge_job_history, timeout=300, cron=settings.SCHEDULER_HISTORY_PURGE_CRON, jitter=60)
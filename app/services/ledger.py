@@ -0,0 +1,257 @@
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from sqlalchemy import bindparam, func, select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.ledger import BalanceSnapshot, LedgerEntry
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+# Минорных единиц в одной единице баланса
+MINOR_UNITS = 100
+
+
+def to_minor(amount: float) -> int:
+    return int(round(amount * MINOR_UNITS))
+
+
+def from_minor(value: int) -> float:
+    return value / MINOR_UNITS
+
+
+def _deltas_after(user_id, last_entry_id):
+    return (
+        select(func.coalesce(func.sum(LedgerEntry.delta), 0))
+        .where(LedgerEntry.user_id == user_id, LedgerEntry.id > last_entry_id)
+    )
+
+
+class BalanceLedger:
+    """
+    Баланс как журнал движений + периодические снапшоты
+
+    Запись - только INSERT в ledger_entries: конкурентные ставки
+    одного игрока не ждут блокировку строки users.
+    Чтение - закешированный снапшот + сумма дельт после него.
+    Старые движения не удаляются, поэтому даже устаревший снапшот
+    в кеше другого процесса даёт правильный баланс.
+
+    Пока снапшота нет, начальным балансом считается users.balance.
+    Компакция переносит свёрнутый баланс обратно в users.balance,
+    чтобы старые читатели колонки видели почти актуальное значение.
+    """
+
+    def __init__(self, max_cached_users: int = None):
+        self._max_cached_users = max_cached_users
+        # user_id -> (баланс снапшота в минорных единицах, last_entry_id)
+        self._snapshots = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def max_cached_users(self) -> int:
+        return self._max_cached_users or settings.LEDGER_CACHE_MAX_USERS
+
+    # =========================
+    # ЗАПИСЬ
+    # =========================
+
+    def record(self, db: Session, user_id: int, amount: float, reason: str, bet=None) -> LedgerEntry:
+        """
+        Добавить движение баланса (без commit)
+
+        Args:
+            db: Сессия БД
+            user_id: ID пользователя
+            amount: Изменение баланса (+/-)
+            reason: Причина движения
+            bet: Ставка (bet_id проставится при flush)
+
+        Returns:
+            Новая запись журнала
+        """
+        entry = LedgerEntry(user_id=user_id, delta=to_minor(amount), reason=reason, bet=bet)
+        db.add(entry)
+        return entry
+
+    # =========================
+    # ЧТЕНИЕ
+    # =========================
+
+    def _cached_snapshot(self, user_id: int):
+        with self._lock:
+            snapshot = self._snapshots.get(user_id)
+            if snapshot is not None:
+                self._snapshots.move_to_end(user_id)
+            return snapshot
+
+    def _cache_snapshot(self, user_id: int, balance: int, last_entry_id: int) -> None:
+        with self._lock:
+            current = self._snapshots.get(user_id)
+            # Не откатываемся на более старый снапшот
+            if current is None or current[1] <= last_entry_id:
+                self._snapshots[user_id] = (balance, last_entry_id)
+                self._snapshots.move_to_end(user_id)
+            while len(self._snapshots) > self.max_cached_users:
+                self._snapshots.popitem(last=False)
+
+    def clear_cache(self) -> None:
+        with self._lock:
+            self._snapshots.clear()
+
+    def balance_minor(self, db: Session, user_id: int) -> int:
+        """
+        Текущий баланс в минорных единицах
+
+        Raises:
+            ValueError: Если пользователь не найден
+        """
+        snapshot = self._cached_snapshot(user_id)
+
+        if snapshot is None:
+            # Снапшот и начальный баланс читаем одним запросом,
+            # чтобы не поймать компакцию между ними
+            row = db.query(
+                User.balance,
+                BalanceSnapshot.balance,
+                BalanceSnapshot.last_entry_id
+            ).outerjoin(
+                BalanceSnapshot, BalanceSnapshot.user_id == User.id
+            ).filter(User.id == user_id).first()
+
+            if row is None:
+                raise ValueError("User not found")
+
+            opening, balance, last_entry_id = row
+            if balance is None:
+                balance, last_entry_id = to_minor(opening or 0), 0
+
+            snapshot = (balance, last_entry_id)
+            self._cache_snapshot(user_id, *snapshot)
+
+        balance, last_entry_id = snapshot
+        return balance + db.scalar(_deltas_after(user_id, last_entry_id))
+
+    def balance(self, db: Session, user_id: int) -> float:
+        """
+        Текущий баланс пользователя
+        """
+        return from_minor(self.balance_minor(db, user_id))
+
+    def balances(self, db: Session, user_ids: list[int]) -> dict:
+        """
+        Балансы нескольких пользователей одним запросом
+
+        Returns:
+            {user_id: баланс}
+        """
+        if not user_ids:
+            return {}
+
+        last_entry_id = func.coalesce(BalanceSnapshot.last_entry_id, 0)
+        rows = db.query(
+            User.id,
+            User.balance,
+            BalanceSnapshot.balance,
+            _deltas_after(User.id, last_entry_id).scalar_subquery()
+        ).outerjoin(
+            BalanceSnapshot, BalanceSnapshot.user_id == User.id
+        ).filter(User.id.in_(user_ids)).all()
+
+        return {
+            user_id: from_minor(
+                (balance if balance is not None else to_minor(opening or 0)) + deltas
+            )
+            for user_id, opening, balance, deltas in rows
+        }
+
+    # =========================
+    # КОМПАКЦИЯ
+    # =========================
+
+    def compact(self, db: Session, grace_seconds: float = None) -> int:
+        """
+        Свернуть накопившиеся движения в снапшоты
+
+        Берём только движения старше grace_seconds: у более свежих
+        транзакции могут быть ещё не закоммичены, а снапшот не должен
+        перескочить через запись, которая появится позже.
+
+        Returns:
+            Сколько снапшотов обновлено
+        """
+        if grace_seconds is None:
+            grace_seconds = settings.LEDGER_COMPACT_GRACE_SECONDS
+        cutoff = datetime.utcnow() - timedelta(seconds=grace_seconds)
+
+        upto = db.query(func.max(LedgerEntry.id)).filter(LedgerEntry.created_at < cutoff).scalar()
+        if upto is None:
+            db.rollback()
+            return 0
+
+        pending = db.query(
+            LedgerEntry.user_id,
+            BalanceSnapshot.last_entry_id,
+            func.sum(LedgerEntry.delta),
+            func.max(LedgerEntry.id)
+        ).outerjoin(
+            BalanceSnapshot, BalanceSnapshot.user_id == LedgerEntry.user_id
+        ).filter(
+            LedgerEntry.id <= upto,
+            LedgerEntry.id > func.coalesce(BalanceSnapshot.last_entry_id, 0)
+        ).group_by(LedgerEntry.user_id, BalanceSnapshot.last_entry_id).all()
+
+        if not pending:
+            db.rollback()
+            return 0
+
+        user_ids = [row[0] for row in pending]
+        snapshots = {
+            snapshot.user_id: snapshot
+            for snapshot in db.query(BalanceSnapshot)
+            .filter(BalanceSnapshot.user_id.in_(user_ids))
+            .with_for_update()
+        }
+        openings = dict(db.query(User.id, User.balance).filter(User.id.in_(user_ids)))
+
+        now = datetime.utcnow()
+        compacted = {}
+        for user_id, base_entry_id, deltas, last_entry_id in pending:
+            snapshot = snapshots.get(user_id)
+            if snapshot is None:
+                snapshot = BalanceSnapshot(user_id=user_id, balance=to_minor(openings.get(user_id) or 0))
+                db.add(snapshot)
+            elif snapshot.last_entry_id != base_entry_id:
+                # Параллельная компакция успела сдвинуть снапшот - досчитаем в следующий раз
+                continue
+
+            snapshot.balance += deltas
+            snapshot.last_entry_id = last_entry_id
+            snapshot.updated_at = now
+            compacted[user_id] = (snapshot.balance, last_entry_id)
+
+        if compacted:
+            # Зеркалим свёрнутый баланс в users.balance для совместимости
+            users_table = User.__table__
+            db.execute(
+                users_table.update()
+                .where(users_table.c.id == bindparam("uid"))
+                .values(balance=bindparam("new_balance")),
+                [
+                    {"uid": user_id, "new_balance": from_minor(balance)}
+                    for user_id, (balance, _) in compacted.items()
+                ]
+            )
+
+        db.commit()
+
+        for user_id, snapshot in compacted.items():
+            self._cache_snapshot(user_id, *snapshot)
+
+        return len(compacted)
+
+
+ledger = BalanceLedger()
@@ -0,0 +1,253 @@
+import hashlib
+import json
+import logging
+import struct
+from datetime import datetime, timedelta
+from itertools import takewhile
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.bet import Bet
+from app.models.merkle_batch import MerkleBatch
+from app.models.rollup import RollupWatermark
+
+logger = logging.getLogger(__name__)
+
+WATERMARK_NAME = "merkle_batches"
+
+HASH_SIZE = 32
+ID_SIZE = 8
+
+# Разные префиксы листьев и узлов: лист нельзя выдать за внутренний узел
+LEAF_PREFIX = b"\x00"
+NODE_PREFIX = b"\x01"
+
+
+# =========================
+# ДЕРЕВО
+# =========================
+
+def bet_leaf(bet) -> str:
+    """
+    Каноническое представление ставки - то, что хешируется в лист
+
+    Отдаётся игроку вместе с доказательством: хешировать нужно
+    именно эту строку (UTF-8).
+    """
+    return json.dumps({
+        "id": bet.id,
+        "user_id": bet.user_id,
+        "game_id": bet.game_id,
+        "amount": bet.amount,
+        "result": bet.result,
+        "profit_loss": bet.profit_loss,
+        "game_data": bet.game_data,
+        "timestamp": bet.timestamp.isoformat()
+    }, sort_keys=True, separators=(",", ":"))
+
+
+def leaf_hash(leaf: str) -> bytes:
+    return hashlib.sha256(LEAF_PREFIX + leaf.encode()).digest()
+
+
+def node_hash(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(NODE_PREFIX + left + right).digest()
+
+
+def level_sizes(count: int) -> list[int]:
+    """
+    Число узлов на каждом уровне, от листьев до корня
+    """
+    sizes = [count]
+    while sizes[-1] > 1:
+        sizes.append((sizes[-1] + 1) // 2)
+    return sizes
+
+
+def build_levels(leaves: list[bytes]) -> list[list[bytes]]:
+    """
+    Все уровни дерева, от листьев до корня
+
+    Непарный последний узел поднимается на уровень выше без
+    изменений (не дублируется - иначе два разных набора листьев
+    давали бы один корень).
+    """
+    if not leaves:
+        raise ValueError("Cannot build a Merkle tree without leaves")
+
+    levels = [leaves]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        parents = [node_hash(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            parents.append(level[-1])
+        levels.append(parents)
+    return levels
+
+
+def _node(levels_blob: bytes, offsets: list[int], level: int, index: int) -> bytes:
+    start = (offsets[level] + index) * HASH_SIZE
+    return levels_blob[start:start + HASH_SIZE]
+
+
+def _find_leaf(bet_ids: bytes, bet_id: int) -> int | None:
+    """
+    Бинарный поиск ID ставки в упакованном списке
+    """
+    low, high = 0, len(bet_ids) // ID_SIZE
+    while low < high:
+        middle = (low + high) // 2
+        (value,) = struct.unpack_from(">Q", bet_ids, middle * ID_SIZE)
+        if value < bet_id:
+            low = middle + 1
+        else:
+            high = middle
+    if low * ID_SIZE < len(bet_ids) and struct.unpack_from(">Q", bet_ids, low * ID_SIZE)[0] == bet_id:
+        return low
+    return None
+
+
+def batch_proof(batch: MerkleBatch, bet_id: int) -> dict | None:
+    """
+    Доказательство включения ставки из сохранённых уровней - O(log n)
+
+    Returns:
+        {"leaf_index", "leaf_hash", "proof": [{"hash", "side"}]}
+        или None, если ставки нет в пачке
+    """
+    index = _find_leaf(batch.bet_ids, bet_id)
+    if index is None:
+        return None
+
+    sizes = level_sizes(batch.bets_count)
+    offsets = [sum(sizes[:level]) for level in range(len(sizes))]
+
+    proof = []
+    position = index
+    for level, size in enumerate(sizes[:-1]):
+        sibling = position ^ 1
+        # У непарного последнего узла соседа нет - он поднимается как есть
+        if sibling < size:
+            proof.append({
+                "hash": _node(batch.levels, offsets, level, sibling).hex(),
+                "side": "left" if sibling < position else "right"
+            })
+        position //= 2
+
+    return {
+        "leaf_index": index,
+        "leaf_hash": _node(batch.levels, offsets, 0, index).hex(),
+        "proof": proof
+    }
+
+
+def verify_proof(leaf: str, proof: list[dict], root: str) -> bool:
+    """
+    Проверить доказательство включения (то же делает аудитор у себя)
+    """
+    current = leaf_hash(leaf)
+    for step in proof:
+        sibling = bytes.fromhex(step["hash"])
+        current = node_hash(sibling, current) if step["side"] == "left" else node_hash(current, sibling)
+    return current.hex() == root
+
+
+# =========================
+# ПАЧКИ
+# =========================
+
+class MerkleCommitter:
+    """
+    Периодические Merkle-коммитменты рассчитанных ставок
+
+    Пачка - MERKLE_BATCH_SIZE ставок подряд по id после watermark
+    (до первой моложе MERKLE_GRACE_SECONDS);
+    неполная пачка коммитится, когда её старейшая ставка старше
+    MERKLE_BATCH_MAX_AGE_SECONDS. Одно построение дерева на пачку,
+    в фоновой задаче - не на пути запроса. Строка watermark
+    блокируется на время прохода (как у агрегатора отчётов).
+    """
+
+    def _lock_watermark(self, db: Session) -> RollupWatermark:
+        watermark = db.query(RollupWatermark).filter(
+            RollupWatermark.name == WATERMARK_NAME
+        ).with_for_update().first()
+
+        if watermark is None:
+            watermark = RollupWatermark(name=WATERMARK_NAME, last_bet_id=0)
+            db.add(watermark)
+            db.flush()
+
+        return watermark
+
+    def run_once(self, db: Session, force: bool = False) -> MerkleBatch | None:
+        """
+        Закоммитить одну пачку, если она набралась
+
+        Args:
+            force: Коммитить неполную пачку, не дожидаясь возраста
+
+        Returns:
+            Новая пачка или None
+        """
+        watermark = self._lock_watermark(db)
+        now = datetime.utcnow()
+        cutoff = now - timedelta(seconds=settings.MERKLE_GRACE_SECONDS)
+
+        bets = db.query(Bet).filter(
+            Bet.id > watermark.last_bet_id
+        ).order_by(Bet.id).limit(settings.MERKLE_BATCH_SIZE).all()
+
+        # Пачка покрывает id подряд: останавливаемся на первой слишком
+        # свежей ставке, а не пропускаем её - иначе она не попадёт ни в
+        # одну пачку, хотя диапазон [first_bet_id, last_bet_id] её накроет
+        bets = list(takewhile(lambda bet: bet.timestamp < cutoff, bets))
+
+        full = len(bets) == settings.MERKLE_BATCH_SIZE
+        stale = bets and bets[0].timestamp < now - timedelta(seconds=settings.MERKLE_BATCH_MAX_AGE_SECONDS)
+        if not bets or not (full or stale or force):
+            db.rollback()
+            return None
+
+        levels = build_levels([leaf_hash(bet_leaf(bet)) for bet in bets])
+        batch = MerkleBatch(
+            first_bet_id=bets[0].id,
+            last_bet_id=bets[-1].id,
+            bets_count=len(bets),
+            root=levels[-1][0].hex(),
+            bet_ids=b"".join(struct.pack(">Q", bet.id) for bet in bets),
+            levels=b"".join(b"".join(level) for level in levels)
+        )
+        db.add(batch)
+
+        watermark.last_bet_id = bets[-1].id
+        watermark.updated_at = now
+        db.commit()
+
+        logger.info(f"Merkle batch {batch.id}: bets {batch.first_bet_id}-{batch.last_bet_id}, root {batch.root}")
+        return batch
+
+    def catch_up(self, db: Session) -> int:
+        """
+        Закоммитить все набравшиеся пачки
+
+        Returns:
+            Сколько пачек создано
+        """
+        created = 0
+        while self.run_once(db) is not None:
+            created += 1
+        return created
+
+
+merkle_committer = MerkleCommitter()
+
+
+def find_bet_batch(db: Session, bet_id: int) -> MerkleBatch | None:
+    """
+    Пачка, в диапазон которой попадает ставка
+    """
+    return db.query(MerkleBatch).filter(
+        MerkleBatch.last_bet_id >= bet_id,
+        MerkleBatch.first_bet_id <= bet_id
+    ).order_by(MerkleBatch.last_bet_id).first()
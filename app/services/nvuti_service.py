@@ -1,14 +1,23 @@
-import secrets
 import hashlib
-import hmac
 import json
+import logging
 from sqlalchemy.orm import Session
 from datetime import datetime
 
+from app.config import settings
 from app.models.seed import Seed
 from app.models.user import User
 from app.models.bet import Bet
-from app.models.game import Game
+from app.services.anomaly import anomaly_detector
+from app.services.exposure import exposure_tracker
+from app.services.game_catalog import game_catalog
+from app.services.game_engines import DiceEngine, engine_for
+from app.services.hash_chain import acquire_chain_seed, find_chain_seed
+from app.services.idempotency import idempotency_cache, request_fingerprint
+from app.services.ledger import from_minor, ledger, to_minor
+from app.services.seed_pool import seed_pool, generate_server_seed, generate_client_seed
+
+logger = logging.getLogger(__name__)
 
 
 class NvutiService:
@@ -19,13 +28,79 @@ class NvutiService:
     Результат генерируется криптографически (Provably Fair)
     """
     
+    # Тип игры в таблице games (движок - из реестра game_engines)
+    GAME_TYPE = "dice"
+    
     # Константы игры
     HOUSE_EDGE = 5.0  # Преимущество казино 5%
-    MIN_WIN_CHANCE = 1.0
-    MAX_WIN_CHANCE = 95.0
+    MIN_WIN_CHANCE = DiceEngine.MIN_WIN_CHANCE
+    MAX_WIN_CHANCE = DiceEngine.MAX_WIN_CHANCE
     
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, autocommit: bool = True):
+        """
+        Args:
+            db: Сессия БД
+            autocommit: False - вместо commit только flush, транзакцией
+                управляет вызывающий (пакетная запись в SQLite)
+        """
         self.db = db
+        self.autocommit = autocommit
+        # Эффекты в памяти, ждущие commit вызывающего: (после commit, после отката)
+        self.pending = []
+        # Алерты по закоммиченным ставкам, которые записывает вызывающий
+        self.alerts = []
+    
+    def _commit(self) -> None:
+        if self.autocommit:
+            self.db.commit()
+        else:
+            self.db.flush()
+    
+    def _after_commit(self, on_commit, on_rollback=None) -> None:
+        """
+        Выполнить эффект в памяти только после commit транзакции
+        
+        При autocommit commit уже сделан - эффект выполняется сразу.
+        Иначе он ждёт finish() от вызывающего: пачка писателя ещё
+        может откатиться.
+        """
+        if self.autocommit:
+            on_commit()
+        else:
+            self.pending.append((on_commit, on_rollback))
+    
+    def _record_alerts(self, alerts: list) -> None:
+        """
+        Записать алерты детекторов (ставка уже закоммичена)
+        
+        При autocommit - отдельной транзакцией: ошибка записи алертов
+        не должна ломать ответ на уже сыгранную ставку. Иначе алерты
+        остаются в self.alerts для вызывающего.
+        """
+        if not alerts:
+            return
+        if not self.autocommit:
+            self.alerts.extend(alerts)
+            return
+        try:
+            self.db.add_all(alerts)
+            self.db.commit()
+        except Exception as e:
+            self.db.rollback()
+            logger.error(f"Failed to store anomaly alerts: {e}", exc_info=True)
+    
+    def finish(self, committed: bool) -> None:
+        """
+        Применить отложенные эффекты, когда транзакция вызывающего завершилась
+        
+        Args:
+            committed: True - транзакция закоммичена, False - откачена
+        """
+        pending, self.pending = self.pending, []
+        for on_commit, on_rollback in pending:
+            action = on_commit if committed else on_rollback
+            if action is not None:
+                action()
     
     # =========================
     # PROVABLY FAIR ФУНКЦИИ
@@ -50,31 +125,59 @@ class NvutiService:
         if seed:
             return seed
         
-        # Создаём новый seed pair
-        server_seed = secrets.token_hex(32)  # 64 символа
-        server_seed_hash = hashlib.sha256(server_seed.encode()).hexdigest()
-        client_seed = secrets.token_hex(16)  # 32 символа
+        # Выдаём новый seed pair
+        new_seed = self._issue_seed(user_id)
+        
+        self._commit()
+        self.db.refresh(new_seed)
         
-        new_seed = Seed(
+        return new_seed
+    
+    def _issue_seed(self, user_id: int, client_seed: str = None) -> Seed:
+        """
+        Выдать пользователю новый активный seed (без commit)
+        
+        В режиме цепочки берём следующее звено цепочки хешей игрока.
+        Иначе - готовый seed из пула, и только если пул пуст -
+        генерируем и хешируем server seed прямо в запросе.
+        
+        Args:
+            user_id: ID пользователя
+            client_seed: Свой client seed (опционально)
+        
+        Returns:
+            Новый активный Seed
+        """
+        if settings.SEED_MODE == "chain":
+            seed = acquire_chain_seed(self.db, user_id, client_seed)
+            if seed:
+                return seed
+            logger.warning("No active hash chain or chain exhausted, falling back to random seeds")
+        
+        if settings.SEED_POOL_ENABLED:
+            seed = seed_pool.acquire(self.db, user_id, client_seed)
+            if seed:
+                return seed
+        
+        server_seed, server_seed_hash = generate_server_seed()
+        
+        seed = Seed(
             user_id=user_id,
             server_seed=server_seed,
             server_seed_hash=server_seed_hash,
-            client_seed=client_seed,
+            client_seed=client_seed or generate_client_seed(),
             nonce=0,
             active=True
         )
+        self.db.add(seed)
         
-        self.db.add(new_seed)
-        self.db.commit()
-        self.db.refresh(new_seed)
-        
-        return new_seed
+        return seed
     
-    def calculate_result(self, server_seed: str, client_seed: str, nonce: int) -> float:
+    def calculate_result(self, server_seed: str, client_seed: str, nonce: int, game_type: str = None, **params):
         """
         Вычислить результат игры (Provably Fair алгоритм)
         
-        Алгоритм:
+        Алгоритм (движок DiceEngine):
         1. Создаём HMAC-SHA256 из server_seed, client_seed, nonce
         2. Берём первые 8 hex символов
         3. Конвертируем в число 0-9999
@@ -84,27 +187,13 @@ class NvutiService:
             server_seed: Серверный seed
             client_seed: Клиентский seed
             nonce: Номер игры
+            game_type: Тип игры (по умолчанию - Nvuti)
+            **params: Параметры броска движка (например, flips)
         
         Returns:
-            Число от 0.00 до 99.99
+            Число от 0.00 до 99.99 (для Nvuti)
         """
-        # Создаём HMAC
-        hmac_result = hmac.new(
-            key=server_seed.encode('utf-8'),
-            msg=f"{client_seed}:{nonce}".encode('utf-8'),
-            digestmod=hashlib.sha256
-        ).hexdigest()
-        
-        # Берём первые 8 символов
-        hex_part = hmac_result[:8]
-        
-        # Конвертируем в число
-        decimal = int(hex_part, 16)
-        
-        # Результат 0.00 - 99.99
-        result = (decimal % 10000) / 100.0
-        
-        return round(result, 2)
+        return engine_for(game_type or self.GAME_TYPE).outcome(server_seed, client_seed, nonce, **params)
     
     def calculate_multiplier(self, win_chance: float) -> float:
         """
@@ -125,11 +214,87 @@ class NvutiService:
         """
         return round((100 - self.HOUSE_EDGE) / win_chance, 2)
     
+    def verify(
+        self,
+        server_seed: str,
+        client_seed: str,
+        nonce: int,
+        server_seed_hash: str = None,
+        chain_terminal_hash: str = None,
+        chain_index: int = None
+    ) -> dict:
+        """
+        Проверить результат игры по раскрытому server seed
+        
+        Работает в обоих режимах:
+        - случайный seed: sha256(server_seed) == server_seed_hash
+        - цепочка хешей: seed - звено chain_index цепочки игрока с
+          терминальным хешем chain_terminal_hash (server_seed_hash его
+          первого seed'а из цепочки). Проверка - по выданному seed'у в БД.
+        
+        Args:
+            server_seed: Раскрытый server seed
+            client_seed: Client seed
+            nonce: Номер игры
+            server_seed_hash: Хеш, опубликованный до игры (опционально)
+            chain_terminal_hash: Терминальный хеш цепочки игрока (опционально)
+            chain_index: Номер seed'а в цепочке (вместе с chain_terminal_hash)
+        
+        Returns:
+            Результат игры и флаги проверок (None - проверка не запрашивалась)
+        
+        Raises:
+            ValueError: Если нет chain_index или цепочка нам неизвестна
+        """
+        hash_valid = None
+        if server_seed_hash is not None:
+            hash_valid = hashlib.sha256(server_seed.encode()).hexdigest() == server_seed_hash
+        
+        chain_valid = None
+        if chain_terminal_hash is not None:
+            if chain_index is None or chain_index < 0:
+                raise ValueError("chain_index is required to verify a hash chain seed")
+            chain_valid = self._verify_chain_seed(server_seed, chain_terminal_hash, chain_index)
+        
+        return {
+            "result_number": self.calculate_result(server_seed, client_seed, nonce),
+            "hash_valid": hash_valid,
+            "chain_valid": chain_valid
+        }
+    
+    def _verify_chain_seed(self, server_seed: str, terminal_hash: str, index: int) -> bool:
+        """
+        Проверить seed из цепочки хешей игрока
+        
+        Сверяем с выданным seed'ом по строке в БД - без хеширования
+        на сервере. Чужую цепочку аудитор проверяет сам:
+        verify_chain_seed хеширует seed index + 1 раз.
+        
+        Raises:
+            ValueError: Если цепочка с таким терминальным хешем нам неизвестна
+        """
+        if self.db is None:
+            raise ValueError("Unknown hash chain")
+        
+        first = find_chain_seed(self.db, terminal_hash, 0)
+        if first is None:
+            raise ValueError("Unknown hash chain: verify offline by hashing the seed chain_index + 1 times")
+        
+        seed = first if index == 0 else find_chain_seed(self.db, terminal_hash, index)
+        return seed is not None and seed.server_seed == server_seed
+    
     # =========================
     # ИГРОВАЯ ЛОГИКА
     # =========================
     
-    def play(self, user_id: int, game_id: int, bet_amount: float, win_chance: float) -> dict:
+    def play(
+        self,
+        user_id: int,
+        game_id: int,
+        bet_amount: float,
+        win_chance: float,
+        idempotency_key: str = None
+    ) -> dict:
         """
         Сыграть раунд Nvuti
         
@@ -138,6 +303,8 @@ class NvutiService:
             game_id: ID игры (из таблицы games)
             bet_amount: Размер ставки
             win_chance: Шанс выигрыша (1-95%)
+            idempotency_key: Ключ Idempotency-Key - ответ сохраняется
+                в той же транзакции (повтор ключа даст IntegrityError)
         
         Returns:
             Результат игры со всеми данными
@@ -145,102 +312,175 @@ class NvutiService:
         Raises:
             ValueError: Если валидация не прошла
         """
-        # Валидация шанса выигрыша
-        if not (self.MIN_WIN_CHANCE <= win_chance <= self.MAX_WIN_CHANCE):
-            raise ValueError(
-                f"Win chance must be between {self.MIN_WIN_CHANCE} and {self.MAX_WIN_CHANCE}"
-            )
+        return self.play_game(user_id, game_id, bet_amount, {"win_chance": win_chance}, idempotency_key)
+    
+    def play_game(
+        self,
+        user_id: int,
+        game_id: int,
+        bet_amount: float,
+        params: dict,
+        idempotency_key: str = None
+    ) -> dict:
+        """
+        Сыграть ставку в игру любого типа с движком в реестре game_engines
+        
+        Движок выбирается по Game.type: он проверяет параметры ставки,
+        даёт шанс выигрыша (из него - множитель) и решает исход.
+        
+        Args:
+            user_id: ID пользователя
+            game_id: ID игры (из таблицы games)
+            bet_amount: Размер ставки
+            params: Параметры ставки движка (для dice - win_chance)
+            idempotency_key: Ключ Idempotency-Key - ответ сохраняется
+                в той же транзакции (повтор ключа даст IntegrityError)
+        
+        Returns:
+            Результат игры: исход под OUTCOME_FIELD движка, параметры
+            ставки и данные для Provably Fair верификации
+        
+        Raises:
+            ValueError: Если валидация не прошла
+        """
+        # Получаем игру (из кеша каталога воркера)
+        game = game_catalog.get(self.db, game_id)
+        if not game:
+            raise ValueError("Game not found")
+        
+        engine = engine_for(game.type)
+        if not engine.DIRECT_BETS:
+            raise ValueError(f"Game type '{game.type}' does not accept direct bets")
+        
+        # Валидация параметров ставки (для dice - шанс выигрыша)
+        params = engine.bet_params(params)
+        win_chance = engine.win_chance(**params)
         
         # Получаем пользователя
         user = self.db.query(User).filter(User.id == user_id).first()
         if not user:
             raise ValueError("User not found")
         
-        # Проверка баланса
-        if user.balance < bet_amount:
+        # Проверка баланса (снапшот + движения по журналу)
+        balance = ledger.balance_minor(self.db, user_id)
+        if balance < to_minor(bet_amount):
             raise ValueError("Insufficient balance")
         
-        # Получаем игру
-        game = self.db.query(Game).filter(Game.id == game_id).first()
-        if not game:
-            raise ValueError("Game not found")
-        
         # Проверка лимитов ставки
         if bet_amount < game.min_bet or bet_amount > game.max_bet:
             raise ValueError(
                 f"Bet must be between {game.min_bet} and {game.max_bet}"
             )
         
-        # Получить активный seed
-        seed = self.get_or_create_active_seed(user_id)
-        
-        # Текущий nonce (ДО увеличения)
-        current_nonce = seed.nonce
-        
-        # Увеличиваем nonce для следующей игры
-        seed.nonce += 1
-        
-        # Вычисляем результат (Provably Fair)
-        result_number = self.calculate_result(
-            seed.server_seed,
-            seed.client_seed,
-            current_nonce
-        )
-        
-        # Определяем выигрыш
-        is_win = result_number < win_chance
-        
-        # Рассчитываем множитель и выплату
+        # Рассчитываем множитель
         multiplier = self.calculate_multiplier(win_chance)
         
-        if is_win:
-            payout = bet_amount * multiplier
-            profit_loss = payout - bet_amount
-        else:
-            payout = 0
-            profit_loss = -bet_amount
-        
-        # Обновляем баланс пользователя
-        user.balance += profit_loss
-        
-        # Сохраняем ставку в БД
-        bet = Bet(
-            user_id=user_id,
-            game_id=game_id,
-            amount=bet_amount,
-            result="win" if is_win else "loss",
-            profit_loss=profit_loss,
-            game_data=json.dumps({
-                "win_chance": win_chance,
+        # Лимиты риска казино (в памяти, без запросов к БД)
+        reserved = exposure_tracker.reserve(user_id, bet_amount, multiplier)
+        
+        try:
+            # Получить активный seed
+            seed = self.get_or_create_active_seed(user_id)
+            
+            # Текущий nonce (ДО увеличения)
+            current_nonce = seed.nonce
+            
+            # Увеличиваем nonce для следующей игры
+            seed.nonce += 1
+            
+            # Вычисляем результат (Provably Fair)
+            outcome = self.calculate_result(
+                seed.server_seed,
+                seed.client_seed,
+                current_nonce,
+                game.type,
+                **engine.roll_params(**params)
+            )
+            
+            # Определяем выигрыш
+            is_win = engine.is_win(outcome, **params)
+            
+            # Рассчитываем выплату (в минорных единицах, как в журнале)
+            if is_win:
+                payout = from_minor(to_minor(bet_amount * multiplier))
+                profit_loss = from_minor(to_minor(payout) - to_minor(bet_amount))
+            else:
+                payout = 0.0
+                profit_loss = -bet_amount
+            
+            # Сохраняем ставку в БД
+            bet = Bet(
+                user_id=user_id,
+                game_id=game_id,
+                amount=bet_amount,
+                result="win" if is_win else "loss",
+                profit_loss=profit_loss,
+                game_data=json.dumps({
+                    **params,
+                    "multiplier": multiplier,
+                    engine.OUTCOME_FIELD: outcome,
+                    "server_seed_hash": seed.server_seed_hash,
+                    "client_seed": seed.client_seed,
+                    "nonce": current_nonce,
+                    "is_win": is_win,
+                    "payout": payout
+                })
+            )
+            
+            self.db.add(bet)
+            
+            # Движение баланса - только INSERT, строку users не трогаем
+            ledger.record(self.db, user_id, profit_loss, "bet", bet=bet)
+            
+            # ID ставки нужен в ответе до commit (ответ сохраняется вместе со ставкой)
+            self.db.flush()
+            result = {
+                "bet_id": bet.id,
+                engine.OUTCOME_FIELD: outcome,
+                **params,
                 "multiplier": multiplier,
-                "result_number": result_number,
+                "is_win": is_win,
+                "payout": payout,
+                "profit_loss": profit_loss,
+                "new_balance": from_minor(balance + to_minor(profit_loss)),
+                # Данные для Provably Fair верификации
                 "server_seed_hash": seed.server_seed_hash,
                 "client_seed": seed.client_seed,
-                "nonce": current_nonce,
-                "is_win": is_win,
-                "payout": payout
-            })
-        )
-        
-        self.db.add(bet)
-        self.db.commit()
-        self.db.refresh(bet)
-        
-        # Возвращаем результат
-        return {
-            "bet_id": bet.id,
-            "result_number": result_number,
-            "win_chance": win_chance,
-            "multiplier": multiplier,
-            "is_win": is_win,
-            "payout": payout,
-            "profit_loss": profit_loss,
-            "new_balance": user.balance,
-            # Данные для Provably Fair верификации
-            "server_seed_hash": seed.server_seed_hash,
-            "client_seed": seed.client_seed,
-            "nonce": current_nonce
-        }
+                "nonce": current_nonce
+            }
+            
+            if idempotency_key is not None:
+                idempotency_cache.store(
+                    self.db,
+                    user_id,
+                    idempotency_key,
+                    request_fingerprint(game_id=game_id, amount=bet_amount, **params),
+                    result
+                )
+            
+            self._commit()
+        except Exception:
+            exposure_tracker.release(reserved)
+            raise
+        
+        def settle():
+            exposure_tracker.settle(user_id, reserved, profit_loss)
+            # Потоковые детекторы аномалий (O(1)) - по закоммиченной ставке
+            if settings.ANOMALY_ENABLED:
+                self._record_alerts(anomaly_detector.observe(
+                    user_id=user_id,
+                    bet_id=result["bet_id"],
+                    win_chance=win_chance,
+                    multiplier=multiplier,
+                    amount=bet_amount,
+                    profit_loss=profit_loss,
+                    is_win=is_win,
+                    client_seed=result["client_seed"]
+                ))
+        
+        self._after_commit(settle, lambda: exposure_tracker.release(reserved))
+        
+        return result
     
     def rotate_seed(self, user_id: int, new_client_seed: str = None) -> dict:
         """
@@ -269,28 +509,16 @@ class NvutiService:
             old_server_seed = None
             old_server_seed_hash = None
         
-        # Создаём новый seed pair
-        server_seed = secrets.token_hex(32)
-        server_seed_hash = hashlib.sha256(server_seed.encode()).hexdigest()
-        client_seed = new_client_seed or secrets.token_hex(16)
-        
-        new_seed = Seed(
-            user_id=user_id,
-            server_seed=server_seed,
-            server_seed_hash=server_seed_hash,
-            client_seed=client_seed,
-            nonce=0,
-            active=True
-        )
+        # Выдаём новый seed pair (из пула, если есть)
+        new_seed = self._issue_seed(user_id, new_client_seed)
         
-        self.db.add(new_seed)
-        self.db.commit()
+        self._commit()
         
         return {
             "previous_server_seed": old_server_seed,  # РАСКРЫЛИ
             "previous_server_seed_hash": old_server_seed_hash,
-            "new_server_seed_hash": server_seed_hash,
-            "new_client_seed": client_seed,
+            "new_server_seed_hash": new_seed.server_seed_hash,
+            "new_client_seed": new_seed.client_seed,
             "message": "Seed rotated successfully. Use previous_server_seed to verify past games."
         }
     
@@ -0,0 +1,259 @@
+import logging
+import os
+import random
+import re
+import secrets
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+from fastapi import Request
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Потоки, стоящие в этих модулях, ждут работы - в профиль не попадают
+_IDLE_FILES = ("threading.py", "selectors.py", "queue.py", "concurrent/futures/thread.py")
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """
+    Сэмплирующий профилировщик: раз в interval снимает стеки всех потоков
+
+    Результат - «свёрнутые» стеки (folded stacks): строка
+    "поток;корень;...;лист число_сэмплов", формат flamegraph.pl,
+    speedscope и inferno. Снимаются все потоки процесса, потому что
+    синхронные endpoint'ы выполняются в пуле потоков, а не в потоке
+    event loop.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.samples = 0
+        self._stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        return self._stacks
+
+    def _sample(self) -> None:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        own = threading.get_ident()
+
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own:
+                continue
+            if frame.f_code.co_filename.endswith(_IDLE_FILES):
+                continue
+
+            stack = []
+            while frame is not None:
+                stack.append(_frame_name(frame))
+                frame = frame.f_back
+            stack.append(names.get(thread_id, str(thread_id)))
+            self._stacks[";".join(reversed(stack))] += 1
+
+        self.samples += 1
+
+    def _run(self) -> None:
+        self._sample()
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+
+def write_folded(path: str, stacks: Counter) -> None:
+    with open(path, "w") as f:
+        for stack, count in stacks.most_common():
+            f.write(f"{stack} {count}\n")
+
+
+class RequestProfiler:
+    """
+    Профилирование выборки запросов по команде админа
+
+    Работает, только если приложение собрано с PROFILING_ENABLED
+    (иначе profile_request не подключён). Взведённый профилирует
+    следующие N запросов:
+    - с заголовком X-Profile-Token (токен выдаётся при взведении) - всегда;
+    - остальные с путём path_prefix - с вероятностью sample_rate.
+    Каждый запрос пишется в PROFILING_DIR отдельным .folded файлом.
+    """
+
+    TOKEN_HEADER = "X-Profile-Token"
+
+    def __init__(self):
+        self.remaining = 0
+        self.sample_rate = 1.0
+        self.path_prefix = None
+        self.token = None
+        self._lock = threading.Lock()
+
+    @property
+    def directory(self) -> str:
+        return settings.PROFILING_DIR
+
+    def arm(self, requests: int, sample_rate: float = 1.0, path_prefix: str = None) -> str:
+        """
+        Профилировать следующие requests запросов
+
+        Returns:
+            Токен для заголовка X-Profile-Token
+
+        Raises:
+            ValueError: Если профилирование выключено (PROFILING_ENABLED)
+        """
+        if not settings.PROFILING_ENABLED:
+            raise ValueError("Request profiling is disabled, set PROFILING_ENABLED=true")
+
+        with self._lock:
+            self.sample_rate = sample_rate
+            self.path_prefix = path_prefix
+            self.token = secrets.token_hex(16)
+            self.remaining = requests
+        logger.warning(f"Request profiling armed for {requests} request(s), prefix={path_prefix}")
+        return self.token
+
+    def disarm(self) -> None:
+        with self._lock:
+            self.remaining = 0
+            self.token = None
+
+    def should_profile(self, request: Request) -> bool:
+        """
+        Взять запрос в профиль (уменьшает счётчик оставшихся)
+        """
+        token = request.headers.get(self.TOKEN_HEADER)
+        with self._lock:
+            if self.remaining <= 0:
+                return False
+            if token is not None and token == self.token:
+                pass
+            elif self.path_prefix and not request.url.path.startswith(self.path_prefix):
+                return False
+            elif random.random() >= self.sample_rate:
+                return False
+
+            self.remaining -= 1
+            if self.remaining == 0:
+                self.token = None
+            return True
+
+    def dump_path(self, request: Request, elapsed_ms: float) -> str:
+        path = re.sub(r"[^A-Za-z0-9]+", "_", request.url.path).strip("_") or "root"
+        stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
+        return os.path.join(self.directory, f"{stamp}_{request.method}_{path}_{elapsed_ms:.0f}ms.folded")
+
+    def dumps(self) -> list[str]:
+        """
+        Файлы профилей, новые первыми
+        """
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(
+            (name for name in os.listdir(self.directory) if name.endswith((".folded", ".tracemalloc.txt"))),
+            reverse=True
+        )
+
+
+request_profiler = RequestProfiler()
+
+
+async def profile_request(request: Request):
+    """
+    Глобальная зависимость FastAPI (подключается в create_app при PROFILING_ENABLED)
+
+    Невзведённый профилировщик - сразу yield, без сэмплера и таймеров,
+    но запрос всё равно платит за разрешение зависимости и проход
+    генератора - поэтому по умолчанию она не подключена.
+    """
+    if request_profiler.remaining <= 0 or not request_profiler.should_profile(request):
+        yield
+        return
+
+    sampler = StackSampler(settings.PROFILING_SAMPLE_INTERVAL_MS / 1000)
+    started = time.perf_counter()
+    sampler.start()
+    try:
+        yield
+    finally:
+        stacks = sampler.stop()
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        os.makedirs(request_profiler.directory, exist_ok=True)
+        path = request_profiler.dump_path(request, elapsed_ms)
+        write_folded(path, stacks)
+        logger.info(f"Profiled {request.method} {request.url.path}: {elapsed_ms:.1f} ms, {sampler.samples} samples -> {path}")
+
+
+# =========================
+# TRACEMALLOC
+# =========================
+
+def start_tracemalloc(frames: int = 1) -> None:
+    """
+    Включить трассировку выделений памяти (замедляет весь процесс, пока включена)
+    """
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+
+
+def stop_tracemalloc() -> None:
+    tracemalloc.stop()
+
+
+def tracemalloc_top(limit: int = 20, group_by: str = "lineno") -> dict:
+    """
+    Топ мест выделения памяти по текущему снимку
+
+    Снимок также пишется в PROFILING_DIR.
+
+    Raises:
+        ValueError: Если трассировка не включена
+    """
+    if not tracemalloc.is_tracing():
+        raise ValueError("tracemalloc is not tracing, start it first")
+
+    snapshot = tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ))
+    stats = snapshot.statistics(group_by)
+    current, peak = tracemalloc.get_traced_memory()
+
+    top = [
+        {
+            "location": str(stat.traceback[0]) if group_by != "traceback" else " <- ".join(map(str, stat.traceback)),
+            "size_kb": round(stat.size / 1024, 1),
+            "count": stat.count
+        }
+        for stat in stats[:limit]
+    ]
+
+    os.makedirs(settings.PROFILING_DIR, exist_ok=True)
+    stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
+    with open(os.path.join(settings.PROFILING_DIR, f"{stamp}.tracemalloc.txt"), "w") as f:
+        for stat in stats[:limit]:
+            f.write(f"{stat}\n")
+
+    return {
+        "tracing": True,
+        "traced_kb": round(current / 1024, 1),
+        "peak_kb": round(peak / 1024, 1),
+        "top": top
+    }
@@ -0,0 +1,269 @@
+import logging
+import math
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from fastapi import Depends, HTTPException, Request, status
+from jose import JWTError
+
+from app.config import settings
+from app.services.auth import decode_access_token, oauth2_scheme
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def _refill(tokens: float, updated: float, now: float, rate: float, burst: float) -> float:
+    return min(burst, tokens + max(now - updated, 0.0) * rate)
+
+
+def _take(tokens: float, cost: float, rate: float) -> tuple[float, float]:
+    """
+    Списать cost токенов
+
+    Returns:
+        (остаток токенов, через сколько секунд повторить; 0 - разрешено)
+    """
+    if tokens >= cost:
+        return tokens - cost, 0.0
+    return tokens, (cost - tokens) / rate
+
+
+# =========================
+# ХРАНИЛИЩА КОРЗИН
+# =========================
+
+class MemoryBuckets:
+    """
+    Корзины токенов в памяти воркера
+
+    Каждая корзина - (токены, время обновления), пополняется лениво
+    при обращении: O(1) на запрос. Число корзин ограничено max_keys,
+    при переполнении вытесняется корзина, к которой дольше всех не
+    обращались (LRU): неактивная корзина всё равно успела бы
+    наполниться, так что её удаление лимит почти не ослабляет.
+    """
+
+    def __init__(self, max_keys: int = None, clock=time.monotonic):
+        self.max_keys = max_keys or settings.RATE_LIMIT_MAX_KEYS
+        self._clock = clock
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+    def acquire(self, key: str, rate: float, burst: float, cost: float = 1.0) -> float:
+        """
+        Взять токен из корзины key
+
+        Returns:
+            0 - запрос разрешён, иначе - через сколько секунд повторить
+        """
+        now = self._clock()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                tokens = burst
+                if len(self._buckets) >= self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                tokens = _refill(bucket[0], bucket[1], now, rate, burst)
+                self._buckets.move_to_end(key)
+
+            tokens, retry_after = _take(tokens, cost, rate)
+            self._buckets[key] = (tokens, now)
+            return retry_after
+
+
+class SQLiteBuckets:
+    """
+    Корзины токенов в общем файле SQLite - один лимит на все воркеры хоста
+
+    Каждый acquire - одна короткая транзакция BEGIN IMMEDIATE
+    (чтение и запись корзины атомарны между процессами). Время -
+    time.time(), общее для процессов. Давно неактивные корзины
+    удаляются раз в prune_every обращений.
+    """
+
+    def __init__(self, path: str, idle_seconds: float = None, prune_every: int = 1000, clock=time.time):
+        self.path = path
+        self.idle_seconds = idle_seconds if idle_seconds is not None else settings.RATE_LIMIT_IDLE_SECONDS
+        self.prune_every = prune_every
+        self._clock = clock
+        self._local = threading.local()
+        self._calls = 0
+
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_limit_buckets ("
+                "key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")  # Потеря корзин при сбое ОС не страшна
+            self._local.conn = conn
+        return conn
+
+    def clear(self) -> None:
+        self._connect().execute("DELETE FROM rate_limit_buckets")
+
+    def prune(self) -> int:
+        """
+        Удалить корзины, к которым не обращались idle_seconds
+        """
+        cursor = self._connect().execute(
+            "DELETE FROM rate_limit_buckets WHERE updated < ?",
+            (self._clock() - self.idle_seconds,)
+        )
+        return cursor.rowcount
+
+    def acquire(self, key: str, rate: float, burst: float, cost: float = 1.0) -> float:
+        conn = self._connect()
+        now = self._clock()
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT tokens, updated FROM rate_limit_buckets WHERE key = ?", (key,)
+            ).fetchone()
+            tokens = burst if row is None else _refill(row[0], row[1], now, rate, burst)
+
+            tokens, retry_after = _take(tokens, cost, rate)
+            conn.execute(
+                "INSERT OR REPLACE INTO rate_limit_buckets (key, tokens, updated) VALUES (?, ?, ?)",
+                (key, tokens, now)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        self._calls += 1
+        if self._calls % self.prune_every == 0:
+            self.prune()
+
+        return retry_after
+
+
+# =========================
+# ЛИМИТЕР
+# =========================
+
+class RateLimiter:
+    """
+    Лимиты частоты запросов по маршрутам: по игроку и по IP
+
+    Правила - settings.RATE_LIMIT_RULES: {маршрут: {"user_rate",
+    "user_burst", "ip_rate", "ip_burst"}}, rate - запросов в секунду,
+    burst - ёмкость корзины. Отсутствующий ключ - без ограничения.
+    """
+
+    def __init__(self):
+        self._backend = None
+        self._lock = threading.Lock()
+        self.limited = metrics.counter("rate_limited_total", "Requests rejected by the rate limiter")
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            with self._lock:
+                if self._backend is None:
+                    self._backend = self._create_backend()
+        return self._backend
+
+    def _create_backend(self):
+        if settings.RATE_LIMIT_BACKEND == "sqlite":
+            return SQLiteBuckets(settings.RATE_LIMIT_SQLITE_PATH)
+        if settings.RATE_LIMIT_BACKEND == "memory":
+            return MemoryBuckets()
+        raise ValueError(f"Unknown RATE_LIMIT_BACKEND: {settings.RATE_LIMIT_BACKEND}")
+
+    def configure(self, backend) -> None:
+        """
+        Подменить хранилище корзин (None - создать заново по настройкам)
+        """
+        with self._lock:
+            self._backend = backend
+
+    def clear(self) -> None:
+        if self._backend is not None:
+            self._backend.clear()
+
+    def check(self, route: str, user_id: int | None, ip: str | None) -> float:
+        """
+        Проверить запрос по правилам маршрута
+
+        Returns:
+            0 - запрос разрешён, иначе - через сколько секунд повторить
+        """
+        rule = settings.RATE_LIMIT_RULES.get(route)
+        if not settings.RATE_LIMIT_ENABLED or not rule:
+            return 0.0
+
+        retry_after = 0.0
+        if user_id is not None and "user_rate" in rule:
+            retry_after = self.backend.acquire(
+                f"{route}:user:{user_id}", rule["user_rate"], rule.get("user_burst", rule["user_rate"])
+            )
+        if not retry_after and ip is not None and "ip_rate" in rule:
+            retry_after = self.backend.acquire(
+                f"{route}:ip:{ip}", rule["ip_rate"], rule.get("ip_burst", rule["ip_rate"])
+            )
+
+        if retry_after:
+            self.limited.inc()
+        return retry_after
+
+
+rate_limiter = RateLimiter()
+
+
+def _token_user_id(token: str) -> int | None:
+    """
+    ID игрока из подписи токена (uid), без запроса к БД
+
+    Невалидный токен - None: лимит только по IP, а 401 вернёт
+    get_current_user.
+    """
+    try:
+        return decode_access_token(token).get("uid")
+    except JWTError:
+        return None
+
+
+def rate_limit(route: str):
+    """
+    Зависимость FastAPI: 429 Too Many Requests при превышении лимита маршрута
+
+    Корзины проверяются до get_current_user: игрок берётся из токена,
+    так что отклонённый запрос не делает запрос к БД и не занимает
+    соединение из пула. Подключать через dependencies маршрута - они
+    разрешаются раньше параметров endpoint'а.
+
+    Пример:
+        @router.post("/nvuti/bet", dependencies=[Depends(rate_limit("nvuti_bet"))])
+    """
+    def dependency(request: Request, token: str = Depends(oauth2_scheme)):
+        ip = request.client.host if request.client else None
+        user_id = _token_user_id(token)
+        retry_after = rate_limiter.check(route, user_id, ip)
+
+        if retry_after:
+            logger.warning(f"Rate limit on {route}: user={user_id}, ip={ip}")
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests",
+                headers={"Retry-After": str(math.ceil(retry_after))}
+            )
+
+    return dependency
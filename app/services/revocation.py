@@ -0,0 +1,243 @@
+import asyncio
+import heapq
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.revoked_token import RevokedToken
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def _to_timestamp(moment: datetime) -> float:
+    return moment.replace(tzinfo=timezone.utc).timestamp()
+
+
+def _to_datetime(timestamp: float) -> datetime:
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).replace(tzinfo=None)
+
+
+class RevocationList:
+    """
+    Отозванные токены в памяти воркера
+
+    Проверка токена - два поиска в dict, без обращений к БД:
+    - jti в списке отозванных токенов (logout);
+    - игрок забанен, а токен выдан до бана (iat <= момента бана).
+
+    Каждая запись живёт, пока не истекут токены, которые она
+    отзывает; куча по времени истечения удаляет их за O(log n).
+    Отзывы других воркеров подтягиваются из revoked_tokens по id.
+    """
+
+    def __init__(self):
+        self._tokens = {}   # jti -> expires_at
+        self._users = {}    # user_id -> (revoked_at, expires_at)
+        self._expiry = []   # куча (expires_at, kind, key)
+        self._last_id = 0
+        self._lock = threading.Lock()
+
+        self.size_gauge = metrics.gauge("revocation_list_size", "Revoked tokens and users held in memory")
+        self.rejected = metrics.counter("revocation_rejected_total", "Requests with a revoked token")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._tokens.clear()
+            self._users.clear()
+            self._expiry.clear()
+            self._last_id = 0
+
+    def __len__(self) -> int:
+        return len(self._tokens) + len(self._users)
+
+    # =========================
+    # ПРОВЕРКА
+    # =========================
+
+    def is_revoked(self, payload: dict) -> bool:
+        """
+        Отозван ли токен (по claims jti, uid и iat)
+        """
+        jti = payload.get("jti")
+        if jti is not None and jti in self._tokens:
+            self.rejected.inc()
+            return True
+
+        user_id = payload.get("uid")
+        if user_id is not None:
+            banned = self._users.get(user_id)
+            # Токены без iat выданы до появления отзыва - считаем старыми
+            if banned is not None and payload.get("iat", 0) <= banned[0]:
+                self.rejected.inc()
+                return True
+
+        return False
+
+    # =========================
+    # ДОБАВЛЕНИЕ И ИСТЕЧЕНИЕ
+    # =========================
+
+    def _add(self, kind: str, key: str, revoked_at: float, expires_at: float) -> None:
+        if kind == "token":
+            if self._tokens.get(key, 0) >= expires_at:
+                return
+            self._tokens[key] = expires_at
+        else:
+            user_id = int(key)
+            current = self._users.get(user_id)
+            if current is not None:
+                revoked_at = max(revoked_at, current[0])
+                expires_at = max(expires_at, current[1])
+            self._users[user_id] = (revoked_at, expires_at)
+        heapq.heappush(self._expiry, (expires_at, kind, key))
+
+    def _purge(self, now: float) -> None:
+        while self._expiry and self._expiry[0][0] <= now:
+            expires_at, kind, key = heapq.heappop(self._expiry)
+            # Запись могли продлить - удаляем только если срок совпадает
+            if kind == "token":
+                if self._tokens.get(key) == expires_at:
+                    del self._tokens[key]
+            else:
+                current = self._users.get(int(key))
+                if current is not None and current[1] == expires_at:
+                    del self._users[int(key)]
+        self.size_gauge.set(len(self))
+
+    def apply(self, kind: str, key: str, revoked_at: float, expires_at: float) -> None:
+        """
+        Добавить отзыв в память (своего воркера - сразу, чужих - при синхронизации)
+        """
+        now = time.time()
+        with self._lock:
+            if expires_at > now:
+                self._add(kind, key, revoked_at, expires_at)
+            self._purge(now)
+
+    # =========================
+    # ОТЗЫВ
+    # =========================
+
+    def revoke_token(self, db: Session, payload: dict) -> None:
+        """
+        Отозвать один токен до его истечения (logout)
+
+        Raises:
+            ValueError: Если в токене нет jti (выдан до появления отзыва)
+        """
+        jti = payload.get("jti")
+        if jti is None:
+            raise ValueError("Token cannot be revoked")
+
+        revoked_at = time.time()
+        expires_at = float(payload["exp"])
+        db.add(RevokedToken(
+            kind="token",
+            key=jti,
+            revoked_at=_to_datetime(revoked_at),
+            expires_at=_to_datetime(expires_at)
+        ))
+        db.commit()
+
+        self.apply("token", jti, revoked_at, expires_at)
+
+    def revoke_user(self, db: Session, user_id: int) -> None:
+        """
+        Отозвать все уже выданные токены игрока (бан)
+
+        Запись нужна, пока не истекут токены, выданные до бана.
+        Новые токены забаненному не выдаёт логин.
+        """
+        revoked_at = time.time()
+        expires_at = revoked_at + settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+        db.add(RevokedToken(
+            kind="user",
+            key=str(user_id),
+            revoked_at=_to_datetime(revoked_at),
+            expires_at=_to_datetime(expires_at)
+        ))
+        db.commit()
+
+        self.apply("user", str(user_id), revoked_at, expires_at)
+
+    # =========================
+    # СИНХРОНИЗАЦИЯ ВОРКЕРОВ
+    # =========================
+
+    def sync(self, db: Session) -> int:
+        """
+        Подтянуть новые отзывы из БД
+
+        Читаем строки с id больше последнего увиденного, плюс свежие
+        за REVOCATION_SYNC_GRACE_SECONDS: id выдаётся до коммита, и
+        строка с меньшим id может стать видимой позже. Повторное
+        добавление безвредно.
+
+        Returns:
+            Сколько строк прочитано
+        """
+        now = datetime.utcnow()
+        grace = now - timedelta(seconds=settings.REVOCATION_SYNC_GRACE_SECONDS)
+
+        rows = db.query(RevokedToken).filter(
+            or_(RevokedToken.id > self._last_id, RevokedToken.revoked_at >= grace),
+            RevokedToken.expires_at > now
+        ).order_by(RevokedToken.id).all()
+
+        for row in rows:
+            self.apply(row.kind, row.key, _to_timestamp(row.revoked_at), _to_timestamp(row.expires_at))
+            self._last_id = max(self._last_id, row.id)
+
+        with self._lock:
+            self._purge(time.time())
+
+        db.rollback()
+        return len(rows)
+
+    def purge_expired(self, db: Session) -> int:
+        """
+        Удалить из БД отзывы, токены которых уже истекли
+        """
+        deleted = db.query(RevokedToken).filter(
+            RevokedToken.expires_at < datetime.utcnow()
+        ).delete(synchronize_session=False)
+        db.commit()
+        return deleted
+
+    async def run(self, session_factory, interval: float = None):
+        """
+        Фоновая задача: опрос revoked_tokens и чистка истёкших строк
+
+        Args:
+            session_factory: Фабрика сессий (SessionLocal)
+            interval: Пауза между опросами в секундах
+        """
+        interval = interval or settings.REVOCATION_POLL_INTERVAL_SECONDS
+        purge_every = max(int(60 / interval), 1)
+        polls = 0
+
+        def sync_once(purge: bool):
+            db = session_factory()
+            try:
+                self.sync(db)
+                if purge:
+                    self.purge_expired(db)
+            finally:
+                db.close()
+
+        while True:
+            try:
+                await asyncio.to_thread(sync_once, polls % purge_every == 0)
+            except Exception as e:
+                logger.error(f"Revocation sync failed: {e}", exc_info=True)
+
+            polls += 1
+            await asyncio.sleep(interval)
+
+
+revocation_list = RevocationList()
@@ -0,0 +1,330 @@
+import logging
+from collections import defaultdict
+from itertools import takewhile
+from datetime import datetime, timedelta
+from sqlalchemy import func, tuple_
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.bet import Bet
+from app.models.rollup import BetRollupHourly, RollupWatermark
+
+logger = logging.getLogger(__name__)
+
+WATERMARK_NAME = "bet_rollups_hourly"
+
+
+def truncate_hour(moment: datetime) -> datetime:
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+# =========================
+# АГРЕГАЦИЯ
+# =========================
+
+def aggregate_bets(rows) -> dict:
+    """
+    Сгруппировать ставки по (игра, час)
+
+    Args:
+        rows: Итерируемое (game_id, amount, profit_loss, result, timestamp)
+
+    Returns:
+        {(game_id, hour): {"bets_count", "wins_count", "turnover", "payout"}}
+    """
+    aggregates = defaultdict(lambda: {"bets_count": 0, "wins_count": 0, "turnover": 0.0, "payout": 0.0})
+
+    for game_id, amount, profit_loss, result, timestamp in rows:
+        bucket = aggregates[(game_id, truncate_hour(timestamp))]
+        bucket["bets_count"] += 1
+        bucket["wins_count"] += result == "win"
+        bucket["turnover"] += amount
+        # Выплата игроку = ставка + прибыль (0 при проигрыше)
+        bucket["payout"] += amount + profit_loss
+
+    return aggregates
+
+
+def apply_aggregates(db: Session, aggregates: dict) -> None:
+    """
+    Прибавить агрегаты к часовым строкам (без commit)
+    """
+    if not aggregates:
+        return
+
+    existing = {
+        (row.game_id, row.hour): row
+        for row in db.query(BetRollupHourly).filter(
+            tuple_(BetRollupHourly.game_id, BetRollupHourly.hour).in_(list(aggregates))
+        )
+    }
+
+    for (game_id, hour), values in aggregates.items():
+        row = existing.get((game_id, hour))
+        if row is None:
+            db.add(BetRollupHourly(game_id=game_id, hour=hour, **values))
+            continue
+
+        row.bets_count += values["bets_count"]
+        row.wins_count += values["wins_count"]
+        row.turnover += values["turnover"]
+        row.payout += values["payout"]
+
+
+def lock_watermark(db: Session) -> RollupWatermark:
+    """
+    Строка watermark агрегации под блокировкой до конца транзакции
+    """
+    watermark = db.query(RollupWatermark).filter(
+        RollupWatermark.name == WATERMARK_NAME
+    ).with_for_update().first()
+
+    if watermark is None:
+        watermark = RollupWatermark(name=WATERMARK_NAME, last_bet_id=0)
+        db.add(watermark)
+        db.flush()
+
+    return watermark
+
+
+def transfer_rollups(source: Session, dest: Session, bets: list[dict], old_ids: list[int], new_ids: list[int]) -> None:
+    """
+    Перенести вклад ставок игрока в часовые строки при переезде на другой шард (без commit)
+
+    Ставки, уже пройденные watermark'ом источника, вычитаются из его
+    строк. На целевом шарде ставки получают новые ID: те, что выше его
+    watermark, учтёт обычный проход агрегации (до него отчёты за часы
+    этих ставок их не видят), остальные прибавляются сразу. Watermark'и
+    обоих шардов заблокированы до commit.
+
+    Args:
+        source: Сессия исходного шарда
+        dest: Сессия целевого шарда
+        bets: Строки ставок
+        old_ids: ID ставок на исходном шарде
+        new_ids: ID тех же ставок на целевом шарде
+    """
+    source_mark = lock_watermark(source).last_bet_id
+    dest_mark = lock_watermark(dest).last_bet_id
+
+    def columns(row):
+        return row["game_id"], row["amount"], row["profit_loss"], row["result"], row["timestamp"]
+
+    counted = aggregate_bets(columns(row) for row, old_id in zip(bets, old_ids) if old_id <= source_mark)
+    for values in counted.values():
+        for key in values:
+            values[key] = -values[key]
+    apply_aggregates(source, counted)
+
+    apply_aggregates(dest, aggregate_bets(
+        columns(row) for row, new_id in zip(bets, new_ids) if new_id <= dest_mark
+    ))
+
+
+def _bet_columns(db: Session):
+    return db.query(Bet.game_id, Bet.amount, Bet.profit_loss, Bet.result, Bet.timestamp)
+
+
+class RollupAggregator:
+    """
+    Инкрементальная агрегация ставок по watermark на Bet.id
+
+    Каждый проход берёт ставки с id больше watermark (подряд по id,
+    до первой моложе ROLLUP_GRACE_SECONDS), прибавляет их к часовым
+    строкам и сдвигает watermark - всё в одной транзакции.
+    Строка watermark блокируется на время прохода, так что несколько
+    воркеров не посчитают одни и те же ставки дважды.
+    """
+
+    def run_once(self, db: Session) -> int:
+        """
+        Один проход агрегации
+
+        Returns:
+            Сколько ставок учтено
+        """
+        watermark = lock_watermark(db)
+        cutoff = datetime.utcnow() - timedelta(seconds=settings.ROLLUP_GRACE_SECONDS)
+
+        rows = _bet_columns(db).add_columns(Bet.id).filter(
+            Bet.id > watermark.last_bet_id
+        ).order_by(Bet.id).limit(settings.ROLLUP_BATCH_SIZE).all()
+
+        # Watermark - по id, а время ставок может идти не по порядку id
+        # (параллельные писатели, расчёт раунда задним числом): берём
+        # ставки до первой слишком свежей, а не отфильтровываем её -
+        # иначе watermark перескочит через неё навсегда
+        rows = list(takewhile(lambda row: row.timestamp < cutoff, rows))
+
+        if not rows:
+            db.rollback()
+            return 0
+
+        apply_aggregates(db, aggregate_bets(row[:5] for row in rows))
+
+        watermark.last_bet_id = rows[-1].id
+        watermark.updated_at = datetime.utcnow()
+        db.commit()
+
+        return len(rows)
+
+    def catch_up(self, db: Session) -> int:
+        """
+        Агрегировать всё накопившееся (батчами)
+        """
+        total = 0
+        while True:
+            count = self.run_once(db)
+            total += count
+            if count < settings.ROLLUP_BATCH_SIZE:
+                return total
+
+
+rollup_aggregator = RollupAggregator()
+
+
+# =========================
+# ПЕРЕСБОРКА ИСТОРИИ
+# =========================
+
+def rebuild_range(db: Session, start: datetime, end: datetime) -> int:
+    """
+    Пересобрать часовые строки за [start, end) с нуля
+
+    Границы должны быть выровнены по часу, чтобы параллельные
+    пересборки соседних диапазонов не задевали одни и те же строки.
+
+    Returns:
+        Сколько ставок учтено
+    """
+    db.query(BetRollupHourly).filter(
+        BetRollupHourly.hour >= start,
+        BetRollupHourly.hour < end
+    ).delete(synchronize_session=False)
+
+    rows = _bet_columns(db).filter(
+        Bet.timestamp >= start,
+        Bet.timestamp < end
+    ).yield_per(50_000)
+
+    aggregates = aggregate_bets(rows)
+    for (game_id, hour), values in aggregates.items():
+        db.add(BetRollupHourly(game_id=game_id, hour=hour, **values))
+
+    db.commit()
+
+    return sum(values["bets_count"] for values in aggregates.values())
+
+
+def set_watermark(db: Session, last_bet_id: int) -> None:
+    """
+    Выставить watermark вручную (после пересборки истории)
+    """
+    watermark = db.query(RollupWatermark).filter(
+        RollupWatermark.name == WATERMARK_NAME
+    ).with_for_update().first()
+
+    if watermark is None:
+        watermark = RollupWatermark(name=WATERMARK_NAME)
+        db.add(watermark)
+
+    watermark.last_bet_id = last_bet_id
+    watermark.updated_at = datetime.utcnow()
+    db.commit()
+
+
+# =========================
+# ОТЧЁТЫ (ТОЛЬКО ИЗ АГРЕГАТОВ)
+# =========================
+
+def _report_row(game_id: int, period: datetime, values: dict) -> dict:
+    turnover = values["turnover"]
+    payout = values["payout"]
+    return {
+        "game_id": game_id,
+        "period": period,
+        "bets_count": values["bets_count"],
+        "wins_count": values["wins_count"],
+        "turnover": turnover,
+        "payout": payout,
+        "ggr": turnover - payout,
+        "rtp": payout / turnover if turnover else None
+    }
+
+
+def hourly_report(db: Session, start: datetime, end: datetime, game_id: int = None) -> list[dict]:
+    """
+    GGR, оборот и RTP по часам
+    """
+    query = db.query(BetRollupHourly).filter(
+        BetRollupHourly.hour >= start,
+        BetRollupHourly.hour < end
+    )
+    if game_id is not None:
+        query = query.filter(BetRollupHourly.game_id == game_id)
+
+    return [
+        _report_row(row.game_id, row.hour, {
+            "bets_count": row.bets_count,
+            "wins_count": row.wins_count,
+            "turnover": row.turnover,
+            "payout": row.payout
+        })
+        for row in query.order_by(BetRollupHourly.hour, BetRollupHourly.game_id)
+    ]
+
+
+def daily_report(db: Session, start: datetime, end: datetime, game_id: int = None) -> list[dict]:
+    """
+    GGR, оборот и RTP по дням (сумма часовых строк)
+    """
+    query = db.query(
+        BetRollupHourly.game_id,
+        BetRollupHourly.hour,
+        BetRollupHourly.bets_count,
+        BetRollupHourly.wins_count,
+        BetRollupHourly.turnover,
+        BetRollupHourly.payout
+    ).filter(
+        BetRollupHourly.hour >= start,
+        BetRollupHourly.hour < end
+    )
+    if game_id is not None:
+        query = query.filter(BetRollupHourly.game_id == game_id)
+
+    days = defaultdict(lambda: {"bets_count": 0, "wins_count": 0, "turnover": 0.0, "payout": 0.0})
+    for row_game_id, hour, bets_count, wins_count, turnover, payout in query:
+        day = days[(row_game_id, hour.replace(hour=0))]
+        day["bets_count"] += bets_count
+        day["wins_count"] += wins_count
+        day["turnover"] += turnover
+        day["payout"] += payout
+
+    return [
+        _report_row(row_game_id, day, values)
+        for (row_game_id, day), values in sorted(days.items(), key=lambda item: (item[0][1], item[0][0]))
+    ]
+
+
+def merge_reports(reports: list[list[dict]]) -> list[dict]:
+    """
+    Сложить отчёты нескольких шардов (строки с одинаковыми игрой и периодом)
+    """
+    merged = defaultdict(lambda: {"bets_count": 0, "wins_count": 0, "turnover": 0.0, "payout": 0.0})
+    for report in reports:
+        for row in report:
+            values = merged[(row["game_id"], row["period"])]
+            for key in values:
+                values[key] += row[key]
+
+    return [
+        _report_row(game_id, period, values)
+        for (game_id, period), values in sorted(merged.items(), key=lambda item: (item[0][1], item[0][0]))
+    ]
+
+
+def max_bet_id_before(db: Session, end: datetime) -> int:
+    """
+    Максимальный id ставки до момента end (для watermark после пересборки)
+    """
+    return db.query(func.max(Bet.id)).filter(Bet.timestamp < end).scalar() or 0
@@ -0,0 +1,462 @@
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.bet import Bet
+from app.models.ledger import LedgerEntry
+from app.models.round import Round
+from app.models.user import User
+from app.services.exposure import exposure_tracker
+from app.services.game_catalog import GameInfo
+from app.services.game_engines import engine_for
+from app.services.ledger import from_minor, ledger, to_minor
+from app.services.nvuti_service import NvutiService
+from app.services.seed_pool import generate_server_seed, generate_client_seed
+
+logger = logging.getLogger(__name__)
+
+
+def round_client_seed(round_id: int, player_seeds: list[str]) -> str:
+    """
+    Client seed раунда из seed'ов игроков, принятых до закрытия окна
+
+    SHA-256 от JSON [round_id, [seed, ...]] в порядке приёма ставок.
+    Server seed зафиксирован хешем до первой ставки, а client seed
+    становится известен только при закрытии окна, так что исход раунда
+    не определён, пока игроки добавляют свои seed'ы.
+    """
+    payload = json.dumps([round_id, player_seeds], separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class PendingBet:
+    """
+    Ставка, принятая в открытый раунд и ещё не рассчитанная
+    """
+    user_id: int
+    amount: float
+    win_chance: float
+    multiplier: float
+    placed_at: datetime
+    # Seed игрока для client seed раунда
+    client_seed: str
+    # Резерв в трекере рисков казино
+    reserved: float = 0.0
+
+
+class OpenRound:
+    """
+    Открытый раунд в памяти воркера: публичные данные + принятые ставки
+    """
+
+    def __init__(self, round_row: Round):
+        self.id = round_row.id
+        self.game_id = round_row.game_id
+        self.server_seed_hash = round_row.server_seed_hash
+        self.closes_at = round_row.closes_at
+        self.bets: list[PendingBet] = []
+        # Сумма принятых ставок по пользователям (для проверки баланса без БД)
+        self.stakes: dict[int, float] = defaultdict(float)
+        # Забран на расчёт - новые ставки не принимаются
+        self.closed = False
+
+
+class RoundBook:
+    """
+    CONTROLLER: Общие раунды Nvuti
+
+    Ставки окна копятся в памяти (из БД читается только баланс). Когда
+    окно закрывается, результат считается один раз на весь раунд (один
+    HMAC), а все ставки рассчитываются одной транзакцией: массовые
+    INSERT в bets и в журнал движений баланса.
+
+    Ставка не списывается при приёме: если к расчёту баланса игрока
+    не хватает на все его ставки раунда, они аннулируются.
+
+    Ограничение: раунды живут в памяти своего воркера. С несколькими
+    воркерами uvicorn у каждого свой текущий раунд - игроки на разных
+    воркерах играют на разные числа. При рестарте нерассчитанные
+    ставки аннулируются (деньги при этом не двигались).
+    """
+
+    GAME_TYPE = "dice_round"
+
+    def __init__(self):
+        self._rounds: dict[int, OpenRound] = {}
+        # Раунды, вытесненные из книги до расчёта
+        self._closed: list[OpenRound] = []
+        self._lock = threading.Lock()
+        self._calculator = NvutiService(None)
+        self._engine = engine_for(self.GAME_TYPE)
+
+    # =========================
+    # ПРИЁМ СТАВОК
+    # =========================
+
+    def _open_round(self, db: Session, game: GameInfo) -> OpenRound:
+        """
+        Открыть новый раунд: server seed фиксируется сразу, публикуется только хеш
+
+        Client seed появится при расчёте (round_client_seed).
+        """
+        server_seed, server_seed_hash = generate_server_seed()
+
+        round_row = Round(
+            game_id=game.id,
+            server_seed=server_seed,
+            server_seed_hash=server_seed_hash,
+            status="open",
+            closes_at=datetime.utcnow() + timedelta(seconds=settings.ROUND_WINDOW_SECONDS)
+        )
+        db.add(round_row)
+        db.commit()
+        db.refresh(round_row)
+
+        return OpenRound(round_row)
+
+    def current_round(self, db: Session, game: GameInfo) -> OpenRound:
+        """
+        Текущий открытый раунд игры (открывается при необходимости)
+        """
+        with self._lock:
+            current = self._rounds.get(game.id)
+            if current and current.closes_at > datetime.utcnow():
+                return current
+
+        new_round = self._open_round(db, game)
+
+        with self._lock:
+            current = self._rounds.get(game.id)
+            # Другой поток успел открыть раунд - лишний закрываем при расчёте как пустой
+            if current and current.closes_at > datetime.utcnow():
+                self._closed.append(new_round)
+                return current
+            if current:
+                self._closed.append(current)
+            self._rounds[game.id] = new_round
+            return new_round
+
+    def place_bet(
+        self,
+        db: Session,
+        user: User,
+        game: GameInfo,
+        bet_amount: float,
+        win_chance: float,
+        client_seed: str = None
+    ) -> dict:
+        """
+        Принять ставку в текущий раунд
+
+        Args:
+            db: Сессия БД (баланс по журналу и открытие нового раунда)
+            user: Игрок
+            game: Игра типа dice_round
+            bet_amount: Размер ставки
+            win_chance: Шанс выигрыша (1-95%)
+            client_seed: Seed игрока для client seed раунда (случайный, если не передан)
+
+        Returns:
+            Данные раунда и принятой ставки
+
+        Raises:
+            ValueError: Если валидация не прошла
+        """
+        if not (NvutiService.MIN_WIN_CHANCE <= win_chance <= NvutiService.MAX_WIN_CHANCE):
+            raise ValueError(
+                f"Win chance must be between {NvutiService.MIN_WIN_CHANCE} and {NvutiService.MAX_WIN_CHANCE}"
+            )
+
+        if bet_amount < game.min_bet or bet_amount > game.max_bet:
+            raise ValueError(
+                f"Bet must be between {game.min_bet} and {game.max_bet}"
+            )
+
+        multiplier = self._calculator.calculate_multiplier(win_chance)
+        balance = ledger.balance(db, user.id)
+        client_seed = client_seed or generate_client_seed()
+
+        while True:
+            current = self.current_round(db, game)
+
+            with self._lock:
+                # Раунд успели забрать на расчёт - ставка уходит в следующий
+                if current.closed:
+                    continue
+
+                if balance < current.stakes[user.id] + bet_amount:
+                    raise ValueError("Insufficient balance")
+
+                reserved = exposure_tracker.reserve(user.id, bet_amount, multiplier)
+
+                current.stakes[user.id] += bet_amount
+                current.bets.append(PendingBet(
+                    user_id=user.id,
+                    amount=bet_amount,
+                    win_chance=win_chance,
+                    multiplier=multiplier,
+                    placed_at=datetime.utcnow(),
+                    client_seed=client_seed,
+                    reserved=reserved
+                ))
+                break
+
+        return {
+            "round_id": current.id,
+            "server_seed_hash": current.server_seed_hash,
+            "player_seed": client_seed,
+            "closes_at": current.closes_at,
+            "amount": bet_amount,
+            "win_chance": win_chance,
+            "multiplier": multiplier
+        }
+
+    # =========================
+    # РАСЧЁТ РАУНДОВ
+    # =========================
+
+    def take_due_rounds(self, now: datetime = None, force: bool = False) -> list[OpenRound]:
+        """
+        Забрать из книги раунды, окно которых закрылось
+
+        Args:
+            now: Текущее время (для тестов)
+            force: Забрать все раунды, включая открытые
+        """
+        now = now or datetime.utcnow()
+
+        with self._lock:
+            due = [r for r in self._rounds.values() if force or r.closes_at <= now]
+            for r in due:
+                del self._rounds[r.game_id]
+            due.extend(self._closed)
+            self._closed.clear()
+            for r in due:
+                r.closed = True
+
+        return due
+
+    def settle(self, db: Session, open_round: OpenRound) -> dict:
+        """
+        Рассчитать раунд одной транзакцией
+
+        Args:
+            db: Сессия БД
+            open_round: Раунд, забранный из книги
+
+        Returns:
+            Итоги раунда
+        """
+        round_row = db.query(Round).filter(Round.id == open_round.id).first()
+
+        # Seed'ы всех принятых ставок - окно закрыто, список больше не меняется
+        player_seeds = [pending.client_seed for pending in open_round.bets]
+        round_row.player_seeds = json.dumps(player_seeds)
+        round_row.client_seed = round_client_seed(open_round.id, player_seeds)
+
+        # Один HMAC на весь раунд
+        result_number = self._engine.outcome(
+            round_row.server_seed,
+            round_row.client_seed,
+            0
+        )
+
+        # Один запрос за балансами всех участников (снапшот + журнал)
+        balances = ledger.balances(db, list(open_round.stakes))
+
+        covered = {
+            user_id for user_id, stake in open_round.stakes.items()
+            if balances.get(user_id, 0) >= stake
+        }
+
+        now = datetime.utcnow()
+        bet_rows = []
+        settled = []
+        deltas = defaultdict(float)
+
+        for pending in open_round.bets:
+            if pending.user_id not in covered:
+                continue
+
+            is_win = result_number < pending.win_chance
+            if is_win:
+                payout = from_minor(to_minor(pending.amount * pending.multiplier))
+                profit_loss = from_minor(to_minor(payout) - to_minor(pending.amount))
+            else:
+                payout = 0
+                profit_loss = -pending.amount
+
+            deltas[pending.user_id] += profit_loss
+            settled.append((pending, profit_loss))
+            bet_rows.append({
+                "user_id": pending.user_id,
+                "game_id": open_round.game_id,
+                "amount": pending.amount,
+                "result": "win" if is_win else "loss",
+                "profit_loss": profit_loss,
+                "timestamp": now,
+                "game_data": json.dumps({
+                    "round_id": open_round.id,
+                    "win_chance": pending.win_chance,
+                    "multiplier": pending.multiplier,
+                    "result_number": result_number,
+                    "server_seed_hash": round_row.server_seed_hash,
+                    "client_seed": round_row.client_seed,
+                    "player_seed": pending.client_seed,
+                    "nonce": 0,
+                    "is_win": is_win,
+                    "payout": payout
+                })
+            })
+
+        if bet_rows:
+            # Два массовых INSERT: ставки и движения баланса, без UPDATE users
+            bet_ids = db.scalars(
+                insert(Bet).returning(Bet.id, sort_by_parameter_order=True),
+                bet_rows
+            ).all()
+
+            db.execute(insert(LedgerEntry), [
+                {
+                    "user_id": pending.user_id,
+                    "delta": to_minor(profit_loss),
+                    "reason": "round_bet",
+                    "bet_id": bet_id,
+                    "created_at": now
+                }
+                for (pending, profit_loss), bet_id in zip(settled, bet_ids)
+            ])
+
+        round_row.status = "settled"
+        round_row.result_number = result_number
+        round_row.bets_count = len(bet_rows)
+        round_row.settled_at = now
+
+        db.commit()
+
+        for pending, profit_loss in settled:
+            exposure_tracker.settle(pending.user_id, pending.reserved, profit_loss)
+        for pending in open_round.bets:
+            if pending.user_id not in covered:
+                exposure_tracker.release(pending.reserved)
+
+        voided = len(open_round.bets) - len(bet_rows)
+        if voided:
+            logger.warning(f"Round {open_round.id}: voided {voided} bets (insufficient balance)")
+
+        return {
+            "round_id": open_round.id,
+            "result_number": result_number,
+            "bets_settled": len(bet_rows),
+            "bets_voided": voided,
+            "house_profit": -sum(deltas.values())
+        }
+
+    def settle_due(self, db: Session, force: bool = False) -> list[dict]:
+        """
+        Рассчитать все раунды с закрытым окном
+        """
+        results = []
+        for open_round in self.take_due_rounds(force=force):
+            try:
+                results.append(self.settle(db, open_round))
+            except Exception:
+                db.rollback()
+                for pending in open_round.bets:
+                    exposure_tracker.release(pending.reserved)
+                logger.error(
+                    f"Failed to settle round {open_round.id}, "
+                    f"voiding it: {len(open_round.bets)} bets dropped",
+                    exc_info=True
+                )
+                self._void_round(db, open_round.id)
+        return results
+
+    def _void_round(self, db: Session, round_id: int) -> None:
+        """
+        Аннулировать раунд после неудачного расчёта (отдельной транзакцией)
+
+        Балансы не двигались - раунд помечается void, и его server
+        seed раскрывается, как у брошенных раундов (void_stale_rounds).
+        """
+        try:
+            db.query(Round).filter(
+                Round.id == round_id,
+                Round.status == "open"
+            ).update({"status": "void"}, synchronize_session=False)
+            db.commit()
+        except Exception:
+            db.rollback()
+            logger.error(f"Failed to void round {round_id}", exc_info=True)
+
+    async def run(self, session_factory, interval: float = None):
+        """
+        Фоновая задача: рассчитывать раунды по закрытию окна
+
+        Args:
+            session_factory: Фабрика сессий (SessionLocal)
+            interval: Пауза между проверками в секундах
+        """
+        interval = interval or settings.ROUND_SETTLE_INTERVAL_SECONDS
+
+        def settle_once():
+            db = session_factory()
+            try:
+                return self.settle_due(db)
+            finally:
+                db.close()
+
+        await asyncio.to_thread(lambda: self._void_stale(session_factory))
+
+        try:
+            while True:
+                await asyncio.to_thread(settle_once)
+                await asyncio.sleep(interval)
+        finally:
+            # При остановке воркера рассчитываем то, что успели принять
+            await asyncio.to_thread(lambda: self._settle_all(session_factory))
+
+    def void_stale_rounds(self, db: Session) -> int:
+        """
+        Аннулировать раунды, брошенные упавшими воркерами
+
+        Ставки таких раундов не рассчитывались и балансы не трогали,
+        раунд просто помечается void, а его server seed раскрывается.
+        """
+        cutoff = datetime.utcnow() - timedelta(seconds=settings.ROUND_WINDOW_SECONDS * 6)
+
+        voided = db.query(Round).filter(
+            Round.status == "open",
+            Round.closes_at < cutoff
+        ).update({"status": "void"}, synchronize_session=False)
+        db.commit()
+
+        return voided
+
+    def _void_stale(self, session_factory):
+        db = session_factory()
+        try:
+            voided = self.void_stale_rounds(db)
+            if voided:
+                logger.warning(f"Voided {voided} stale rounds")
+        finally:
+            db.close()
+
+    def _settle_all(self, session_factory):
+        db = session_factory()
+        try:
+            self.settle_due(db, force=True)
+        finally:
+            db.close()
+
+
+round_book = RoundBook()
@@ -0,0 +1,429 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import random
+import socket
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Callable
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.config import Settings, settings
+from app.models.job import JobLease, JobRun
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+# =========================
+# CRON
+# =========================
+
+class CronSchedule:
+    """
+    Расписание в формате cron: "минута час день месяц день_недели" (UTC)
+
+    Поля: *, число, диапазон a-b, шаг */n или a-b/n, списки через
+    запятую. День недели 0-6 (0 и 7 - воскресенье). Если ограничены
+    и день месяца, и день недели - подходит любой из них (как в cron).
+    """
+
+    FIELDS = (("minute", 0, 59), ("hour", 0, 23), ("day", 1, 31), ("month", 1, 12), ("weekday", 0, 7))
+
+    def __init__(self, expression: str):
+        """
+        Raises:
+            ValueError: Если выражение не разбирается
+        """
+        parts = expression.split()
+        if len(parts) != len(self.FIELDS):
+            raise ValueError(f"Cron expression must have 5 fields: {expression!r}")
+
+        self.expression = expression
+        values = [self._parse(part, low, high) for part, (_, low, high) in zip(parts, self.FIELDS)]
+        self.minutes, self.hours, self.days, self.months, weekdays = values
+        self.weekdays = {day % 7 for day in weekdays}
+        self.any_day = parts[2] == "*"
+        self.any_weekday = parts[4] == "*"
+
+    @staticmethod
+    def _parse(part: str, low: int, high: int) -> set:
+        values = set()
+        for item in part.split(","):
+            base, _, step = item.partition("/")
+            if base == "*":
+                start, stop = low, high
+            elif "-" in base:
+                start, stop = (int(value) for value in base.split("-", 1))
+            else:
+                start = stop = int(base)
+                if step:
+                    stop = high
+            step = int(step) if step else 1
+            if not (low <= start <= stop <= high) or step < 1:
+                raise ValueError(f"Cron field {item!r} out of range {low}-{high}")
+            values.update(range(start, stop + 1, step))
+        return values
+
+    def _day_matches(self, moment: datetime) -> bool:
+        day = moment.day in self.days
+        # isoweekday: 1 - понедельник ... 7 - воскресенье
+        weekday = moment.isoweekday() % 7 in self.weekdays
+        if self.any_day:
+            return weekday
+        if self.any_weekday:
+            return day
+        return day or weekday
+
+    def next_after(self, moment: datetime) -> datetime:
+        """
+        Ближайшее время срабатывания строго после moment
+
+        Raises:
+            ValueError: Если срабатываний нет (например, 30 февраля)
+        """
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = candidate + timedelta(days=366 * 5)
+
+        while candidate < limit:
+            if candidate.month not in self.months:
+                month = candidate.month % 12 + 1
+                candidate = candidate.replace(
+                    year=candidate.year + (month == 1), month=month, day=1, hour=0, minute=0
+                )
+            elif not self._day_matches(candidate):
+                candidate = candidate.replace(hour=0, minute=0) + timedelta(days=1)
+            elif candidate.hour not in self.hours:
+                candidate = candidate.replace(minute=0) + timedelta(hours=1)
+            elif candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+            else:
+                return candidate
+
+        raise ValueError(f"Cron expression never fires: {self.expression!r}")
+
+
+# =========================
+# ПЛАНИРОВЩИК
+# =========================
+
+@dataclass
+class Job:
+    """
+    Фоновая задача
+
+    func - функция без аргументов. Обычная выполняется в пуле потоков,
+    async - в event loop, с process=True - в пуле процессов (тогда
+    func должна быть функцией верхнего уровня модуля: её передают
+    в процесс по имени).
+    """
+    name: str
+    func: Callable
+    interval: float | None = None
+    cron: CronSchedule | None = None
+    jitter: float = 0.0
+    timeout: float | None = None
+    singleton: bool = True
+    process: bool = False
+
+    next_run_at: datetime | None = None
+    last_run_at: datetime | None = None
+    last_status: str | None = None
+    # Запуск, который ещё идёт (после таймаута поток или процесс не прервать)
+    running: asyncio.Future | None = field(default=None, repr=False)
+
+    @property
+    def schedule(self) -> str:
+        return self.cron.expression if self.cron else f"every {self.interval:g}s"
+
+    def next_delay(self, now: datetime) -> float:
+        """
+        Пауза до следующего запуска (с jitter), секунды
+        """
+        if self.cron:
+            delay = (self.cron.next_after(now) - now).total_seconds()
+        else:
+            delay = self.interval
+        return delay + random.uniform(0, self.jitter)
+
+
+def _init_process(app_settings: Settings) -> None:
+    # Процессы пула запускаются через spawn: настройки (в т.ч. переданные
+    # в create_app) приходят из родителя, engine создаётся лениво
+    settings.configure(app_settings)
+
+
+def _describe(value) -> str | None:
+    return None if value is None else repr(value)[:200]
+
+
+class JobScheduler:
+    """
+    Планировщик фоновых задач в event loop воркера
+
+    Задачи по интервалу и по cron-расписанию, со случайной добавкой
+    (jitter) к паузе, таймаутом и историей запусков в job_runs.
+    Задачу с singleton=True во всех воркерах выполняет один: перед
+    запуском воркер берёт аренду в job_leases до своего следующего
+    запуска (плюс таймаут и запас), и пока она не истекла, остальные
+    воркеры задачу пропускают.
+
+    Тяжёлые задачи (process=True) выполняются в пуле процессов,
+    чтобы не занимать GIL и потоки, обслуживающие запросы.
+    """
+
+    def __init__(self):
+        self.jobs: dict[str, Job] = {}
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self._pool = None
+        self.runs = metrics.counter("scheduler_runs_total", "Background job runs")
+        self.failures = metrics.counter("scheduler_failures_total", "Background job runs that failed or timed out")
+        self.skipped = metrics.counter("scheduler_skipped_total", "Runs skipped: lease held by another worker or previous run still going")
+
+    def add(
+        self,
+        name: str,
+        func: Callable,
+        interval: float = None,
+        cron: str = None,
+        jitter: float = 0.0,
+        timeout: float = None,
+        singleton: bool = True,
+        process: bool = False
+    ) -> Job:
+        """
+        Зарегистрировать задачу
+
+        Raises:
+            ValueError: Если имя занято или задано не ровно одно из interval / cron
+        """
+        if name in self.jobs:
+            raise ValueError(f"Job {name!r} is already registered")
+        if (interval is None) == (cron is None):
+            raise ValueError("Exactly one of interval or cron is required")
+        if interval is not None and interval <= 0:
+            raise ValueError("interval must be positive")
+        if process and asyncio.iscoroutinefunction(func):
+            raise ValueError("Coroutine jobs cannot run in the process pool")
+
+        job = Job(
+            name=name,
+            func=func,
+            interval=interval,
+            cron=CronSchedule(cron) if cron else None,
+            jitter=jitter,
+            timeout=timeout,
+            singleton=singleton,
+            process=process
+        )
+        self.jobs[name] = job
+        return job
+
+    def clear(self) -> None:
+        self.jobs.clear()
+
+    # =========================
+    # АРЕНДА И ИСТОРИЯ
+    # =========================
+
+    def acquire_lease(self, db: Session, name: str, ttl: float) -> bool:
+        """
+        Взять или продлить аренду задачи на ttl секунд
+
+        Returns:
+            True - задачу выполняет этот воркер
+        """
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=ttl)
+
+        # UPDATE перепроверяет условие под блокировкой строки:
+        # из двух воркеров, заметивших истёкшую аренду, её получит один
+        updated = db.query(JobLease).filter(
+            JobLease.name == name,
+            or_(JobLease.owner == self.owner, JobLease.expires_at < now)
+        ).update({"owner": self.owner, "acquired_at": now, "expires_at": expires_at}, synchronize_session=False)
+        if updated:
+            db.commit()
+            return True
+
+        try:
+            db.add(JobLease(name=name, owner=self.owner, acquired_at=now, expires_at=expires_at))
+            db.commit()
+            return True
+        except IntegrityError:
+            # Аренда есть и принадлежит другому воркеру
+            db.rollback()
+            return False
+
+    def release_leases(self, db: Session) -> int:
+        """
+        Отдать свои аренды (при остановке): задачи сразу подхватит другой воркер
+        """
+        released = db.query(JobLease).filter(JobLease.owner == self.owner).delete(synchronize_session=False)
+        db.commit()
+        return released
+
+    def record_run(self, db: Session, job: Job, started_at: datetime, status: str, result=None, error: str = None) -> JobRun:
+        finished_at = datetime.utcnow()
+        run = JobRun(
+            job=job.name,
+            owner=self.owner,
+            started_at=started_at,
+            finished_at=finished_at,
+            duration_ms=(finished_at - started_at).total_seconds() * 1000,
+            status=status,
+            result=_describe(result),
+            error=error
+        )
+        db.add(run)
+        db.commit()
+        return run
+
+    def purge_history(self, db: Session, days: float = None) -> int:
+        """
+        Удалить историю запусков старше days дней
+        """
+        cutoff = datetime.utcnow() - timedelta(days=days or settings.SCHEDULER_HISTORY_DAYS)
+        deleted = db.query(JobRun).filter(JobRun.started_at < cutoff).delete(synchronize_session=False)
+        db.commit()
+        return deleted
+
+    # =========================
+    # ВЫПОЛНЕНИЕ
+    # =========================
+
+    def _process_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=settings.SCHEDULER_PROCESS_WORKERS,
+                # fork из процесса с потоками и открытыми соединениями небезопасен
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_process,
+                initargs=(settings.current(),)
+            )
+        return self._pool
+
+    def _start(self, job: Job) -> asyncio.Future:
+        if asyncio.iscoroutinefunction(job.func):
+            return asyncio.ensure_future(job.func())
+        if job.process:
+            return asyncio.get_running_loop().run_in_executor(self._process_pool(), job.func)
+        return asyncio.ensure_future(asyncio.to_thread(job.func))
+
+    def _with_session(self, session_factory, method, *args):
+        db = session_factory()
+        try:
+            return method(db, *args)
+        finally:
+            db.close()
+
+    async def run_job(self, job: Job, session_factory, lease_ttl: float = None) -> str | None:
+        """
+        Один запуск задачи: аренда, выполнение с таймаутом, запись в историю
+
+        Args:
+            lease_ttl: На сколько брать аренду (None - до следующего запуска по расписанию)
+
+        Returns:
+            Статус ("ok", "error", "timeout") или None, если запуск пропущен
+        """
+        if job.running is not None and not job.running.done():
+            logger.warning(f"Job {job.name}: previous run is still going, skipping")
+            self.skipped.inc()
+            return None
+
+        if job.singleton:
+            if lease_ttl is None:
+                lease_ttl = job.next_delay(datetime.utcnow()) + job.jitter
+            lease_ttl += (job.timeout or 0) + settings.SCHEDULER_LEASE_GRACE_SECONDS
+            acquired = await asyncio.to_thread(self._with_session, session_factory, self.acquire_lease, job.name, lease_ttl)
+            if not acquired:
+                self.skipped.inc()
+                return None
+
+        started_at = datetime.utcnow()
+        started = time.perf_counter()
+        job.running = self._start(job)
+        result, error = None, None
+        try:
+            # shield: по таймауту перестаём ждать, но сам запуск не отменяем
+            result = await asyncio.wait_for(asyncio.shield(job.running), job.timeout)
+            status = "ok"
+        except asyncio.TimeoutError:
+            status, error = "timeout", f"Timed out after {job.timeout:g}s"
+        except Exception as e:
+            status, error = "error", f"{type(e).__name__}: {e}"
+            logger.error(f"Job {job.name} failed: {error}")
+
+        self.runs.inc()
+        if status != "ok":
+            self.failures.inc()
+        job.last_run_at, job.last_status = started_at, status
+        logger.debug(f"Job {job.name}: {status} in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+        try:
+            await asyncio.to_thread(
+                self._with_session, session_factory, self.record_run, job, started_at, status, result, error
+            )
+        except Exception as e:
+            logger.error(f"Job {job.name}: cannot record run: {e}")
+        return status
+
+    async def _loop(self, job: Job, session_factory) -> None:
+        # Задачи по интервалу первый раз - сразу при старте (с jitter), cron - по расписанию
+        delay = random.uniform(0, job.jitter) if job.interval else job.next_delay(datetime.utcnow())
+        while True:
+            job.next_run_at = datetime.utcnow() + timedelta(seconds=delay)
+            await asyncio.sleep(delay)
+            try:
+                await self.run_job(job, session_factory)
+            except Exception as e:
+                # Например, БД недоступна при взятии аренды
+                logger.error(f"Job {job.name} scheduling failed: {e}", exc_info=True)
+            delay = job.next_delay(datetime.utcnow())
+
+    async def run(self, session_factory):
+        """
+        Фоновая задача: все зарегистрированные задачи, каждая в своём цикле
+
+        Args:
+            session_factory: Фабрика сессий (SessionLocal) для аренд и истории
+        """
+        try:
+            await asyncio.gather(*(self._loop(job, session_factory) for job in self.jobs.values()))
+        finally:
+            self.shutdown()
+            try:
+                await asyncio.to_thread(self._with_session, session_factory, self.release_leases)
+            except Exception as e:
+                logger.warning(f"Cannot release job leases: {e}")
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def status(self) -> list[dict]:
+        return [
+            {
+                "name": job.name,
+                "schedule": job.schedule,
+                "singleton": job.singleton,
+                "process": job.process,
+                "timeout": job.timeout,
+                "running": job.running is not None and not job.running.done(),
+                "next_run_at": job.next_run_at,
+                "last_run_at": job.last_run_at,
+                "last_status": job.last_status
+            }
+            for job in self.jobs.values()
+        ]
+
+
+scheduler = JobScheduler()
@@ -0,0 +1,149 @@
+import hashlib
+import logging
+import secrets
+from sqlalchemy import func, insert, update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.seed import Seed
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+# =========================
+# ГЕНЕРАЦИЯ SEED'ОВ
+# =========================
+
+def generate_server_seed() -> tuple[str, str]:
+    """
+    Сгенерировать server seed и его хеш
+
+    Returns:
+        (server_seed, server_seed_hash)
+    """
+    server_seed = secrets.token_hex(32)  # 64 символа
+    server_seed_hash = hashlib.sha256(server_seed.encode()).hexdigest()
+    return server_seed, server_seed_hash
+
+
+def generate_client_seed() -> str:
+    """
+    Сгенерировать client seed по умолчанию (32 символа)
+    """
+    return secrets.token_hex(16)
+
+
+# =========================
+# ПУЛ SEED'ОВ
+# =========================
+
+class SeedPool:
+    """
+    Пул заранее сгенерированных и захешированных seed'ов
+
+    Свободные seed'ы хранятся в таблице seeds с user_id = NULL.
+    Выдача seed'а игроку - один условный UPDATE без генерации
+    и хеширования на пути запроса. Фоновая задача доливает пул
+    до SEED_POOL_TARGET, когда он опускается ниже SEED_POOL_LOW_WATERMARK.
+    """
+
+    # Сколько раз пробуем перехватить seed, если его забрал другой воркер
+    ACQUIRE_ATTEMPTS = 3
+
+    def __init__(self):
+        self.size_gauge = metrics.gauge("seed_pool_size", "Free seeds in the pool")
+        self.refill_rate = metrics.rate("seed_pool_refill_rate", "Seeds inserted per second")
+        self.refilled = metrics.counter("seed_pool_refilled_total", "Seeds inserted by refill")
+        self.hits = metrics.counter("seed_pool_hits_total", "Seeds assigned from the pool")
+        self.misses = metrics.counter("seed_pool_misses_total", "Seeds generated inline (empty pool)")
+
+    def acquire(self, db: Session, user_id: int, client_seed: str = None) -> Seed | None:
+        """
+        Выдать пользователю seed из пула (без commit)
+
+        Args:
+            db: Сессия БД
+            user_id: ID пользователя
+            client_seed: Свой client seed (если не задан - остаётся сгенерированный)
+
+        Returns:
+            Seed или None, если пул пуст
+        """
+        values = {"user_id": user_id, "active": True}
+        if client_seed:
+            values["client_seed"] = client_seed
+
+        for _ in range(self.ACQUIRE_ATTEMPTS):
+            candidate_id = db.query(Seed.id).filter(
+                Seed.user_id.is_(None)
+            ).limit(1).with_for_update(skip_locked=True).scalar()
+
+            if candidate_id is None:
+                break
+
+            # Условие user_id IS NULL защищает от двойной выдачи без блокировок
+            result = db.execute(
+                update(Seed)
+                .where(Seed.id == candidate_id, Seed.user_id.is_(None))
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount == 1:
+                self.hits.inc()
+                return db.get(Seed, candidate_id)
+
+        self.misses.inc()
+        return None
+
+    def size(self, db: Session) -> int:
+        """
+        Количество свободных seed'ов в пуле
+        """
+        count = db.query(func.count(Seed.id)).filter(Seed.user_id.is_(None)).scalar()
+        self.size_gauge.set(count)
+        return count
+
+    def refill(self, db: Session) -> int:
+        """
+        Долить пул до SEED_POOL_TARGET (если он ниже watermark)
+
+        Args:
+            db: Сессия БД
+
+        Returns:
+            Сколько seed'ов добавлено
+        """
+        current = self.size(db)
+        if current >= settings.SEED_POOL_LOW_WATERMARK:
+            return 0
+
+        missing = settings.SEED_POOL_TARGET - current
+        added = 0
+
+        while added < missing:
+            batch = min(settings.SEED_POOL_REFILL_BATCH, missing - added)
+            rows = []
+            for _ in range(batch):
+                server_seed, server_seed_hash = generate_server_seed()
+                rows.append({
+                    "user_id": None,
+                    "server_seed": server_seed,
+                    "server_seed_hash": server_seed_hash,
+                    "client_seed": generate_client_seed(),
+                    "nonce": 0,
+                    "active": False
+                })
+
+            db.execute(insert(Seed), rows)
+            db.commit()
+
+            added += batch
+            self.refilled.inc(batch)
+            self.refill_rate.mark(batch)
+
+        self.size_gauge.set(current + added)
+        return added
+
+
+seed_pool = SeedPool()
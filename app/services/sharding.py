@@ -0,0 +1,305 @@
+import logging
+from datetime import datetime
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+
+from app.database import Base, shard_router
+from app.models.anomaly_alert import AnomalyAlert
+from app.models.bet import Bet
+from app.models.game import Game
+from app.models.idempotency_key import IdempotencyKey
+from app.models.ledger import BalanceSnapshot, LedgerEntry
+from app.models.merkle_batch import MerkleBatch
+from app.models.seed import Seed
+from app.models.user import User
+from app.models.user_directory import UserDirectory
+from app.services.ledger import from_minor, ledger, to_minor
+from app.services.rollups import transfer_rollups
+
+logger = logging.getLogger(__name__)
+
+
+# =========================
+# СПРАВОЧНИК ИГРОКОВ
+# =========================
+
+def find_user(db: Session, username: str) -> UserDirectory | None:
+    """
+    Найти игрока в справочнике по username
+    """
+    return db.query(UserDirectory).filter(UserDirectory.username == username).first()
+
+
+def open_user_session(db: Session, user_id: int) -> Session | None:
+    """
+    Сессия БД, где лежат данные игрока
+
+    Без шардирования - сама db. С шардированием - новая сессия шарда
+    (закрывает вызывающий) или None, если игрока нет в справочнике.
+    """
+    if not shard_router.enabled:
+        return db
+
+    entry = db.query(UserDirectory).filter(UserDirectory.id == user_id).first()
+    if entry is None:
+        return None
+    return shard_router.session(entry.shard)
+
+
+def create_sharded_user(db: Session, user: User) -> User:
+    """
+    Зарегистрировать игрока: глобальный ID из справочника, строка users - на шарде
+
+    Args:
+        db: Сессия основной БД
+        user: Новый (ещё не сохранённый) пользователь
+
+    Returns:
+        Сохранённый пользователь
+
+    Raises:
+        ValueError: Если username или email уже заняты
+    """
+    if find_user(db, user.username):
+        raise ValueError("Username already exists")
+    if db.query(UserDirectory).filter(UserDirectory.email == user.email).first():
+        raise ValueError("Email already registered")
+
+    entry = UserDirectory(username=user.username, email=user.email, shard=0)
+    db.add(entry)
+    db.flush()
+    entry.shard = shard_router.shard_for_new_user(entry.id)
+    db.commit()
+
+    user.id = entry.id
+    user_db = shard_router.session(entry.shard)
+    try:
+        user_db.add(user)
+        user_db.commit()
+        user_db.refresh(user)
+    except Exception:
+        user_db.rollback()
+        db.delete(entry)
+        db.commit()
+        raise
+    finally:
+        user_db.close()
+
+    return user
+
+
+def shard_user_counts(db: Session) -> dict:
+    """
+    Сколько игроков на каждом шарде
+
+    Returns:
+        {шард: число игроков}, включая пустые шарды
+    """
+    counts = dict.fromkeys(range(len(shard_router)), 0)
+    counts.update(
+        db.query(UserDirectory.shard, func.count(UserDirectory.id))
+        .group_by(UserDirectory.shard)
+        .all()
+    )
+    return counts
+
+
+# =========================
+# ПОДГОТОВКА ШАРДОВ
+# =========================
+
+def init_shards(db: Session) -> int:
+    """
+    Создать недостающие таблицы на шардах и скопировать каталог игр
+
+    Ставки ссылаются на games, поэтому каталог нужен на каждом шарде
+    с теми же ID, что и в основной БД.
+
+    Returns:
+        Сколько игр скопировано на каждый шард
+    """
+    games = db.query(Game).all()
+    columns = [column.name for column in Game.__table__.columns]
+
+    for shard in range(len(shard_router)):
+        Base.metadata.create_all(bind=shard_router.engine(shard))
+
+        shard_db = shard_router.session(shard)
+        try:
+            for game in games:
+                shard_db.merge(Game(**{name: getattr(game, name) for name in columns}))
+            shard_db.commit()
+        finally:
+            shard_db.close()
+
+    return len(games)
+
+
+# =========================
+# ПЕРЕНОС ИГРОКОВ
+# =========================
+
+def _rows(shard_db: Session, model, user_id: int) -> list[dict]:
+    table = model.__table__
+    return [
+        dict(row._mapping)
+        for row in shard_db.execute(
+            select(table).where(table.c.user_id == user_id).order_by(*table.primary_key.columns)
+        )
+    ]
+
+
+def _insert_new_ids(shard_db: Session, model, rows: list[dict]) -> list[int]:
+    """
+    Вставить строки с новыми ID (у каждого шарда своя последовательность)
+    """
+    if not rows:
+        return []
+    for row in rows:
+        row.pop("id")
+    return shard_db.scalars(
+        insert(model).returning(model.id, sort_by_parameter_order=True),
+        rows
+    ).all()
+
+
+def move_user(db: Session, user_id: int, target: int) -> dict:
+    """
+    Перенести игрока со всеми данными на другой шард
+
+    Порядок: копия на целевой шард -> переключение справочника ->
+    удаление с исходного. ID ставок, seed'ов и записей журнала на
+    новом шарде меняются (последовательности у шардов свои), поэтому
+    игрока со ставками, уже попавшими в Merkle-пачки, не переносим.
+    Вклад ставок в часовые агрегаты переезжает вместе с ними
+    (transfer_rollups). Баланс переносится снапшотом. Сохранённые ответы Idempotency-Key не
+    переносятся (в них старые ID ставок) - они нужны только для
+    повторов в пределах минут. Запускать при остановленных воркерах API:
+    их токены и кеши снапшотов указывают на старый шард.
+
+    Args:
+        db: Сессия основной БД
+        user_id: ID игрока
+        target: Номер целевого шарда
+
+    Returns:
+        Сколько строк перенесено
+
+    Raises:
+        ValueError: Если игрок не найден, уже на этом шарде или его
+            ставки закоммичены в Merkle-пачки
+    """
+    entry = db.query(UserDirectory).filter(UserDirectory.id == user_id).with_for_update().first()
+    if not entry:
+        raise ValueError("User not found")
+    if entry.shard == target:
+        raise ValueError(f"User {user_id} is already on shard {target}")
+
+    source_shard = entry.shard
+    source = shard_router.session(source_shard)
+    dest = shard_router.session(target)
+
+    try:
+        # Блокировка строки игрока держит вставки ставок по FK до конца переноса
+        user_table = User.__table__
+        user_row = source.execute(
+            select(user_table).where(user_table.c.id == user_id).with_for_update()
+        ).first()
+        if user_row is None:
+            raise ValueError("User not found on its shard")
+
+        balance = to_minor(ledger.balances(source, [user_id])[user_id])
+
+        seeds = _rows(source, Seed, user_id)
+        bets = _rows(source, Bet, user_id)
+
+        # Merkle-пачки шарда коммитят ID ставок: с новыми ID доказательства
+        # перенесённых ставок не сойдутся, а старые ID будут указывать в пустоту
+        committed = source.query(func.max(MerkleBatch.last_bet_id)).scalar()
+        if committed is not None and bets and bets[0]["id"] <= committed:
+            raise ValueError(
+                f"User {user_id} has bets committed to Merkle batches on shard {source_shard}, "
+                "their ids must stay stable"
+            )
+        entries = _rows(source, LedgerEntry, user_id)
+        alerts = _rows(source, AnomalyAlert, user_id)
+
+        dest.execute(insert(User), [dict(user_row._mapping, balance=from_minor(balance))])
+        _insert_new_ids(dest, Seed, seeds)
+
+        old_bet_ids = [row["id"] for row in bets]
+        new_bet_ids = _insert_new_ids(dest, Bet, bets)
+        bet_ids = dict(zip(old_bet_ids, new_bet_ids))
+        # Часовые агрегаты: иначе отчёты посчитают ставки на обоих шардах
+        transfer_rollups(source, dest, bets, old_bet_ids, new_bet_ids)
+        for row in entries:
+            row["bet_id"] = bet_ids.get(row["bet_id"])
+        entry_ids = _insert_new_ids(dest, LedgerEntry, entries)
+        for row in alerts:
+            row["bet_id"] = bet_ids.get(row["bet_id"])
+        _insert_new_ids(dest, AnomalyAlert, alerts)
+
+        # Журнал переехал целиком, баланс фиксируем снапшотом на его конец
+        dest.add(BalanceSnapshot(
+            user_id=user_id,
+            balance=balance,
+            last_entry_id=max(entry_ids, default=0)
+        ))
+        dest.commit()
+
+        entry.shard = target
+        entry.moved_at = datetime.utcnow()
+        db.commit()
+
+        for model in (IdempotencyKey, AnomalyAlert, LedgerEntry, BalanceSnapshot, Bet, Seed):
+            source.query(model).filter(model.user_id == user_id).delete(synchronize_session=False)
+        source.query(User).filter(User.id == user_id).delete(synchronize_session=False)
+        source.commit()
+    except Exception:
+        source.rollback()
+        dest.rollback()
+        db.rollback()
+        raise
+    finally:
+        source.close()
+        dest.close()
+
+    ledger.clear_cache()
+    logger.info(f"User {user_id} moved from shard {source_shard} to shard {target}")
+
+    return {"seeds": len(seeds), "bets": len(bets), "ledger_entries": len(entries), "anomaly_alerts": len(alerts)}
+
+
+def plan_rebalance(db: Session) -> list[tuple[int, int, int]]:
+    """
+    План выравнивания числа игроков по шардам
+
+    С перегруженных шардов уходят самые новые игроки.
+
+    Returns:
+        Список переносов (user_id, с шарда, на шард)
+    """
+    counts = shard_user_counts(db)
+    if not counts:
+        return []
+
+    base, extra = divmod(sum(counts.values()), len(counts))
+    by_load = sorted(counts, key=counts.get, reverse=True)
+    targets = {shard: base + (i < extra) for i, shard in enumerate(by_load)}
+
+    deficits = []
+    for shard in by_load:
+        deficits.extend([shard] * max(targets[shard] - counts[shard], 0))
+
+    moves = []
+    for shard in by_load:
+        surplus = counts[shard] - targets[shard]
+        if surplus <= 0:
+            continue
+        user_ids = db.query(UserDirectory.id).filter(
+            UserDirectory.shard == shard
+        ).order_by(UserDirectory.id.desc()).limit(surplus).all()
+        for (user_id,) in user_ids:
+            moves.append((user_id, shard, deficits.pop()))
+
+    return moves
@@ -0,0 +1,180 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.config import settings
+from app.database import make_engine
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class SQLiteWriter:
+    """
+    Единственный поток-писатель для SQLite
+
+    В SQLite одновременно пишет только одно соединение: потоки,
+    коммитящие сами, упираются в "database is locked". Здесь запись
+    идёт из одного потока, а операции из очереди склеиваются в одну
+    транзакцию (один fsync на пачку). Каждая операция выполняется
+    в своём SAVEPOINT: ошибка откатывает только её.
+
+    Операция - функция от сессии; она не должна делать commit
+    (только flush). Результат возвращается после коммита пачки.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = None,
+        batch_size: int = None,
+        max_delay_ms: float = None
+    ):
+        self._session_factory = session_factory
+        self._batch_size = batch_size
+        self._max_delay_ms = max_delay_ms
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+        self.batches = metrics.counter("sqlite_writer_batches_total", "Transactions committed by the SQLite writer")
+        self.jobs = metrics.counter("sqlite_writer_jobs_total", "Operations executed by the SQLite writer")
+        self.queue_gauge = metrics.gauge("sqlite_writer_queue", "Operations waiting for the SQLite writer")
+
+    @property
+    def batch_size(self) -> int:
+        return self._batch_size or settings.SQLITE_WRITER_BATCH_SIZE
+
+    @property
+    def max_delay(self) -> float:
+        max_delay_ms = self._max_delay_ms if self._max_delay_ms is not None else settings.SQLITE_WRITER_MAX_DELAY_MS
+        return max_delay_ms / 1000
+
+    @property
+    def enabled(self) -> bool:
+        """
+        Писатель используется только в режиме SQLITE_TUNED на SQLite
+        """
+        return settings.SQLITE_TUNED and settings.DATABASE_URL.startswith("sqlite")
+
+    def _create_session_factory(self):
+        writer_engine = make_engine(settings.DATABASE_URL, begin="BEGIN IMMEDIATE")
+        return sessionmaker(autocommit=False, autoflush=False, bind=writer_engine)
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            if self._session_factory is None:
+                self._session_factory = self._create_session_factory()
+            self._thread = threading.Thread(target=self._loop, name="sqlite-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """
+        Дописать очередь и остановить поток
+        """
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread:
+            self._queue.put(_STOP)
+            thread.join(timeout)
+
+    def submit(self, job: Callable[[Session], object]) -> Future:
+        """
+        Поставить операцию в очередь (поток стартует при первом вызове)
+
+        Returns:
+            Future с результатом операции
+        """
+        if self._thread is None:
+            self.start()
+        future = Future()
+        self._queue.put((job, future))
+        return future
+
+    def execute(self, job: Callable[[Session], object], timeout: float = None):
+        """
+        Выполнить операцию и дождаться коммита её пачки
+
+        Raises:
+            Исключение операции или коммита
+        """
+        return self.submit(job).result(timeout)
+
+    # =========================
+    # ПОТОК-ПИСАТЕЛЬ
+    # =========================
+
+    def _next_batch(self) -> tuple[list, bool]:
+        item = self._queue.get()
+        if item is _STOP:
+            return [], True
+
+        batch = [item]
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.batch_size:
+            try:
+                # Уже накопившееся забираем сразу, новых ждём до дедлайна
+                item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+
+        return batch, False
+
+    def _loop(self) -> None:
+        while True:
+            batch, stop = self._next_batch()
+            if batch:
+                self.queue_gauge.set(self._queue.qsize())
+                self._run_batch(batch)
+            if stop:
+                return
+
+    def _run_batch(self, batch: list) -> None:
+        db = self._session_factory()
+        done = []
+
+        try:
+            for job, future in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                savepoint = db.begin_nested()
+                try:
+                    result = job(db)
+                    savepoint.commit()
+                    done.append((future, result, None))
+                except Exception as e:
+                    savepoint.rollback()
+                    done.append((future, None, e))
+            db.commit()
+        except Exception as e:
+            logger.error(f"SQLite writer batch failed: {e}", exc_info=True)
+            db.rollback()
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            db.close()
+
+        self.batches.inc()
+        self.jobs.inc(len(done))
+
+        for future, result, error in done:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+
+sqlite_writer = SQLiteWriter()
@@ -0,0 +1,404 @@
+import csv
+import hashlib
+import io
+import json
+import logging
+import math
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, func, text
+from sqlalchemy.orm import Session
+
+from app.models.bet import Bet
+from app.models.game import Game
+from app.models.ledger import BalanceSnapshot, LedgerEntry
+from app.models.seed import Seed
+from app.models.user import User
+from app.services.auth import get_password_hash
+from app.services.game_engines import engine_for
+from app.services.ledger import from_minor, to_minor
+from app.services.nvuti_service import NvutiService
+
+logger = logging.getLogger(__name__)
+
+# Популярные шансы (кнопки интерфейса), остальное - произвольный шанс
+POPULAR_CHANCES = (49.5, 50.0, 10.0, 90.0, 25.0, 75.0, 5.0, 95.0)
+POPULAR_SHARE = 0.6
+AMOUNTS = (1.0, 2.0, 5.0, 10.0, 20.0, 50.0, 100.0)
+AMOUNT_WEIGHTS = (20, 15, 25, 20, 10, 7, 3)
+
+# Порядок вставки - по внешним ключам
+TABLES = (User.__table__, Seed.__table__, Bet.__table__, LedgerEntry.__table__, BalanceSnapshot.__table__)
+
+
+@dataclass(frozen=True)
+class DatasetPlan:
+    """
+    Что и с какими ID генерировать
+
+    ID назначаются заранее, поэтому процессы-воркеры пишут свои
+    диапазоны игроков независимо. Ставки нумеруются по кругу между
+    игроками (j-я ставка игрока k - bet_offset + j * users + k + 1):
+    id растут вместе со временем, а история каждого игрока
+    растянута на весь период, как в живой БД.
+    """
+    users: int
+    bets_per_user: int
+    bets_per_seed: int
+    game_id: int
+    password_hash: str
+    initial_balance: float
+    started_at: datetime
+    span_seconds: float
+    user_offset: int
+    seed_offset: int
+    bet_offset: int
+    ledger_offset: int
+    username_prefix: str
+    rng_seed: int
+
+    @property
+    def seeds_per_user(self) -> int:
+        return max(1, math.ceil(self.bets_per_user / self.bets_per_seed))
+
+    @property
+    def total_bets(self) -> int:
+        return self.users * self.bets_per_user
+
+    def user_id(self, k: int) -> int:
+        return self.user_offset + k + 1
+
+    def seed_id(self, k: int, s: int) -> int:
+        return self.seed_offset + k * self.seeds_per_user + s + 1
+
+    def bet_index(self, k: int, j: int) -> int:
+        return j * self.users + k
+
+    def bet_id(self, k: int, j: int) -> int:
+        return self.bet_offset + self.bet_index(k, j) + 1
+
+    def ledger_id(self, k: int, j: int) -> int:
+        return self.ledger_offset + self.bet_index(k, j) + 1
+
+
+def plan_dataset(
+    db: Session,
+    users: int,
+    bets_per_user: int,
+    bets_per_seed: int = 1000,
+    days: float = 30.0,
+    password: str = "loadtest123",
+    initial_balance: float = 1_000_000.0,
+    username_prefix: str = "load",
+    rng_seed: int = 0
+) -> DatasetPlan:
+    """
+    Спланировать набор данных после уже существующих строк
+
+    Пароль хешируется один раз - у всех игроков один хеш.
+
+    Raises:
+        ValueError: Если в БД нет игры Nvuti (dice) или параметры неверны
+    """
+    if users < 1 or bets_per_user < 0 or bets_per_seed < 1:
+        raise ValueError("users and bets_per_seed must be positive, bets_per_user non-negative")
+
+    game = db.query(Game).filter(Game.type == NvutiService.GAME_TYPE).order_by(Game.id).first()
+    if game is None:
+        raise ValueError("Nvuti game not found in database. Run init_db.py first.")
+
+    def max_id(model) -> int:
+        return db.query(func.coalesce(func.max(model.id), 0)).scalar()
+
+    return DatasetPlan(
+        users=users,
+        bets_per_user=bets_per_user,
+        bets_per_seed=bets_per_seed,
+        game_id=game.id,
+        password_hash=get_password_hash(password),
+        initial_balance=initial_balance,
+        started_at=datetime.utcnow() - timedelta(days=days),
+        span_seconds=days * 86400,
+        user_offset=max_id(User),
+        seed_offset=max_id(Seed),
+        bet_offset=max_id(Bet),
+        ledger_offset=max_id(LedgerEntry),
+        username_prefix=username_prefix,
+        rng_seed=rng_seed
+    )
+
+
+# =========================
+# ГЕНЕРАЦИЯ СТРОК
+# =========================
+
+def _random_chance(rng: random.Random) -> float:
+    if rng.random() < POPULAR_SHARE:
+        return rng.choice(POPULAR_CHANCES)
+    return round(rng.uniform(NvutiService.MIN_WIN_CHANCE, NvutiService.MAX_WIN_CHANCE), 2)
+
+
+def generate_rows(plan: DatasetPlan, start: int, stop: int) -> dict[str, list[dict]]:
+    """
+    Строки для игроков с индексами [start, stop)
+
+    Результаты считаются тем же движком, что и в игре (пакетным
+    ядром на seed): каждая ставка проверяется через /nvuti/verify по
+    server_seed своего seed'а и nonce. Баланс сразу свёрнут в
+    balance_snapshots (как после компакции журнала).
+
+    Returns:
+        {имя таблицы: [строки]}
+    """
+    service = NvutiService(None)
+    engine = engine_for(NvutiService.GAME_TYPE)
+    # Свой генератор на игрока: данные не зависят от разбиения на воркеры
+    rows = {table.name: [] for table in TABLES}
+    step = plan.span_seconds / max(plan.total_bets, 1)
+    now = datetime.utcnow()
+
+    for k in range(start, stop):
+        rng = random.Random(plan.rng_seed * 1_000_003 + k)
+        user_id = plan.user_id(k)
+        username = f"{plan.username_prefix}{user_id}"
+
+        seeds = []
+        for s in range(plan.seeds_per_user):
+            server_seed = rng.randbytes(32).hex()
+            played = min(plan.bets_per_seed, plan.bets_per_user - s * plan.bets_per_seed)
+            seeds.append({
+                "id": plan.seed_id(k, s),
+                "user_id": user_id,
+                "server_seed": server_seed,
+                "server_seed_hash": hashlib.sha256(server_seed.encode()).hexdigest(),
+                "client_seed": rng.randbytes(16).hex(),
+                "nonce": max(played, 0),
+                # Прошлые seed'ы сменены (server_seed раскрыт), последний активен
+                "active": s == plan.seeds_per_user - 1,
+                "chain_id": None,
+                "chain_index": None
+            })
+        rows["seeds"].extend(seeds)
+        results = [
+            engine.roll_batch(seed["server_seed"], seed["client_seed"], range(seed["nonce"]))
+            for seed in seeds
+        ]
+
+        balance = to_minor(plan.initial_balance)
+        for j in range(plan.bets_per_user):
+            seed = seeds[j // plan.bets_per_seed]
+            nonce = j % plan.bets_per_seed
+            win_chance = _random_chance(rng)
+            amount = rng.choices(AMOUNTS, AMOUNT_WEIGHTS)[0]
+            multiplier = service.calculate_multiplier(win_chance)
+            result_number = float(results[j // plan.bets_per_seed][nonce])
+
+            # Как в NvutiService.play
+            is_win = result_number < win_chance
+            if is_win:
+                payout = from_minor(to_minor(amount * multiplier))
+                profit_loss = from_minor(to_minor(payout) - to_minor(amount))
+            else:
+                payout = 0.0
+                profit_loss = -amount
+
+            bet_id = plan.bet_id(k, j)
+            timestamp = plan.started_at + timedelta(seconds=plan.bet_index(k, j) * step + rng.random() * step)
+            rows["bets"].append({
+                "id": bet_id,
+                "user_id": user_id,
+                "game_id": plan.game_id,
+                "amount": amount,
+                "result": "win" if is_win else "loss",
+                "profit_loss": profit_loss,
+                "game_data": json.dumps({
+                    "win_chance": win_chance,
+                    "multiplier": multiplier,
+                    "result_number": result_number,
+                    "server_seed_hash": seed["server_seed_hash"],
+                    "client_seed": seed["client_seed"],
+                    "nonce": nonce,
+                    "is_win": is_win,
+                    "payout": payout
+                }),
+                "timestamp": timestamp
+            })
+            rows["ledger_entries"].append({
+                "id": plan.ledger_id(k, j),
+                "user_id": user_id,
+                "delta": to_minor(profit_loss),
+                "reason": "bet",
+                "bet_id": bet_id,
+                "created_at": timestamp
+            })
+            balance += to_minor(profit_loss)
+
+        rows["users"].append({
+            "id": user_id,
+            "username": username,
+            "email": f"{username}@load.test",
+            "hashed_password": plan.password_hash,
+            "balance": from_minor(balance),
+            "is_admin": False,
+            "is_banned": False,
+            "created_at": plan.started_at
+        })
+        if plan.bets_per_user:
+            rows["balance_snapshots"].append({
+                "user_id": user_id,
+                "balance": balance,
+                "last_entry_id": plan.ledger_id(k, plan.bets_per_user - 1),
+                "updated_at": now
+            })
+
+    return rows
+
+
+# =========================
+# ЗАПИСЬ
+# =========================
+
+def _csv_value(value):
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _copy_rows(connection, table, rows: list[dict]) -> None:
+    """
+    Postgres COPY ... FROM STDIN (CSV) - в разы быстрее INSERT
+    """
+    columns = list(rows[0])
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([_csv_value(row[column]) for column in columns])
+    buffer.seek(0)
+
+    cursor = connection.connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+    finally:
+        cursor.close()
+
+
+def _sqlite_value(value):
+    # Формат DateTime SQLAlchemy для SQLite (всегда с микросекундами)
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ", timespec="microseconds")
+    return value
+
+
+def _insert_sqlite_rows(connection, table, rows: list[dict]) -> None:
+    """
+    SQLite: executemany драйвера с кортежами, без обработки строк в SQLAlchemy
+    """
+    columns = list(rows[0])
+    sql = f"INSERT INTO {table.name} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+    connection.exec_driver_sql(sql, [tuple(_sqlite_value(row[column]) for column in columns) for row in rows])
+
+
+def write_rows(connection, rows: dict[str, list[dict]]) -> None:
+    """
+    Записать строки: COPY для Postgres, executemany драйвера для SQLite,
+    Core insert для остальных БД
+    """
+    dialect = connection.dialect.name
+    for table in TABLES:
+        table_rows = rows[table.name]
+        if not table_rows:
+            continue
+        if dialect == "postgresql":
+            _copy_rows(connection, table, table_rows)
+        elif dialect == "sqlite":
+            _insert_sqlite_rows(connection, table, table_rows)
+        else:
+            connection.execute(table.insert(), table_rows)
+
+
+def _bulk_engine(url: str):
+    # Писатели SQLite ждут друг друга до минуты, а не 5 секунд
+    connect_args = {"timeout": 60} if url.startswith("sqlite") else {}
+    return create_engine(url, connect_args=connect_args)
+
+
+def generate_chunk(url: str, plan: DatasetPlan, start: int, stop: int, batch_users: int) -> int:
+    """
+    Сгенерировать и записать игроков [start, stop) пачками по batch_users
+
+    Каждая пачка - своя транзакция. Выполняется в процессе-воркере.
+
+    Returns:
+        Сколько ставок записано
+    """
+    engine = _bulk_engine(url)
+    try:
+        for batch_start in range(start, stop, batch_users):
+            rows = generate_rows(plan, batch_start, min(batch_start + batch_users, stop))
+            with engine.begin() as connection:
+                write_rows(connection, rows)
+    finally:
+        engine.dispose()
+    return (stop - start) * plan.bets_per_user
+
+
+def _reset_sequences(url: str) -> None:
+    """
+    Postgres: сдвинуть последовательности id за вставленные явно id
+    """
+    engine = _bulk_engine(url)
+    try:
+        if engine.dialect.name != "postgresql":
+            return
+        with engine.begin() as connection:
+            for table in TABLES[:-1]:
+                connection.execute(text(
+                    f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+                    f"(SELECT COALESCE(MAX(id), 1) FROM {table.name}))"
+                ))
+    finally:
+        engine.dispose()
+
+
+def generate_dataset(url: str, plan: DatasetPlan, workers: int = 1, batch_users: int = 100, progress=None) -> dict:
+    """
+    Сгенерировать набор данных параллельно
+
+    Игроки делятся на диапазоны, каждый диапазон пишет свой процесс
+    (для SQLite процессы по очереди берут блокировку записи, но
+    считают HMAC и собирают строки параллельно). С workers=1 -
+    в текущем процессе.
+
+    Args:
+        url: URL БД (те же таблицы, что в DATABASE_URL)
+        progress: callback(записано ставок) после каждого диапазона
+
+    Returns:
+        {"users", "bets", "elapsed"}
+    """
+    started = time.perf_counter()
+    chunk = max(batch_users, math.ceil(plan.users / (workers * 4)))
+    ranges = [(start, min(start + chunk, plan.users)) for start in range(0, plan.users, chunk)]
+    written = 0
+
+    if workers <= 1:
+        for start, stop in ranges:
+            written += generate_chunk(url, plan, start, stop, batch_users)
+            if progress:
+                progress(written)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(generate_chunk, url, plan, start, stop, batch_users) for start, stop in ranges]
+            for future in futures:
+                written += future.result()
+                if progress:
+                    progress(written)
+
+    _reset_sequences(url)
+
+    return {"users": plan.users, "bets": written, "elapsed": time.perf_counter() - started}
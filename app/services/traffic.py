@@ -0,0 +1,460 @@
+import asyncio
+import glob
+import hashlib
+import hmac
+import json
+import logging
+import os
+import random
+import threading
+import time
+import uuid
+from datetime import datetime
+from urllib.parse import parse_qsl
+
+import httpx
+from jose import JWTError
+
+from app.config import settings
+from app.services.auth import decode_access_token
+
+logger = logging.getLogger(__name__)
+
+FILE_PREFIX = "traffic-"
+
+# Значение секретных полей в записи
+REDACTED = "[redacted]"
+
+
+# =========================
+# АНОНИМИЗАЦИЯ
+# =========================
+
+def pseudonym(value: str) -> str:
+    """
+    Стабильный псевдоним значения: одно значение - один псевдоним
+
+    HMAC с SECRET_KEY: без ключа исходное значение не подобрать
+    перебором (имена, email), а повторы в трафике сохраняются.
+    """
+    digest = hmac.new(settings.SECRET_KEY.encode(), str(value).encode(), hashlib.sha256).hexdigest()
+    return f"anon-{digest[:16]}"
+
+
+def anonymize(value, fields: frozenset, secrets: frozenset = frozenset()):
+    """
+    Заменить строки в полях fields псевдонимами, а поля secrets - заглушкой (рекурсивно)
+
+    Псевдоним - для идентификаторов, где важны повторы. Секреты
+    (пароли, токены) не пишутся даже псевдонимом: быстрый HMAC от
+    пароля подбирается перебором любым, у кого есть SECRET_KEY.
+    Числа, флаги и остальные поля остаются как есть: они и задают
+    «форму» трафика (суммы, шансы, форматы выгрузки).
+    """
+    if isinstance(value, dict):
+        return {
+            key: REDACTED if key in secrets
+            else pseudonym(item) if key in fields and isinstance(item, (str, int)) and not isinstance(item, bool)
+            else anonymize(item, fields, secrets)
+            for key, item in value.items()
+        }
+    if isinstance(value, list):
+        return [anonymize(item, fields, secrets) for item in value]
+    return value
+
+
+# =========================
+# ЗАПИСЬ
+# =========================
+
+class TrafficRecorder:
+    """
+    Запись выборки запросов в JSONL с ротацией файлов
+
+    Выборка - по сессиям: запрос с токеном берётся, если хеш токена
+    попадает в долю sample_rate, поэтому сессия игрока записывается
+    целиком (темп ставок, повторы с Idempotency-Key). Запросы без
+    токена - случайно с той же вероятностью.
+
+    Каждый процесс пишет свои файлы traffic-<время>-<pid>.jsonl:
+    новый файл - когда текущий больше max_file_bytes, самые старые
+    удаляются сверх max_files.
+    """
+
+    def __init__(self):
+        self.records = 0
+        self._file = None
+        self._path = None
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @property
+    def directory(self) -> str:
+        return settings.RECORDER_DIR
+
+    @property
+    def sample_rate(self) -> float:
+        return settings.RECORDER_SAMPLE_RATE
+
+    @property
+    def fields(self) -> frozenset:
+        return frozenset(settings.RECORDER_REDACT_FIELDS)
+
+    @property
+    def secrets(self) -> frozenset:
+        return frozenset(settings.RECORDER_SECRET_FIELDS)
+
+    def should_record(self, path: str, token: str | None) -> bool:
+        if not path.startswith(tuple(settings.RECORDER_PATH_PREFIXES)):
+            return False
+        rate = self.sample_rate
+        if rate >= 1.0:
+            return True
+        if token:
+            bucket = int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest(), "big")
+            return bucket / 2 ** 64 < rate
+        return random.random() < rate
+
+    def subject(self, token: str | None) -> str | None:
+        """
+        Псевдоним игрока из токена (None - без токена или токен невалиден)
+        """
+        if not token:
+            return None
+        try:
+            payload = decode_access_token(token)
+        except JWTError:
+            return None
+        subject = payload.get("uid", payload.get("sub"))
+        return pseudonym(subject) if subject is not None else None
+
+    def write(self, record: dict) -> None:
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        with self._lock:
+            if self._file is None or self._size >= settings.RECORDER_MAX_FILE_MB * 1024 * 1024:
+                self._rotate()
+            self._file.write(line)
+            self._file.flush()
+            self._size += len(line)
+            self.records += 1
+
+    def _rotate(self) -> None:
+        if self._file is not None:
+            self._file.close()
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
+        self._path = os.path.join(self.directory, f"{FILE_PREFIX}{stamp}-{os.getpid()}.jsonl")
+        self._file = open(self._path, "a")
+        self._size = 0
+
+        # Имена начинаются со времени - сортировка по имени хронологическая
+        files = sorted(glob.glob(os.path.join(self.directory, f"{FILE_PREFIX}*.jsonl")))
+        for old in files[:max(0, len(files) - settings.RECORDER_MAX_FILES)]:
+            if old != self._path:
+                try:
+                    os.remove(old)
+                except OSError:
+                    pass
+
+    def files(self) -> list[str]:
+        return sorted(glob.glob(os.path.join(self.directory, f"{FILE_PREFIX}*.jsonl")))
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+traffic_recorder = TrafficRecorder()
+
+
+def _bearer(headers: dict) -> str | None:
+    value = headers.get(b"authorization", b"").decode("latin-1")
+    scheme, _, token = value.partition(" ")
+    return token if scheme.lower() == "bearer" and token else None
+
+
+class TrafficRecorderMiddleware:
+    """
+    ASGI middleware записи трафика (подключается в create_app при RECORDER_ENABLED)
+
+    Чистый ASGI, а не BaseHTTPMiddleware: тело запроса копируется
+    по мере чтения приложением, ответ не буферизуется. Запрос вне
+    выборки проходит без обёрток.
+    """
+
+    def __init__(self, app, recorder: TrafficRecorder = None):
+        self.app = app
+        self.recorder = recorder or traffic_recorder
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        token = _bearer(headers)
+        if not self.recorder.should_record(scope["path"], token):
+            await self.app(scope, receive, send)
+            return
+
+        ts = time.time()
+        started = time.perf_counter()
+        body = bytearray()
+        status = [500]
+
+        async def receive_wrapper():
+            message = await receive()
+            if message["type"] == "http.request" and len(body) <= settings.RECORDER_MAX_BODY_BYTES:
+                body.extend(message.get("body", b""))
+            return message
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            duration_ms = (time.perf_counter() - started) * 1000
+            try:
+                self.recorder.write(self._record(scope, headers, token, bytes(body), status[0], ts, duration_ms))
+            except Exception as e:
+                # Запись трафика не должна ломать ответ
+                logger.warning(f"Traffic record failed: {e}")
+
+    def _record(self, scope, headers, token, body: bytes, status: int, ts: float, duration_ms: float) -> dict:
+        fields, secrets = self.recorder.fields, self.recorder.secrets
+        content_type = headers.get(b"content-type", b"").decode("latin-1")
+
+        payload = None
+        if body and content_type.startswith("application/json") and len(body) <= settings.RECORDER_MAX_BODY_BYTES:
+            try:
+                payload = anonymize(json.loads(body), fields, secrets)
+            except ValueError:
+                payload = None
+
+        query = scope.get("query_string", b"").decode("latin-1")
+        idempotency_key = headers.get(b"idempotency-key")
+        route = scope.get("route")
+
+        return {
+            "ts": ts,
+            "method": scope["method"],
+            "path": scope["path"],
+            # Шаблон маршрута (/api/bets/{bet_id}) - ключ для сравнения задержек
+            "route": getattr(route, "path", scope["path"]),
+            "query": anonymize(dict(parse_qsl(query)), fields, secrets) if query else None,
+            "subject": self.recorder.subject(token),
+            "idempotency_key": pseudonym(idempotency_key.decode("latin-1")) if idempotency_key else None,
+            "content_type": content_type or None,
+            "body": payload,
+            "body_bytes": len(body),
+            "status": status,
+            "duration_ms": round(duration_ms, 3)
+        }
+
+
+# =========================
+# ВОСПРОИЗВЕДЕНИЕ
+# =========================
+
+def load_records(paths: list[str], skip_prefixes: tuple = (), route_prefix: str = None) -> list[dict]:
+    """
+    Прочитать записи из файлов и каталогов, упорядочить по времени
+
+    Файлы разных воркеров сливаются в один поток запросов.
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, f"{FILE_PREFIX}*.jsonl"))))
+        else:
+            files.append(path)
+
+    records = []
+    for path in files:
+        with open(path) as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                if skip_prefixes and record["path"].startswith(tuple(skip_prefixes)):
+                    continue
+                if route_prefix and not record["path"].startswith(route_prefix):
+                    continue
+                records.append(record)
+
+    records.sort(key=lambda record: record["ts"])
+    return records
+
+
+async def _provision_users(client: httpx.AsyncClient, subjects: list[str], user_prefix: str, password: str) -> dict:
+    """
+    Токены локальных игроков: k-й игрок записи - {user_prefix}{k+1}
+
+    Игрок входит, а если его нет - регистрируется. С игроками
+    generate_data (--user-prefix load --password loadtest123) у
+    каждого большой баланс, и длинная запись не упирается в 1000.
+
+    Raises:
+        ValueError: Если игрока не удалось ни войти, ни зарегистрировать
+    """
+    semaphore = asyncio.Semaphore(8)
+
+    async def login(username: str) -> httpx.Response:
+        return await client.post("/api/auth/login", data={"username": username, "password": password})
+
+    async def provision(k: int) -> str:
+        username = f"{user_prefix}{k + 1}"
+        async with semaphore:
+            response = await login(username)
+            if response.status_code == 401:
+                registered = await client.post("/api/auth/register", json={
+                    "username": username, "email": f"{username}@replay.pichisino.com", "password": password
+                })
+                if registered.status_code != 201:
+                    raise ValueError(f"Cannot register {username}: {registered.text}")
+                response = await login(username)
+            if response.status_code != 200:
+                raise ValueError(f"Cannot log in as {username}: {response.text}")
+            return response.json()["access_token"]
+
+    tokens = await asyncio.gather(*(provision(k) for k in range(len(subjects))))
+    return dict(zip(subjects, tokens))
+
+
+async def replay(
+    records: list[dict],
+    base_url: str,
+    speed: float = 1.0,
+    user_prefix: str = "replay",
+    password: str = "replay123",
+    max_connections: int = 100,
+    timeout: float = 30.0,
+    transport: httpx.AsyncBaseTransport = None
+) -> list[dict]:
+    """
+    Воспроизвести записи с исходными интервалами между запросами
+
+    Открытая модель нагрузки: запрос уходит по расписанию, не дожидаясь
+    ответов на предыдущие, как и в живом трафике. lag_ms - на сколько
+    запрос ушёл позже расписания: если он растёт, упёрся сам реплеер.
+
+    Args:
+        speed: Ускорение времени (2.0 - вдвое чаще исходного)
+        max_connections: Соединений к серверу одновременно
+        transport: Транспорт httpx (в тестах - ASGITransport приложения)
+
+    Returns:
+        Результат на каждую запись
+
+    Raises:
+        ValueError: Если speed <= 0 или не удалось завести игроков
+    """
+    if speed <= 0:
+        raise ValueError("speed must be positive")
+
+    run_id = uuid.uuid4().hex[:8]
+    subjects = list(dict.fromkeys(record["subject"] for record in records if record.get("subject")))
+    limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+
+    async with httpx.AsyncClient(base_url=base_url, transport=transport, timeout=timeout, limits=limits) as client:
+        tokens = await _provision_users(client, subjects, user_prefix, password)
+        results = [None] * len(records)
+
+        async def send(i: int, record: dict, scheduled: float) -> None:
+            headers = {}
+            if record.get("subject"):
+                headers["Authorization"] = f"Bearer {tokens[record['subject']]}"
+            if record.get("idempotency_key"):
+                # Повторы внутри прогона остаются повторами, но не совпадают с прошлыми прогонами
+                headers["Idempotency-Key"] = f"{run_id}-{record['idempotency_key']}"
+
+            sent = time.perf_counter()
+            status, error = None, None
+            try:
+                response = await client.request(
+                    record["method"], record["path"], params=record.get("query"),
+                    json=record.get("body"), headers=headers
+                )
+                status = response.status_code
+            except httpx.HTTPError as e:
+                error = f"{type(e).__name__}: {e}"
+
+            results[i] = {
+                "method": record["method"],
+                "route": record["route"],
+                "original_status": record["status"],
+                "original_ms": record["duration_ms"],
+                "status": status,
+                "ms": (time.perf_counter() - sent) * 1000,
+                "lag_ms": (sent - scheduled) * 1000,
+                "error": error
+            }
+
+        tasks = []
+        if records:
+            first_ts = records[0]["ts"]
+            started = time.perf_counter()
+            for i, record in enumerate(records):
+                scheduled = started + (record["ts"] - first_ts) / speed
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                tasks.append(asyncio.create_task(send(i, record, scheduled)))
+            await asyncio.gather(*tasks)
+
+    return results
+
+
+def _percentile(values: list[float], q: float) -> float | None:
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def _is_error(status) -> bool:
+    return status is None or status >= 500
+
+
+def _stats(results: list[dict]) -> dict:
+    count = len(results)
+    stats = {"count": count}
+    for prefix, ms_key, status_key in (("original", "original_ms", "original_status"), ("replay", "ms", "status")):
+        latencies = [result[ms_key] for result in results if result[status_key] is not None]
+        for q in (0.5, 0.95, 0.99):
+            stats[f"{prefix}_p{int(q * 100)}_ms"] = _percentile(latencies, q)
+        stats[f"{prefix}_error_rate"] = sum(_is_error(result[status_key]) for result in results) / count
+    stats["p99_delta_ms"] = (
+        stats["replay_p99_ms"] - stats["original_p99_ms"]
+        if stats["replay_p99_ms"] is not None and stats["original_p99_ms"] is not None else None
+    )
+    stats["error_rate_delta"] = stats["replay_error_rate"] - stats["original_error_rate"]
+    # Ответ другого класса (2xx / 4xx / 5xx), чем в записи
+    stats["status_mismatches"] = sum(
+        (result["status"] or 0) // 100 != result["original_status"] // 100 for result in results
+    )
+    return stats
+
+
+def summarize(results: list[dict]) -> dict:
+    """
+    Задержки и ошибки записи против воспроизведения по маршрутам
+
+    Ошибка - 5xx или сбой соединения; 4xx (нет средств, лимит частоты)
+    считаются в status_mismatches.
+    """
+    routes = {}
+    for result in results:
+        routes.setdefault(f"{result['method']} {result['route']}", []).append(result)
+
+    return {
+        "total": _stats(results) if results else {"count": 0},
+        "routes": {route: _stats(items) for route, items in sorted(routes.items())},
+        "lag_p99_ms": _percentile([result["lag_ms"] for result in results], 0.99)
+    }
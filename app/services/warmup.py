@@ -0,0 +1,54 @@
+import logging
+import time
+from sqlalchemy import text
+
+from app.database import get_engine, shard_router
+from app.services.game_catalog import game_catalog
+
+logger = logging.getLogger(__name__)
+
+
+def ping_databases() -> float:
+    """
+    Открыть по соединению в пул основной БД и каждого шарда (SELECT 1)
+
+    Ошибка подключения всплывает здесь, при старте воркера, а не на
+    первом запросе игрока.
+
+    Returns:
+        Время в миллисекундах
+    """
+    started = time.perf_counter()
+    engines = [get_engine()] + [shard_router.engine(shard) for shard in range(len(shard_router))]
+    for engine in engines:
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+    return (time.perf_counter() - started) * 1000
+
+
+def warm_up(session_factory) -> dict:
+    """
+    Прогрев воркера перед готовностью: соединения с БД и каталог игр
+
+    Args:
+        session_factory: Фабрика сессий (SessionLocal)
+
+    Returns:
+        {"ping_ms", "games", "elapsed_ms"}
+    """
+    started = time.perf_counter()
+    ping_ms = ping_databases()
+
+    db = session_factory()
+    try:
+        games = game_catalog.warm(db)
+    finally:
+        db.close()
+
+    report = {
+        "ping_ms": round(ping_ms, 1),
+        "games": games,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)
+    }
+    logger.info(f"Worker warm-up: {report}")
+    return report
@@ -0,0 +1,38 @@
+import argparse
+import time
+
+from app.database import SessionLocal
+from app.services.bet_snapshot import BetSnapshot, append_snapshot
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Append new bets to the memory-mapped columnar snapshot used by analytics"
+    )
+    parser.add_argument("--dir", default="snapshots/bets", help="Snapshot directory")
+    parser.add_argument("--batch-size", type=int, default=100_000)
+    parser.add_argument("--summary", action="store_true", help="Print per-game totals afterwards")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        added = append_snapshot(db, args.dir, batch_size=args.batch_size)
+        elapsed = time.perf_counter() - started
+        print(f"✅ {added:,} bets appended in {elapsed:.1f}s")
+    finally:
+        db.close()
+
+    snapshot = BetSnapshot(args.dir)
+    print(f"   Rows: {len(snapshot):,}, last bet id: {snapshot.meta['last_bet_id']}")
+
+    if args.summary:
+        for game_id, stats in snapshot.group_by("game_id").items():
+            print(
+                f"   Game {game_id}: {stats['bets_count']:,} bets, "
+                f"turnover {stats['turnover']:,.2f}, GGR {stats['ggr']:,.2f}, RTP {stats['rtp']:.4f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,31 +1,70 @@
+import os
+
+# До первого чтения настроек: bcrypt минимальной стоимости (~1 мс вместо ~300 мс на хеш)
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 
 from app.main import app
-from app.database import Base, get_db
+from app.database import Base, configure_sqlite, get_db
 from app.models.game import Game
+from app.services.anomaly import anomaly_detector
+from app.services.game_catalog import game_catalog
+from app.services.idempotency import idempotency_cache
+from app.services.ledger import ledger
+from app.services.rate_limit import rate_limiter
+from app.services.revocation import revocation_list
 
-# Тестовая БД в памяти (SQLite)
-SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+# Тестовая БД в памяти (SQLite): своя у каждого процесса pytest,
+# поэтому параллельные воркеры (pytest -n) не мешают друг другу.
+# StaticPool - одно соединение на процесс, иначе у каждого
+# соединения была бы своя пустая БД в памяти.
+SQLALCHEMY_DATABASE_URL = "sqlite://"
 
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
-    connect_args={"check_same_thread": False}
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool
 )
+# Драйвер sqlite3 сам не открывает транзакцию перед SAVEPOINT
+configure_sqlite(engine)
+
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False)
 
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+@pytest.fixture(scope="session")
+def schema():
+    """
+    Схема создаётся один раз на сессию pytest
+    """
+    Base.metadata.create_all(bind=engine)
+    yield
+    Base.metadata.drop_all(bind=engine)
 
 
 @pytest.fixture
-def db():
+def db(schema):
     """
     Fixture для тестовой БД
-    Создаёт все таблицы, даёт сессию, потом удаляет всё
+
+    Тест выполняется внутри внешней транзакции, которая в конце
+    откатывается. commit() и rollback() кода под тестом работают
+    с SAVEPOINT внутри неё (join_transaction_mode="create_savepoint").
     """
-    Base.metadata.create_all(bind=engine)
-    db = TestingSessionLocal()
+    ledger.clear_cache()
+    revocation_list.clear()
+    rate_limiter.clear()
+    idempotency_cache.clear()
+    anomaly_detector.clear()
+    game_catalog.clear()
+
+    connection = engine.connect()
+    transaction = connection.begin()
+    db = TestingSessionLocal(bind=connection, join_transaction_mode="create_savepoint")
     
     # Добавляем тестовую игру Nvuti
     game = Game(
@@ -42,7 +81,8 @@ def db():
     yield db
     
     db.close()
-    Base.metadata.drop_all(bind=engine)
+    transaction.rollback()
+    connection.close()
 
 
 @pytest.fixture
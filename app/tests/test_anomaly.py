@@ -0,0 +1,183 @@
+import json
+import math
+import random
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from app.config import settings
+from app.models.anomaly_alert import AnomalyAlert
+from app.models.game import Game
+from app.models.user import User
+from app.services.anomaly import AnomalyDetector, anomaly_detector
+from app.services.nvuti_service import NvutiService
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _bet(detector, user_id, win_chance, is_win, client_seed=None, amount=10.0):
+    multiplier = round(95 / win_chance, 2)
+    profit_loss = amount * (multiplier - 1) if is_win else -amount
+    return detector.observe(user_id, None, win_chance, multiplier, amount, profit_loss, is_win, client_seed)
+
+
+def test_fair_play_raises_no_alerts():
+    """
+    Честная игра (выигрыши с заявленной вероятностью) не даёт алертов
+    """
+    rng = random.Random(42)
+    detector = AnomalyDetector()
+
+    alerts = []
+    for user_id in range(20):
+        for _ in range(1000):
+            chance = rng.choice([10.0, 50.0, 90.0])
+            alerts += _bet(detector, user_id, chance, rng.random() * 100 < chance, client_seed=f"seed{user_id}")
+
+    assert alerts == []
+
+
+def test_impossible_win_streak():
+    detector = AnomalyDetector()
+
+    alerts = []
+    for _ in range(30):
+        alerts += _bet(detector, 1, 50.0, True)
+
+    detectors = [alert.detector for alert in alerts]
+    assert detectors.count("win_streak") == 1
+    streak = next(alert for alert in alerts if alert.detector == "win_streak")
+    assert streak.score < settings.ANOMALY_STREAK_MAX_PROBABILITY
+
+
+def test_win_rate_and_profit_drift():
+    """
+    Стабильно завышенная доля выигрышей (70% при шансе 50%) - EWMA и CUSUM
+    """
+    rng = random.Random(7)
+    detector = AnomalyDetector()
+
+    alerts = []
+    for _ in range(600):
+        alerts += _bet(detector, 1, 50.0, rng.random() < 0.7)
+
+    detectors = {alert.detector for alert in alerts}
+    assert {"win_rate", "profit_drift"} <= detectors
+    # Cooldown: не больше одного алерта каждого детектора
+    assert len(alerts) == len(detectors)
+
+
+def test_shared_client_seed():
+    detector = AnomalyDetector()
+
+    assert _bet(detector, 1, 50.0, False, client_seed="bot") == []
+    assert _bet(detector, 2, 50.0, False, client_seed="bot") == []
+    alerts = _bet(detector, 3, 50.0, False, client_seed="bot")
+
+    assert [alert.detector for alert in alerts] == ["shared_seed"]
+    assert json.loads(alerts[0].details)["user_ids"] == [1, 2, 3]
+    assert _bet(detector, 4, 50.0, False, client_seed="bot") == []
+
+
+def test_state_is_bounded_and_idle_users_are_evicted():
+    clock = FakeClock()
+    detector = AnomalyDetector(max_users=3, clock=clock)
+
+    for user_id in range(5):
+        _bet(detector, user_id, 50.0, False)
+    assert len(detector) == 3
+
+    clock.now += settings.ANOMALY_IDLE_SECONDS + 1
+    _bet(detector, 100, 50.0, False)
+    assert len(detector) == 1
+
+
+def test_interleaved_bets_raise_one_alert(db, monkeypatch):
+    """
+    Две ставки игрока в одной транзакции (пачка писателя): порог серии
+    пересекается один раз - ровно один алерт, серия не теряется
+    """
+    user = User(username="lucky", email="lucky@test.com", hashed_password="x", balance=1000.0)
+    db.add(user)
+    db.commit()
+    game_id = db.query(Game).first().id
+
+    # Серия на одну ставку короче порога
+    threshold = math.floor(math.log(settings.ANOMALY_STREAK_MAX_PROBABILITY) / math.log(0.5)) + 1
+    for _ in range(threshold - 1):
+        anomaly_detector.observe(user.id, None, 50.0, 1.9, 1.0, 0.9, True)
+
+    services = [NvutiService(db, autocommit=False) for _ in range(2)]
+    for service in services:
+        monkeypatch.setattr(service, "calculate_result", lambda *args: 0.0)
+        service.play(user.id, game_id, 1.0, 50.0)
+    assert len(anomaly_detector) == 1 and anomaly_detector._users[user.id].bets == threshold - 1
+
+    db.commit()
+    for service in services:
+        service.finish(committed=True)
+
+    alerts = [alert for service in services for alert in service.alerts]
+    assert [alert.detector for alert in alerts] == ["win_streak"]
+    assert anomaly_detector._users[user.id].bets == threshold + 1
+
+
+def test_rolled_back_bet_does_not_shift_detector_state(db, monkeypatch):
+    """
+    Ставка, откаченная на дубле ключа идемпотентности, не двигает серию
+    """
+    user = User(username="lucky", email="lucky@test.com", hashed_password="x", balance=1000.0)
+    db.add(user)
+    db.commit()
+    game_id = db.query(Game).first().id
+
+    service = NvutiService(db)
+    monkeypatch.setattr(service, "calculate_result", lambda *args: 0.0)
+
+    service.play(user.id, game_id, 1.0, 50.0, idempotency_key="race")
+    with pytest.raises(IntegrityError):
+        service.play(user.id, game_id, 1.0, 50.0, idempotency_key="race")
+    db.rollback()
+
+    stats = anomaly_detector._users[user.id]
+    assert (stats.bets, stats.streak) == (1, 1)
+
+
+def test_play_writes_alerts(db, monkeypatch):
+    """
+    Алерт пишется в anomaly_alerts вместе со ставкой
+    """
+    user = User(username="lucky", email="lucky@test.com", hashed_password="x", balance=1000.0)
+    db.add(user)
+    db.commit()
+    game = db.query(Game).first()
+
+    service = NvutiService(db)
+    monkeypatch.setattr(service, "calculate_result", lambda *args: 0.0)
+
+    for _ in range(25):
+        service.play(user.id, game.id, 1.0, 50.0)
+
+    alert = db.query(AnomalyAlert).filter(AnomalyAlert.detector == "win_streak").one()
+    assert alert.user_id == user.id
+    assert alert.bet_id is not None
+
+
+def test_detectors_can_be_disabled(db, monkeypatch):
+    monkeypatch.setattr(settings, "ANOMALY_ENABLED", False)
+    user = User(username="lucky", email="lucky@test.com", hashed_password="x", balance=1000.0)
+    db.add(user)
+    db.commit()
+
+    service = NvutiService(db)
+    monkeypatch.setattr(service, "calculate_result", lambda *args: 0.0)
+    for _ in range(25):
+        service.play(user.id, db.query(Game).first().id, 1.0, 50.0)
+
+    assert db.query(AnomalyAlert).count() == 0
@@ -0,0 +1,55 @@
+import os
+import subprocess
+import sys
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+
+from app.config import Settings, settings
+from app.database import Base
+from app.main import create_app
+from app.models.game import Game
+from app.services.game_catalog import game_catalog
+
+
+def test_import_has_no_side_effects(tmp_path):
+    """
+    Импорт не читает настройки, не создаёт engine и не открывает app.log
+    """
+    code = (
+        "import app.main, app.config, app.database; "
+        "assert not app.config.settings.loaded; "
+        "assert app.database._engine is None"
+    )
+    env = {**os.environ, "PYTHONPATH": os.getcwd()}
+    subprocess.run([sys.executable, "-c", code], cwd=tmp_path, env=env, check=True)
+    assert not (tmp_path / "app.log").exists()
+
+
+def test_factory_warms_up_before_ready(tmp_path):
+    url = f"sqlite:///{tmp_path}/factory.db"
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        connection.execute(Game.__table__.insert().values(
+            name="Nvuti", type="dice", house_edge=5.0, min_bet=1.0, max_bet=1000.0
+        ))
+    engine.dispose()
+
+    game_catalog.clear()
+    app = create_app(Settings(
+        DATABASE_URL=url,
+        SECRET_KEY="factory-secret",
+        LOG_FILE="",
+        SEED_POOL_ENABLED=False,
+        MERKLE_ENABLED=False
+    ))
+    try:
+        with TestClient(app) as client:
+            # Каталог загружен в lifespan, до первого запроса (без сессии БД)
+            assert game_catalog.by_type(None, "dice").max_bet == 1000.0
+            assert client.get("/health").json() == {"status": "healthy"}
+            assert settings.DATABASE_URL == url
+    finally:
+        settings.configure(None)
+        game_catalog.clear()
@@ -0,0 +1,74 @@
+import csv
+import gzip
+import io
+import json
+
+from app.models.bet import Bet
+from app.services.bet_export import export_bets
+
+
+def _play(auth_client, times):
+    for _ in range(times):
+        auth_client.post(
+            "/api/games/nvuti/bet",
+            json={"win_chance": 50.0, "amount": 10.0}
+        )
+
+
+def test_export_csv(auth_client):
+    """
+    CSV-выгрузка своих ставок
+    """
+    _play(auth_client, 3)
+
+    response = auth_client.get("/api/bets/export", params={"format": "csv"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(rows) == 3
+    assert json.loads(rows[0]["game_data"])["nonce"] == 0
+
+
+def test_export_ndjson_gzip(auth_client):
+    """
+    NDJSON со сжатием на лету, game_data - вложенный объект
+    """
+    _play(auth_client, 2)
+
+    response = auth_client.get("/api/bets/export", params={"format": "ndjson", "gzip": "true"})
+
+    assert response.status_code == 200
+    lines = gzip.decompress(response.content).decode().splitlines()
+    bets = [json.loads(line) for line in lines]
+    assert [bet["game_data"]["nonce"] for bet in bets] == [0, 1]
+
+
+def test_export_other_user_forbidden(auth_client):
+    """
+    Игрок не может выгрузить чужие ставки
+    """
+    response = auth_client.get("/api/bets/export", params={"user_id": 999})
+
+    assert response.status_code == 403
+
+
+def test_export_filters_and_chunks(db):
+    """
+    Фильтры по игре и пользователю, выгрузка идёт кусками
+    """
+    db.add_all([
+        Bet(user_id=i % 2, game_id=1 + i % 3, amount=1, result="loss", profit_loss=-1)
+        for i in range(3000)
+    ])
+    db.commit()
+
+    chunks = list(export_bets(db, export_format="ndjson", user_id=1))
+    assert len(chunks) == 2
+    assert len(b"".join(chunks).decode().splitlines()) == 1500
+
+    chunks = export_bets(db, export_format="ndjson", user_id=1, game_id=2)
+    bets = [json.loads(line) for line in b"".join(chunks).decode().splitlines()]
+    assert len(bets) == 500
+    assert all(bet["user_id"] == 1 and bet["game_id"] == 2 for bet in bets)
+    assert all(bet["game_data"] is None for bet in bets)
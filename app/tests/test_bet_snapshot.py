@@ -0,0 +1,111 @@
+import os
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from app.models.bet import Bet
+from app.services.bet_snapshot import BetSnapshot, append_snapshot
+
+
+def _bets(count, start_id=0):
+    return [
+        Bet(
+            user_id=1 + i % 3,
+            game_id=1 + i % 2,
+            amount=10.0,
+            result="win" if i % 4 == 0 else "loss",
+            profit_loss=9.0 if i % 4 == 0 else -10.0,
+            timestamp=datetime(2025, 1, 1 + i % 2, i % 24)
+        )
+        for i in range(start_id, start_id + count)
+    ]
+
+
+def test_snapshot_appends_incrementally(db, tmp_path):
+    """
+    Снапшот дописывается только новыми ставками
+    """
+    snapshot_dir = str(tmp_path / "bets")
+    db.add_all(_bets(100))
+    db.commit()
+
+    assert append_snapshot(db, snapshot_dir, batch_size=30) == 100
+    assert append_snapshot(db, snapshot_dir) == 0
+
+    db.add_all(_bets(20, start_id=100))
+    db.commit()
+    assert append_snapshot(db, snapshot_dir) == 20
+
+    snapshot = BetSnapshot(snapshot_dir)
+    assert len(snapshot) == 120
+    assert isinstance(snapshot["amount"], np.memmap)
+    assert snapshot["id"].tolist() == list(range(1, 121))
+    assert snapshot.meta["last_bet_id"] == 120
+
+
+def test_snapshot_waits_for_out_of_order_bet(db, tmp_path):
+    """
+    Свежая ставка с меньшим id не теряется: снапшот останавливается перед ней
+    """
+    snapshot_dir = str(tmp_path / "bets")
+    [old, fresh, later] = _bets(3)
+    fresh.timestamp = datetime.utcnow()
+    db.add_all([old, fresh, later])
+    db.commit()
+
+    assert append_snapshot(db, snapshot_dir, grace_seconds=60) == 1
+
+    fresh.timestamp = datetime(2025, 1, 3)
+    db.commit()
+    assert append_snapshot(db, snapshot_dir, grace_seconds=60) == 2
+    assert BetSnapshot(snapshot_dir)["id"].tolist() == [old.id, fresh.id, later.id]
+
+
+def test_snapshot_truncates_partial_tail(db, tmp_path):
+    """
+    Недописанный хвост после падения отрезается
+    """
+    snapshot_dir = str(tmp_path / "bets")
+    db.add_all(_bets(10))
+    db.commit()
+    append_snapshot(db, snapshot_dir)
+
+    with open(os.path.join(snapshot_dir, "amount.bin"), "ab") as f:
+        f.write(b"\x00" * 12)
+
+    db.add_all(_bets(5, start_id=10))
+    db.commit()
+    append_snapshot(db, snapshot_dir)
+
+    snapshot = BetSnapshot(snapshot_dir)
+    assert len(snapshot) == 15
+    assert os.path.getsize(os.path.join(snapshot_dir, "amount.bin")) == 15 * 8
+    assert (snapshot["amount"] == 10.0).all()
+
+
+def test_snapshot_filters_and_group_by(db, tmp_path):
+    """
+    Векторные фильтры и группировки совпадают с ручным подсчётом
+    """
+    snapshot_dir = str(tmp_path / "bets")
+    bets = _bets(48)
+    db.add_all(bets)
+    db.commit()
+    append_snapshot(db, snapshot_dir)
+
+    snapshot = BetSnapshot(snapshot_dir)
+
+    by_user = snapshot.group_by("user_id")
+    assert sorted(by_user) == [1, 2, 3]
+    assert sum(group["bets_count"] for group in by_user.values()) == 48
+
+    mask = snapshot.mask(game_id=1, start=datetime(2025, 1, 1), end=datetime(2025, 1, 2))
+    expected = [b for b in bets if b.game_id == 1 and b.timestamp.day == 1]
+    summary = snapshot.summary(mask)
+    assert summary["bets_count"] == len(expected)
+    assert summary["wins_count"] == sum(b.result == "win" for b in expected)
+    assert summary["ggr"] == pytest.approx(-sum(b.profit_loss for b in expected))
+
+    by_day = snapshot.group_by("day")
+    assert [group["bets_count"] for group in by_day.values()] == [24, 24]
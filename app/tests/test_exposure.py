@@ -0,0 +1,81 @@
+from datetime import datetime
+
+import pytest
+
+from app.config import settings
+from app.models.bet import Bet
+from app.services.exposure import ExposureLimitExceeded, ExposureTracker, RollingSum
+
+
+def test_rolling_sum_expires_old_buckets():
+    """
+    Скользящая сумма забывает события старше окна
+    """
+    rolling = RollingSum(window_seconds=60, buckets=6)
+
+    rolling.add(10, now=0)
+    rolling.add(5, now=30)
+    assert rolling.total(now=59) == 15
+
+    # Корзина с первым событием выпала из окна
+    assert rolling.total(now=65) == 5
+    assert rolling.total(now=1000) == 0
+
+
+def test_tracker_limits(monkeypatch):
+    """
+    Лимиты на одну ставку, ставки «в полёте» и выигрыш игрока
+    """
+    monkeypatch.setattr(settings, "EXPOSURE_MAX_BET_PAYOUT", 500.0)
+    monkeypatch.setattr(settings, "EXPOSURE_MAX_PENDING_PAYOUT", 1000.0)
+    monkeypatch.setattr(settings, "EXPOSURE_MAX_USER_NET_WIN", 500.0)
+    tracker = ExposureTracker()
+
+    # 10 * 95x = 940 чистого выигрыша - больше лимита на ставку
+    with pytest.raises(ExposureLimitExceeded):
+        tracker.reserve(1, 10.0, 95.0)
+
+    # Две ставки «в полёте» по 450 - третья не влезает
+    first = tracker.reserve(2, 500.0, 1.9)
+    tracker.reserve(3, 500.0, 1.9)
+    with pytest.raises(ExposureLimitExceeded):
+        tracker.reserve(4, 500.0, 1.9)
+
+    # Игрок 2 выиграл 450 - ещё 90 возможного выигрыша уже больше 500
+    tracker.settle(2, first, 450.0)
+    with pytest.raises(ExposureLimitExceeded, match="Player win limit"):
+        tracker.reserve(2, 100.0, 1.9)
+    tracker.reserve(5, 100.0, 1.9)
+
+    assert tracker.snapshot()["house_pnl_window"] == -450.0
+
+
+def test_tracker_reconciles_from_bets(db):
+    """
+    Сверка восстанавливает P&L за окно из таблицы bets
+    """
+    db.add_all([
+        Bet(user_id=1, game_id=1, amount=10, result="loss", profit_loss=-10, timestamp=datetime.utcnow()),
+        Bet(user_id=1, game_id=1, amount=10, result="win", profit_loss=9, timestamp=datetime.utcnow()),
+        Bet(user_id=2, game_id=1, amount=10, result="loss", profit_loss=-10, timestamp=datetime(2000, 1, 1))
+    ])
+    db.commit()
+
+    tracker = ExposureTracker()
+    assert tracker.reconcile(db) == 2
+    assert tracker.snapshot()["house_pnl_window"] == 1.0
+
+
+def test_bet_rejected_by_exposure_limit(auth_client, monkeypatch):
+    """
+    Ставка сверх лимита отклоняется до игры
+    """
+    monkeypatch.setattr(settings, "EXPOSURE_MAX_BET_PAYOUT", 100.0)
+
+    response = auth_client.post(
+        "/api/games/nvuti/bet",
+        json={"win_chance": 1.0, "amount": 10.0}
+    )
+
+    assert response.status_code == 400
+    assert "house limit" in response.json()["detail"]
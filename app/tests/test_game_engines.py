@@ -0,0 +1,89 @@
+import hashlib
+import hmac
+
+import numpy as np
+import pytest
+
+from app.services.game_engines import (
+    ByteStream,
+    CoinFlipEngine,
+    DiceEngine,
+    GameEngine,
+    engine_for,
+    register_engine,
+    registered_types
+)
+
+
+def legacy_result(server_seed: str, client_seed: str, nonce: int) -> float:
+    # Исходный calculate_result до реестра движков
+    digest = hmac.new(server_seed.encode(), f"{client_seed}:{nonce}".encode(), hashlib.sha256).hexdigest()
+    return round((int(digest[:8], 16) % 10000) / 100.0, 2)
+
+
+def test_dice_matches_legacy_algorithm():
+    engine = engine_for("dice")
+    nonces = range(500)
+
+    expected = [legacy_result("server", "client", nonce) for nonce in nonces]
+
+    assert [engine.outcome("server", "client", nonce) for nonce in nonces] == expected
+    assert engine.roll_batch("server", "client", nonces).tolist() == expected
+    assert engine_for("dice_round").outcome("server", "client", 7) == expected[7]
+    assert engine.roll_batch("server", "client", []).shape == (0,)
+
+
+def test_byte_stream_extends_with_rounds():
+    stream = ByteStream("server", "client", 7)
+
+    first = stream.read(30)
+    assert stream.rounds == 1
+    # Чтение через границу HMAC: хвост раунда 0 + начало раунда 1
+    chunk = stream.read(4)
+    assert stream.rounds == 2
+
+    round_0 = hmac.new(b"server", b"client:7", hashlib.sha256).digest()
+    round_1 = hmac.new(b"server", b"client:7:1", hashlib.sha256).digest()
+    assert first + chunk == round_0 + round_1[:2]
+
+    values = [stream.below(52) for _ in range(100)]
+    assert all(0 <= value < 52 for value in values)
+    assert 0 <= stream.unit() < 1
+
+
+def test_coin_flips_share_one_hmac():
+    engine = engine_for("coinflip")
+
+    flips = engine.outcome("server", "client", 3, flips=20)
+    digest = hmac.new(b"server", b"client:3", hashlib.sha256).digest()
+    bits = "".join(f"{byte:08b}" for byte in digest)
+    assert flips == [bit == "1" for bit in bits[:20]]
+
+    batch = engine.roll_batch("server", "client", range(5), flips=20)
+    assert batch.shape == (5, 20)
+    assert batch[3].tolist() == flips
+
+    # Больше 256 бросков - следующие раунды потока
+    long_series = engine.roll_batch("server", "client", [3], flips=300)
+    assert long_series[0][:20].tolist() == flips
+    assert np.array_equal(long_series[0], engine.outcome("server", "client", 3, flips=300))
+
+    with pytest.raises(ValueError):
+        engine.outcome("server", "client", 3, flips=0)
+
+
+def test_registry():
+    assert {"dice", "dice_round", "coinflip"} <= set(registered_types())
+    assert isinstance(engine_for("dice"), DiceEngine)
+    assert isinstance(engine_for("coinflip"), CoinFlipEngine)
+    with pytest.raises(ValueError):
+        engine_for("roulette")
+
+
+def test_engine_without_roll_is_rejected_at_registration():
+    class Roulette(GameEngine):
+        GAME_TYPES = ("roulette",)
+
+    with pytest.raises(TypeError):
+        register_engine(Roulette)
+    assert "roulette" not in registered_types()
@@ -0,0 +1,196 @@
+import hashlib
+
+import pytest
+
+from app.config import settings
+from app.models.user import User
+from app.services.hash_chain import (
+    HashChain,
+    generate_chain,
+    register_chain,
+    verify_chain_seed
+)
+from app.services.nvuti_service import NvutiService
+
+
+def test_chain_links_hash_into_each_other(tmp_path):
+    """
+    Хеш каждого seed'а из цепочки - предыдущий выданный seed, в конце - терминал
+    """
+    path = str(tmp_path / "chain.bin")
+    terminal_hash = generate_chain(path, 50)
+
+    chain = HashChain(path)
+    try:
+        assert len(chain) == 50
+        assert chain.terminal_hash == terminal_hash
+
+        for index in range(chain.capacity):
+            seed = chain.server_seed(index)
+            assert hashlib.sha256(seed.encode()).hexdigest() == chain.server_seed_hash(index)
+
+        assert verify_chain_seed(chain.server_seed(10), terminal_hash, 10)
+        assert not verify_chain_seed(chain.server_seed(10), terminal_hash, 11)
+    finally:
+        chain.close()
+
+
+def test_chain_mode_rotation_and_verification(auth_client, db, tmp_path, monkeypatch):
+    """
+    В режиме цепочки смена seed выдаёт звенья по порядку, проверка принимает оба режима
+    """
+    path = str(tmp_path / "chain.bin")
+    generate_chain(path, 5)
+    chain_row = register_chain(db, path)
+    monkeypatch.setattr(settings, "SEED_MODE", "chain")
+
+    response = auth_client.get("/api/games/nvuti/chain")
+    assert response.json() == {
+        "terminal_hash": chain_row.terminal_hash, "length": 5, "segment_length": 5, "issued": 0
+    }
+
+    # Первый seed - звено 0, ставка, потом смена seed раскрывает его
+    seed_info = auth_client.get("/api/games/nvuti/seed").json()
+    bet = auth_client.post(
+        "/api/games/nvuti/bet",
+        json={"win_chance": 50.0, "amount": 10.0}
+    ).json()
+    rotated = auth_client.post("/api/games/nvuti/seed/rotate", json={}).json()
+    revealed = rotated["previous_server_seed"]
+
+    assert seed_info["server_seed_hash"] == chain_row.terminal_hash
+
+    response = auth_client.post(
+        "/api/games/nvuti/verify",
+        json={
+            "server_seed": revealed,
+            "client_seed": bet["client_seed"],
+            "nonce": bet["nonce"],
+            "server_seed_hash": bet["server_seed_hash"],
+            "chain_terminal_hash": chain_row.terminal_hash,
+            "chain_index": 0
+        }
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["result_number"] == bet["result_number"]
+    assert data["hash_valid"] is True
+    assert data["chain_valid"] is True
+
+    # Неверная позиция в цепочке (звено 1 ещё не раскрыто и не совпадает)
+    response = auth_client.post(
+        "/api/games/nvuti/verify",
+        json={
+            "server_seed": revealed,
+            "client_seed": bet["client_seed"],
+            "nonce": bet["nonce"],
+            "chain_terminal_hash": chain_row.terminal_hash,
+            "chain_index": 1
+        }
+    )
+    assert response.json()["chain_valid"] is False
+
+    # Чужая цепочка - сервер не хеширует, проверка офлайн
+    response = auth_client.post(
+        "/api/games/nvuti/verify",
+        json={
+            "server_seed": revealed,
+            "client_seed": bet["client_seed"],
+            "nonce": bet["nonce"],
+            "chain_terminal_hash": "0" * 64,
+            "chain_index": 0
+        }
+    )
+    assert response.status_code == 400
+
+    # Цепочка на 5 звеньев выдаёт игроку 4 seed'а, потом - откат на случайные seed'ы
+    for _ in range(4):
+        response = auth_client.post("/api/games/nvuti/seed/rotate", json={})
+        assert response.status_code == 200
+    assert auth_client.get("/api/games/nvuti/chain").status_code == 404
+
+
+def test_verify_random_seed(auth_client):
+    """
+    Проверка в обычном режиме: хеш и результат
+    """
+    bet = auth_client.post(
+        "/api/games/nvuti/bet",
+        json={"win_chance": 50.0, "amount": 10.0}
+    ).json()
+    revealed = auth_client.post("/api/games/nvuti/seed/rotate", json={}).json()
+
+    response = auth_client.post(
+        "/api/games/nvuti/verify",
+        json={
+            "server_seed": revealed["previous_server_seed"],
+            "client_seed": bet["client_seed"],
+            "nonce": bet["nonce"],
+            "server_seed_hash": bet["server_seed_hash"]
+        }
+    )
+
+    data = response.json()
+    assert data["result_number"] == bet["result_number"]
+    assert data["hash_valid"] is True
+    assert data["chain_valid"] is None
+
+
+def test_players_get_separate_chains(db, tmp_path, monkeypatch):
+    """
+    Раскрытый seed одного игрока не выдаёт seed'ы другого
+    """
+    path = str(tmp_path / "chain.bin")
+    generate_chain(path, 30, segment_length=10)
+    chain_row = register_chain(db, path, segment_length=10)
+    monkeypatch.setattr(settings, "SEED_MODE", "chain")
+
+    users = [User(username=f"chain{i}", email=f"chain{i}@test.com", hashed_password="x") for i in range(2)]
+    db.add_all(users)
+    db.commit()
+    service = NvutiService(db)
+
+    first = [service.get_or_create_active_seed(user.id) for user in users]
+    assert [seed.chain_segment for seed in first] == [0, 1]
+    assert chain_row.next_index == 2
+
+    # Раскрываем seed первого игрока несколько раз подряд
+    revealed = []
+    for _ in range(3):
+        revealed.append(service.rotate_seed(users[0].id)["previous_server_seed"])
+    active = service.get_or_create_active_seed(users[0].id)
+    assert (active.chain_segment, active.chain_index) == (0, 3)
+
+    # Хеши раскрытых seed'ов ведут только назад по своей цепочке
+    other = first[1].server_seed
+    for seed in revealed:
+        link = bytes.fromhex(seed)
+        for _ in range(10):
+            link = hashlib.sha256(link.hex().encode()).digest()
+            assert link.hex() != other
+
+    terminal = first[0].server_seed_hash
+    assert verify_chain_seed(revealed[2], terminal, 2)
+    assert service.verify(revealed[2], "c", 0, chain_terminal_hash=terminal, chain_index=2)["chain_valid"]
+    # Позиция за пределами выданных не проверяется хешированием
+    assert not service.verify(revealed[2], "c", 0, chain_terminal_hash=terminal, chain_index=9)["chain_valid"]
+    with pytest.raises(ValueError):
+        service.verify(revealed[2], "c", 0, chain_terminal_hash="f" * 64, chain_index=2)
+
+
+def test_segmented_chain_file(tmp_path):
+    path = str(tmp_path / "chain.bin")
+    published = generate_chain(path, 20, segment_length=5)
+
+    chain = HashChain(path, 5)
+    try:
+        assert chain.segments == 4 and chain.capacity == 4
+        assert chain.terminal_hash == published
+        for segment in range(chain.segments):
+            assert verify_chain_seed(chain.server_seed(3, segment), chain.terminal(segment), 3)
+        assert chain.terminal(0) != chain.terminal(1)
+    finally:
+        chain.close()
+
+    with pytest.raises(ValueError):
+        generate_chain(path, 20, segment_length=6)
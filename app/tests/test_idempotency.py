@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from app.models.bet import Bet
+from app.models.game import Game
+from app.models.idempotency_key import IdempotencyKey
+from app.models.user import User
+from app.services.idempotency import idempotency_cache, request_fingerprint
+from app.services.nvuti_service import NvutiService
+
+
+BET = {"win_chance": 50.0, "amount": 10.0}
+
+
+def test_retry_returns_stored_response(auth_client, db):
+    """
+    Повтор с тем же ключом не играет заново и отдаёт тот же ответ
+    """
+    headers = {**auth_client.headers, "Idempotency-Key": "retry-1"}
+
+    first = auth_client.post("/api/games/nvuti/bet", json=BET, headers=headers)
+    assert first.status_code == 200
+    assert "Idempotent-Replayed" not in first.headers
+
+    hits = idempotency_cache.cache_hits.value
+    second = auth_client.post("/api/games/nvuti/bet", json=BET, headers=headers)
+    assert second.status_code == 200
+    assert second.headers["Idempotent-Replayed"] == "true"
+    assert second.json() == first.json()
+    assert idempotency_cache.cache_hits.value == hits + 1
+
+    assert db.query(Bet).count() == 1
+
+    # Без ключа - обычная новая ставка
+    third = auth_client.post("/api/games/nvuti/bet", json=BET)
+    assert third.json()["bet_id"] != first.json()["bet_id"]
+
+
+def test_retry_after_cache_loss_reads_db(auth_client, db):
+    """
+    Другой воркер (пустой кеш) находит ответ в idempotency_keys
+    """
+    headers = {**auth_client.headers, "Idempotency-Key": "retry-2"}
+    first = auth_client.post("/api/games/nvuti/bet", json=BET, headers=headers)
+
+    idempotency_cache.clear()
+    db_hits = idempotency_cache.db_hits.value
+
+    second = auth_client.post("/api/games/nvuti/bet", json=BET, headers=headers)
+    assert second.json() == first.json()
+    assert idempotency_cache.db_hits.value == db_hits + 1
+    assert db.query(Bet).count() == 1
+
+
+def test_key_reuse_with_other_parameters(auth_client):
+    headers = {**auth_client.headers, "Idempotency-Key": "retry-3"}
+    auth_client.post("/api/games/nvuti/bet", json=BET, headers=headers)
+
+    response = auth_client.post("/api/games/nvuti/bet", json={**BET, "amount": 20.0}, headers=headers)
+    assert response.status_code == 400
+
+
+def test_duplicate_key_is_rejected_by_constraint(auth_client, db):
+    """
+    Гонка двух повторов: вторая ставка с тем же ключом не коммитится
+    """
+    user = db.query(User).first()
+    game_id = db.query(Game).first().id
+    service = NvutiService(db)
+
+    service.play(user.id, game_id, 10.0, 50.0, idempotency_key="race")
+    with pytest.raises(IntegrityError):
+        service.play(user.id, game_id, 10.0, 50.0, idempotency_key="race")
+    db.rollback()
+
+    assert db.query(Bet).count() == 1
+
+
+def test_purge_expired_keys(db, auth_client):
+    user = db.query(User).first()
+    fingerprint = request_fingerprint(amount=1)
+    idempotency_cache.store(db, user.id, "old", fingerprint, {"bet_id": None})
+    idempotency_cache.store(db, user.id, "new", fingerprint, {"bet_id": None})
+    db.commit()
+    db.query(IdempotencyKey).filter(IdempotencyKey.key == "old").update(
+        {"created_at": datetime.utcnow() - timedelta(days=2)}
+    )
+    db.commit()
+
+    assert idempotency_cache.purge(db) == 1
+    assert [row.key for row in db.query(IdempotencyKey)] == ["new"]
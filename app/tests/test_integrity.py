@@ -0,0 +1,59 @@
+from app.models.game import Game
+from app.models.seed import Seed
+from app.models.user import User
+from app.services.integrity import check_bet_integrity, opening_state
+from app.services.ledger import ledger
+from app.services.nvuti_service import NvutiService
+
+
+def _setup(db):
+    user = User(username="stress", email="stress@test.com", hashed_password="x", balance=1000.0)
+    db.add(user)
+    db.commit()
+    game = db.query(Game).filter(Game.type == "dice").first()
+    return user.id, game.id, opening_state(db, [user.id])
+
+
+def test_sequential_bets_keep_invariants(db):
+    user_id, game_id, opening = _setup(db)
+    service = NvutiService(db)
+    for _ in range(5):
+        service.play(user_id, game_id, 10.0, 50.0)
+
+    report = check_bet_integrity(db, [user_id], opening)
+
+    assert report["ok"]
+    assert report["bets"] == 5
+
+
+def test_detects_repeated_nonce(db):
+    """
+    Потерянное обновление seeds.nonce: следующая ставка повторяет сыгранный nonce
+    """
+    user_id, game_id, opening = _setup(db)
+    service = NvutiService(db)
+    for _ in range(3):
+        service.play(user_id, game_id, 10.0, 50.0)
+    seed = db.query(Seed).filter(Seed.user_id == user_id).one()
+    seed.nonce = 1
+    db.commit()
+
+    service.play(user_id, game_id, 10.0, 50.0)
+    report = check_bet_integrity(db, [user_id], opening)
+
+    assert not report["ok"]
+    assert report["duplicate_nonces"] == [{"server_seed_hash": seed.server_seed_hash, "nonce": 1, "bets": 2}]
+    assert report["counters_behind"][0]["max_nonce"] == 2
+
+
+def test_detects_balance_drift(db):
+    user_id, game_id, opening = _setup(db)
+    NvutiService(db).play(user_id, game_id, 10.0, 50.0)
+    # Движение баланса без ставки
+    ledger.record(db, user_id, 5.0, "manual")
+    db.commit()
+
+    report = check_bet_integrity(db, [user_id], opening)
+
+    [mismatch] = report["balance_mismatches"]
+    assert mismatch["actual"] - mismatch["expected"] == 500
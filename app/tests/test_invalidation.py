@@ -0,0 +1,113 @@
+import time
+
+from app.config import settings
+from app.models.user import User
+from app.services.game_catalog import game_catalog
+from app.services.invalidation import InvalidationBus, SQLitePollingBackend, VersionedCache, invalidation_bus
+
+
+def _wait_for(condition, timeout: float = 2.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_versioned_cache_drops_load_racing_invalidation():
+    """
+    Значение, загруженное до инвалидации, не попадает в кеш
+    """
+    bus = InvalidationBus()
+    cache = VersionedCache("games", bus)
+
+    def stale_loader():
+        # Пока читали из БД, другой запрос изменил игру
+        bus.publish("games", 1)
+        return "old"
+
+    assert cache.get(1, stale_loader) == "old"
+    assert len(cache) == 0
+
+    assert cache.get(1, lambda: "new") == "new"
+    assert cache.get(1, lambda: "unused") == "new"
+
+    bus.publish("games", 2)
+    assert cache.get(1, lambda: "unused") == "new"
+    bus.publish("games")
+    assert len(cache) == 0
+
+
+def test_apply_batch_coalesces_keys_per_topic():
+    bus = InvalidationBus()
+    calls = []
+    bus.subscribe("users", calls.append)
+
+    def message(key, origin="other"):
+        return f'{{"t": "users", "k": {key}, "v": {time.time_ns()}, "s": {time.time()}, "o": "{origin}"}}'
+
+    bus.apply_batch([message(1), message(2), message(1), message(3, origin=bus.origin)])
+    assert calls == [{1, 2}]
+
+    # Инвалидация всей темы поглощает ключи
+    bus.apply_batch([message(1), message("null"), message(2)])
+    assert calls[-1] is None
+    assert bus.lag.value >= 0
+
+
+def test_sqlite_backend_propagates_between_workers(tmp_path, monkeypatch):
+    """
+    Два «воркера» на общем файле: запись в одном сбрасывает кеш другого
+    """
+    monkeypatch.setattr(settings, "INVALIDATION_COALESCE_MS", 5.0)
+    path = str(tmp_path / "invalidation.db")
+    writer = InvalidationBus(SQLitePollingBackend(path, 0.01))
+    reader = InvalidationBus(SQLitePollingBackend(path, 0.01))
+    cache = VersionedCache("games", reader)
+    cache.get(1, lambda: "cached")
+
+    writer.start()
+    reader.start()
+    try:
+        writer.publish("games", 1)
+        assert _wait_for(lambda: len(cache) == 0)
+        assert reader.versions["games"] == writer.versions["games"]
+        assert reader.received.value >= 1
+    finally:
+        writer.stop()
+        reader.stop()
+
+
+def test_admin_game_update_invalidates_catalog(auth_client, db):
+    db.query(User).filter(User.username == "testuser").update({"is_admin": True})
+    db.commit()
+
+    game = game_catalog.by_type(db, "dice")
+    assert game.max_bet == 1000.0
+
+    response = auth_client.patch(f"/api/admin/games/{game.id}", json={"max_bet": 5.0})
+    assert response.status_code == 200
+    assert response.json()["max_bet"] == 5.0
+    assert game_catalog.by_type(db, "dice").max_bet == 5.0
+
+    response = auth_client.post("/api/games/nvuti/bet", json={"amount": 10.0, "win_chance": 50.0})
+    assert response.status_code == 400
+    assert "between" in response.json()["detail"]
+
+    response = auth_client.patch(f"/api/admin/games/{game.id}", json={"min_bet": 10.0})
+    assert response.status_code == 400
+    assert auth_client.patch("/api/admin/games/999", json={"max_bet": 5.0}).status_code == 404
+
+
+def test_game_update_requires_admin(auth_client):
+    assert auth_client.patch("/api/admin/games/1", json={"max_bet": 5.0}).status_code == 403
+
+
+def test_writes_publish_invalidations(auth_client):
+    versions = dict(invalidation_bus.versions)
+
+    auth_client.post("/api/games/nvuti/seed/rotate", json={})
+    assert invalidation_bus.versions["seeds"] > versions.get("seeds", 0)
+    # Регистрация в фикстуре
+    assert "users" in invalidation_bus.versions
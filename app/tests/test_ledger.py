@@ -0,0 +1,92 @@
+from app.models.ledger import BalanceSnapshot, LedgerEntry
+from app.models.user import User
+from app.services.ledger import BalanceLedger, ledger
+
+
+def _make_user(db, balance=100.0):
+    user = User(username="player", email="p@test.com", hashed_password="x", balance=balance)
+    db.add(user)
+    db.commit()
+    return user
+
+
+def test_bet_writes_ledger_entry(auth_client, db):
+    """
+    Ставка пишет движение баланса в той же транзакции, users.balance не трогается
+    """
+    response = auth_client.post(
+        "/api/games/nvuti/bet",
+        json={"win_chance": 50.0, "amount": 10.0}
+    )
+    data = response.json()
+
+    [entry] = db.query(LedgerEntry).all()
+    assert entry.reason == "bet"
+    assert entry.bet_id == data["bet_id"]
+    assert entry.delta == round(data["profit_loss"] * 100)
+
+    user = db.query(User).filter(User.username == "testuser").first()
+    assert user.balance == 1000.0
+
+    me = auth_client.get("/api/auth/me").json()
+    assert me["balance"] == data["new_balance"]
+
+
+def test_compaction_keeps_balance(db):
+    """
+    Компакция сворачивает движения в снапшот, баланс не меняется
+    """
+    user = _make_user(db)
+    for amount in (10.0, -2.5, 0.01, -7.51):
+        ledger.record(db, user.id, amount, "adjustment")
+    db.commit()
+
+    assert ledger.balance(db, user.id) == 100.0
+
+    assert ledger.compact(db, grace_seconds=0) == 1
+    assert ledger.compact(db, grace_seconds=0) == 0
+
+    snapshot = db.query(BalanceSnapshot).filter(BalanceSnapshot.user_id == user.id).first()
+    assert snapshot.balance == 10000
+    assert snapshot.last_entry_id == db.query(LedgerEntry).count()
+
+    ledger.record(db, user.id, 5.0, "adjustment")
+    db.commit()
+    assert ledger.balance(db, user.id) == 105.0
+    assert ledger.balances(db, [user.id]) == {user.id: 105.0}
+
+    # users.balance - зеркало последнего снапшота
+    db.refresh(user)
+    assert user.balance == 100.0
+
+
+def test_stale_cached_snapshot_is_still_correct(db):
+    """
+    Устаревший снапшот в кеше другого процесса даёт тот же баланс
+    """
+    user = _make_user(db)
+    other_process = BalanceLedger()
+
+    ledger.record(db, user.id, -30.0, "adjustment")
+    db.commit()
+    assert other_process.balance(db, user.id) == 70.0
+
+    ledger.compact(db, grace_seconds=0)
+    ledger.record(db, user.id, -20.0, "adjustment")
+    db.commit()
+
+    assert other_process.balance(db, user.id) == 50.0
+    assert BalanceLedger().balance(db, user.id) == 50.0
+
+
+def test_compaction_skips_recent_entries(db):
+    """
+    Свежие движения (в пределах grace) в снапшот не попадают
+    """
+    user = _make_user(db)
+    ledger.record(db, user.id, 1.0, "adjustment")
+    db.commit()
+
+    assert ledger.compact(db, grace_seconds=60) == 0
+    assert db.query(BalanceSnapshot).count() == 0
+    assert ledger.balance(db, user.id) == 101.0
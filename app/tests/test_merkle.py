@@ -0,0 +1,124 @@
+import struct
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.config import settings
+from app.models.bet import Bet
+from app.models.merkle_batch import MerkleBatch
+from app.services.merkle import (
+    batch_proof,
+    bet_leaf,
+    build_levels,
+    leaf_hash,
+    merkle_committer,
+    verify_proof
+)
+
+
+@pytest.fixture
+def merkle_settings(monkeypatch):
+    monkeypatch.setattr(settings, "MERKLE_BATCH_SIZE", 3)
+    monkeypatch.setattr(settings, "MERKLE_GRACE_SECONDS", 0)
+
+
+def _play(client, count):
+    for _ in range(count):
+        response = client.post("/api/games/nvuti/bet", json={"win_chance": 50.0, "amount": 1.0})
+        assert response.status_code == 200
+
+
+@pytest.mark.parametrize("count", [1, 2, 3, 5, 8, 13])
+def test_proofs_for_every_leaf(count):
+    """
+    Доказательство из сохранённых уровней сходится к корню для любого листа
+    """
+    leaves = [f"bet-{i}" for i in range(count)]
+    levels = build_levels([leaf_hash(leaf) for leaf in leaves])
+    bet_ids = [10 + 3 * i for i in range(count)]
+    batch = MerkleBatch(
+        bets_count=count,
+        root=levels[-1][0].hex(),
+        bet_ids=b"".join(struct.pack(">Q", bet_id) for bet_id in bet_ids),
+        levels=b"".join(b"".join(level) for level in levels)
+    )
+
+    for index, (bet_id, leaf) in enumerate(zip(bet_ids, leaves)):
+        proof = batch_proof(batch, bet_id)
+        assert proof["leaf_index"] == index
+        assert len(proof["proof"]) <= max(count - 1, 0).bit_length()
+        assert verify_proof(leaf, proof["proof"], batch.root)
+        assert not verify_proof(leaf + "x", proof["proof"], batch.root)
+
+    assert batch_proof(batch, 11) is None
+
+
+def test_batches_by_size_and_age(auth_client, db, merkle_settings, monkeypatch):
+    """
+    Полная пачка коммитится сразу, неполная - когда постареет
+    """
+    _play(auth_client, 4)
+
+    assert merkle_committer.catch_up(db) == 1
+    batch = db.query(MerkleBatch).one()
+    assert batch.bets_count == 3
+
+    # Остаток из одной ставки ещё молод
+    assert merkle_committer.run_once(db) is None
+
+    monkeypatch.setattr(settings, "MERKLE_BATCH_MAX_AGE_SECONDS", 0)
+    assert merkle_committer.run_once(db).bets_count == 1
+    assert merkle_committer.run_once(db) is None
+
+
+def test_batch_stops_at_out_of_order_bet(auth_client, db, merkle_settings, monkeypatch):
+    """
+    Свежая ставка с меньшим id не выпадает из пачек: пачка обрывается перед ней
+    """
+    monkeypatch.setattr(settings, "MERKLE_GRACE_SECONDS", 60)
+    monkeypatch.setattr(settings, "MERKLE_BATCH_MAX_AGE_SECONDS", 0)
+    _play(auth_client, 3)
+    first, fresh, last = db.query(Bet).order_by(Bet.id).all()
+    first.timestamp = last.timestamp = datetime.utcnow() - timedelta(minutes=5)
+    db.commit()
+
+    batch = merkle_committer.run_once(db)
+    assert (batch.first_bet_id, batch.last_bet_id) == (first.id, first.id)
+    assert merkle_committer.run_once(db) is None
+
+    fresh.timestamp = datetime.utcnow() - timedelta(minutes=5)
+    db.commit()
+    batch = merkle_committer.run_once(db)
+    assert (batch.first_bet_id, batch.last_bet_id, batch.bets_count) == (fresh.id, last.id, 2)
+
+
+def test_proof_endpoint(auth_client, db, merkle_settings):
+    _play(auth_client, 3)
+    bet_id = db.query(Bet.id).order_by(Bet.id).all()[1][0]
+
+    response = auth_client.get(f"/api/bets/{bet_id}/proof")
+    assert response.status_code == 404
+
+    merkle_committer.run_once(db)
+
+    proof = auth_client.get(f"/api/bets/{bet_id}/proof").json()
+    assert proof["leaf_index"] == 1
+    assert verify_proof(proof["leaf"], proof["proof"], proof["root"])
+
+    batches = auth_client.get("/api/bets/merkle/batches").json()
+    assert [batch["root"] for batch in batches] == [proof["root"]]
+
+    # Подмена ставки в БД ломает доказательство
+    bet = db.query(Bet).filter(Bet.id == bet_id).one()
+    bet.profit_loss += 100
+    db.commit()
+    assert not verify_proof(bet_leaf(bet), proof["proof"], proof["root"])
+
+
+def test_proof_of_foreign_bet_is_hidden(auth_client, db, merkle_settings):
+    _play(auth_client, 1)
+    bet = db.query(Bet).one()
+    bet.user_id += 1000
+    db.commit()
+
+    assert auth_client.get(f"/api/bets/{bet.id}/proof").status_code == 404
@@ -1,3 +1,6 @@
+from app.models.game import Game
+
+
 def test_play_nvuti_success(auth_client):
     """
     Тест 8: Успешная игра в Nvuti
@@ -143,4 +146,54 @@ def test_list_games(auth_client):
     
     assert len(games) > 0
     assert games[0]["name"] == "Nvuti"
-    assert games[0]["type"] == "dice"
\ No newline at end of file
+    assert games[0]["type"] == "dice"
+
+def _add_game(db, game_type):
+    game = Game(name=game_type, type=game_type, house_edge=5.0, min_bet=1.0, max_bet=1000.0)
+    db.add(game)
+    db.commit()
+    return game
+
+
+def test_generic_bet_dispatches_on_game_type(auth_client, db):
+    """
+    /games/{id}/bet выбирает движок по Game.type
+    """
+    game = _add_game(db, "coinflip")
+
+    response = auth_client.post(
+        f"/api/games/{game.id}/bet",
+        json={"amount": 10.0, "params": {"flips": 2, "heads": False}}
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["flips"] == 2
+    assert data["heads"] is False
+    assert data["multiplier"] == 3.8
+    assert len(data["outcome"]) == 2
+    assert data["is_win"] == (data["outcome"] == [False, False])
+
+
+def test_generic_bet_plays_dice(auth_client, db):
+    dice = db.query(Game).filter(Game.type == "dice").one()
+
+    response = auth_client.post(f"/api/games/{dice.id}/bet", json={"amount": 10.0, "params": {"win_chance": 50}})
+
+    assert response.status_code == 200
+    assert response.json()["multiplier"] == 1.9
+    assert 0 <= response.json()["result_number"] <= 99.99
+
+
+def test_generic_bet_rejects_bad_params(auth_client, db):
+    rounds = _add_game(db, "dice_round")
+    dice = db.query(Game).filter(Game.type == "dice").one()
+
+    unknown = auth_client.post(f"/api/games/{dice.id}/bet", json={"amount": 10.0, "params": {"win_chance": 50, "x": 1}})
+    round_bet = auth_client.post(f"/api/games/{rounds.id}/bet", json={"amount": 10.0, "params": {"win_chance": 50}})
+    missing = auth_client.post("/api/games/999999/bet", json={"amount": 10.0, "params": {}})
+
+    assert unknown.status_code == 400
+    assert "Unknown bet parameters" in unknown.json()["detail"]
+    assert round_bet.status_code == 400
+    assert missing.status_code == 404
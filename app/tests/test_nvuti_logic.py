@@ -58,10 +58,11 @@ def test_balance_updates_correctly(auth_client, db):
     Тест 20: Баланс обновляется правильно
     """
     from app.models.user import User
+    from app.services.ledger import ledger
     
     # Получаем начальный баланс
     user = db.query(User).filter(User.username == "testuser").first()
-    initial_balance = user.balance
+    initial_balance = ledger.balance(db, user.id)
     
     # Делаем ставку
     response = auth_client.post(
@@ -73,6 +74,6 @@ def test_balance_updates_correctly(auth_client, db):
     profit_loss = data["profit_loss"]
     
     # Проверяем баланс
-    db.refresh(user)
-    assert user.balance == initial_balance + profit_loss
-    assert user.balance == data["new_balance"]
\ No newline at end of file
+    balance = ledger.balance(db, user.id)
+    assert balance == initial_balance + profit_loss
+    assert balance == data["new_balance"]
\ No newline at end of file
@@ -0,0 +1,127 @@
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.main import app, create_app
+from app.models.user import User
+from app.services.profiling import StackSampler, request_profiler, stop_tracemalloc
+
+
+@pytest.fixture
+def admin_client(auth_client, db, tmp_path, monkeypatch):
+    """
+    Админ-клиент приложения, собранного с PROFILING_ENABLED
+    """
+    monkeypatch.setattr(settings, "PROFILING_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "PROFILING_ENABLED", True)
+    db.query(User).filter(User.username == "testuser").update({"is_admin": True})
+    db.commit()
+
+    profiled = create_app()
+    profiled.dependency_overrides = dict(app.dependency_overrides)
+    client = TestClient(profiled)
+    client.headers = auth_client.headers
+    yield client
+    request_profiler.disarm()
+
+
+def test_profiling_disabled_by_default(auth_client, db):
+    """
+    Без PROFILING_ENABLED зависимость не подключена, а взвести нельзя
+    """
+    db.query(User).filter(User.username == "testuser").update({"is_admin": True})
+    db.commit()
+
+    assert app.router.dependencies == []
+    response = auth_client.post("/api/admin/profiling", json={})
+    assert response.status_code == 400
+    assert request_profiler.remaining == 0
+
+
+def test_profiling_requires_admin(auth_client):
+    assert auth_client.post("/api/admin/profiling", json={}).status_code == 403
+    assert auth_client.get("/api/admin/tracemalloc").status_code == 403
+
+
+def test_profiles_sampled_requests(admin_client, tmp_path):
+    """
+    Взведённый профилировщик пишет folded stacks для N запросов и выключается
+    """
+    response = admin_client.post("/api/admin/profiling", json={"requests": 1, "path_prefix": "/api/games"})
+    assert response.status_code == 200
+    assert response.json()["remaining"] == 1
+
+    # Не подходит по префиксу
+    admin_client.get("/health")
+    assert list(tmp_path.iterdir()) == []
+
+    admin_client.get("/api/games/nvuti/seed")
+    admin_client.get("/api/games/nvuti/seed")
+
+    dumps = list(tmp_path.glob("*.folded"))
+    assert len(dumps) == 1
+    assert "GET_api_games_nvuti_seed" in dumps[0].name
+    for line in dumps[0].read_text().splitlines():
+        stack, count = line.rsplit(" ", 1)
+        assert int(count) > 0
+
+    status = admin_client.get("/api/admin/profiling").json()
+    assert status["remaining"] == 0
+    assert status["dumps"] == [dumps[0].name]
+
+
+def test_profile_token_header(admin_client, tmp_path):
+    """
+    Запрос с X-Profile-Token профилируется вне выборки
+    """
+    token = admin_client.post(
+        "/api/admin/profiling", json={"requests": 5, "path_prefix": "/nowhere"}
+    ).json()["token"]
+
+    admin_client.get("/api/games/nvuti/seed")
+    assert list(tmp_path.glob("*.folded")) == []
+
+    admin_client.get("/api/games/nvuti/seed", headers={"X-Profile-Token": token})
+    assert len(list(tmp_path.glob("*.folded"))) == 1
+
+
+def test_stack_sampler_sees_busy_thread():
+    stop = threading.Event()
+
+    def busy_loop():
+        while not stop.is_set():
+            sum(range(1000))
+
+    worker = threading.Thread(target=busy_loop, name="busy")
+    worker.start()
+    sampler = StackSampler(0.001)
+    sampler.start()
+    try:
+        while sampler.samples < 20:
+            stop.wait(0.005)
+    finally:
+        stacks = sampler.stop()
+        stop.set()
+        worker.join()
+
+    assert any(stack.startswith("busy;") and "busy_loop" in stack for stack in stacks)
+
+
+def test_tracemalloc_endpoints(admin_client, tmp_path):
+    assert admin_client.get("/api/admin/tracemalloc").status_code == 400
+
+    try:
+        assert admin_client.post("/api/admin/tracemalloc/start").status_code == 204
+        payload = [bytearray(1024) for _ in range(100)]
+
+        report = admin_client.get("/api/admin/tracemalloc", params={"top": 5}).json()
+        assert report["tracing"] is True
+        assert 0 < len(report["top"]) <= 5
+        assert list(tmp_path.glob("*.tracemalloc.txt"))
+        del payload
+    finally:
+        stop_tracemalloc()
+
+    assert admin_client.post("/api/admin/tracemalloc/stop").status_code == 204
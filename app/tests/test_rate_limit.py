@@ -0,0 +1,106 @@
+from sqlalchemy import event
+
+from app.config import settings
+from app.services.rate_limit import MemoryBuckets, SQLiteBuckets
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_bucket_allows_burst_then_refills():
+    """
+    Корзина пропускает burst запросов подряд и пополняется со скоростью rate
+    """
+    clock = FakeClock()
+    buckets = MemoryBuckets(max_keys=10, clock=clock)
+
+    assert [buckets.acquire("u", rate=2, burst=3) for _ in range(3)] == [0, 0, 0]
+    assert buckets.acquire("u", rate=2, burst=3) == 0.5
+
+    clock.now += 0.5
+    assert buckets.acquire("u", rate=2, burst=3) == 0
+    assert buckets.acquire("u", rate=2, burst=3) > 0
+
+    # Долгий простой не копит больше burst
+    clock.now += 100
+    assert [buckets.acquire("u", rate=2, burst=3) for _ in range(4)][-1] > 0
+
+
+def test_buckets_are_lru_bounded():
+    """
+    Число корзин ограничено, вытесняется самая давно неиспользуемая
+    """
+    buckets = MemoryBuckets(max_keys=2, clock=FakeClock())
+
+    buckets.acquire("a", rate=1, burst=1)
+    buckets.acquire("b", rate=1, burst=1)
+    buckets.acquire("a", rate=1, burst=1)
+    buckets.acquire("c", rate=1, burst=1)
+
+    assert len(buckets) == 2
+    # "a" осталась пустой, "b" вытеснена и начинает с полной корзины
+    assert buckets.acquire("a", rate=1, burst=1) > 0
+    assert buckets.acquire("b", rate=1, burst=1) == 0
+
+
+def test_sqlite_buckets_are_shared(tmp_path):
+    """
+    Два экземпляра (два воркера) делят одну корзину через файл SQLite
+    """
+    clock = FakeClock()
+    path = str(tmp_path / "limits.db")
+    first = SQLiteBuckets(path, clock=clock)
+    second = SQLiteBuckets(path, clock=clock)
+
+    assert first.acquire("u", rate=1, burst=2) == 0
+    assert second.acquire("u", rate=1, burst=2) == 0
+    assert first.acquire("u", rate=1, burst=2) == 1.0
+
+    clock.now += settings.RATE_LIMIT_IDLE_SECONDS + 1
+    assert second.prune() == 1
+
+
+def test_bet_route_returns_429(auth_client, monkeypatch):
+    """
+    Превышение лимита на ставки - 429 с Retry-After
+    """
+    monkeypatch.setattr(settings, "RATE_LIMIT_RULES", {"nvuti_bet": {"user_rate": 0.1, "user_burst": 2}})
+
+    for _ in range(2):
+        response = auth_client.post("/api/games/nvuti/bet", json={"win_chance": 50.0, "amount": 1.0})
+        assert response.status_code == 200
+
+    response = auth_client.post("/api/games/nvuti/bet", json={"win_chance": 50.0, "amount": 1.0})
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "10"
+
+    # Другие маршруты не ограничены
+    assert auth_client.get("/api/games/nvuti/seed").status_code == 200
+
+
+def test_limited_request_does_not_touch_db(auth_client, db, monkeypatch):
+    """
+    Отклонённый запрос не ходит в БД: игрок для корзины - из токена
+    """
+    monkeypatch.setattr(settings, "RATE_LIMIT_RULES", {"nvuti_bet": {"user_rate": 0.1, "user_burst": 1}})
+    assert auth_client.post("/api/games/nvuti/bet", json={"win_chance": 50.0, "amount": 1.0}).status_code == 200
+
+    statements = []
+    connection = db.connection()
+
+    def listener(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(connection, "before_cursor_execute", listener)
+    try:
+        response = auth_client.post("/api/games/nvuti/bet", json={"win_chance": 50.0, "amount": 1.0})
+    finally:
+        event.remove(connection, "before_cursor_execute", listener)
+
+    assert response.status_code == 429
+    assert statements == []
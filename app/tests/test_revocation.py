@@ -0,0 +1,107 @@
+import time
+
+from app.models.revoked_token import RevokedToken
+from app.models.user import User
+from app.services.revocation import RevocationList, revocation_list, _to_datetime
+
+
+def _login(client, username="testuser", password="testpass123"):
+    return client.post("/api/auth/login", data={"username": username, "password": password})
+
+
+def _make_admin(client, db):
+    client.post(
+        "/api/auth/register",
+        json={"username": "admin", "email": "admin@test.com", "password": "adminpass123"}
+    )
+    db.query(User).filter(User.username == "admin").update({"is_admin": True})
+    db.commit()
+    token = _login(client, "admin", "adminpass123").json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_logout_revokes_token(auth_client):
+    """
+    После logout токен больше не принимается
+    """
+    assert auth_client.get("/api/auth/me").status_code == 200
+
+    response = auth_client.post("/api/auth/logout")
+    assert response.status_code == 204
+
+    assert auth_client.get("/api/auth/me").status_code == 401
+
+
+def test_ban_revokes_existing_tokens_and_blocks_login(auth_client, db):
+    """
+    Бан отзывает выданные токены и запрещает логин; после разбана логин работает
+    """
+    user_headers = dict(auth_client.headers)
+    user_id = auth_client.get("/api/auth/me").json()["id"]
+    admin = _make_admin(auth_client, db)
+
+    response = auth_client.post(f"/api/auth/users/{user_id}/ban", headers=admin)
+    assert response.status_code == 200
+    assert response.json() == {"user_id": user_id, "is_banned": True}
+
+    assert auth_client.get("/api/auth/me", headers=user_headers).status_code == 401
+    assert _login(auth_client).status_code == 403
+
+    response = auth_client.post(f"/api/auth/users/{user_id}/unban", headers=admin)
+    assert response.status_code == 200
+
+    # Старый токен так и остаётся отозванным, новый - работает
+    assert auth_client.get("/api/auth/me", headers=user_headers).status_code == 401
+    time.sleep(0.01)
+    token = _login(auth_client).json()["access_token"]
+    assert auth_client.get("/api/auth/me", headers={"Authorization": f"Bearer {token}"}).status_code == 200
+
+
+def test_ban_requires_admin(auth_client):
+    response = auth_client.post("/api/auth/users/1/ban")
+    assert response.status_code == 403
+
+
+def test_ban_unknown_user(auth_client, db):
+    admin = _make_admin(auth_client, db)
+    response = auth_client.post("/api/auth/users/9999/ban", headers=admin)
+    assert response.status_code == 404
+
+
+def test_other_worker_picks_up_revocations(db):
+    """
+    Второй экземпляр (другой воркер) узнаёт об отзывах через sync
+    """
+    now = time.time()
+    revocation_list.revoke_token(db, {"jti": "abc", "exp": now + 60})
+    revocation_list.revoke_user(db, 42)
+
+    other = RevocationList()
+    assert not other.is_revoked({"jti": "abc"})
+
+    assert other.sync(db) == 2
+    assert other.is_revoked({"jti": "abc"})
+    assert other.is_revoked({"uid": 42, "iat": now - 1})
+    assert not other.is_revoked({"uid": 42, "iat": now + 5})
+    assert not other.is_revoked({"uid": 7, "iat": now - 1})
+
+
+def test_expired_revocations_are_dropped(db):
+    """
+    Истёкшие записи удаляются из памяти и из БД
+    """
+    now = time.time()
+    revocations = RevocationList()
+    revocations.apply("token", "old", now - 10, now - 1)
+    revocations.apply("token", "fresh", now - 10, now + 60)
+
+    assert not revocations.is_revoked({"jti": "old"})
+    assert revocations.is_revoked({"jti": "fresh"})
+    assert len(revocations) == 1
+
+    db.add(RevokedToken(kind="token", key="old", revoked_at=_to_datetime(now - 10), expires_at=_to_datetime(now - 1)))
+    db.commit()
+
+    assert revocations.sync(db) == 0
+    assert revocations.purge_expired(db) == 1
+    assert db.query(RevokedToken).count() == 0
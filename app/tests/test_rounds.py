@@ -0,0 +1,160 @@
+import json
+
+import pytest
+
+from app.models.bet import Bet
+from app.models.game import Game
+from app.models.round import Round
+from app.models.user import User
+from app.services.ledger import ledger
+from app.services.nvuti_service import NvutiService
+from app.services.round_service import RoundBook, round_book, round_client_seed
+
+
+@pytest.fixture
+def round_game(db):
+    game = Game(
+        name="Nvuti Rounds",
+        type="dice_round",
+        house_edge=5.0,
+        min_bet=1.0,
+        max_bet=1000.0,
+        rules="Test game"
+    )
+    db.add(game)
+    db.commit()
+    return game
+
+
+def _make_users(db, count, balance=1000.0):
+    users = [
+        User(username=f"player{i}", email=f"p{i}@test.com", hashed_password="x", balance=balance)
+        for i in range(count)
+    ]
+    db.add_all(users)
+    db.commit()
+    return users
+
+
+def test_round_settles_all_bets_on_one_roll(db, round_game):
+    """
+    Все ставки раунда играют на одно число и рассчитываются разом
+    """
+    book = RoundBook()
+    users = _make_users(db, 20)
+
+    for i, user in enumerate(users):
+        book.place_bet(db, user, round_game, bet_amount=10.0, win_chance=5.0 + i * 4)
+
+    [summary] = book.settle_due(db, force=True)
+
+    assert summary["bets_settled"] == 20
+    assert summary["bets_voided"] == 0
+
+    round_row = db.query(Round).filter(Round.id == summary["round_id"]).first()
+    assert round_row.status == "settled"
+    assert round_row.client_seed == round_client_seed(round_row.id, json.loads(round_row.player_seeds))
+    assert round_row.result_number == NvutiService(None).calculate_result(
+        round_row.server_seed, round_row.client_seed, 0
+    )
+
+    bets = db.query(Bet).filter(Bet.game_id == round_game.id).all()
+    assert len(bets) == 20
+    for bet in bets:
+        data = json.loads(bet.game_data)
+        assert data["round_id"] == round_row.id
+        assert data["result_number"] == round_row.result_number
+        assert data["is_win"] == (round_row.result_number < data["win_chance"])
+
+    balances = ledger.balances(db, [user.id for user in users])
+    for user in users:
+        total = sum(b.profit_loss for b in bets if b.user_id == user.id)
+        assert balances[user.id] == pytest.approx(1000.0 + total)
+
+
+def test_round_client_seed_comes_from_players(db, round_game):
+    """
+    Client seed раунда неизвестен до закрытия окна и выводится из seed'ов игроков
+    """
+    book = RoundBook()
+    users = _make_users(db, 2)
+
+    first = book.place_bet(db, users[0], round_game, bet_amount=10.0, win_chance=50.0, client_seed="alice-seed")
+    book.place_bet(db, users[1], round_game, bet_amount=10.0, win_chance=50.0)
+    assert first["player_seed"] == "alice-seed"
+
+    round_row = db.query(Round).filter(Round.id == first["round_id"]).first()
+    assert round_row.client_seed == ""
+
+    book.settle_due(db, force=True)
+    db.refresh(round_row)
+
+    player_seeds = json.loads(round_row.player_seeds)
+    assert player_seeds[0] == "alice-seed" and len(player_seeds) == 2
+    assert round_row.client_seed == round_client_seed(round_row.id, player_seeds)
+    # Другой seed игрока - другой client seed раунда
+    assert round_client_seed(round_row.id, ["bob-seed", player_seeds[1]]) != round_row.client_seed
+
+    bet = db.query(Bet).filter(Bet.user_id == users[0].id).one()
+    assert json.loads(bet.game_data)["player_seed"] == "alice-seed"
+
+
+def test_failed_settlement_voids_round(db, round_game, monkeypatch, caplog):
+    """
+    Если расчёт упал, раунд аннулируется (seed раскрыт), а не висит открытым
+    """
+    book = RoundBook()
+    users = _make_users(db, 3)
+    for user in users:
+        book.place_bet(db, user, round_game, bet_amount=10.0, win_chance=50.0)
+
+    def broken_balances(*args, **kwargs):
+        raise RuntimeError("database is gone")
+
+    monkeypatch.setattr(ledger, "balances", broken_balances)
+
+    assert book.settle_due(db, force=True) == []
+    assert "3 bets dropped" in caplog.text
+
+    [round_row] = db.query(Round).filter(Round.game_id == round_game.id).all()
+    assert round_row.status == "void"
+    assert db.query(Bet).filter(Bet.game_id == round_game.id).count() == 0
+
+
+def test_round_rejects_stakes_above_balance(db, round_game):
+    """
+    Сумма ставок игрока в раунде не может превышать баланс
+    """
+    book = RoundBook()
+    [user] = _make_users(db, 1, balance=15.0)
+
+    book.place_bet(db, user, round_game, bet_amount=10.0, win_chance=50.0)
+    with pytest.raises(ValueError, match="Insufficient balance"):
+        book.place_bet(db, user, round_game, bet_amount=10.0, win_chance=50.0)
+
+
+def test_round_bet_endpoint(auth_client, db, round_game):
+    """
+    Ставка через API, server seed раскрывается только после расчёта
+    """
+    response = auth_client.post(
+        "/api/games/rounds/bet",
+        json={"win_chance": 50.0, "amount": 10.0, "client_seed": "my-seed"}
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["multiplier"] == 1.9
+    assert data["player_seed"] == "my-seed"
+
+    info = auth_client.get(f"/api/games/rounds/{data['round_id']}").json()
+    assert info["status"] == "open"
+    assert info["server_seed"] is None
+    assert info["client_seed"] is None
+
+    round_book.settle_due(db, force=True)
+    info = auth_client.get(f"/api/games/rounds/{data['round_id']}").json()
+    assert info["status"] == "settled"
+    assert info["server_seed"] is not None
+    assert info["player_seeds"] == ["my-seed"]
+    assert info["client_seed"] == round_client_seed(data["round_id"], ["my-seed"])
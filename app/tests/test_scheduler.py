@@ -0,0 +1,143 @@
+import asyncio
+import os
+import time
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.job import JobLease, JobRun
+from app.models.user import User
+from app.services.scheduler import CronSchedule, JobScheduler
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    """
+    Отдельная файловая БД: планировщик открывает сессии из потоков
+    """
+    engine = create_engine(f"sqlite:///{tmp_path}/jobs.db", connect_args={"check_same_thread": False})
+    JobLease.__table__.create(bind=engine)
+    JobRun.__table__.create(bind=engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+def test_cron_next_after():
+    moment = datetime(2026, 10, 19, 10, 7, 30)  # понедельник
+
+    assert CronSchedule("*/15 * * * *").next_after(moment) == datetime(2026, 10, 19, 10, 15)
+    assert CronSchedule("0 3 * * *").next_after(moment) == datetime(2026, 10, 20, 3, 0)
+    assert CronSchedule("30 9 * * 0").next_after(moment) == datetime(2026, 10, 25, 9, 30)
+    assert CronSchedule("0 0 1 1-3 *").next_after(moment) == datetime(2027, 1, 1, 0, 0)
+    assert CronSchedule("0 12 29 2 *").next_after(moment) == datetime(2028, 2, 29, 12, 0)
+
+    for expression in ("* * *", "60 * * * *", "0 0 30 2 *"):
+        with pytest.raises(ValueError):
+            CronSchedule(expression).next_after(moment)
+
+
+def test_lease_is_exclusive_until_expiry(session_factory):
+    first, second = JobScheduler(), JobScheduler()
+    db = session_factory()
+
+    assert first.acquire_lease(db, "rollups", ttl=60)
+    assert not second.acquire_lease(db, "rollups", ttl=60)
+    # Владелец продлевает свою аренду
+    assert first.acquire_lease(db, "rollups", ttl=-1)
+    # Истёкшую аренду забирает другой воркер
+    assert second.acquire_lease(db, "rollups", ttl=60)
+    assert not first.acquire_lease(db, "rollups", ttl=60)
+
+    assert second.release_leases(db) == 1
+    assert first.acquire_lease(db, "rollups", ttl=60)
+    db.close()
+
+
+def test_singleton_job_runs_in_one_worker(session_factory):
+    calls = []
+    workers = [JobScheduler(), JobScheduler()]
+    jobs = [worker.add("count", lambda: calls.append(1) or len(calls), interval=60) for worker in workers]
+
+    async def run_both():
+        return [await worker.run_job(job, session_factory) for worker, job in zip(workers, jobs)]
+
+    assert asyncio.run(run_both()) == ["ok", None]
+    assert calls == [1]
+
+    db = session_factory()
+    [run] = db.query(JobRun).all()
+    assert run.job == "count" and run.status == "ok" and run.result == "1"
+    assert run.owner == workers[0].owner
+    db.close()
+
+
+def test_failures_and_timeouts_are_recorded(session_factory):
+    worker = JobScheduler()
+
+    def fail():
+        raise RuntimeError("boom")
+
+    failing = worker.add("fail", fail, interval=60, singleton=False)
+    slow = worker.add("slow", lambda: time.sleep(0.3), interval=60, timeout=0.05, singleton=False)
+
+    async def run():
+        statuses = [await worker.run_job(failing, session_factory), await worker.run_job(slow, session_factory)]
+        # Запуск после таймаута ещё идёт - следующий пропускается
+        statuses.append(await worker.run_job(slow, session_factory))
+        await slow.running
+        return statuses
+
+    assert asyncio.run(run()) == ["error", "timeout", None]
+
+    db = session_factory()
+    runs = {run.job: run for run in db.query(JobRun).all()}
+    assert runs["fail"].error == "RuntimeError: boom"
+    assert runs["slow"].status == "timeout"
+    db.close()
+
+
+def test_process_job_runs_in_another_process(session_factory):
+    worker = JobScheduler()
+    job = worker.add("pid", os.getpid, interval=60, process=True, singleton=False, timeout=60)
+
+    try:
+        assert asyncio.run(worker.run_job(job, session_factory)) == "ok"
+    finally:
+        worker.shutdown()
+
+    db = session_factory()
+    run = db.query(JobRun).one()
+    assert run.result != repr(os.getpid())
+    db.close()
+
+
+def test_add_validates_schedule():
+    worker = JobScheduler()
+    with pytest.raises(ValueError):
+        worker.add("both", print, interval=1, cron="* * * * *")
+    with pytest.raises(ValueError):
+        worker.add("none", print)
+    worker.add("ok", print, cron="0 * * * *")
+    with pytest.raises(ValueError):
+        worker.add("ok", print, interval=1)
+
+
+def test_admin_job_endpoints(auth_client, db):
+    assert auth_client.get("/api/admin/jobs/runs").status_code == 403
+
+    db.query(User).filter(User.username == "testuser").update({"is_admin": True})
+    now = datetime.utcnow()
+    db.add_all([
+        JobRun(job="rollups", owner="w1", started_at=now, finished_at=now, duration_ms=1.0, status="ok", result="10"),
+        JobRun(job="rollups", owner="w1", started_at=now, finished_at=now, duration_ms=2.0, status="error", error="boom"),
+        JobRun(job="merkle_commit", owner="w2", started_at=now, finished_at=now, duration_ms=3.0, status="ok")
+    ])
+    db.commit()
+
+    runs = auth_client.get("/api/admin/jobs/runs", params={"job": "rollups"}).json()
+    assert [run["status"] for run in runs] == ["error", "ok"]
+    failed = auth_client.get("/api/admin/jobs/runs", params={"status": "error"}).json()
+    assert [run["error"] for run in failed] == ["boom"]
+    assert auth_client.get("/api/admin/jobs").status_code == 200
@@ -0,0 +1,61 @@
+import hashlib
+
+from app.config import settings
+from app.models.seed import Seed
+from app.services.nvuti_service import NvutiService
+from app.services.seed_pool import seed_pool
+
+
+def test_refill_fills_pool_up_to_target(db, monkeypatch):
+    """
+    Пул доливается до SEED_POOL_TARGET, seed'ы уже захешированы
+    """
+    monkeypatch.setattr(settings, "SEED_POOL_TARGET", 30)
+    monkeypatch.setattr(settings, "SEED_POOL_LOW_WATERMARK", 10)
+    monkeypatch.setattr(settings, "SEED_POOL_REFILL_BATCH", 7)
+
+    assert seed_pool.refill(db) == 30
+    assert seed_pool.size(db) == 30
+
+    # Выше watermark - ничего не делаем
+    assert seed_pool.refill(db) == 0
+
+    pooled = db.query(Seed).filter(Seed.user_id.is_(None)).first()
+    assert pooled.active is False
+    assert pooled.server_seed_hash == hashlib.sha256(pooled.server_seed.encode()).hexdigest()
+
+
+def test_rotate_assigns_pooled_seed(auth_client, db, monkeypatch):
+    """
+    Смена seed берёт готовый seed из пула
+    """
+    monkeypatch.setattr(settings, "SEED_POOL_TARGET", 5)
+    monkeypatch.setattr(settings, "SEED_POOL_LOW_WATERMARK", 5)
+    seed_pool.refill(db)
+
+    response = auth_client.post(
+        "/api/games/nvuti/seed/rotate",
+        json={"new_client_seed": "my-client-seed"}
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["new_client_seed"] == "my-client-seed"
+    assert seed_pool.size(db) == 4
+
+    seed = db.query(Seed).filter(Seed.server_seed_hash == data["new_server_seed_hash"]).first()
+    assert seed.user_id is not None
+    assert seed.active is True
+
+
+def test_empty_pool_falls_back_to_inline_generation(auth_client, db):
+    """
+    Пустой пул не ломает выдачу seed'а
+    """
+    assert seed_pool.size(db) == 0
+
+    service = NvutiService(db)
+    seed = service.get_or_create_active_seed(user_id=1)
+
+    assert seed.active is True
+    assert seed.nonce == 0
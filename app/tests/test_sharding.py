@@ -0,0 +1,249 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.config import settings
+from app.database import shard_router
+from app.models.bet import Bet
+from app.models.ledger import BalanceSnapshot
+from app.models.seed import Seed
+from app.models.user import User
+from app.models.user_directory import UserDirectory
+from app.services.exposure import exposure_tracker
+from app.services.jobs import (
+    aggregate_rollups,
+    commit_merkle_batches,
+    compact_ledger,
+    reconcile_exposure,
+    refill_seed_pool
+)
+from app.services.ledger import ledger
+from app.services.rollups import hourly_report, merge_reports
+from app.services.sharding import init_shards, move_user, plan_rebalance, shard_user_counts
+
+
+@pytest.fixture
+def shards(db, tmp_path):
+    """
+    Два шарда - отдельные SQLite-файлы, основная БД - тестовая
+    """
+    shard_router.configure([f"sqlite:///{tmp_path}/shard{i}.db" for i in range(2)])
+    init_shards(db)
+    yield shard_router
+    shard_router.configure([])
+
+
+def _register_and_login(client, username):
+    response = client.post(
+        "/api/auth/register",
+        json={"username": username, "email": f"{username}@test.com", "password": "testpass123"}
+    )
+    assert response.status_code == 201
+
+    response = client.post(
+        "/api/auth/login",
+        data={"username": username, "password": "testpass123"}
+    )
+    assert response.status_code == 200
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def _count(shard, model, **filters):
+    shard_db = shard_router.session(shard)
+    try:
+        return shard_db.query(model).filter_by(**filters).count()
+    finally:
+        shard_db.close()
+
+
+def test_users_and_bets_live_on_their_shard(client, db, shards):
+    """
+    Пользователи раскладываются по шардам, ставки пишутся на шард игрока
+    """
+    alice = _register_and_login(client, "alice")
+    bob = _register_and_login(client, "bob")
+
+    entries = {entry.username: entry for entry in db.query(UserDirectory)}
+    assert {entries["alice"].shard, entries["bob"].shard} == {0, 1}
+    assert db.query(User).count() == 0
+
+    for _ in range(3):
+        response = client.post("/api/games/nvuti/bet", json={"win_chance": 50.0, "amount": 10.0}, headers=alice)
+        assert response.status_code == 200
+    client.post("/api/games/nvuti/bet", json={"win_chance": 50.0, "amount": 10.0}, headers=bob)
+
+    alice_shard = entries["alice"].shard
+    assert _count(alice_shard, Bet, user_id=entries["alice"].id) == 3
+    assert _count(1 - alice_shard, Bet) == 1
+
+    me = client.get("/api/auth/me", headers=bob).json()
+    assert me["username"] == "bob"
+
+    duplicate = client.post(
+        "/api/auth/register",
+        json={"username": "alice", "email": "other@test.com", "password": "testpass123"}
+    )
+    assert duplicate.status_code == 400
+
+
+def test_move_user_keeps_history_and_balance(client, db, shards):
+    """
+    Перенос игрока: ставки, журнал и баланс переезжают, логин ведёт на новый шард
+    """
+    headers = _register_and_login(client, "alice")
+    for _ in range(4):
+        client.post("/api/games/nvuti/bet", json={"win_chance": 50.0, "amount": 10.0}, headers=headers)
+    balance = client.get("/api/auth/me", headers=headers).json()["balance"]
+
+    entry = db.query(UserDirectory).filter(UserDirectory.username == "alice").first()
+    source, target = entry.shard, 1 - entry.shard
+
+    moved = move_user(db, entry.id, target)
+    assert moved["bets"] == 4
+
+    db.refresh(entry)
+    assert entry.shard == target
+    assert _count(source, User) == 0
+    assert _count(target, Bet, user_id=entry.id) == 4
+
+    response = client.post("/api/auth/login", data={"username": "alice", "password": "testpass123"})
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    assert client.get("/api/auth/me", headers=headers).json()["balance"] == balance
+
+    response = client.post("/api/games/nvuti/bet", json={"win_chance": 50.0, "amount": 10.0}, headers=headers)
+    assert response.status_code == 200
+    assert _count(target, Bet, user_id=entry.id) == 5
+
+
+def test_move_user_refuses_merkle_committed_bets(client, db, shards, monkeypatch):
+    """
+    Ставки из Merkle-пачек не переносим: их ID в пачке должны остаться прежними
+    """
+    monkeypatch.setattr(settings, "MERKLE_BATCH_SIZE", 2)
+    monkeypatch.setattr(settings, "MERKLE_GRACE_SECONDS", -60)
+    headers = _register_and_login(client, "alice")
+    for _ in range(2):
+        client.post("/api/games/nvuti/bet", json={"win_chance": 50.0, "amount": 10.0}, headers=headers)
+
+    entry = db.query(UserDirectory).filter(UserDirectory.username == "alice").first()
+    assert commit_merkle_batches() == 1
+
+    with pytest.raises(ValueError, match="Merkle"):
+        move_user(db, entry.id, 1 - entry.shard)
+
+    db.refresh(entry)
+    assert _count(entry.shard, Bet, user_id=entry.id) == 2
+    assert _count(1 - entry.shard, User) == 0
+
+
+def _report_totals():
+    now = datetime.utcnow()
+    reports = []
+    for shard in range(2):
+        shard_db = shard_router.session(shard)
+        try:
+            reports.append(hourly_report(shard_db, now - timedelta(hours=2), now + timedelta(hours=2)))
+        finally:
+            shard_db.close()
+    rows = merge_reports(reports)
+    return {key: round(sum(row[key] for row in rows), 2) for key in ("bets_count", "turnover", "payout")}
+
+
+def test_move_user_keeps_report_totals(client, db, shards, monkeypatch):
+    """
+    Перенос не удваивает оборот и GGR: агрегаты переезжают вместе со ставками
+    """
+    monkeypatch.setattr(settings, "ROLLUP_GRACE_SECONDS", -60)
+    alice = _register_and_login(client, "alice")
+    bob = _register_and_login(client, "bob")
+    for headers, amount in ((alice, 10.0), (alice, 20.0), (bob, 5.0)):
+        client.post("/api/games/nvuti/bet", json={"win_chance": 50.0, "amount": amount}, headers=headers)
+    assert aggregate_rollups() == 3
+
+    # Ещё не агрегированная ставка переезжает вместе с остальными
+    client.post("/api/games/nvuti/bet", json={"win_chance": 50.0, "amount": 40.0}, headers=alice)
+    aggregate_rollups()
+    before = _report_totals()
+    assert before["bets_count"] == 4
+
+    # Ставка после прохода агрегации - её учтёт проход уже на новом шарде
+    client.post("/api/games/nvuti/bet", json={"win_chance": 50.0, "amount": 80.0}, headers=alice)
+
+    entry = db.query(UserDirectory).filter(UserDirectory.username == "alice").first()
+    move_user(db, entry.id, 1 - entry.shard)
+
+    assert aggregate_rollups() == 4
+    after = _report_totals()
+    assert after["bets_count"] == 5
+    assert after["turnover"] == before["turnover"] + 80.0
+
+    # Повторный проход ничего не добавляет
+    assert aggregate_rollups() == 0
+    assert _report_totals() == after
+
+
+def test_plan_rebalance_evens_out_shards(db, shards):
+    """
+    План переносит самых новых игроков с перегруженного шарда
+    """
+    db.add_all([
+        UserDirectory(id=i, username=f"u{i}", email=f"u{i}@test.com", shard=0)
+        for i in range(1, 6)
+    ])
+    db.commit()
+
+    plan = plan_rebalance(db)
+
+    assert [user_id for user_id, _, _ in plan] == [5, 4]
+    assert all(source == 0 and target == 1 for _, source, target in plan)
+    assert shard_user_counts(db) == {0: 5, 1: 0}
+
+
+def test_sharding_disabled_uses_main_db(auth_client, db):
+    """
+    Без шардов всё работает с основной БД, как раньше
+    """
+    assert not shard_router.enabled
+
+    response = auth_client.post("/api/games/nvuti/bet", json={"win_chance": 50.0, "amount": 10.0})
+
+    assert response.status_code == 200
+    assert db.query(Bet).count() == 1
+    assert ledger.balance(db, db.query(User).first().id) == response.json()["new_balance"]
+
+
+def test_maintenance_jobs_cover_every_shard(client, db, shards, monkeypatch):
+    """
+    Фоновые задачи обрабатывают данные игроков на всех шардах
+    """
+    monkeypatch.setattr(settings, "ROLLUP_GRACE_SECONDS", -60)
+    monkeypatch.setattr(settings, "LEDGER_COMPACT_GRACE_SECONDS", -60)
+    monkeypatch.setattr(settings, "SEED_POOL_TARGET", 3)
+    monkeypatch.setattr(settings, "SEED_POOL_LOW_WATERMARK", 2)
+
+    for username, bets in (("alice", 3), ("bob", 2)):
+        headers = _register_and_login(client, username)
+        for _ in range(bets):
+            response = client.post("/api/games/nvuti/bet", json={"win_chance": 50.0, "amount": 10.0}, headers=headers)
+            assert response.status_code == 200
+
+    # Сверка лимитов риска видит ставки обоих шардов
+    assert reconcile_exposure() == 5
+    assert exposure_tracker.snapshot()["tracked_users"] == 2
+
+    assert aggregate_rollups() == 5
+    now = datetime.utcnow()
+    reports = []
+    for shard in range(2):
+        shard_db = shard_router.session(shard)
+        try:
+            reports.append(hourly_report(shard_db, now - timedelta(hours=2), now + timedelta(hours=2)))
+        finally:
+            shard_db.close()
+    assert sum(row["bets_count"] for row in merge_reports(reports)) == 5
+
+    assert compact_ledger() == 2
+    assert _count(0, BalanceSnapshot) == _count(1, BalanceSnapshot) == 1
+
+    assert refill_seed_pool() == 6
+    assert _count(0, Seed, user_id=None) == _count(1, Seed, user_id=None) == 3
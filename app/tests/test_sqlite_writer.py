@@ -0,0 +1,158 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.api import games
+from app.config import settings
+from app.database import Base, configure_sqlite
+from app.models.bet import Bet
+from app.models.game import Game
+from app.models.seed import Seed
+from app.models.user import User
+from app.services.anomaly import anomaly_detector
+from app.services.exposure import exposure_tracker
+from app.services.nvuti_service import NvutiService
+from app.services.sqlite_writer import SQLiteWriter
+
+
+@pytest.fixture
+def sqlite_factory(tmp_path):
+    """
+    Отдельный SQLite-файл в режиме WAL, как у писателя
+    """
+    engine = create_engine(f"sqlite:///{tmp_path}/tuned.db", connect_args={"check_same_thread": False})
+    configure_sqlite(engine, begin="BEGIN IMMEDIATE")
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    engine.dispose()
+
+
+def test_pragmas_applied(sqlite_factory):
+    """
+    Каждое соединение получает WAL и synchronous=NORMAL
+    """
+    db = sqlite_factory()
+    try:
+        assert db.connection().exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+        assert db.connection().exec_driver_sql("PRAGMA synchronous").scalar() == 1
+    finally:
+        db.close()
+
+
+def test_writer_batches_and_isolates_failures(sqlite_factory):
+    """
+    Операции склеиваются в пачки, ошибка откатывает только свою операцию
+    """
+    writer = SQLiteWriter(sqlite_factory, batch_size=100, max_delay_ms=50)
+    batches_before = writer.batches.value
+
+    def add_game(i):
+        def job(db):
+            db.add(Game(name=f"game{i}", type="dice", house_edge=5.0, min_bet=1.0, max_bet=10.0))
+            db.flush()
+            if i == 7:
+                raise ValueError("boom")
+            return i
+        return job
+
+    futures = [writer.submit(add_game(i)) for i in range(30)]
+    results = []
+    for future in futures:
+        try:
+            results.append(future.result(timeout=10))
+        except ValueError:
+            results.append(None)
+    writer.stop()
+
+    assert results == [None if i == 7 else i for i in range(30)]
+    assert writer.batches.value - batches_before < 30
+
+    db = sqlite_factory()
+    try:
+        names = {name for (name,) in db.query(Game.name)}
+    finally:
+        db.close()
+    assert len(names) == 29
+    assert "game7" not in names
+
+
+def test_concurrent_bets_through_writer(sqlite_factory):
+    """
+    Ставки из многих потоков без "database is locked", nonce не теряются
+    """
+    db = sqlite_factory()
+    game = Game(name="Nvuti", type="dice", house_edge=5.0, min_bet=1.0, max_bet=1000.0)
+    user = User(username="player", email="p@test.com", hashed_password="x", balance=10_000.0)
+    db.add_all([game, user])
+    db.commit()
+    game_id, user_id = game.id, user.id
+    db.close()
+
+    writer = SQLiteWriter(sqlite_factory, max_delay_ms=5)
+
+    def play(_):
+        return writer.execute(
+            lambda writer_db: NvutiService(writer_db, autocommit=False).play(user_id, game_id, 1.0, 50.0),
+            timeout=30
+        )
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(play, range(80)))
+    writer.stop()
+
+    assert sorted(result["nonce"] for result in results) == list(range(80))
+
+    db = sqlite_factory()
+    try:
+        assert db.query(Bet).count() == 80
+        assert db.query(Seed).filter(Seed.user_id == user_id).one().nonce == 80
+    finally:
+        db.close()
+
+
+def test_failed_batch_commit_leaves_memory_untouched(sqlite_factory, monkeypatch):
+    """
+    Лимиты риска и детекторы учитывают ставку только после commit пачки
+    """
+    db = sqlite_factory()
+    game = Game(name="Nvuti", type="dice", house_edge=5.0, min_bet=1.0, max_bet=1000.0)
+    user = User(username="player", email="p@test.com", hashed_password="x", balance=10_000.0)
+    db.add_all([game, user])
+    db.commit()
+    game_id, user_id = game.id, user.id
+    db.close()
+
+    def failing_factory():
+        session = sqlite_factory()
+
+        def commit():
+            raise RuntimeError("disk I/O error")
+
+        session.commit = commit
+        return session
+
+    anomaly_detector.clear()
+    monkeypatch.setattr(settings, "SQLITE_TUNED", True)
+    before = exposure_tracker.snapshot()
+
+    def play():
+        return games._run_nvuti(None, lambda service: service.play(user_id, game_id, 10.0, 50.0))
+
+    monkeypatch.setattr(games, "sqlite_writer", SQLiteWriter(failing_factory, max_delay_ms=1))
+    with pytest.raises(RuntimeError):
+        play()
+    games.sqlite_writer.stop()
+
+    assert exposure_tracker.snapshot() == before
+    assert len(anomaly_detector) == 0
+
+    monkeypatch.setattr(games, "sqlite_writer", SQLiteWriter(sqlite_factory, max_delay_ms=1))
+    result = play()
+    games.sqlite_writer.stop()
+
+    after = exposure_tracker.snapshot()
+    assert after["pending_payout"] == before["pending_payout"]
+    assert after["house_pnl_window"] == pytest.approx(before["house_pnl_window"] - result["profit_loss"])
+    assert len(anomaly_detector) == 1
@@ -0,0 +1,86 @@
+import json
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models.bet import Bet
+from app.models.game import Game
+from app.models.seed import Seed
+from app.models.user import User
+from app.services.auth import verify_password
+from app.services.ledger import ledger
+from app.services.nvuti_service import NvutiService
+from app.services.synthetic import generate_dataset, generate_rows, plan_dataset
+
+
+def test_generated_bets_are_provably_fair(db):
+    plan = plan_dataset(db, users=3, bets_per_user=25, bets_per_seed=10, password="secret123")
+    rows = generate_rows(plan, 0, plan.users)
+    service = NvutiService(None)
+
+    assert len(rows["bets"]) == 75
+    assert len(rows["seeds"]) == 9
+    assert verify_password("secret123", rows["users"][0]["hashed_password"])
+
+    by_hash = {seed["server_seed_hash"]: seed for seed in rows["seeds"]}
+    for bet in rows["bets"]:
+        data = json.loads(bet["game_data"])
+        seed = by_hash[data["server_seed_hash"]]
+        verified = service.verify(seed["server_seed"], data["client_seed"], data["nonce"], data["server_seed_hash"])
+        assert verified["hash_valid"]
+        assert verified["result_number"] == data["result_number"]
+        assert data["is_win"] == (data["result_number"] < data["win_chance"])
+
+    # Nonce подряд в пределах seed'а, активен только последний seed
+    for user in rows["users"]:
+        user_seeds = [seed for seed in rows["seeds"] if seed["user_id"] == user["id"]]
+        assert [seed["active"] for seed in user_seeds] == [False, False, True]
+        assert [seed["nonce"] for seed in user_seeds] == [10, 10, 5]
+
+
+def test_rows_do_not_depend_on_split(db):
+    plan = plan_dataset(db, users=4, bets_per_user=5)
+    whole = generate_rows(plan, 0, 4)
+    parts = generate_rows(plan, 0, 1)["bets"] + generate_rows(plan, 1, 4)["bets"]
+    assert sorted(parts, key=lambda bet: bet["id"]) == sorted(whole["bets"], key=lambda bet: bet["id"])
+    # Ставки нумеруются по кругу между игроками, без пропусков
+    assert sorted(bet["id"] for bet in parts) == list(range(plan.bet_offset + 1, plan.bet_offset + 21))
+
+
+def test_plan_requires_dice_game(db):
+    db.query(Game).delete()
+    with pytest.raises(ValueError):
+        plan_dataset(db, users=1, bets_per_user=1)
+
+
+def test_generate_dataset_writes_consistent_ledger(tmp_path):
+    url = f"sqlite:///{tmp_path}/synthetic.db"
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        connection.execute(Game.__table__.insert().values(
+            name="Nvuti", type="dice", house_edge=5.0, min_bet=1.0, max_bet=1000.0
+        ))
+
+    session = sessionmaker(bind=engine)()
+    try:
+        plan = plan_dataset(session, users=5, bets_per_user=40, bets_per_seed=15, initial_balance=1000.0)
+        result = generate_dataset(url, plan, workers=1, batch_users=2)
+        assert result["bets"] == 200
+
+        assert session.query(User).count() == 5
+        assert session.query(Seed).count() == 15
+        assert session.query(Bet).count() == 200
+
+        # Баланс пользователя = снимок журнала = начальный баланс + сумма исходов ставок
+        ledger.clear_cache()
+        for user in session.query(User).all():
+            profit = sum(bet.profit_loss for bet in session.query(Bet).filter(Bet.user_id == user.id))
+            assert ledger.balance(session, user.id) == pytest.approx(user.balance)
+            assert user.balance == pytest.approx(1000.0 + profit)
+    finally:
+        session.close()
+        engine.dispose()
+        ledger.clear_cache()
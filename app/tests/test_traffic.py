@@ -0,0 +1,112 @@
+import asyncio
+import json
+
+import httpx
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.main import app
+from app.services.traffic import (
+    REDACTED,
+    TrafficRecorder,
+    TrafficRecorderMiddleware,
+    anonymize,
+    load_records,
+    pseudonym,
+    replay,
+    summarize
+)
+
+
+def _recorder(monkeypatch, tmp_path, **overrides) -> TrafficRecorder:
+    monkeypatch.setattr(settings, "RECORDER_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "RECORDER_SAMPLE_RATE", 1.0)
+    for name, value in overrides.items():
+        monkeypatch.setattr(settings, name, value)
+    return TrafficRecorder()
+
+
+def test_anonymize_keeps_shape_and_hides_identity():
+    fields = frozenset({"client_seed"})
+    secrets = frozenset({"password"})
+    body = {"amount": 10.0, "win_chance": 49.5, "client_seed": "mine", "nested": [{"password": "secret"}]}
+
+    anonymized = anonymize(body, fields, secrets)
+
+    assert anonymized["amount"] == 10.0 and anonymized["win_chance"] == 49.5
+    assert anonymized["client_seed"] == pseudonym("mine") != "mine"
+    # Секрет не пишется даже псевдонимом
+    assert anonymized["nested"][0]["password"] == REDACTED
+    assert pseudonym("secret") not in json.dumps(anonymized)
+    # Одно значение - один псевдоним: повторы в трафике сохраняются
+    assert anonymize(body, fields, secrets) == anonymized
+
+
+def test_middleware_records_sampled_requests(auth_client, monkeypatch, tmp_path):
+    recorder = _recorder(monkeypatch, tmp_path)
+    client = TestClient(TrafficRecorderMiddleware(app, recorder))
+    headers = {**auth_client.headers, "Idempotency-Key": "bet-1"}
+
+    assert client.post("/api/games/nvuti/bet", json={"win_chance": 50.0, "amount": 10.0}, headers=headers).status_code == 200
+    assert client.post("/api/games/nvuti/bet", json={"win_chance": 50.0, "amount": 10.0}, headers=headers).status_code == 200
+    assert client.get("/health").status_code == 200  # Вне RECORDER_PATH_PREFIXES
+    recorder.close()
+
+    records = load_records([str(tmp_path)])
+    assert len(records) == 2
+    first = records[0]
+    assert first["method"] == "POST" and first["route"] == "/api/games/nvuti/bet"
+    assert first["body"] == {"win_chance": 50.0, "amount": 10.0}
+    assert first["status"] == 200 and first["duration_ms"] > 0
+    assert first["subject"] and first["subject"] == records[1]["subject"]
+    assert first["idempotency_key"] == records[1]["idempotency_key"] == pseudonym("bet-1")
+    assert "testuser" not in json.dumps(records)
+
+
+def test_session_sampling_is_consistent(monkeypatch, tmp_path):
+    recorder = _recorder(monkeypatch, tmp_path, RECORDER_SAMPLE_RATE=0.5)
+    tokens = [f"token-{i}" for i in range(200)]
+
+    sampled = [recorder.should_record("/api/bets", token) for token in tokens]
+
+    assert sampled == [recorder.should_record("/api/bets", token) for token in tokens]
+    assert 50 < sum(sampled) < 150
+
+
+def test_files_rotate_and_old_ones_are_dropped(monkeypatch, tmp_path):
+    recorder = _recorder(monkeypatch, tmp_path, RECORDER_MAX_FILE_MB=100 / (1024 * 1024), RECORDER_MAX_FILES=3)
+
+    for i in range(20):
+        recorder.write({"ts": float(i), "path": "/api/x", "padding": "x" * 60})
+    recorder.close()
+
+    assert len(recorder.files()) <= 3
+    # Остались самые новые записи
+    assert load_records([str(tmp_path)])[-1]["ts"] == 19.0
+
+
+def test_replay_reports_latency_and_errors(client):
+    # Тестовая сессия БД одна на все запросы - интервалы больше времени ставки,
+    # чтобы запросы не шли одновременно
+    records = [
+        {
+            "ts": 1000.0 + i * 0.05, "method": "POST", "path": "/api/games/nvuti/bet",
+            "route": "/api/games/nvuti/bet", "query": None, "subject": "anon-1",
+            "idempotency_key": None, "body": {"win_chance": 50.0, "amount": 1.0},
+            "status": 200, "duration_ms": 5.0
+        }
+        for i in range(6)
+    ]
+    records.append({**records[0], "ts": 1000.3, "path": "/api/bets/missing", "route": "/api/bets/{bet_id}",
+                    "method": "GET", "body": None, "status": 500})
+
+    results = asyncio.run(replay(records, "http://test", speed=1.0, transport=httpx.ASGITransport(app=app)))
+
+    assert [result["status"] for result in results[:6]] == [200] * 6
+    summary = summarize(results)
+    bets = summary["routes"]["POST /api/games/nvuti/bet"]
+    assert bets["count"] == 6
+    assert bets["original_p50_ms"] == 5.0
+    assert bets["replay_error_rate"] == 0.0
+    assert summary["total"]["original_error_rate"] > 0
+    assert summary["total"]["count"] == 7
@@ -0,0 +1,59 @@
+import msgpack
+
+from app.schemas.game import NvutiBetResponse, SeedInfo
+from app.utils.wire import MSGPACK
+
+
+BET = {"win_chance": 50.0, "amount": 10.0}
+
+
+def test_msgpack_bet_roundtrip(auth_client):
+    """
+    Ставка в MessagePack - ответ в MessagePack с теми же полями, что и JSON
+    """
+    response = auth_client.post(
+        "/api/games/nvuti/bet",
+        content=msgpack.packb(BET),
+        headers={"Content-Type": MSGPACK, "Accept": MSGPACK}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == MSGPACK
+
+    data = msgpack.unpackb(response.content)
+    NvutiBetResponse.model_validate(data, strict=True)
+
+    json_response = auth_client.post("/api/games/nvuti/bet", json=BET)
+    assert json_response.headers["content-type"] == "application/json"
+    assert set(json_response.json()) == set(data)
+    assert len(response.content) < len(json_response.content)
+
+
+def test_msgpack_validation_errors(auth_client):
+    """
+    Невалидное тело - 422 в обоих форматах
+    """
+    headers = {"Content-Type": MSGPACK}
+
+    response = auth_client.post(
+        "/api/games/nvuti/bet", content=msgpack.packb({"win_chance": 99.0, "amount": 10.0}), headers=headers
+    )
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["body", "win_chance"]
+
+    response = auth_client.post("/api/games/nvuti/bet", content=b"\xc1", headers=headers)
+    assert response.status_code == 422
+
+    response = auth_client.post("/api/games/nvuti/bet", json={"win_chance": "50", "amount": 10})
+    assert response.status_code == 200
+
+
+def test_accept_header_selects_format(auth_client):
+    """
+    Формат ответа выбирается по Accept и на GET
+    """
+    response = auth_client.get("/api/games/nvuti/seed", headers={"Accept": MSGPACK})
+    assert response.headers["content-type"] == MSGPACK
+    SeedInfo.model_validate(msgpack.unpackb(response.content), strict=True)
+
+    response = auth_client.get("/api/games/nvuti/seed")
+    assert response.json()["nonce"] == 0
@@ -0,0 +1,119 @@
+import threading
+import time
+
+
+class Counter:
+    """
+    Монотонно растущий счётчик
+    """
+
+    def __init__(self, name: str, description: str = ""):
+        self.name = name
+        self.description = description
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+
+class Gauge:
+    """
+    Текущее значение (размер пула, лаг и т.д.)
+    """
+
+    def __init__(self, name: str, description: str = ""):
+        self.name = name
+        self.description = description
+        self._value = 0
+
+    def set(self, value: float) -> None:
+        self._value = value
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+
+class RateMeter:
+    """
+    Скорость событий в секунду (экспоненциальное сглаживание)
+
+    Args:
+        half_life: За сколько секунд вклад старых событий падает вдвое
+    """
+
+    def __init__(self, name: str, description: str = "", half_life: float = 60.0):
+        self.name = name
+        self.description = description
+        self.half_life = half_life
+        self._rate = 0.0
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _decay(self, now: float) -> None:
+        elapsed = now - self._last
+        if elapsed > 0:
+            self._rate *= 0.5 ** (elapsed / self.half_life)
+            self._last = now
+
+    def mark(self, amount: float = 1) -> None:
+        with self._lock:
+            self._decay(time.monotonic())
+            # Вклад события «размазан» по окну half_life / ln 2
+            self._rate += amount * 0.6931471805599453 / self.half_life
+
+    @property
+    def value(self) -> float:
+        with self._lock:
+            self._decay(time.monotonic())
+            return self._rate
+
+
+class MetricsRegistry:
+    """
+    Реестр метрик процесса
+
+    Метрики создаются один раз при импорте модуля-владельца
+    и отдаются целиком через GET /metrics.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, description: str, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = cls(name, description, **kwargs)
+                self._metrics[name] = metric
+            return metric
+
+    def counter(self, name: str, description: str = "") -> Counter:
+        return self._get_or_create(Counter, name, description)
+
+    def gauge(self, name: str, description: str = "") -> Gauge:
+        return self._get_or_create(Gauge, name, description)
+
+    def rate(self, name: str, description: str = "", half_life: float = 60.0) -> RateMeter:
+        return self._get_or_create(RateMeter, name, description, half_life=half_life)
+
+    def snapshot(self) -> dict:
+        """
+        Получить значения всех метрик
+
+        Returns:
+            {имя метрики: значение}
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {metric.name: metric.value for metric in sorted(metrics, key=lambda m: m.name)}
+
+
+metrics = MetricsRegistry()
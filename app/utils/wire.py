@@ -0,0 +1,109 @@
+from datetime import datetime
+from typing import Any
+
+import msgpack
+import pydantic_core
+from fastapi import Request, Response
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, ValidationError
+
+# Компактный бинарный формат для ботов: Content-Type / Accept
+MSGPACK = "application/msgpack"
+MSGPACK_TYPES = (MSGPACK, "application/x-msgpack")
+JSON = "application/json"
+
+
+def _is_msgpack(content_type: str) -> bool:
+    return any(media_type in content_type for media_type in MSGPACK_TYPES)
+
+
+def _default(value: Any) -> Any:
+    # Так же, как datetime сериализует pydantic
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+# =========================
+# ЗАПРОС
+# =========================
+
+def wire_body(model: type[BaseModel]):
+    """
+    Зависимость FastAPI: тело запроса в JSON или MessagePack
+
+    JSON разбирается и валидируется за один проход в pydantic-core
+    (model_validate_json), MessagePack - msgpack + model_validate.
+    Ошибки - обычная 422, как у тела-модели FastAPI.
+
+    Пример:
+        bet_data: NvutiBetRequest = Depends(wire_body(NvutiBetRequest))
+    """
+    async def dependency(request: Request) -> BaseModel:
+        body = await request.body()
+        try:
+            if _is_msgpack(request.headers.get("content-type", "")):
+                try:
+                    data = msgpack.unpackb(body)
+                except (ValueError, msgpack.UnpackException) as e:
+                    raise RequestValidationError(
+                        [{"type": "value_error", "loc": ("body",), "msg": f"Malformed body: {e}", "input": None}]
+                    )
+                return model.model_validate(data)
+            return model.model_validate_json(body)
+        except ValidationError as e:
+            raise RequestValidationError(
+                [{**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)]
+            )
+
+    return dependency
+
+
+def wire_openapi(model: type[BaseModel]) -> dict:
+    """
+    openapi_extra для маршрута с wire_body: тело в двух форматах
+    """
+    schema = {"$ref": f"#/components/schemas/{model.__name__}"}
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {JSON: {"schema": schema}, MSGPACK: {"schema": schema}},
+        }
+    }
+
+
+# =========================
+# ОТВЕТ
+# =========================
+
+def wants_msgpack(request: Request) -> bool:
+    """
+    Клиент просит MessagePack (Accept), а без Accept - прислал MessagePack
+    """
+    accept = request.headers.get("accept", "")
+    if _is_msgpack(accept):
+        return True
+    if accept and accept != "*/*":
+        return False
+    return _is_msgpack(request.headers.get("content-type", ""))
+
+
+def wire_response(request: Request, payload: dict, status_code: int = 200, headers: dict = None) -> Response:
+    """
+    Ответ в формате, который просил клиент
+
+    payload уже собран сервисом с нужными типами, поэтому
+    response_model маршрута его не перепроверяет (остаётся для
+    документации): dict сериализуется напрямую, без модели.
+    """
+    if wants_msgpack(request):
+        content = msgpack.packb(payload, default=_default)
+        media_type = MSGPACK
+    else:
+        content = pydantic_core.to_json(payload)
+        media_type = JSON
+
+    return Response(content, status_code=status_code, headers=headers, media_type=media_type)
+
+
+WIRE_RESPONSES = {200: {"content": {MSGPACK: {}}}}
@@ -0,0 +1,63 @@
+"""
+Бенчмарк: исход Nvuti по одному HMAC против пакетного ядра движка
+
+Запуск:
+    python -m benchmarks.bench_engines --nonces 200000
+"""
+import argparse
+import hashlib
+import hmac
+import os
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+
+from app.services.game_engines import engine_for  # noqa: E402
+
+SERVER_SEED = "a" * 64
+CLIENT_SEED = "benchmark"
+
+
+def legacy(nonces: int) -> list[float]:
+    # Исходный calculate_result: новый HMAC и hexdigest на каждый nonce
+    results = []
+    for nonce in range(nonces):
+        digest = hmac.new(
+            SERVER_SEED.encode("utf-8"), f"{CLIENT_SEED}:{nonce}".encode("utf-8"), hashlib.sha256
+        ).hexdigest()
+        results.append(round((int(digest[:8], 16) % 10000) / 100.0, 2))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк движков игр")
+    parser.add_argument("--nonces", type=int, default=200_000)
+    args = parser.parse_args()
+
+    dice = engine_for("dice")
+    coinflip = engine_for("coinflip")
+
+    runs = {
+        "legacy calculate_result": lambda: legacy(args.nonces),
+        "DiceEngine.outcome": lambda: [dice.outcome(SERVER_SEED, CLIENT_SEED, n) for n in range(args.nonces)],
+        "DiceEngine.roll_batch": lambda: dice.roll_batch(SERVER_SEED, CLIENT_SEED, range(args.nonces)),
+        "CoinFlip x100 roll_batch": lambda: coinflip.roll_batch(SERVER_SEED, CLIENT_SEED, range(args.nonces), flips=100)
+    }
+
+    print(f"{'run':<28}{'seconds':>10}{'nonces/s':>14}")
+    outputs = {}
+    for name, run in runs.items():
+        started = time.perf_counter()
+        outputs[name] = run()
+        elapsed = time.perf_counter() - started
+        print(f"{name:<28}{elapsed:>10.3f}{args.nonces / elapsed:>14,.0f}")
+
+    if list(outputs["DiceEngine.roll_batch"]) != outputs["legacy calculate_result"]:
+        print("❌ Пакетное ядро расходится с исходным алгоритмом")
+        raise SystemExit(1)
+    print("✅ Результаты совпадают с исходным алгоритмом")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Бенчмарк: общие раунды против отдельных ставок Nvuti
+
+Запуск:
+    python -m benchmarks.bench_rounds --users 1000 --bets 5000
+
+По умолчанию работает на временной SQLite БД. Для Postgres:
+    DATABASE_URL=postgresql://... python -m benchmarks.bench_rounds
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+_tmp_dir = tempfile.mkdtemp(prefix="bench_rounds_")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_tmp_dir}/bench.db")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+
+from app.database import Base, SessionLocal, engine  # noqa: E402
+from app.models.game import Game  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.services.nvuti_service import NvutiService  # noqa: E402
+from app.services.round_service import RoundBook  # noqa: E402
+
+
+def setup(db, users_count: int) -> tuple[Game, Game, list[User]]:
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    dice = Game(name="Nvuti", type="dice", house_edge=5.0, min_bet=1.0, max_bet=1000.0)
+    rounds = Game(name="Nvuti Rounds", type="dice_round", house_edge=5.0, min_bet=1.0, max_bet=1000.0)
+    db.add_all([dice, rounds])
+
+    users = [
+        User(username=f"bench{i}", email=f"bench{i}@test.com", hashed_password="x", balance=1_000_000.0)
+        for i in range(users_count)
+    ]
+    db.add_all(users)
+    db.commit()
+
+    return dice, rounds, users
+
+
+def bench_single_bets(db, game: Game, users: list[User], bets: int) -> float:
+    service = NvutiService(db)
+    started = time.perf_counter()
+    for i in range(bets):
+        service.play(users[i % len(users)].id, game.id, 10.0, random.uniform(1, 95))
+    return time.perf_counter() - started
+
+
+def bench_round(db, game: Game, users: list[User], bets: int) -> tuple[float, float]:
+    book = RoundBook()
+
+    started = time.perf_counter()
+    for i in range(bets):
+        book.place_bet(db, users[i % len(users)], game, 10.0, random.uniform(1, 95))
+    placed = time.perf_counter() - started
+
+    started = time.perf_counter()
+    [summary] = book.settle_due(db, force=True)
+    settled = time.perf_counter() - started
+
+    assert summary["bets_settled"] == bets
+    return placed, settled
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--bets", type=int, default=5000)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        dice, rounds, users = setup(db, args.users)
+
+        single = bench_single_bets(db, dice, users, args.bets)
+        placed, settled = bench_round(db, rounds, users, args.bets)
+
+        print(f"Database: {engine.url.get_backend_name()}, {args.users} users, {args.bets} bets")
+        print(f"Single bets:   {single:8.3f}s  ({args.bets / single:10,.0f} bets/s, {args.bets} transactions)")
+        print(f"Round placing: {placed:8.3f}s  ({args.bets / placed:10,.0f} bets/s, in memory)")
+        print(f"Round settle:  {settled:8.3f}s  ({args.bets / settled:10,.0f} bets/s, 1 transaction)")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
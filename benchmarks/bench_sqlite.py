@@ -0,0 +1,136 @@
+"""
+Бенчмарк: ставки Nvuti из многих потоков на SQLite
+
+Сравнивает конфигурацию по умолчанию (каждый поток коммитит сам,
+журнал rollback) и режим SQLITE_TUNED (WAL + pragma + один
+поток-писатель, коммитящий ставки пачками).
+
+Запуск:
+    python -m benchmarks.bench_sqlite --threads 8 --bets 2000
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+_tmp_dir = tempfile.mkdtemp(prefix="bench_sqlite_")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_tmp_dir}/bench.db")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.exc import OperationalError  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.database import Base, configure_sqlite  # noqa: E402
+from app.models.game import Game  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.services.nvuti_service import NvutiService  # noqa: E402
+from app.services.sqlite_writer import SQLiteWriter  # noqa: E402
+
+
+def setup(url: str, threads: int, tuned: bool):
+    engine = create_engine(url, connect_args={"check_same_thread": False})
+    if tuned:
+        configure_sqlite(engine, begin="BEGIN IMMEDIATE")
+
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    db = factory()
+    game = Game(name="Nvuti", type="dice", house_edge=5.0, min_bet=1.0, max_bet=1000.0)
+    users = [
+        User(username=f"bench{i}", email=f"bench{i}@test.com", hashed_password="x", balance=1_000_000.0)
+        for i in range(threads)
+    ]
+    db.add(game)
+    db.add_all(users)
+    db.commit()
+    ids = game.id, [user.id for user in users]
+    db.close()
+
+    return engine, factory, ids
+
+
+def run_threads(threads: int, bets: int, worker) -> tuple[float, int]:
+    errors = []
+    per_thread = bets // threads
+
+    def target(i):
+        for _ in range(per_thread):
+            try:
+                worker(i)
+            except OperationalError:
+                # "database is locked"
+                errors.append(i)
+
+    pool = [threading.Thread(target=target, args=(i,)) for i in range(threads)]
+    started = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return time.perf_counter() - started, len(errors)
+
+
+def bench_default(threads: int, bets: int) -> tuple[float, int]:
+    engine, factory, (game_id, user_ids) = setup(f"sqlite:///{_tmp_dir}/default.db", threads, tuned=False)
+    local = threading.local()
+
+    def worker(i):
+        if not hasattr(local, "db"):
+            local.db = factory()
+        try:
+            NvutiService(local.db).play(user_ids[i], game_id, 10.0, 50.0)
+        except OperationalError:
+            local.db.rollback()
+            raise
+
+    try:
+        return run_threads(threads, bets, worker)
+    finally:
+        engine.dispose()
+
+
+def bench_tuned(threads: int, bets: int) -> tuple[float, int]:
+    engine, factory, (game_id, user_ids) = setup(f"sqlite:///{_tmp_dir}/tuned.db", threads, tuned=True)
+    writer = SQLiteWriter(factory)
+
+    def worker(i):
+        writer.execute(
+            lambda db: NvutiService(db, autocommit=False).play(user_ids[i], game_id, 10.0, 50.0)
+        )
+
+    try:
+        result = run_threads(threads, bets, worker)
+        batches = writer.batches.value
+        return result + (batches,)
+    finally:
+        writer.stop()
+        engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--bets", type=int, default=2000)
+    args = parser.parse_args()
+
+    bets = args.bets // args.threads * args.threads
+
+    default_time, default_errors = bench_default(args.threads, bets)
+    tuned_time, tuned_errors, batches = bench_tuned(args.threads, bets)
+
+    print(f"SQLite, {args.threads} threads, {bets} bets")
+    print(
+        f"Default: {default_time:8.3f}s  ({(bets - default_errors) / default_time:8,.0f} bets/s, "
+        f"{default_errors} 'database is locked')"
+    )
+    print(
+        f"Tuned:   {tuned_time:8.3f}s  ({(bets - tuned_errors) / tuned_time:8,.0f} bets/s, "
+        f"{tuned_errors} errors, {batches:.0f} commits)"
+    )
+
+
+if __name__ == "__main__":
+    main()
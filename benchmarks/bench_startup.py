@@ -0,0 +1,116 @@
+"""
+Бенчмарк: время старта воркера и первого запроса
+
+Каждый прогон - новый процесс (холодный импорт):
+- import: import app.main (без настроек, engine и логов);
+- create_app: сборка приложения фабрикой;
+- startup: lifespan до готовности (прогрев: ping БД, каталог игр);
+- first bet / second bet: первая и вторая ставка через TestClient.
+
+Прогоны с прогревом и без (WARMUP_ENABLED) показывают, что
+прогрев переносит с первого запроса на старт.
+
+Запуск:
+    python -m benchmarks.bench_startup --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+_tmp_dir = tempfile.mkdtemp(prefix="bench_startup_")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_tmp_dir}/bench.db")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+os.environ.setdefault("LOG_FILE", "")
+
+BET = {"win_chance": 49.5, "amount": 10.0}
+STAGES = ("import", "create_app", "startup", "first bet", "second bet")
+
+
+def child(token: str) -> dict:
+    """
+    Один холодный старт (выполняется в отдельном процессе)
+    """
+    timings = {}
+    started = time.perf_counter()
+
+    from app.main import create_app
+    timings["import"] = time.perf_counter() - started
+
+    from fastapi.testclient import TestClient
+
+    mark = time.perf_counter()
+    app = create_app()
+    timings["create_app"] = time.perf_counter() - mark
+
+    mark = time.perf_counter()
+    with TestClient(app) as client:
+        timings["startup"] = time.perf_counter() - mark
+
+        headers = {"Authorization": f"Bearer {token}"}
+        for stage in ("first bet", "second bet"):
+            mark = time.perf_counter()
+            response = client.post("/api/games/nvuti/bet", json=BET, headers=headers)
+            timings[stage] = time.perf_counter() - mark
+            assert response.status_code == 200, response.text
+
+    return {stage: seconds * 1000 for stage, seconds in timings.items()}
+
+
+def prepare() -> str:
+    from app.database import Base, SessionLocal, dispose_engines, get_engine
+    from app.models.game import Game
+    from app.models.user import User
+    from app.services.auth import create_access_token
+
+    Base.metadata.create_all(bind=get_engine())
+    db = SessionLocal()
+    db.add(Game(name="Nvuti", type="dice", house_edge=5.0, min_bet=1.0, max_bet=1000.0))
+    user = User(username="bench", email="bench@test.com", hashed_password="x", balance=1_000_000_000.0)
+    db.add(user)
+    db.commit()
+    token = create_access_token({"sub": user.username, "uid": user.id})
+    db.close()
+    dispose_engines()
+    return token
+
+
+def run(token: str, runs: int, warmup: bool) -> dict:
+    env = {**os.environ, "WARMUP_ENABLED": str(warmup).lower()}
+    samples = {stage: [] for stage in STAGES}
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_startup", "--child", token],
+            env=env, check=True, capture_output=True, text=True
+        ).stdout
+        for stage, ms in json.loads(output.strip().splitlines()[-1]).items():
+            samples[stage].append(ms)
+    return {stage: statistics.median(values) for stage, values in samples.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Cold starts per mode")
+    parser.add_argument("--child", metavar="TOKEN", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(child(args.child)))
+        return
+
+    token = prepare()
+    print(f"Cold worker start, median of {args.runs} runs (ms)")
+    print(f"   {'':12s}" + "".join(f"{stage:>12s}" for stage in STAGES))
+    for warmup in (False, True):
+        medians = run(token, args.runs, warmup)
+        label = "warm-up" if warmup else "no warm-up"
+        print(f"   {label:12s}" + "".join(f"{medians[stage]:12.1f}" for stage in STAGES))
+
+
+if __name__ == "__main__":
+    main()
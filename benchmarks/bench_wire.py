@@ -0,0 +1,129 @@
+"""
+Бенчмарк: JSON против MessagePack на /api/games/nvuti/bet
+
+Две части:
+- кодек: разбор запроса, валидация и сериализация ответа без БД
+  (как раньше - ответ через response_model, и новые пути JSON / MessagePack);
+- целиком через ASGI-приложение (TestClient) на временной SQLite БД.
+
+Запуск:
+    python -m benchmarks.bench_wire --requests 2000
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+_tmp_dir = tempfile.mkdtemp(prefix="bench_wire_")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_tmp_dir}/bench.db")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+import msgpack  # noqa: E402
+import pydantic_core  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.database import Base, SessionLocal, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.game import Game  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.schemas.game import NvutiBetRequest, NvutiBetResponse  # noqa: E402
+from app.services.auth import create_access_token  # noqa: E402
+from app.utils.wire import MSGPACK, _default  # noqa: E402
+
+BET = {"win_chance": 49.5, "amount": 10.0}
+RESULT = {
+    "bet_id": 123456,
+    "result_number": 37.21,
+    "win_chance": 49.5,
+    "multiplier": 1.92,
+    "is_win": True,
+    "payout": 19.2,
+    "profit_loss": 9.2,
+    "new_balance": 1009.2,
+    "server_seed_hash": "9f86d081884c7d659a2feaa0c55ad015a3bf4f1b2b0b822cd15d6c15b0f00a08",
+    "client_seed": "a1b2c3d4e5f60718",
+    "nonce": 42,
+}
+
+
+def bench_codec(count: int) -> dict:
+    request_json = json.dumps(BET).encode()
+    request_msgpack = msgpack.packb(BET)
+
+    def response_model_json():
+        NvutiBetRequest.model_validate_json(request_json)
+        return NvutiBetResponse.model_validate(RESULT).model_dump_json().encode()
+
+    def wire_json():
+        NvutiBetRequest.model_validate_json(request_json)
+        return pydantic_core.to_json(RESULT)
+
+    def wire_msgpack():
+        NvutiBetRequest.model_validate(msgpack.unpackb(request_msgpack))
+        return msgpack.packb(RESULT, default=_default)
+
+    results = {}
+    for name, codec, request_bytes in (
+        ("json, response_model", response_model_json, request_json),
+        ("json, wire", wire_json, request_json),
+        ("msgpack, wire", wire_msgpack, request_msgpack),
+    ):
+        started = time.perf_counter()
+        for _ in range(count):
+            response_bytes = codec()
+        elapsed = time.perf_counter() - started
+        results[name] = (count / elapsed, len(request_bytes), len(response_bytes))
+    return results
+
+
+def bench_app(count: int) -> dict:
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    db.add(Game(name="Nvuti", type="dice", house_edge=5.0, min_bet=1.0, max_bet=1000.0))
+    user = User(username="bench", email="bench@test.com", hashed_password="x", balance=1_000_000_000.0)
+    db.add(user)
+    db.commit()
+    token = create_access_token({"sub": user.username, "uid": user.id})
+    db.close()
+
+    auth = {"Authorization": f"Bearer {token}"}
+    client = TestClient(app)
+
+    formats = {
+        "json": ({**auth, "Content-Type": "application/json"}, json.dumps(BET).encode()),
+        "msgpack": ({**auth, "Content-Type": MSGPACK, "Accept": MSGPACK}, msgpack.packb(BET)),
+    }
+
+    results = {}
+    for name, (headers, body) in formats.items():
+        sent = received = 0
+        started = time.perf_counter()
+        for _ in range(count):
+            response = client.post("/api/games/nvuti/bet", content=body, headers=headers)
+            assert response.status_code == 200, response.text
+            sent += len(body)
+            received += len(response.content)
+        elapsed = time.perf_counter() - started
+        results[name] = (count / elapsed, sent / count, received / count)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000, help="Requests through the app per format")
+    parser.add_argument("--codec-iterations", type=int, default=200_000)
+    args = parser.parse_args()
+
+    print(f"Codec only, {args.codec_iterations} iterations")
+    for name, (rate, request_size, response_size) in bench_codec(args.codec_iterations).items():
+        print(f"   {name:20s} {rate:12,.0f} req/s   request {request_size:4d} B   response {response_size:4d} B")
+
+    print(f"Full app (TestClient, SQLite), {args.requests} bets")
+    for name, (rate, request_size, response_size) in bench_app(args.requests).items():
+        print(f"   {name:20s} {rate:12,.0f} req/s   request {request_size:4.0f} B   response {response_size:4.0f} B")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+"""
+Стресс-тест: конкурентные ставки одних и тех же игроков
+
+Много потоков (или async-клиентов) ставят за нескольких игроков
+одновременно, затем проверяются инварианты (app/services/integrity.py):
+баланс = начальный + сумма profit_loss, nonce не повторяются, счётчик
+seed'а не отстал, один активный seed. Рядом - пропускная способность
+и задержки, чтобы любая блокировка или атомарный расчёт были
+проверены и на корректность, и на скорость.
+
+Режимы:
+- threads: потоки вызывают NvutiService.play, у каждого своя сессия;
+- async: asyncio-клиенты httpx шлют POST /api/games/nvuti/bet -
+  в приложение в этом же процессе или, с --base-url, в запущенный
+  сервер (он должен работать с той же DATABASE_URL и SECRET_KEY).
+
+Запуск:
+    python -m benchmarks.stress_bets --users 4 --bets 2000 --concurrency 32
+
+По умолчанию - временная SQLite БД. Для Postgres:
+    DATABASE_URL=postgresql://... python -m benchmarks.stress_bets
+
+Код возврата 1, если инвариант нарушен.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+_tmp_dir = tempfile.mkdtemp(prefix="stress_bets_")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_tmp_dir}/stress.db")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+os.environ.setdefault("LOG_FILE", "")
+
+import httpx  # noqa: E402
+
+from app.database import Base, SessionLocal, get_engine, shard_router  # noqa: E402
+from app.models.game import Game  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.services.auth import create_access_token  # noqa: E402
+from app.services.integrity import check_bet_integrity, opening_state  # noqa: E402
+from app.services.nvuti_service import NvutiService  # noqa: E402
+
+AMOUNT = 1.0
+WIN_CHANCE = 49.5
+
+
+def setup(users_count: int) -> tuple[int, list[int]]:
+    """
+    Игроки с большим балансом (префикс stress + время - прогоны не пересекаются)
+    """
+    Base.metadata.create_all(bind=get_engine())
+    db = SessionLocal()
+    try:
+        game = db.query(Game).filter(Game.type == "dice").order_by(Game.id).first()
+        if game is None:
+            game = Game(name="Nvuti", type="dice", house_edge=5.0, min_bet=1.0, max_bet=1000.0)
+            db.add(game)
+
+        run = int(time.time() * 1000)
+        users = [
+            User(username=f"stress{run}_{i}", email=f"stress{run}_{i}@test.com", hashed_password="x", balance=1_000_000.0)
+            for i in range(users_count)
+        ]
+        db.add_all(users)
+        db.commit()
+        return game.id, [user.id for user in users]
+    finally:
+        db.close()
+
+
+def run_threads(game_id: int, user_ids: list[int], bets: int, concurrency: int) -> tuple[float, list, Counter]:
+    """
+    concurrency потоков делят bets ставок; ставка i - за игрока i % users
+    """
+    latencies, errors = [], Counter()
+    counter = iter(range(bets))
+    lock = threading.Lock()
+
+    def target():
+        db = SessionLocal()
+        try:
+            while True:
+                with lock:
+                    i = next(counter, None)
+                if i is None:
+                    return
+                started = time.perf_counter()
+                try:
+                    NvutiService(db).play(user_ids[i % len(user_ids)], game_id, AMOUNT, WIN_CHANCE)
+                    latencies.append(time.perf_counter() - started)
+                except Exception as e:
+                    db.rollback()
+                    errors[type(e).__name__] += 1
+        finally:
+            db.close()
+
+    pool = [threading.Thread(target=target) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return time.perf_counter() - started, latencies, errors
+
+
+async def _run_async(user_ids: list[int], bets: int, concurrency: int, base_url: str = None) -> tuple[float, list, Counter]:
+    latencies, errors = [], Counter()
+    tokens = {
+        user_id: create_access_token({"sub": username, "uid": user_id})
+        for user_id, username in _usernames(user_ids).items()
+    }
+    counter = iter(range(bets))
+
+    if base_url:
+        client = httpx.AsyncClient(base_url=base_url, timeout=60.0, limits=httpx.Limits(max_connections=concurrency))
+    else:
+        from app.main import create_app
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=create_app(), raise_app_exceptions=False), base_url="http://stress", timeout=60.0)
+
+    async def worker():
+        for i in counter:
+            user_id = user_ids[i % len(user_ids)]
+            started = time.perf_counter()
+            try:
+                response = await client.post(
+                    "/api/games/nvuti/bet",
+                    json={"win_chance": WIN_CHANCE, "amount": AMOUNT},
+                    headers={"Authorization": f"Bearer {tokens[user_id]}"}
+                )
+            except httpx.HTTPError as e:
+                errors[type(e).__name__] += 1
+                continue
+            if response.status_code == 200:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors[f"HTTP {response.status_code}"] += 1
+
+    async with client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return time.perf_counter() - started, latencies, errors
+
+
+def _usernames(user_ids: list[int]) -> dict:
+    db = SessionLocal()
+    try:
+        return dict(db.query(User.id, User.username).filter(User.id.in_(user_ids)))
+    finally:
+        db.close()
+
+
+def run_async(user_ids: list[int], bets: int, concurrency: int, base_url: str = None) -> tuple[float, list, Counter]:
+    return asyncio.run(_run_async(user_ids, bets, concurrency, base_url))
+
+
+def report(mode: str, elapsed: float, latencies: list, errors: Counter, integrity: dict) -> None:
+    latencies_ms = sorted(latency * 1000 for latency in latencies)
+    p99 = latencies_ms[min(len(latencies_ms) - 1, int(len(latencies_ms) * 0.99))] if latencies_ms else 0.0
+
+    print(f"[{mode}] {len(latencies):,} bets in {elapsed:.2f}s = {len(latencies) / elapsed:,.0f} bets/s")
+    if latencies_ms:
+        print(f"   latency p50 {statistics.median(latencies_ms):.1f} ms, p99 {p99:.1f} ms")
+    if errors:
+        print(f"   errors: {', '.join(f'{name} x{count}' for name, count in errors.most_common())}")
+
+    print(f"   {'✅' if integrity['ok'] else '❌'} integrity over {integrity['bets']:,} bets")
+    for name, items in integrity.items():
+        if isinstance(items, list) and items:
+            print(f"      {name}: {len(items)} (e.g. {items[0]})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=("threads", "async", "both"), default="both")
+    parser.add_argument("--users", type=int, default=4, help="Players sharing the load (fewer - more contention)")
+    parser.add_argument("--bets", type=int, default=2000, help="Bets per mode")
+    parser.add_argument("--concurrency", type=int, default=32, help="Threads / async clients")
+    parser.add_argument("--base-url", help="Async mode against a running server instead of in-process app")
+    args = parser.parse_args()
+
+    if shard_router.enabled:
+        print("❌ Sharded setups are not supported: run against DATABASE_URL without SHARD_DATABASE_URLS")
+        return
+
+    modes = ("threads", "async") if args.mode == "both" else (args.mode,)
+    print(f"{args.bets:,} bets per mode, {args.users} user(s), concurrency {args.concurrency}")
+
+    failed = False
+    for mode in modes:
+        game_id, user_ids = setup(args.users)
+        db = SessionLocal()
+        opening = opening_state(db, user_ids)
+        db.close()
+
+        if mode == "threads":
+            elapsed, latencies, errors = run_threads(game_id, user_ids, args.bets, args.concurrency)
+        else:
+            elapsed, latencies, errors = run_async(user_ids, args.bets, args.concurrency, args.base_url)
+
+        db = SessionLocal()
+        integrity = check_bet_integrity(db, user_ids, opening)
+        db.close()
+
+        report(mode, elapsed, latencies, errors, integrity)
+        failed = failed or not integrity["ok"]
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()